@@ -1,2 +1,5 @@
+import os
 
-
+if os.environ.get("PRICING4API_PROFILE"):
+    from Pricing4API.ancillary.instrumentation import enable_from_environment
+    enable_from_environment()
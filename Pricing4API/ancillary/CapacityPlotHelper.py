@@ -1,11 +1,150 @@
+from __future__ import annotations
+
+import base64
+import json
 import re
 from typing import List, Optional, Union
-import plotly.graph_objects as go
-from matplotlib.colors import to_rgba
+
+import numpy as np
+
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.ancillary.time_unit import TimeUnit
 from Pricing4API.utils import parse_time_string_to_duration
 
+go = lazy_import("plotly.graph_objects")
+pio = lazy_import("plotly.io")
+plotly_utils = lazy_import("plotly.utils")
+mcolors = lazy_import("matplotlib.colors")
+
+# Por encima de estos puntos una traza se dibuja con WebGL (Scattergl) en lugar de SVG
+WEBGL_MIN_POINTS = 5000
+
+# Arrays más cortos se dejan como listas JSON: el base64 no compensa
+TYPED_ARRAY_MIN_SIZE = 16
+
+# Tipos de los typed arrays de plotly.js, del más compacto al más amplio
+_TYPED_ARRAY_CODES = [("int8", "i1"), ("uint8", "u1"), ("int16", "i2"), ("uint16", "u2"),
+                      ("int32", "i4"), ("uint32", "u4"), ("float32", "f4"), ("float64", "f8")]
+
+# Claves cuyos arrays plotly.js no acepta codificados
+_PLAIN_KEYS = {"geojson", "layer", "layers", "range"}
+
+
 class CapacityPlotHelper:
 
+    @staticmethod
+    def line_trace(x, y, webgl: Optional[bool] = None, **kwargs):
+        """
+        Scatter trace built from NumPy arrays, drawn with WebGL when it is large.
+
+        Args:
+            x: Abscissae, any array-like.
+            y: Ordinates, any array-like.
+            webgl (Optional[bool]): Force Scattergl (True) or Scatter (False). By default
+                Scattergl is used above WEBGL_MIN_POINTS points.
+            **kwargs: Other trace properties (mode, line, fill, name, ...).
+
+        Returns:
+            Union[go.Scatter, go.Scattergl]: The trace.
+        """
+        x, y = np.asarray(x), np.asarray(y)
+        if webgl is None:
+            webgl = len(x) > WEBGL_MIN_POINTS
+        return (go.Scattergl if webgl else go.Scatter)(x=x, y=y, **kwargs)
+
+    @staticmethod
+    def sample_times_ms(t_milliseconds: int, step: int) -> np.ndarray:
+        """
+        Instants 0, step, 2*step, ... up to t_milliseconds, always ending at t_milliseconds.
+        """
+        t_values = np.arange(0, t_milliseconds + 1, step, dtype=np.int64)
+        if t_values[-1] != t_milliseconds:
+            t_values = np.append(t_values, t_milliseconds)
+        return t_values
+
+    @staticmethod
+    def typed_array(values) -> Union[dict, list]:
+        """
+        A numeric array as a plotly.js typed array spec ({"dtype", "bdata"[, "shape"]}).
+
+        The narrowest dtype that holds every value exactly is used, so integral
+        capacities stored as float64 travel as 1, 2 or 4-byte integers. Arrays that
+        are not numeric, or too short to be worth it, are returned as lists.
+        """
+        a = np.asarray(values)
+        if a.dtype.kind not in "biuf" or a.size < TYPED_ARRAY_MIN_SIZE:
+            return a.tolist()
+        if a.dtype.kind == "b":
+            a = a.astype(np.uint8)
+
+        finite = np.isfinite(a).all() if a.dtype.kind == "f" else True
+        integral = finite and (a.dtype.kind != "f" or np.array_equal(a, np.floor(a)))
+        for dtype, code in _TYPED_ARRAY_CODES:
+            if np.dtype(dtype).kind in "iu":
+                if not integral:
+                    continue
+                info = np.iinfo(dtype)
+                if a.min() < info.min or a.max() > info.max:
+                    continue
+            candidate = a.astype(dtype)
+            if np.array_equal(candidate, a, equal_nan=a.dtype.kind == "f"):
+                spec = {"dtype": code, "bdata": base64.b64encode(candidate.astype(candidate.dtype.newbyteorder("<"))
+                                                                 .tobytes()).decode("ascii")}
+                if a.ndim > 1:
+                    spec["shape"] = ", ".join(map(str, a.shape))
+                return spec
+        return a.tolist()
+
+    @staticmethod
+    def figure_dict(fig) -> dict:
+        """
+        Plain dict of a figure with every numeric array encoded by typed_array.
+
+        Args:
+            fig (Union[go.Figure, dict]): A figure or the dict of one.
+
+        Returns:
+            dict: {"data": [...], "layout": {...}}, ready for json.dumps or plotly's to_html.
+        """
+        def encode(obj, key=None):
+            if isinstance(obj, dict):
+                if "bdata" in obj and "dtype" in obj:
+                    # plotly >= 6 ya entrega los arrays codificados, pero sin estrecharlos
+                    a = np.frombuffer(base64.b64decode(obj["bdata"]), dtype=np.dtype(obj["dtype"]).newbyteorder("<"))
+                    if "shape" in obj:
+                        a = a.reshape([int(n) for n in str(obj["shape"]).split(",")])
+                    return CapacityPlotHelper.typed_array(a)
+                return {k: encode(v, k) for k, v in obj.items()}
+            if isinstance(obj, (list, tuple)):
+                if key not in _PLAIN_KEYS and len(obj) >= TYPED_ARRAY_MIN_SIZE \
+                        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in obj):
+                    return CapacityPlotHelper.typed_array(obj)
+                return [encode(v) for v in obj]
+            if isinstance(obj, np.ndarray):
+                return obj.tolist() if key in _PLAIN_KEYS else CapacityPlotHelper.typed_array(obj)
+            return obj
+
+        return encode(fig if isinstance(fig, dict) else fig.to_plotly_json())
+
+    @staticmethod
+    def figure_json(fig) -> str:
+        """
+        Compact JSON of a figure, with its numeric arrays as base64 typed arrays (see figure_dict).
+        """
+        return json.dumps(CapacityPlotHelper.figure_dict(fig), cls=plotly_utils.PlotlyJSONEncoder,
+                          separators=(",", ":"))
+
+    @staticmethod
+    def figure_html(fig, **kwargs) -> str:
+        """
+        plotly's to_html of a figure whose numeric arrays travel as typed arrays.
+
+        Args:
+            fig (Union[go.Figure, dict]): The figure.
+            **kwargs: Passed to plotly.io.to_html (full_html, include_plotlyjs, ...).
+        """
+        return pio.to_html(CapacityPlotHelper.figure_dict(fig), validate=False, **kwargs)
+
     @staticmethod
     def adjust_x_axis(x_vals):
         range_val = max(x_vals) - min(x_vals)
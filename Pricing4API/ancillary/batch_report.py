@@ -0,0 +1,279 @@
+"""
+Batch reports for many pricing catalogs: datasheet, capacity curves and cost curves
+of every plan, written as CSV, JSON and HTML, one catalog per worker process.
+
+Usage:
+    python -m Pricing4API.ancillary.batch_report catalogs/*.yaml -o reports [-j 32]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.CapacityPlotHelper import WEBGL_MIN_POINTS, CapacityPlotHelper
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.ancillary.pricing_catalog import load_catalog_file
+from Pricing4API.basic.capacity_kernels import capacity_jumps, limit_table
+from Pricing4API.utils import parse_time_string_to_duration, select_best_time_unit
+
+pd = lazy_import("pandas")
+pio = lazy_import("plotly.io")
+
+STAGES = ("load", "datasheet", "curves", "render", "write")
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "catalog"
+
+
+def _compact(times: np.ndarray, capacities: np.ndarray, horizon_ms: float, max_points: int):
+    """
+    The steps of a capacity curve, or its value on a grid of max_points instants if there are more.
+    """
+    if len(times) > max_points:
+        grid = np.linspace(0, horizon_ms, max_points)
+        idx = np.searchsorted(times, grid, side="right") - 1
+        return grid, capacities[np.maximum(idx, 0)]
+    # Último punto en el horizonte para que el escalón final se dibuje
+    return np.append(times, horizon_ms), np.append(capacities, capacities[-1] if len(capacities) else 0.0)
+
+
+def plan_curves(plan, horizon_ms: float, max_points: int = 2000) -> dict:
+    """
+    Capacity and cost curves of a Pricing4API.main Plan, computed once and shared by every output.
+
+    The capacity curve holds the exact steps of the plan on [0, horizon_ms] (see
+    capacity_jumps), or its value on a regular grid of max_points instants when it has
+    more steps. The cost curve is the cost of one billing period against the requests
+    made in it: the fee up to the last quota and overage_cost per request beyond it.
+
+    Returns:
+        dict: {"name", "included", "capacity": {"t_ms", "capacity"}, "cost": {"requests", "cost"}}.
+    """
+    values, periods = limit_table(plan.limits)
+    times, capacities = capacity_jumps(values, periods, horizon_ms)
+    t, c = _compact(times, capacities, horizon_ms, max_points)
+
+    included = float(values[-1])
+    if plan.overage_cost is None:
+        requests, cost = [0.0, included], [plan.price, plan.price]
+    else:
+        requests = [0.0, included, 3 * included]
+        cost = [plan.price, plan.price, plan.price + 2 * included * plan.overage_cost]
+    return {
+        "name": plan.name,
+        "included": included,
+        # Milisegundos enteros y capacidades enteras: el JSON ocupa la mitad
+        "capacity": {"t_ms": np.rint(t).astype(np.int64).tolist(),
+                     "capacity": c.astype(np.int64).tolist() if np.all(c == np.floor(c)) else c.tolist()},
+        "cost": {"requests": requests, "cost": cost},
+    }
+
+
+def _figures(name: str, curves: List[dict], horizon_ms: float):
+    """
+    Capacity and cost figures as plain plotly dicts, cheaper to serialize than go.Figure.
+
+    Capacity curves longer than WEBGL_MIN_POINTS are drawn with WebGL.
+    """
+    unit = select_best_time_unit(horizon_ms).unit
+    unit_ms = unit.to_milliseconds()
+    layout = dict(legend=dict(title=dict(text="Plans")), template=pio.templates["plotly_white"].to_plotly_json())
+
+    capacity = dict(
+        data=[dict(type="scattergl" if len(curve["capacity"]["t_ms"]) > WEBGL_MIN_POINTS else "scatter",
+                   x=np.asarray(curve["capacity"]["t_ms"]) / unit_ms,
+                   y=np.asarray(curve["capacity"]["capacity"]), mode="lines",
+                   line=dict(shape="hv", width=1.3), name=curve["name"]) for curve in curves],
+        layout=dict(layout, title=dict(text=f"Capacity Curves - {name}"),
+                    xaxis=dict(title=dict(text=f"Time ({unit.value})")), yaxis=dict(title=dict(text="Capacity"))),
+    )
+    cost = dict(
+        data=[dict(type="scatter", x=curve["cost"]["requests"], y=curve["cost"]["cost"],
+                   mode="lines", name=curve["name"]) for curve in curves],
+        layout=dict(layout, title=dict(text=f"Cost per billing period - {name}"),
+                    xaxis=dict(title=dict(text="Requests")), yaxis=dict(title=dict(text="Cost ($)"))),
+    )
+    return capacity, cost
+
+
+def report_catalog(path: Union[str, os.PathLike], out_dir: Union[str, os.PathLike],
+                   horizon: Optional[str] = None, cache_dir: Optional[str] = None,
+                   max_points: int = 2000, include_plotlyjs: Union[bool, str] = "cdn",
+                   formats: Iterable[str] = ("csv", "json", "html")) -> dict:
+    """
+    Writes the reports of one catalog into out_dir and returns how long each stage took.
+
+    Outputs are datasheet.csv (create_table plus show_more_table), report.json (the
+    datasheet and the curves of every plan) and report.html (capacity and cost figures
+    and the datasheet). The curves are computed once per plan and reused by the JSON and
+    the figures. Errors are reported in the returned row instead of raised, so one bad
+    catalog does not stop a batch.
+
+    Args:
+        path (Union[str, os.PathLike]): YAML file with a '!Pricing' root.
+        out_dir (Union[str, os.PathLike]): Directory for the outputs of this catalog.
+        horizon (Optional[str]): Horizon of the capacity curves, e.g. "1month". Defaults to
+            the largest limit period of the catalog.
+        cache_dir (Optional[str]): Cache of parsed catalogs (see load_catalog).
+        max_points (int): Largest number of points kept per capacity curve.
+        include_plotlyjs (Union[bool, str]): How the HTML gets plotly.js (see plotly's to_html).
+        formats (Iterable[str]): Outputs to write, among "csv", "json" and "html".
+
+    Returns:
+        dict: catalog, path, plans, status, error and the seconds spent in each stage.
+    """
+    row = {"catalog": None, "path": os.fspath(path), "plans": 0, "status": "ok", "error": ""}
+    timings = dict.fromkeys(STAGES, 0.0)
+    formats = set(formats)
+    stage = "load"
+    try:
+        start = time.perf_counter()
+        catalog = load_catalog_file(path, cache_dir=cache_dir)
+        pricing = catalog.pricing
+        row["catalog"], row["plans"] = catalog.name, len(catalog)
+        timings["load"] = time.perf_counter() - start
+
+        stage = "datasheet"
+        start = time.perf_counter()
+        datasheet = pricing.show_more_table(pricing.create_table())
+        datasheet.columns = [plan.name for plan in pricing.plans]
+        # Las listas de cuotas se escriben con el str de cada límite
+        datasheet = datasheet.drop(index="Plan Name").map(
+            lambda v: ", ".join(map(str, v)) if isinstance(v, (list, tuple)) else str(v))
+        timings["datasheet"] = time.perf_counter() - start
+
+        stage = "curves"
+        start = time.perf_counter()
+        horizon_ms = parse_time_string_to_duration(horizon).to_milliseconds() if horizon else \
+            max(plan.limits[-1].duration.to_milliseconds() for plan in pricing.plans)
+        curves = [plan_curves(plan, horizon_ms, max_points) for plan in pricing.plans]
+        timings["curves"] = time.perf_counter() - start
+
+        stage = "render"
+        start = time.perf_counter()
+        html = None
+        if "html" in formats:
+            capacity, cost = _figures(catalog.name, curves, horizon_ms)
+            html = "\n".join([
+                "<html><head><meta charset=\"utf-8\">",
+                f"<title>{catalog.name}</title></head><body>",
+                # Arrays numéricos como typed arrays en base64: el HTML pesa varias veces menos
+                CapacityPlotHelper.figure_html(capacity, full_html=False, include_plotlyjs=include_plotlyjs),
+                CapacityPlotHelper.figure_html(cost, full_html=False, include_plotlyjs=False),
+                datasheet.to_html(),
+                "</body></html>",
+            ])
+        timings["render"] = time.perf_counter() - start
+
+        stage = "write"
+        start = time.perf_counter()
+        os.makedirs(out_dir, exist_ok=True)
+        if "csv" in formats:
+            datasheet.to_csv(os.path.join(out_dir, "datasheet.csv"))
+        if "json" in formats:
+            with open(os.path.join(out_dir, "report.json"), "w") as f:
+                json.dump({
+                    "name": catalog.name,
+                    "billing_object": catalog.billing_object,
+                    "horizon_ms": horizon_ms,
+                    "datasheet": datasheet.to_dict(orient="index"),
+                    "plans": curves,
+                }, f, separators=(",", ":"))
+        if html is not None:
+            with open(os.path.join(out_dir, "report.html"), "w") as f:
+                f.write(html)
+        timings["write"] = time.perf_counter() - start
+    except Exception as e:
+        row["status"], row["error"] = "error", f"{stage}: {type(e).__name__}: {e}"
+
+    row.update(timings)
+    row["total"] = sum(timings.values())
+    return row
+
+
+def _report_job(job, **kwargs) -> dict:
+    path, out_dir = job
+    return report_catalog(path, out_dir, **kwargs)
+
+
+def generate_reports(paths: Iterable[Union[str, os.PathLike]], out_dir: Union[str, os.PathLike],
+                     jobs: Optional[int] = None, **kwargs):
+    """
+    Writes the reports of many catalogs, fanning them out over a process pool.
+
+    Every catalog gets its own subdirectory of out_dir, named after its file, and
+    out_dir/summary.csv gets one row per catalog with its status and stage timings.
+
+    Args:
+        paths (Iterable[Union[str, os.PathLike]]): YAML catalog files.
+        out_dir (Union[str, os.PathLike]): Root directory of the reports.
+        jobs (Optional[int]): Worker processes. 1 runs in this process; defaults to the CPU count.
+        **kwargs: Passed to report_catalog.
+
+    Returns:
+        pd.DataFrame: The summary, one row per catalog.
+    """
+    paths = [os.fspath(p) for p in paths]
+    names: Dict[str, int] = {}
+    used = set()
+    work = []
+    for path in paths:
+        base = _slug(os.path.splitext(os.path.basename(path))[0])
+        slug = base
+        # Otro catálogo puede llamarse ya como el sufijo (a, a y a_2): se sigue hasta uno libre
+        while slug in used:
+            names[base] = names.get(base, 1) + 1
+            slug = f"{base}_{names[base]}"
+        used.add(slug)
+        work.append((path, os.path.join(os.fspath(out_dir), slug)))
+
+    job = partial(_report_job, **kwargs)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(work) <= 1:
+        rows = [job(w) for w in work]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(work))) as executor:
+            rows = list(executor.map(job, work, chunksize=max(1, len(work) // (4 * jobs))))
+
+    summary = pd.DataFrame(rows, columns=["catalog", "path", "plans", "status", "error", *STAGES, "total"])
+    os.makedirs(out_dir, exist_ok=True)
+    summary.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch reports of pricing catalogs.")
+    parser.add_argument("paths", nargs="+", help="YAML catalog files")
+    parser.add_argument("-o", "--out-dir", default="reports")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--horizon", default=None, help="horizon of the capacity curves, e.g. 1month")
+    parser.add_argument("--cache-dir", default=None, help="cache of parsed catalogs")
+    parser.add_argument("--max-points", type=int, default=2000)
+    parser.add_argument("--formats", default="csv,json,html")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = generate_reports(args.paths, args.out_dir, jobs=args.jobs, horizon=args.horizon,
+                               cache_dir=args.cache_dir, max_points=args.max_points,
+                               formats=args.formats.split(","))
+    wall = time.perf_counter() - start
+
+    failed = summary[summary["status"] != "ok"]
+    print(f"{len(summary) - len(failed)}/{len(summary)} catalogs in {wall:.2f} s")
+    print("Time per stage (s, summed over workers): " +
+          ", ".join(f"{stage} {summary[stage].sum():.2f}" for stage in STAGES))
+    for _, row in failed.iterrows():
+        print(f"  {row['path']}: {row['error']}", file=sys.stderr)
+    return 1 if len(failed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
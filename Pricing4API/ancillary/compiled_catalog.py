@@ -0,0 +1,264 @@
+import json
+import os
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.capacity_kernels import ragged_capacity_at_ms
+from Pricing4API.utils import parse_time_string_to_duration
+
+MAGIC = b"P4ACAT01"
+ALIGNMENT = 64
+
+# (column name, dtype); plan columns have one row per plan (offsets one more),
+# limit columns one row per limit, ordered rate first within each plan.
+PLAN_COLUMNS = [
+    ("limit_offsets", "<i8"),
+    ("name_offsets", "<i8"),
+    ("provider", "<i4"),
+    ("cost", "<f8"),
+    ("overage_cost", "<f8"),
+    ("billing_period_ms", "<i8"),
+    ("max_subscriptions", "<i8"),
+]
+LIMIT_COLUMNS = [
+    ("limit_value", "<i8"),
+    ("limit_period_ms", "<i8"),
+]
+
+
+def _whole(value: float, what: str) -> int:
+    if value != int(value):
+        raise ValueError(f"{what} must be a whole number to be compiled, got {value}")
+    return int(value)
+
+
+def _duration_ms(duration) -> float:
+    if isinstance(duration, str):
+        duration = parse_time_string_to_duration(duration)
+    return duration.to_milliseconds()
+
+
+def _rows_from_spec(provider: str, spec: tuple):
+    name, cost, billing_period, billing_unit, unitary_rate, quotas, overage_cost, max_subs = spec
+    limits = [(value, TimeUnit[unit].to_milliseconds(period)) for value, period, unit in quotas]
+    if unitary_rate:
+        limits.append((1, TimeUnit[unitary_rate[1]].to_milliseconds(unitary_rate[0])))
+    limits.sort(key=lambda limit: limit[1])
+    return (provider, name, cost, overage_cost, TimeUnit[billing_unit].to_milliseconds(billing_period),
+            max_subs, limits)
+
+
+def _rows_from_plan(provider: str, plan):
+    if hasattr(plan, "bounded_rate"):
+        # Pricing4API.basic Plan
+        limits = [(l.consumption_unit, l.consumption_period.to_milliseconds()) for l in plan.bounded_rate.limits]
+        return (provider, plan.name, plan.cost, plan.overage_cost, _duration_ms(plan.billing_period),
+                plan.max_number_of_subscriptions, limits)
+    # Pricing4API.main Plan
+    limits = [(l.value, l.duration.to_milliseconds()) for l in plan.limits]
+    return (provider, plan.name, plan.price, plan.overage_cost, plan.billing_unit.to_milliseconds(),
+            plan.max_number_of_subscriptions, limits)
+
+
+def _collect_rows(sources) -> list:
+    if not isinstance(sources, (list, tuple)):
+        sources = [sources]
+
+    rows = []
+    for source in sources:
+        if hasattr(source, "specs"):
+            # PricingCatalog: compile straight from the specs, no Plan is built
+            rows.extend(_rows_from_spec(source.name, spec) for spec in source.specs)
+        elif hasattr(source, "overage_models"):
+            # Pricing4API.basic Pricing: its plans keep their own limits
+            rows.extend(_rows_from_plan("", plan) for plan in source.plans)
+        elif hasattr(source, "plans"):
+            rows.extend(_rows_from_plan(source.name, plan) for plan in source.plans)
+        else:
+            rows.append(_rows_from_plan("", source))
+    return rows
+
+
+def compile_catalog(sources, path: Union[str, os.PathLike]) -> None:
+    """
+    Compiles plans into a flat columnar file that CompiledCatalog can memory-map.
+
+    Args:
+        sources: A PricingCatalog, a Pricing (main or basic), a Plan (main or basic),
+            or a list mixing any of them.
+        path (Union[str, os.PathLike]): Destination file.
+    """
+    rows = _collect_rows(sources)
+
+    providers: List[str] = []
+    provider_index = {}
+    names = bytearray()
+    columns = {name: [] for name, _ in PLAN_COLUMNS + LIMIT_COLUMNS}
+    columns["limit_offsets"].append(0)
+    columns["name_offsets"].append(0)
+
+    for provider, name, cost, overage_cost, billing_ms, max_subs, limits in rows:
+        if provider not in provider_index:
+            provider_index[provider] = len(providers)
+            providers.append(provider)
+        if not limits:
+            raise ValueError(f"Plan '{name}' has no limits to compile")
+
+        names += str(name).encode("utf-8")
+        columns["name_offsets"].append(len(names))
+        columns["provider"].append(provider_index[provider])
+        columns["cost"].append(cost)
+        columns["overage_cost"].append(np.nan if overage_cost is None else overage_cost)
+        columns["billing_period_ms"].append(_whole(billing_ms, f"Billing period of '{name}'"))
+        columns["max_subscriptions"].append(max_subs)
+        for value, period_ms in limits:
+            columns["limit_value"].append(_whole(value, f"Limit value of '{name}'"))
+            columns["limit_period_ms"].append(_whole(period_ms, f"Limit period of '{name}'"))
+        columns["limit_offsets"].append(len(columns["limit_value"]))
+
+    arrays = [(name, np.asarray(columns[name], dtype=dtype)) for name, dtype in PLAN_COLUMNS + LIMIT_COLUMNS]
+    arrays.append(("names", np.frombuffer(bytes(names), dtype=np.uint8)))
+
+    # Lay out the columns after the header, each aligned for direct np.frombuffer views
+    layout = {}
+    offset = 0
+    for name, array in arrays:
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "count": len(array)}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({"n_plans": len(rows), "providers": providers, "columns": layout}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, array in arrays:
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+class CompiledCatalog:
+    """
+    Read-only, memory-mapped view of a file written by compile_catalog.
+
+    Every column is a zero-copy numpy view over the mapping, so worker processes
+    that open the same file share a single page-cache copy of the catalog.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.__path = os.fspath(path)
+        self.__buffer = np.memmap(self.__path, dtype=np.uint8, mode="r")
+
+        if bytes(self.__buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.__path} is not a compiled pricing catalog")
+        header_len = int(self.__buffer[len(MAGIC):len(MAGIC) + 8].view("<u8")[0])
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(self.__buffer[header_start:header_start + header_len]))
+        data_start = -(-(header_start + header_len) // ALIGNMENT) * ALIGNMENT
+
+        self.__providers: List[str] = header["providers"]
+        self.__n_plans: int = header["n_plans"]
+        self.__columns = {
+            name: np.frombuffer(self.__buffer, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                                offset=data_start + spec["offset"])
+            for name, spec in header["columns"].items()
+        }
+        self.__names: Optional[List[str]] = None
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def providers(self) -> List[str]:
+        return self.__providers
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a zero-copy view of one column (see PLAN_COLUMNS and LIMIT_COLUMNS).
+        """
+        return self.__columns[name]
+
+    def __len__(self) -> int:
+        return self.__n_plans
+
+    @property
+    def names(self) -> List[str]:
+        if self.__names is None:
+            blob = bytes(self.__columns["names"])
+            offsets = self.__columns["name_offsets"]
+            self.__names = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.__n_plans)]
+        return self.__names
+
+    def index(self, plan_name: str, provider: Optional[str] = None) -> int:
+        """
+        Row of the plan called plan_name (optionally restricted to one provider).
+        """
+        for i, name in enumerate(self.names):
+            if name == plan_name and (provider is None or self.__providers[self.provider(i)] == provider):
+                return i
+        raise KeyError(f"Plan '{plan_name}' not found in {self.__path}")
+
+    def provider(self, i: int) -> int:
+        return int(self.__columns["provider"][i])
+
+    def limits(self, i: int):
+        """
+        (values, periods_ms) views of the limit table of plan i, rate first.
+        """
+        offsets = self.__columns["limit_offsets"]
+        start, end = offsets[i], offsets[i + 1]
+        return self.__columns["limit_value"][start:end], self.__columns["limit_period_ms"][start:end]
+
+    def _select(self, plans: Optional[Iterable[int]]) -> np.ndarray:
+        if plans is None:
+            return np.arange(self.__n_plans)
+        return np.asarray(plans, dtype=np.int64)
+
+    def capacity_at(self, t_ms: Union[float, np.ndarray], plans: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Accumulated capacity of every selected plan at one or many instants.
+
+        Args:
+            t_ms (Union[float, np.ndarray]): Instant(s) in milliseconds.
+            plans (Optional[Iterable[int]]): Plan rows. Defaults to all plans.
+
+        Returns:
+            np.ndarray: Array of shape (n_selected_plans,) + np.shape(t_ms).
+        """
+        rows = self._select(plans)
+        offsets = self.__columns["limit_offsets"]
+        return ragged_capacity_at_ms(self.__columns["limit_value"], self.__columns["limit_period_ms"],
+                                     offsets[rows], offsets[rows + 1], t_ms)
+
+    def included_requests(self, plans: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Requests included in the subscription fee: the value of each plan's largest limit.
+        """
+        rows = self._select(plans)
+        return self.__columns["limit_value"][self.__columns["limit_offsets"][rows + 1] - 1]
+
+    def cost_of(self, requests: Union[float, np.ndarray], plans: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Cost of serving the given number of requests on every selected plan.
+
+        Requests above the included quota are charged at the overage cost; plans
+        without overage cost charge nothing for them, as in basic.pricing.Pricing.
+
+        Returns:
+            np.ndarray: Array of shape (n_selected_plans,) + np.shape(requests).
+        """
+        rows = self._select(plans)
+        r = np.asarray(requests, dtype=np.float64)
+        extra = (1,) * r.ndim
+        cost = self.__columns["cost"][rows].reshape((-1,) + extra)
+        overage = np.nan_to_num(self.__columns["overage_cost"][rows]).reshape((-1,) + extra)
+        included = self.included_requests(rows).reshape((-1,) + extra)
+        return cost + np.maximum(r - included, 0) * overage
+
+    def billing_period(self, i: int) -> TimeDuration:
+        return TimeDuration(int(self.__columns["billing_period_ms"][i]), TimeUnit.MILLISECOND)
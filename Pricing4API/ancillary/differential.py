@@ -0,0 +1,660 @@
+"""
+Randomized differential testing of the capacity implementations against an exact oracle.
+
+The capacity of a limit table is computed in several places: BoundedRate (basic),
+Plan.available_capacity (main), the deprecated Plan and the vectorized kernels and
+CapacityCurve. This module generates random limit tables, time instants and capacity
+goals, evaluates every registered implementation and compares it with a reference
+written in exact integer arithmetic. Disagreements are shrunk to a minimal
+counterexample (fewer limits, smaller values, periods and inputs).
+
+    python -m Pricing4API.ancillary.differential --cases 20000 --seed 1
+
+New fast paths are checked by registering them:
+
+    @implementation("my_kernel", "capacity")
+    def _my_kernel(values, periods, t_ms):
+        return my_kernel(np.array(values, float), np.array(periods, float), t_ms)
+"""
+import argparse
+import functools
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Pricing4API.ancillary.limit import Limit
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, capacity_at_scalar
+
+PROPERTIES = ("capacity", "min_time", "thresholds")
+
+# Valor y periodo de los niveles de relleno al evaluar tablas de distinta profundidad a la vez
+PADDING = 1 << 62
+
+# Periodos de la rate en ms y factores entre periodos consecutivos
+RATE_PERIODS = (1, 7, 100, 250, 1000, 1013, 60_000)
+PERIOD_FACTORS = (2, 3, 10, 24, 60)
+
+# IMPLEMENTATIONS[propiedad][nombre] = fn(values, periods, inputs) -> np.ndarray
+IMPLEMENTATIONS: Dict[str, Dict[str, Callable]] = {prop: {} for prop in PROPERTIES}
+
+
+def implementation(name: str, prop: str):
+    """
+    Registers an implementation of a property.
+
+    The function receives the limit table as lists of ints (values and periods in
+    milliseconds, rate first) and a 1-d int64 array of inputs: instants in milliseconds
+    for "capacity", goals in requests for "min_time" and None for "thresholds". It
+    returns one float per input, or one per quota for "thresholds".
+    """
+    if prop not in PROPERTIES:
+        raise ValueError(f"Unknown property '{prop}', expected one of {PROPERTIES}.")
+
+    def register(fn):
+        IMPLEMENTATIONS[prop][name] = fn
+        return fn
+    return register
+
+
+# --- oracle ------------------------------------------------------------------------
+
+def reference_capacity(values, periods, t_ms) -> np.ndarray:
+    """
+    Capacity at integer instants, with integer division only, so no rounding can occur.
+
+    values and periods hold the limit table on their last axis (rate first); leading
+    axes, if any, broadcast against t_ms, so many tables can be evaluated at once.
+    Levels whose value and period are PADDING leave the capacity unchanged.
+    """
+    v = np.asarray(values, dtype=np.int64)
+    p = np.asarray(periods, dtype=np.int64)
+    t = np.asarray(t_ms, dtype=np.int64)
+    windows = []
+    for level in range(v.shape[-1] - 1, 0, -1):
+        windows.append(t // p[..., level])
+        t = t % p[..., level]
+    c = v[..., 0] * (t // p[..., 0] + 1)
+    for level, n in zip(range(1, v.shape[-1]), reversed(windows)):
+        c = v[..., level] * n + np.minimum(c, v[..., level])
+    return c
+
+
+def reference_min_time(values, periods, goals) -> np.ndarray:
+    """
+    First integer millisecond at which the reference capacity reaches each goal.
+
+    The capacity only jumps at integer milliseconds when the periods are integers, so
+    a bisection over integers finds the exact instant without assuming any formula.
+    Broadcasts like reference_capacity.
+    """
+    p = np.asarray(periods, dtype=np.int64)
+    goals = np.asarray(goals, dtype=np.int64)
+    shape = np.broadcast_shapes(goals.shape, p[..., 0].shape)
+    lo = np.zeros(shape, dtype=np.int64)
+    hi = np.broadcast_to(p[..., 0], shape).copy()
+    while True:
+        short = reference_capacity(values, periods, hi) < goals
+        if not short.any():
+            break
+        hi = np.where(short, 2 * hi, hi)
+    # Invariante: capacity(hi) >= goal; se busca el menor t con esa propiedad
+    while np.any(lo < hi):
+        mid = (lo + hi) // 2
+        enough = reference_capacity(values, periods, mid) >= goals
+        hi = np.where(enough, mid, hi)
+        lo = np.where(enough, lo, mid + 1)
+    return hi.astype(np.float64)
+
+
+def reference_thresholds(values, periods) -> np.ndarray:
+    """
+    For every quota, the first instant at which the limits below it allow its value.
+
+    Broadcasts like reference_capacity; thresholds of PADDING levels are NaN.
+    """
+    v = np.asarray(values, dtype=np.int64)
+    p = np.asarray(periods, dtype=np.int64)
+    depth = v.shape[-1]
+    # Fila i: la tabla con los niveles >= i anulados, y como meta el valor del nivel i
+    below = np.arange(depth)[None, :] < np.arange(1, depth)[:, None]
+    tv = np.where(below, v[..., None, :], PADDING)
+    tp = np.where(below, p[..., None, :], PADDING)
+    goals = np.where(v[..., 1:] == PADDING, 0, v[..., 1:])
+    thresholds = reference_min_time(tv, tp, goals)
+    return np.where(v[..., 1:] == PADDING, np.nan, thresholds)
+
+
+def valid_table(values: Sequence[int], periods: Sequence[int]) -> bool:
+    """
+    Whether BoundedRate keeps every quota of the table and the quotas grow with their period.
+    """
+    if not values or len(values) != len(periods) or min(values) <= 0 or min(periods) <= 0:
+        return False
+    for i in range(1, len(values)):
+        if periods[i] <= periods[i - 1] or values[i] <= values[i - 1]:
+            return False
+        if values[i] * periods[0] > values[0] * periods[i]:
+            return False
+        if reference_capacity(values[:i], periods[:i], [periods[i]])[0] < values[i]:
+            return False
+    return True
+
+
+def random_table(rng: np.random.Generator, max_depth: int = 4) -> Tuple[List[int], List[int]]:
+    """
+    A random limit table (rate first, periods in ms) that valid_table accepts.
+
+    Most periods are multiples of the previous one, as in real pricings; one in four
+    is not, so that windows of different levels do not align.
+    """
+    values = [int(rng.integers(1, 11))]
+    periods = [int(rng.choice(RATE_PERIODS))]
+    for _ in range(int(rng.integers(0, max_depth))):
+        factor = int(rng.choice(PERIOD_FACTORS))
+        period = periods[-1] * factor + (int(rng.integers(1, periods[-1] + 1)) if rng.random() < 0.25 else 0)
+        most = min(values[0] * period // periods[0],
+                   int(reference_capacity(values, periods, [period])[0]))
+        if most <= values[-1]:
+            break
+        values.append(int(rng.integers(values[-1] + 1, most + 1)))
+        periods.append(period)
+    return values, periods
+
+
+def random_instants(rng: np.random.Generator, periods: Sequence[int], n: int) -> np.ndarray:
+    """
+    Uniform instants over three top periods, plus window boundaries of every level and their neighbours.
+    """
+    top = periods[-1]
+    uniform = rng.integers(0, 3 * top, n - n // 2)
+    level = rng.integers(0, len(periods), n // 2)
+    k = rng.integers(0, 3 * top // np.asarray(periods)[level] + 1)
+    edges = k * np.asarray(periods)[level] + rng.integers(-1, 2, n // 2)
+    return np.maximum(np.concatenate((uniform, edges)), 0).astype(np.int64)
+
+
+def random_goals(rng: np.random.Generator, values: Sequence[int], periods: Sequence[int], n: int) -> np.ndarray:
+    """
+    Uniform goals up to the capacity of three top periods, plus multiples of every limit and their neighbours.
+    """
+    top = int(reference_capacity(values, periods, [3 * periods[-1]])[0])
+    uniform = rng.integers(0, top + 1, n - n // 2)
+    level = rng.integers(0, len(values), n // 2)
+    edges = rng.integers(0, 4, n // 2) * np.asarray(values)[level] + rng.integers(-1, 2, n // 2)
+    return np.maximum(np.concatenate((uniform, edges)), 0).astype(np.int64)
+
+
+def _reference(prop: str, values, periods, inputs) -> np.ndarray:
+    if prop == "capacity":
+        return reference_capacity(values, periods, inputs).astype(np.float64)
+    if prop == "min_time":
+        return reference_min_time(values, periods, inputs)
+    return reference_thresholds(values, periods)
+
+
+# --- implementations -----------------------------------------------------------------
+
+def _ms(value: int) -> TimeDuration:
+    return TimeDuration(value, TimeUnit.MILLISECOND)
+
+
+# Los objetos se construyen una vez por tabla y los comparten las tres propiedades
+@functools.lru_cache(maxsize=64)
+def _bounded_rate(values: tuple, periods: tuple) -> BoundedRate:
+    return BoundedRate(Rate(values[0], _ms(periods[0])), [Quota(v, _ms(p)) for v, p in zip(values[1:], periods[1:])])
+
+
+@functools.lru_cache(maxsize=64)
+def _main_plan(values: tuple, periods: tuple):
+    from Pricing4API.main.plan import Plan
+    return Plan("differential", (0.0, TimeDuration(1, TimeUnit.MONTH)), None, Limit(values[0], _ms(periods[0])),
+                [Limit(v, _ms(p)) for v, p in zip(values[1:], periods[1:])])
+
+
+@functools.lru_cache(maxsize=64)
+def _deprecated_plan(values: tuple, periods: tuple):
+    # Importado aquí: el módulo depreciado carga matplotlib al importarse
+    from Pricing4API.deprecated.plan import Plan
+    # Sin unidades: instantes y periodos enteros en la misma unidad (aquí ms)
+    return Plan("differential", rate=(values[0], periods[0]), quote=list(zip(values[1:], periods[1:])))
+
+
+@functools.lru_cache(maxsize=64)
+def _curve(values: tuple, periods: tuple) -> CapacityCurve:
+    return CapacityCurve.from_limit_table(np.array(values, dtype=np.float64), np.array(periods, dtype=np.float64))
+
+
+def _duration_ms(result) -> float:
+    # BoundedRate.min_time devuelve "0s" cuando el tiempo es 0 aunque display sea False
+    return 0.0 if isinstance(result, str) else float(result.to_milliseconds())
+
+
+@implementation("basic", "capacity")
+def _basic_capacity(values, periods, t_ms):
+    br = _bounded_rate(tuple(values), tuple(periods))
+    return np.array([br.capacity_at(_ms(int(t))) for t in t_ms], dtype=np.float64)
+
+
+@implementation("basic", "min_time")
+def _basic_min_time(values, periods, goals):
+    br = _bounded_rate(tuple(values), tuple(periods))
+    return np.array([_duration_ms(br.min_time(int(g), return_unit=TimeUnit.MILLISECOND, display=False))
+                     for g in goals])
+
+
+@implementation("basic", "thresholds")
+def _basic_thresholds(values, periods, _):
+    thresholds = _bounded_rate(tuple(values), tuple(periods)).quota_exhaustion_threshold(display=False)
+    if not isinstance(thresholds, list):
+        thresholds = [thresholds]
+    return np.array([_duration_ms(t) for t in thresholds], dtype=np.float64)
+
+
+@implementation("main", "capacity")
+def _main_capacity(values, periods, t_ms):
+    plan = _main_plan(tuple(values), tuple(periods))
+    return np.array([plan.capacity(_ms(int(t))) for t in t_ms], dtype=np.float64)
+
+
+@implementation("main", "min_time")
+def _main_min_time(values, periods, goals):
+    plan = _main_plan(tuple(values), tuple(periods))
+    return np.array([plan.min_time(int(g), return_unit=TimeUnit.MILLISECOND).to_milliseconds() for g in goals],
+                    dtype=np.float64)
+
+
+@implementation("main", "thresholds")
+def _main_thresholds(values, periods, _):
+    plan = _main_plan(tuple(values), tuple(periods))
+    return np.array([t.to_milliseconds() for t in plan.quotas_burning_times], dtype=np.float64)
+
+
+@implementation("deprecated", "capacity")
+def _deprecated_capacity(values, periods, t_ms):
+    plan = _deprecated_plan(tuple(values), tuple(periods))
+    return np.array([plan.available_capacity(int(t), len(values) - 1) for t in t_ms], dtype=np.float64)
+
+
+@implementation("deprecated", "min_time")
+def _deprecated_min_time(values, periods, goals):
+    plan = _deprecated_plan(tuple(values), tuple(periods))
+    return np.array([plan.min_time(int(g)) for g in goals], dtype=np.float64)
+
+
+@implementation("deprecated", "thresholds")
+def _deprecated_thresholds(values, periods, _):
+    # t_ast[0] es la rate; los huecos sin calcular se comparan como NaN
+    t_ast = _deprecated_plan(tuple(values), tuple(periods)).compute_t_ast()[1:]
+    return np.array([np.nan if t is None else t for t in t_ast], dtype=np.float64)
+
+
+@implementation("capacity_at_ms", "capacity")
+def _kernel_capacity(values, periods, t_ms):
+    return capacity_at_ms(np.array(values, dtype=np.float64), np.array(periods, dtype=np.float64),
+                          t_ms.astype(np.float64))
+
+
+@implementation("capacity_at_scalar", "capacity")
+def _scalar_capacity(values, periods, t_ms):
+    return np.array([capacity_at_scalar(values, periods, float(t)) for t in t_ms], dtype=np.float64)
+
+
+@implementation("curve", "capacity")
+def _curve_capacity(values, periods, t_ms):
+    return _curve(tuple(values), tuple(periods)).at_many(t_ms.astype(np.float64))
+
+
+@implementation("curve", "min_time")
+def _curve_min_time(values, periods, goals):
+    return np.asarray(_curve(tuple(values), tuple(periods)).inverse(goals.astype(np.float64)), dtype=np.float64)
+
+
+@implementation("curve", "thresholds")
+def _curve_thresholds(values, periods, _):
+    return np.array([_curve(tuple(values[:i]), tuple(periods[:i])).inverse(values[i]) for i in range(1, len(values))])
+
+
+# --- comparison and shrinking ----------------------------------------------------------
+
+class Counterexample:
+    """
+    A limit table and input on which an implementation disagrees with the oracle.
+    """
+
+    def __init__(self, implementation: str, prop: str, values: List[int], periods: List[int],
+                 input: Optional[int], expected, got):
+        self.__implementation = implementation
+        self.__prop = prop
+        self.__values = values
+        self.__periods = periods
+        self.__input = input
+        self.__expected = expected
+        self.__got = got
+
+    @property
+    def implementation(self) -> str:
+        return self.__implementation
+
+    @property
+    def prop(self) -> str:
+        return self.__prop
+
+    @property
+    def values(self) -> List[int]:
+        return self.__values
+
+    @property
+    def periods(self) -> List[int]:
+        """
+        Limit periods in milliseconds, rate first.
+        """
+        return self.__periods
+
+    @property
+    def input(self) -> Optional[int]:
+        """
+        Instant in ms ("capacity") or goal ("min_time"); None for "thresholds".
+        """
+        return self.__input
+
+    @property
+    def expected(self):
+        return self.__expected
+
+    @property
+    def got(self):
+        return self.__got
+
+    @property
+    def size(self) -> int:
+        return len(self.__values) * 10 ** 6 + sum(self.__values) + sum(self.__periods) + (self.__input or 0)
+
+    def to_dict(self) -> dict:
+        return {"implementation": self.__implementation, "property": self.__prop, "values": self.__values,
+                "periods_ms": self.__periods, "input": self.__input, "expected": self.__expected, "got": self.__got}
+
+    def __repr__(self):
+        at = "" if self.__input is None else f" at {self.__input}"
+        return (f"Counterexample({self.__implementation}.{self.__prop}{at}: values={self.__values}, "
+                f"periods_ms={self.__periods}, expected {self.__expected}, got {self.__got})")
+
+
+def _disagreement(expected: np.ndarray, got: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the inputs where got differs from expected, or True everywhere if the shapes differ.
+    """
+    got = np.asarray(got, dtype=np.float64)
+    if got.shape != expected.shape:
+        return np.ones(max(len(expected), 1), dtype=bool)
+    # Iguales si coinciden salvo redondeo de la conversión de unidades; inf solo iguala a inf y NaN a nada
+    with np.errstate(invalid="ignore"):
+        return ~((got == expected) | (np.abs(got - expected) <= 1e-6 + 1e-12 * np.abs(expected)))
+
+
+def _check(fn: Callable, prop: str, values, periods, inputs) -> Optional[Counterexample]:
+    """
+    The first input on which fn disagrees with the oracle (errors count as disagreements), or None.
+    """
+    expected = _reference(prop, values, periods, inputs)
+    try:
+        got = np.asarray(fn(values, periods, inputs), dtype=np.float64)
+    except Exception as e:
+        return Counterexample("", prop, list(values), list(periods),
+                              None if inputs is None else int(inputs[0]), expected.tolist(), f"{type(e).__name__}: {e}")
+    bad = np.flatnonzero(_disagreement(expected, got))
+    if not len(bad):
+        return None
+    if prop == "thresholds" or got.shape != expected.shape:
+        return Counterexample("", prop, list(values), list(periods), None, expected.tolist(), got.tolist())
+    i = int(bad[0])
+    return Counterexample("", prop, list(values), list(periods), int(inputs[i]), float(expected[i]), float(got[i]))
+
+
+def _toward(x: int, lower: int):
+    """
+    Integers from lower up to x - 1, the furthest first, halving the step: lower, x - (x - lower) // 2, ..., x - 1.
+    """
+    if x <= lower:
+        return
+    yield lower
+    step = (x - lower) // 2
+    while step > 0:
+        yield x - step
+        step //= 2
+
+
+def _candidates(values: List[int], periods: List[int], x: Optional[int]):
+    """
+    Smaller versions of a case: fewer limits, then smaller inputs, values and periods.
+    """
+    for i in range(len(values) - 1, 0, -1):
+        yield values[:i] + values[i + 1:], periods[:i] + periods[i + 1:], x
+    if x:
+        if x % periods[-1] < x:
+            yield values, periods, x % periods[-1]
+        for smaller in _toward(x, 0):
+            yield values, periods, smaller
+    for i in range(len(values)):
+        for smaller in _toward(values[i], values[i - 1] + 1 if i else 1):
+            yield values[:i] + [smaller] + values[i + 1:], periods, x
+    for i in range(len(periods)):
+        for smaller in _toward(periods[i], periods[i - 1] + 1 if i else 1):
+            yield values, periods[:i] + [smaller] + periods[i + 1:], x
+
+
+def shrink(fn: Callable, example: Counterexample, max_steps: int = 2000) -> Counterexample:
+    """
+    Greedily shrinks a counterexample while the implementation keeps disagreeing with the oracle.
+
+    Args:
+        fn (Callable): The implementation (see implementation()).
+        example (Counterexample): A failing case of fn.
+        max_steps (int): Largest number of candidate cases to evaluate.
+
+    Returns:
+        Counterexample: A failing case no candidate of which still fails.
+    """
+    current = example
+    steps = 0
+    improved = True
+    while improved and steps < max_steps:
+        improved = False
+        for values, periods, x in _candidates(current.values, current.periods, current.input):
+            steps += 1
+            if steps > max_steps:
+                break
+            if not valid_table(values, periods):
+                continue
+            inputs = None if current.prop == "thresholds" else np.array([x], dtype=np.int64)
+            found = _check(fn, current.prop, values, periods, inputs)
+            if found is not None and found.size < current.size:
+                current = Counterexample(example.implementation, current.prop, found.values, found.periods,
+                                         found.input, found.expected, found.got)
+                improved = True
+                break
+    return current
+
+
+class DifferentialReport:
+    """
+    Outcome of run(): how many checks each implementation passed and its smallest counterexample.
+    """
+
+    def __init__(self, cases: int, seconds: float, checks: Dict[Tuple[str, str], int],
+                 failures: Dict[Tuple[str, str], int], timings: Dict[Tuple[str, str], float],
+                 counterexamples: Dict[Tuple[str, str], Counterexample]):
+        self.__cases = cases
+        self.__seconds = seconds
+        self.__checks = checks
+        self.__failures = failures
+        self.__timings = timings
+        self.__counterexamples = counterexamples
+
+    @property
+    def cases(self) -> int:
+        return self.__cases
+
+    @property
+    def seconds(self) -> float:
+        return self.__seconds
+
+    @property
+    def cases_per_second(self) -> float:
+        return self.__cases / self.__seconds if self.__seconds > 0 else float("inf")
+
+    @property
+    def checks(self) -> Dict[Tuple[str, str], int]:
+        """
+        Cases checked per (implementation, property).
+        """
+        return self.__checks
+
+    @property
+    def failures(self) -> Dict[Tuple[str, str], int]:
+        """
+        Cases on which each (implementation, property) disagreed with the oracle.
+        """
+        return self.__failures
+
+    @property
+    def timings(self) -> Dict[Tuple[str, str], float]:
+        """
+        Seconds spent in each (implementation, property), oracle excluded.
+        """
+        return self.__timings
+
+    @property
+    def counterexamples(self) -> Dict[Tuple[str, str], Counterexample]:
+        """
+        Minimized counterexample of every (implementation, property) that failed.
+        """
+        return self.__counterexamples
+
+    @property
+    def ok(self) -> bool:
+        return not any(self.__failures.values())
+
+    def table(self) -> str:
+        lines = [f"{self.__cases} cases in {self.__seconds:.2f} s ({self.cases_per_second:.0f} cases/s)",
+                 f"{'implementation':<20} {'property':<11} {'checked':>8} {'failed':>8} {'us/case':>9}"]
+        for key, checked in self.__checks.items():
+            per_case = 1e6 * self.__timings[key] / checked if checked else 0.0
+            lines.append(f"{key[0]:<20} {key[1]:<11} {checked:>8} {self.__failures[key]:>8} {per_case:>9.1f}")
+        for example in self.__counterexamples.values():
+            lines.append(f"  {example!r}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"DifferentialReport({self.__cases} cases, {sum(self.__failures.values())} failures)"
+
+
+def run(cases: int = 1000, seed: int = 0, implementations: Optional[Sequence[str]] = None,
+        properties: Sequence[str] = PROPERTIES, points: int = 16, max_depth: int = 4,
+        minimize: bool = True, batch: int = 256) -> DifferentialReport:
+    """
+    Checks the registered implementations on random limit tables against the oracle.
+
+    Every case is one random table with points random instants and points random
+    goals; each implementation of each property is evaluated on all of them at once,
+    while the oracle evaluates a whole batch of tables at once. The first failing case
+    of every (implementation, property) is shrunk and kept.
+
+    Args:
+        cases (int): Number of random limit tables.
+        seed (int): Seed of the generator; the same seed checks the same cases.
+        implementations (Optional[Sequence[str]]): Names to check. Defaults to all registered.
+        properties (Sequence[str]): Among "capacity", "min_time" and "thresholds".
+        points (int): Instants and goals per table.
+        max_depth (int): Largest number of quotas per table.
+        minimize (bool): Shrink the counterexamples.
+        batch (int): Tables generated and checked by the oracle at once.
+
+    Returns:
+        DifferentialReport: Checks, failures and counterexamples per implementation and property.
+    """
+    rng = np.random.default_rng(seed)
+    targets = [(name, prop, fn) for prop in properties for name, fn in IMPLEMENTATIONS[prop].items()
+               if implementations is None or name in implementations]
+    checks = {(name, prop): 0 for name, prop, _ in targets}
+    failures = dict.fromkeys(checks, 0)
+    timings = dict.fromkeys(checks, 0.0)
+    first: Dict[Tuple[str, str], Counterexample] = {}
+
+    # Una llamada previa por implementación para que los imports no cuenten en los tiempos
+    for _, prop, fn in targets:
+        try:
+            fn([1, 2], [1, 2], None if prop == "thresholds" else np.zeros(1, dtype=np.int64))
+        except Exception:
+            pass
+
+    start = time.perf_counter()
+    for lo in range(0, cases, batch):
+        tables = [random_table(rng, max_depth) for _ in range(min(batch, cases - lo))]
+        inputs = {"capacity": [random_instants(rng, p, points) for _, p in tables],
+                  "min_time": [random_goals(rng, v, p, points) for v, p in tables]}
+
+        # El oráculo evalúa el lote entero de una vez, con las tablas rellenadas a la misma profundidad
+        depth = max(len(v) for v, _ in tables)
+        padded_v = np.array([v + [PADDING] * (depth - len(v)) for v, _ in tables], dtype=np.int64)
+        padded_p = np.array([p + [PADDING] * (depth - len(p)) for _, p in tables], dtype=np.int64)
+        expected = {}
+        if "capacity" in properties:
+            expected["capacity"] = reference_capacity(padded_v[:, None], padded_p[:, None],
+                                                      np.array(inputs["capacity"])).astype(np.float64)
+        if "min_time" in properties:
+            expected["min_time"] = reference_min_time(padded_v[:, None], padded_p[:, None], np.array(inputs["min_time"]))
+        if "thresholds" in properties:
+            expected["thresholds"] = reference_thresholds(padded_v, padded_p)
+
+        for b, (values, periods) in enumerate(tables):
+            for name, prop, fn in targets:
+                x = inputs[prop][b] if prop in inputs else None
+                want = expected[prop][b] if prop != "thresholds" else expected[prop][b, :len(values) - 1]
+                checks[name, prop] += 1
+                t0 = time.perf_counter()
+                try:
+                    failed = _disagreement(want, fn(values, periods, x)).any()
+                except Exception:
+                    failed = True
+                timings[name, prop] += time.perf_counter() - t0
+                if failed:
+                    failures[name, prop] += 1
+                    if (name, prop) not in first:
+                        first[name, prop] = _check(fn, prop, values, periods, x)
+    seconds = time.perf_counter() - start
+
+    counterexamples = {}
+    for (name, prop), example in first.items():
+        fn = IMPLEMENTATIONS[prop][name]
+        example = Counterexample(name, prop, example.values, example.periods, example.input, example.expected,
+                                 example.got)
+        counterexamples[name, prop] = shrink(fn, example) if minimize else example
+    return DifferentialReport(cases, seconds, checks, failures, timings, counterexamples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Differential testing of the capacity implementations.")
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--points", type=int, default=16, help="instants and goals per limit table")
+    parser.add_argument("--max-depth", type=int, default=4, help="largest number of quotas")
+    parser.add_argument("-i", "--implementation", action="append", default=None,
+                        help="implementation to check (repeatable); defaults to all")
+    parser.add_argument("-p", "--property", action="append", default=None, choices=PROPERTIES)
+    parser.add_argument("--no-minimize", action="store_true")
+    parser.add_argument("--batch", type=int, default=256, help="tables checked by the oracle at once")
+    args = parser.parse_args(argv)
+
+    report = run(args.cases, args.seed, args.implementation, args.property or PROPERTIES, args.points,
+                 args.max_depth, not args.no_minimize, args.batch)
+    print(report.table())
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
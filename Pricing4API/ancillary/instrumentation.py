@@ -0,0 +1,317 @@
+"""
+Opt-in call counts and wall time of the hot paths of the library.
+
+Nothing is wrapped until instrumentation is enabled: enable() replaces the functions
+listed in HOT_PATHS by timed wrappers (in their module or class, and wherever a
+Pricing4API module imported them by name) and disable() puts the originals back, so
+the disabled library runs exactly the code it runs without this module.
+
+    from Pricing4API.ancillary.instrumentation import Profiler
+
+    with Profiler() as prof:
+        pricing.show_capacity_and_cost("1month", return_fig=True)
+    print(prof.table())
+
+Setting PRICING4API_PROFILE=1 enables it for the whole process and prints the table
+to stderr at exit; PRICING4API_PROFILE=path.json writes the JSON there instead.
+"""
+import atexit
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+ENV_VAR = "PRICING4API_PROFILE"
+
+# (categoría, "módulo:atributo") de cada función instrumentada
+HOT_PATHS: List[Tuple[str, str]] = [
+    ("capacity", "Pricing4API.basic.bounded_rate:Rate.capacity_at"),
+    ("capacity", "Pricing4API.basic.bounded_rate:Quota.capacity_at"),
+    ("capacity", "Pricing4API.basic.bounded_rate:BoundedRate.capacity_at"),
+    ("capacity", "Pricing4API.basic.bounded_rate:BoundedRate.capacity_during"),
+    ("capacity", "Pricing4API.basic.bounded_rate:BoundedRate.capacity_during_many"),
+    ("capacity", "Pricing4API.basic.capacity_curve:CapacityCurve.at_many"),
+    ("capacity", "Pricing4API.basic.capacity_curve:StepCurve.at_many"),
+    ("capacity", "Pricing4API.main.plan:Plan.available_capacity"),
+    ("capacity", "Pricing4API.main.plan:Plan.capacity"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:capacity_at_ms"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:capacity_at_scalar"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:capacity_jumps"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:capacity_during_ms"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:inflection_points"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:admit_events"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:serve_bins"),
+    ("kernel", "Pricing4API.basic.capacity_kernels:validate_quota_tables"),
+    ("min_time", "Pricing4API.basic.bounded_rate:Rate.min_time"),
+    ("min_time", "Pricing4API.basic.bounded_rate:Quota.min_time"),
+    ("min_time", "Pricing4API.basic.bounded_rate:BoundedRate.min_time"),
+    ("min_time", "Pricing4API.basic.capacity_curve:CapacityCurve.inverse"),
+    ("min_time", "Pricing4API.main.plan:Plan.min_time"),
+    ("curve", "Pricing4API.basic.bounded_rate:BoundedRate.capacity_curve"),
+    ("curve", "Pricing4API.basic.bounded_rate:BoundedRate.inflection_points"),
+    ("curve", "Pricing4API.basic.bounded_rate:BoundedRate.calculate_inflection_points"),
+    ("curve", "Pricing4API.basic.capacity_curve:CapacityCurve.breakpoints"),
+    ("curve", "Pricing4API.basic.capacity_curve:CapacityCurve.steps"),
+    ("curve", "Pricing4API.basic.pricing:Pricing.combined_capacity"),
+    ("parser", "Pricing4API.utils:parse_time_string_to_duration"),
+    ("parser", "Pricing4API.ancillary.pricing_catalog:parse_catalog"),
+    ("parser", "Pricing4API.ancillary.pricing_catalog:load_catalog"),
+    ("parser", "Pricing4API.ancillary.yaml_serialization:PricingYamlHandler.parse_pricing_fields"),
+    ("parser", "Pricing4API.ancillary.yaml_serialization:PricingYamlHandler.build_plan"),
+    ("figure", "Pricing4API.basic.bounded_rate:BoundedRate.show_available_capacity_curve"),
+    ("figure", "Pricing4API.basic.bounded_rate:BoundedRate.show_instantaneous_capacity_curve"),
+    ("figure", "Pricing4API.basic.bounded_rate:BoundedRate.show_capacity"),
+    ("figure", "Pricing4API.basic.compare_curves:compare_rates_capacity"),
+    ("figure", "Pricing4API.basic.compare_curves:compare_bounded_rates_capacity"),
+    ("figure", "Pricing4API.basic.compare_curves:compare_bounded_rates_capacity_inflection_points"),
+    ("figure", "Pricing4API.basic.pricing:Pricing.show_capacity"),
+    ("figure", "Pricing4API.basic.pricing:Pricing.show_capacity_and_cost"),
+    ("figure", "Pricing4API.basic.pricing:Pricing.show_capacity_and_cost_no_overage"),
+    ("figure", "Pricing4API.main.plan:Plan.show_available_capacity_curve"),
+    ("figure", "Pricing4API.main.plan:Plan.show_capacity_curve"),
+    ("plotly", "plotly.graph_objects:Scatter.__init__"),
+    ("plotly", "plotly.graph_objects:Figure.add_trace"),
+    ("plotly", "plotly.graph_objects:Figure.update_layout"),
+    ("plotly", "plotly.graph_objects:Figure.show"),
+]
+
+_lock = threading.Lock()
+_local = threading.local()
+_counters: Dict[str, List[float]] = {}  # nombre -> [llamadas, segundos]
+_categories: Dict[str, str] = {}
+_patches: List[tuple] = []  # (objeto, atributo, valor original, estaba en su __dict__)
+_originals: Dict[int, object] = {}  # id(envoltorio) -> función original
+
+
+def _wrap(name: str, fn):
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        depth = getattr(_local, name, 0)
+        if depth:
+            # Llamada recursiva: se cuenta, pero el tiempo ya lo mide la llamada exterior
+            with _lock:
+                _counters[name][0] += 1
+            setattr(_local, name, depth + 1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                setattr(_local, name, depth)
+        setattr(_local, name, 1)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            setattr(_local, name, 0)
+            with _lock:
+                counter = _counters[name]
+                counter[0] += 1
+                counter[1] += elapsed
+    return timed
+
+
+def _patch(owner, attr: str, value):
+    _patches.append((owner, attr, getattr(owner, "__dict__", {}).get(attr, getattr(owner, attr)),
+                     attr in getattr(owner, "__dict__", {})))
+    setattr(owner, attr, value)
+
+
+def is_enabled() -> bool:
+    return bool(_patches)
+
+
+def enable() -> None:
+    """
+    Wraps every function of HOT_PATHS whose module can be imported. Does nothing if already enabled.
+    """
+    if _patches:
+        return
+    for category, target in HOT_PATHS:
+        module_name, qualname = target.split(":")
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        *owners, attr = qualname.split(".")
+        owner = module
+        for part in owners:
+            owner = getattr(owner, part)
+        name = f"{module_name.rsplit('.', 1)[-1]}.{qualname}"
+        _counters.setdefault(name, [0, 0.0])
+        _categories[name] = category
+
+        raw = owner.__dict__.get(attr) if isinstance(owner, type) else getattr(owner, attr)
+        if isinstance(raw, staticmethod):
+            _patch(owner, attr, staticmethod(_wrap(name, raw.__func__)))
+            continue
+        original = getattr(owner, attr)
+        wrapped = _wrap(name, original)
+        _originals[id(wrapped)] = original
+        _patch(owner, attr, wrapped)
+        if owner is module:
+            # Los módulos que la importaron por nombre también la llaman a través del envoltorio
+            for other in list(sys.modules.values()):
+                if other is not module and getattr(other, "__name__", "").startswith("Pricing4API") \
+                        and getattr(other, attr, None) is original:
+                    _patch(other, attr, wrapped)
+
+
+def disable() -> None:
+    """
+    Puts every original function back. The counters are kept until reset().
+    """
+    while _patches:
+        owner, attr, original, owned = _patches.pop()
+        if owned:
+            setattr(owner, attr, original)
+        else:
+            delattr(owner, attr)
+    # Módulos importados mientras estaba activo que se quedaron con un envoltorio
+    for module in list(sys.modules.values()):
+        if getattr(module, "__name__", "").startswith("Pricing4API"):
+            for attr, value in list(vars(module).items()):
+                original = _originals.get(id(value))
+                if original is not None and getattr(value, "__wrapped__", None) is original:
+                    setattr(module, attr, original)
+    _originals.clear()
+
+
+def reset() -> None:
+    with _lock:
+        for counter in _counters.values():
+            counter[0], counter[1] = 0, 0.0
+
+
+class Profile:
+    """
+    Calls and inclusive wall time per instrumented function, over some wall time.
+
+    Times are inclusive (a figure builder includes the capacity_at calls it makes),
+    so the shares of nested functions add up to more than 100%.
+    """
+
+    def __init__(self, counters: Dict[str, Tuple[int, float]], wall_s: float):
+        self.__counters = counters
+        self.__wall_s = wall_s
+
+    @property
+    def wall_s(self) -> float:
+        return self.__wall_s
+
+    def rows(self) -> List[dict]:
+        """
+        One row per function called at least once, slowest first.
+        """
+        rows = [
+            {"function": name, "category": _categories.get(name, ""), "calls": int(calls), "total_s": total,
+             "mean_us": total / calls * 1e6, "share": total / self.__wall_s if self.__wall_s else 0.0}
+            for name, (calls, total) in self.__counters.items() if calls
+        ]
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def __getitem__(self, name: str) -> dict:
+        for row in self.rows():
+            if row["function"] == name:
+                return row
+        return {"function": name, "category": _categories.get(name, ""), "calls": 0, "total_s": 0.0,
+                "mean_us": 0.0, "share": 0.0}
+
+    def to_dict(self) -> dict:
+        return {"wall_s": self.__wall_s, "functions": self.rows()}
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text + "\n")
+        return text
+
+    def table(self, limit: Optional[int] = None) -> str:
+        rows = self.rows()[:limit]
+        width = max([len("function")] + [len(row["function"]) for row in rows])
+        lines = [f"{'function':<{width}} {'category':<9} {'calls':>10} {'total (s)':>10} {'mean (us)':>10} {'% wall':>7}"]
+        for row in rows:
+            lines.append(f"{row['function']:<{width}} {row['category']:<9} {row['calls']:>10} "
+                         f"{row['total_s']:>10.4f} {row['mean_us']:>10.1f} {row['share'] * 100:>6.1f}%")
+        lines.append(f"wall time: {self.__wall_s:.4f} s")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"Profile({len(self.rows())} functions, wall_s={self.__wall_s:.4f})"
+
+
+def _snapshot() -> Dict[str, Tuple[int, float]]:
+    with _lock:
+        return {name: (calls, total) for name, (calls, total) in _counters.items()}
+
+
+class Profiler:
+    """
+    Context manager that instruments the hot paths while it is open.
+
+    On exit, profile holds what was called inside the block only. If instrumentation
+    was already enabled (e.g. through PRICING4API_PROFILE) it is left enabled.
+    """
+
+    def __init__(self):
+        self.profile: Optional[Profile] = None
+        self.__was_enabled = False
+        self.__before: Dict[str, Tuple[int, float]] = {}
+        self.__start = 0.0
+
+    def __enter__(self) -> 'Profiler':
+        self.__was_enabled = is_enabled()
+        enable()
+        self.__before = _snapshot()
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.__start
+        after = _snapshot()
+        if not self.__was_enabled:
+            disable()
+        self.profile = Profile({name: (calls - self.__before.get(name, (0, 0.0))[0],
+                                       total - self.__before.get(name, (0, 0.0))[1])
+                                for name, (calls, total) in after.items()}, wall)
+        return False
+
+    def table(self, limit: Optional[int] = None) -> str:
+        return self.profile.table(limit)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        return self.profile.to_json(path)
+
+
+def stats() -> Profile:
+    """
+    Everything counted since the process started (or since the last reset()).
+    """
+    return Profile(_snapshot(), time.perf_counter() - _process_start)
+
+
+_process_start = time.perf_counter()
+
+
+def _report_at_exit(target: str) -> None:
+    profile = stats()
+    if target.endswith(".json"):
+        profile.to_json(target)
+    else:
+        print(profile.table(), file=sys.stderr)
+
+
+def enable_from_environment() -> bool:
+    """
+    Enables instrumentation for the whole process if PRICING4API_PROFILE is set.
+    """
+    target = os.environ.get(ENV_VAR, "")
+    if not target or target == "0":
+        return False
+    enable()
+    atexit.register(_report_at_exit, target)
+    return True
@@ -0,0 +1,33 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Plotting, YAML and HTTP stacks are bound through it so that the core model
+    (Rate, Quota, BoundedRate, Plan) can be imported without paying for them:
+
+        go = lazy_import("plotly.graph_objects")
+        fig = go.Figure()  # plotly is imported here, once
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Returns a LazyModule for the given absolute module name.
+    """
+    return LazyModule(name)
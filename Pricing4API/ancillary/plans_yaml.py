@@ -2,8 +2,12 @@ import yaml
 from Pricing4API.main.plan import Plan
 from Pricing4API.ancillary.limit import Limit
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.limit_tree import LimitTree
 from Pricing4API.utils import parse_time_string_to_duration
 
+# libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def load_plan(yaml_string: str) -> Plan:
     """
     Convierte un DSL en YAML a un objeto Plan de Pricing4API.
@@ -14,7 +18,7 @@ def load_plan(yaml_string: str) -> Plan:
     Returns:
         Plan: Objeto de Pricing4API representando las cuotas y rate unitario (si existe).
     """
-    data = yaml.safe_load(yaml_string)
+    data = yaml.load(yaml_string, Loader=SafeLoader)
 
     api_name = data.get("name", "Unnamed API")
     limits_section = data.get("limits", {})
@@ -62,6 +66,56 @@ def load_plan(yaml_string: str) -> Plan:
 
     return plan
 
+def _yaml_limit(limit: dict, where: str) -> Limit:
+    max_requests = limit.get("max", 1)
+    period = limit.get("period", {})
+    period_value = period.get("value")
+    period_unit = period.get("unit")
+
+    if not (max_requests and period_value and period_unit):
+        raise ValueError(f"Faltan valores en el límite definido para {where}")
+
+    return Limit(max_requests, TimeDuration(int(period_value), TimeUnit[period_unit.upper()]))
+
+
+def load_limit_tree(yaml_string: str) -> LimitTree:
+    """
+    Convierte el DSL en YAML de load_plan a un LimitTree, sin aplanar los límites por endpoint.
+
+    Las cuotas bajo "/*" con método "all" son los límites globales del plan; cualquier
+    otro endpoint o método tiene su propio nodo (ver LimitTree). Un unitary_rate en el
+    nivel superior también es global, y uno dado por endpoint ({endpoint: {método:
+    {requests: {period}}}}, como en los catálogos !Pricing) va a su nodo. Cada método
+    puede contener la lista de límites directamente o bajo "requests".
+
+    Args:
+        yaml_string (str): YAML en formato string.
+
+    Returns:
+        LimitTree: Árbol de límites del API.
+    """
+    data = yaml.load(yaml_string, Loader=SafeLoader)
+
+    tree = LimitTree(name=data.get("name", "Unnamed API"))
+    limits_section = data.get("limits", {})
+
+    unitary_rate_section = limits_section.get("unitary_rate") or {}
+    if "period" in unitary_rate_section:
+        unitary_rate_section = {"/*": {"all": unitary_rate_section}}
+    for endpoint, methods in unitary_rate_section.items():
+        for method, rate in methods.items():
+            rate = rate.get("requests", rate)
+            # Siempre es 1 porque es un rate unitario explícito
+            tree.add(endpoint, [_yaml_limit(dict(rate, max=1), f"el unitary_rate de {endpoint} {method}")], method)
+
+    for endpoint, methods in (limits_section.get("quotas") or {}).items():
+        for method, limits in methods.items():
+            if isinstance(limits, dict):
+                limits = limits.get("requests", [])
+            tree.add(endpoint, [_yaml_limit(limit, f"{endpoint} {method}") for limit in limits], method)
+
+    return tree
+
 def load_plan_simple(yaml_string: str) -> Plan:
     """
     Carga un plan simplificado desde un YAML plano sin rutas ni métodos HTTP.
@@ -72,7 +126,7 @@ def load_plan_simple(yaml_string: str) -> Plan:
     Returns:
         Plan: Objeto Plan de Pricing4API.
     """
-    data = yaml.safe_load(yaml_string)
+    data = yaml.load(yaml_string, Loader=SafeLoader)
 
     api_name = data.get("name", "Unnamed API")
     limits_section = data.get("limits", {})
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Union
+
+import yaml
+
+from Pricing4API.ancillary.yaml_serialization import PricingYamlHandler, SafeLoader
+from Pricing4API.main.plan import Plan
+from Pricing4API.main.pricing import Pricing
+
+# Bump whenever the layout of the plan specs produced by
+# PricingYamlHandler.parse_pricing_fields changes, so stale cache entries are ignored.
+CACHE_FORMAT_VERSION = 2
+
+
+class _CatalogLoader(SafeLoader):
+    """
+    Loader that keeps '!Pricing' documents as plain mappings instead of building a Pricing.
+    """
+
+
+yaml.add_constructor("!Pricing", lambda loader, node: loader.construct_mapping(node, deep=True), Loader=_CatalogLoader)
+
+
+class PricingCatalog:
+    """
+    Parsed pricing catalog whose Plan objects are only built on first access.
+
+    The catalog keeps the validated plan specs (plain tuples) and turns each one
+    into a Plan the first time it is requested, so loading hundreds of catalogs
+    only pays for the plans that are actually used.
+    """
+
+    def __init__(self, name: str, billing_object: str, specs: List[tuple]):
+        self.__name = name
+        self.__billing_object = billing_object
+        self.__specs: Dict[str, tuple] = {spec[0]: spec for spec in specs}
+        self.__plans: Dict[str, Plan] = {}
+        self.__pricing: Optional[Pricing] = None
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def billing_object(self) -> str:
+        return self.__billing_object
+
+    @property
+    def plan_names(self) -> List[str]:
+        return list(self.__specs)
+
+    @property
+    def specs(self) -> List[tuple]:
+        return list(self.__specs.values())
+
+    def __len__(self) -> int:
+        return len(self.__specs)
+
+    def __contains__(self, plan_name: str) -> bool:
+        return plan_name in self.__specs
+
+    def plan(self, plan_name: str) -> Plan:
+        """
+        Returns the Plan called plan_name, building it on first access.
+        """
+        if plan_name not in self.__plans:
+            if plan_name not in self.__specs:
+                raise KeyError(f"Plan '{plan_name}' not found in catalog '{self.__name}'")
+            self.__plans[plan_name] = PricingYamlHandler.build_plan(self.__specs[plan_name])
+        return self.__plans[plan_name]
+
+    @property
+    def plans(self) -> List[Plan]:
+        return [self.plan(plan_name) for plan_name in self.__specs]
+
+    @property
+    def pricing(self) -> Pricing:
+        """
+        Pricing with every plan of the catalog, built (and linked) on first access.
+        """
+        if self.__pricing is None:
+            self.__pricing = Pricing(name=self.__name, plans=self.plans, billing_object=self.__billing_object)
+        return self.__pricing
+
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{digest}.v{CACHE_FORMAT_VERSION}.json")
+
+
+def _spec_from_json(spec: list) -> tuple:
+    # JSON devuelve listas: solo unitary_rate y quotas (ver parse_pricing_fields) vuelven a ser tuplas
+    name, cost, billing_period, billing_unit, unitary_rate, quotas, overage_cost, max_subs = spec
+    return (name, cost, billing_period, billing_unit, unitary_rate and tuple(unitary_rate),
+            tuple(map(tuple, quotas)), overage_cost, max_subs)
+
+
+def _read_cache(path: str):
+    """
+    Reads a cache entry, or None if it is missing or unreadable in any way (then the YAML is parsed again).
+
+    Entries are JSON, so a file planted in a shared cache_dir can at worst make the load fail
+    over to parsing, never run code.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            name, billing_object, specs = json.load(f)
+        return name, billing_object, [_spec_from_json(spec) for spec in specs]
+    except Exception:
+        return None
+
+
+def _write_cache(path: str, entry) -> None:
+    """
+    Writes the cache entry atomically so concurrent workers never read a partial file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def parse_catalog(yaml_string: str):
+    """
+    Parses a '!Pricing' YAML document into (name, billing_object, specs) without building plans.
+    """
+    fields = yaml.load(yaml_string, Loader=_CatalogLoader)
+    return PricingYamlHandler.parse_pricing_fields(fields)
+
+
+def load_catalog(yaml_string: Union[str, bytes], cache_dir: Optional[str] = None) -> PricingCatalog:
+    """
+    Loads a pricing catalog from its YAML text.
+
+    When cache_dir is given, the parsed and validated catalog is stored there as
+    JSON under the SHA-256 of the YAML text, and later loads of the same
+    content skip YAML parsing altogether.
+
+    Args:
+        yaml_string (Union[str, bytes]): YAML document with a '!Pricing' root.
+        cache_dir (Optional[str]): Directory for the on-disk cache. Defaults to no caching.
+
+    Returns:
+        PricingCatalog: Catalog whose plans are built lazily.
+    """
+    raw = yaml_string.encode("utf-8") if isinstance(yaml_string, str) else yaml_string
+
+    entry = None
+    path = None
+    if cache_dir is not None:
+        path = _cache_path(cache_dir, hashlib.sha256(raw).hexdigest())
+        entry = _read_cache(path)
+
+    if entry is None:
+        entry = parse_catalog(raw)
+        if path is not None:
+            _write_cache(path, entry)
+
+    name, billing_object, specs = entry
+    return PricingCatalog(name, billing_object, specs)
+
+
+def load_catalog_file(path: Union[str, os.PathLike], cache_dir: Optional[str] = None) -> PricingCatalog:
+    """
+    Loads a pricing catalog from a YAML file. See load_catalog.
+    """
+    with open(path, "rb") as f:
+        return load_catalog(f.read(), cache_dir=cache_dir)
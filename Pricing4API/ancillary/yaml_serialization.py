@@ -1,9 +1,14 @@
+from typing import List, Tuple
+
 import yaml
 from Pricing4API.ancillary.limit import Limit
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.main.plan import Plan
 from Pricing4API.main.pricing import Pricing
 
+# libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class PricingYamlHandler:
     @staticmethod
@@ -24,18 +29,25 @@ class PricingYamlHandler:
         return unit_map.get(unit, unit.value)  # Default to enum value if not in the map
 
     @staticmethod
-    def pricing_constructor(loader, node):
+    def parse_pricing_fields(fields: dict) -> Tuple[str, str, List[tuple]]:
         """
-        YAML Constructor: Converts YAML into a Pricing instance.
+        Validates a '!Pricing' mapping and flattens it into plain plan specs.
+
+        A plan spec is a tuple of builtins (name, cost, billing_period, billing_unit,
+        unitary_rate, quotas, overage_cost, max_number_of_subscriptions), where
+        unitary_rate is (value, unit) or None and quotas is a tuple of (max, value, unit).
+        Specs are cheap to cache and are turned into Plan objects by build_plan.
+
+        Returns:
+            Tuple[str, str, List[tuple]]: pricing name, billing object and plan specs.
         """
-        fields = loader.construct_mapping(node, deep=True)
         pricing_name, pricing_data = next(iter(fields.items()))
 
         # Extract metrics (billing object)
         metrics = pricing_data["metrics"]["name"]
 
         # Extract plans
-        plans = []
+        specs = []
         for plan_name, plan_data in pricing_data["plans"].items():
             # Extract pricing
             cost = plan_data["cost"]
@@ -50,18 +62,15 @@ class PricingYamlHandler:
             # Extract unitary_rate (handle missing case)
             unitary_rate_field = plan_data.get("unitary_rate", {}).get("/*", {}).get("all", {}).get("requests", {}).get("period", None)
             if unitary_rate_field:
-                unitary_rate = Limit(1, TimeDuration(unitary_rate_field["value"], TimeUnit[unitary_rate_field["unit"].upper()]))
+                unitary_rate = (unitary_rate_field["value"], TimeUnit[unitary_rate_field["unit"].upper()].name)
             else:
-                unitary_rate = None  # Or a default value, e.g., Limit(0, TimeDuration(0, TimeUnit.SECOND))
+                unitary_rate = None
 
             # Extract quotas
-            quotas = [
-                Limit(
-                    quota["max"],
-                    TimeDuration(quota["period"]["value"], TimeUnit[quota["period"]["unit"].upper()])
-                )
+            quotas = tuple(
+                (quota["max"], quota["period"]["value"], TimeUnit[quota["period"]["unit"].upper()].name)
                 for quota in plan_data["quotas"]["/*"]["all"]["requests"]
-            ]
+            )
 
             # Extract overage
             overage = plan_data.get("overage", {})
@@ -70,16 +79,38 @@ class PricingYamlHandler:
             # Extract max_number_of_subscriptions
             max_number_of_subscriptions = plan_data.get("max_number_of_subscriptions", 1)
 
-            # Create Plan instance
-            plan = Plan(
-                name=plan_name,
-                billing=(cost, TimeDuration(billing_period, billing_unit)),
-                overage_cost=overage_cost,
-                unitary_rate=unitary_rate,
-                quotes=quotas,
-                max_number_of_subscriptions=max_number_of_subscriptions,
-            )
-            plans.append(plan)
+            specs.append((plan_name, cost, billing_period, billing_unit.name, unitary_rate,
+                          quotas, overage_cost, max_number_of_subscriptions))
+
+        return pricing_name, metrics, specs
+
+    @staticmethod
+    def build_plan(spec: tuple) -> Plan:
+        """
+        Creates a Plan instance from a spec produced by parse_pricing_fields.
+        """
+        name, cost, billing_period, billing_unit, unitary_rate, quotas, overage_cost, max_subs = spec
+
+        if unitary_rate:
+            unitary_rate = Limit(1, TimeDuration(unitary_rate[0], TimeUnit[unitary_rate[1]]))
+
+        return Plan(
+            name=name,
+            billing=(cost, TimeDuration(billing_period, TimeUnit[billing_unit])),
+            overage_cost=overage_cost,
+            unitary_rate=unitary_rate,
+            quotes=[Limit(value, TimeDuration(period, TimeUnit[unit])) for value, period, unit in quotas],
+            max_number_of_subscriptions=max_subs,
+        )
+
+    @staticmethod
+    def pricing_constructor(loader, node):
+        """
+        YAML Constructor: Converts YAML into a Pricing instance.
+        """
+        fields = loader.construct_mapping(node, deep=True)
+        pricing_name, metrics, specs = PricingYamlHandler.parse_pricing_fields(fields)
+        plans = [PricingYamlHandler.build_plan(spec) for spec in specs]
 
         # Create Pricing instance
         return Pricing(name=pricing_name, plans=plans, billing_object=metrics)
@@ -149,5 +180,6 @@ class PricingYamlHandler:
         """
         Registers the custom YAML constructor and representer for the Pricing class.
         """
-        yaml.add_constructor("!Pricing", PricingYamlHandler.pricing_constructor, Loader=yaml.SafeLoader)
+        for loader in {yaml.SafeLoader, SafeLoader}:
+            yaml.add_constructor("!Pricing", PricingYamlHandler.pricing_constructor, Loader=loader)
         yaml.add_representer(Pricing, PricingYamlHandler.pricing_representer, Dumper=yaml.SafeDumper)
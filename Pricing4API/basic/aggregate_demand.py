@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.ancillary.time_unit import TimeDuration
+from Pricing4API.basic.bounded_rate import BoundedRate
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, capacity_jumps
+from Pricing4API.basic.plan_and_demand import Demand
+from Pricing4API.utils import select_best_time_unit, to_milliseconds
+
+go = lazy_import("plotly.graph_objects")
+
+
+class AggregateDemand:
+    """
+    Cumulative number of requests sent by a population of users, as a step function.
+
+    requests[k] is the total sent in [0, times_ms[k]] and holds until the next time.
+    """
+
+    def __init__(self, times_ms: np.ndarray, requests: np.ndarray, horizon_ms: float, exact: bool):
+        self.__times_ms = times_ms
+        self.__requests = requests
+        self.__horizon_ms = horizon_ms
+        self.__exact = exact
+
+    @property
+    def times_ms(self) -> np.ndarray:
+        return self.__times_ms
+
+    @property
+    def requests(self) -> np.ndarray:
+        return self.__requests
+
+    @property
+    def horizon_ms(self) -> float:
+        return self.__horizon_ms
+
+    @property
+    def exact(self) -> bool:
+        return self.__exact
+
+    @property
+    def total(self) -> float:
+        return float(self.__requests[-1]) if len(self.__requests) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.__times_ms)
+
+    def at(self, t_ms: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Requests sent up to (and including) the given instant(s), in milliseconds.
+        """
+        idx = np.searchsorted(self.__times_ms, t_ms, side="right") - 1
+        return np.where(idx >= 0, self.__requests[np.maximum(idx, 0)], 0.0)
+
+    def max_excess(self, bounded_rate: Union[BoundedRate, CapacityCurve]) -> float:
+        """
+        Largest amount by which the demand exceeds the accumulated capacity of bounded_rate.
+
+        Both curves are non-decreasing steps, so the maximum is reached at a jump of
+        the demand and only those instants are checked. 0 means the plan covers it.
+        bounded_rate can also be a CapacityCurve.
+        """
+        if isinstance(bounded_rate, CapacityCurve):
+            capacity = bounded_rate.at_many(self.__times_ms)
+        else:
+            values, periods = bounded_rate.limit_table
+            capacity = capacity_at_ms(values, periods, self.__times_ms)
+        return float(max(np.max(self.__requests - capacity, initial=0.0), 0.0))
+
+    def fits(self, bounded_rate: Union[BoundedRate, CapacityCurve]) -> bool:
+        return self.max_excess(bounded_rate) == 0.0
+
+    def show(self, time_unit=None, color=None, return_fig=False):
+        """
+        Plots the aggregate demand curve.
+        """
+        if time_unit is None:
+            time_unit = select_best_time_unit(self.__horizon_ms).unit
+        unit_ms = time_unit.to_milliseconds()
+
+        xs = np.append(self.__times_ms, self.__horizon_ms) / unit_ms
+        ys = np.append(self.__requests, self.total)
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=xs,
+            y=ys,
+            mode='lines',
+            line=dict(color=color or 'red', shape='hv', width=1.3),
+            name='Aggregate Demand'
+        ))
+        fig.update_layout(
+            title='Aggregate Demand',
+            xaxis_title=f"Time ({time_unit.value})",
+            yaxis_title="Requests",
+            showlegend=True,
+            template="plotly_white",
+            width=1000,
+            height=600
+        )
+
+        if return_fig:
+            return fig
+        fig.show()
+
+
+def aggregate_demands(
+    demands: List[Demand],
+    offsets: Optional[Sequence[Union[str, TimeDuration, float]]] = None,
+    time_interval: Union[str, TimeDuration, None] = None,
+    approximate: bool = False,
+    resolution: int = 2000,
+) -> AggregateDemand:
+    """
+    Combines many (different, unaligned) demands into one cumulative demand curve.
+
+    User i starts sending at offsets[i] and behaves as demands[i].bounded_rate from
+    then on, during its duration (max_active_time) if it has one.
+
+    The exact mode sweeps the jumps of every user: each distinct limit table is
+    expanded once with capacity_jumps, shifted and cut per user, and the deltas of
+    all users are merged in time order. The approximate mode works on a grid of
+    resolution steps with the offsets rounded to it: each large group of users with
+    the same (limits, duration) is one curve convolved with the histogram of their
+    offsets, the remaining users are evaluated on the grid directly.
+
+    Args:
+        demands (List[Demand]): The users.
+        offsets (Optional[Sequence]): Start of each user (str, TimeDuration or ms). Defaults to 0.
+        time_interval (Union[str, TimeDuration, None]): Horizon. Defaults to the latest
+            end of a user (offset plus duration, or its largest limit period).
+        approximate (bool): Use the grid/convolution mode. Defaults to False.
+        resolution (int): Number of grid steps of the approximate mode.
+
+    Returns:
+        AggregateDemand: The aggregate curve on [0, horizon].
+    """
+    if not demands:
+        raise ValueError("At least one demand is required.")
+    if offsets is None:
+        starts = np.zeros(len(demands))
+    elif isinstance(offsets, np.ndarray):
+        starts = offsets.astype(np.float64)
+    else:
+        starts = np.array([0.0 if offset is None else to_milliseconds(offset) for offset in offsets],
+                          dtype=np.float64)
+    if len(starts) != len(demands):
+        raise ValueError("offsets must have one entry per demand.")
+    if np.any(starts < 0):
+        raise ValueError("offsets must not be negative.")
+
+    tables = [demand.bounded_rate.limit_table for demand in demands]
+    durations = np.array([np.inf if demand.bounded_rate.max_active_time is None
+                          else demand.bounded_rate.max_active_time.to_milliseconds() for demand in demands])
+
+    if time_interval is None:
+        ends = np.where(np.isfinite(durations), durations, [periods.max() for _, periods in tables])
+        horizon = float(np.max(starts + ends))
+    else:
+        horizon = to_milliseconds(time_interval)
+
+    # Users with identical limits share one expansion of their curve
+    groups = {}
+    for i, (values, periods) in enumerate(tables):
+        key = (values.tobytes(), periods.tobytes()) if not approximate else \
+            (values.tobytes(), periods.tobytes(), durations[i])
+        groups.setdefault(key, []).append(i)
+
+    if approximate:
+        return _aggregate_on_grid(tables, durations, starts, groups, horizon, resolution)
+
+    all_times, all_deltas = [], []
+    for users in groups.values():
+        users = np.asarray(users)
+        values, periods = tables[users[0]]
+        # Each user sends on [0, min(duration, horizon - offset)] of its own clock
+        spans = np.minimum(durations[users], horizon - starts[users])
+        active = spans >= 0
+        users, spans = users[active], spans[active]
+        if not len(users):
+            continue
+
+        times, caps = capacity_jumps(values, periods, np.nextafter(spans.max(), np.inf))
+        deltas = np.diff(caps, prepend=0.0)
+        counts = np.searchsorted(times, spans, side="right")
+
+        first = np.cumsum(counts) - counts
+        idx = np.arange(counts.sum()) - np.repeat(first, counts)
+        all_times.append(times[idx] + np.repeat(starts[users], counts))
+        all_deltas.append(deltas[idx])
+
+    if not all_times:
+        return AggregateDemand(np.zeros(1), np.zeros(1), horizon, exact=True)
+
+    times = np.concatenate(all_times)
+    deltas = np.concatenate(all_deltas)
+    order = np.argsort(times, kind="stable")
+    times, requests = times[order], np.cumsum(deltas[order])
+
+    # Several users can jump at the same instant: keep the last running total
+    last = np.append(times[1:] != times[:-1], True)
+    times, requests = times[last], requests[last]
+    if times[0] > 0:
+        times, requests = np.insert(times, 0, 0.0), np.insert(requests, 0, 0.0)
+    return AggregateDemand(times, requests, horizon, exact=True)
+
+
+def _aggregate_on_grid(tables, durations, starts, groups, horizon: float, resolution: int,
+                       min_group: int = 32, chunk: int = 1 << 20) -> AggregateDemand:
+    grid = np.linspace(0.0, horizon, resolution + 1)
+    step = horizon / resolution if resolution else 1.0
+    bins = np.rint(starts / step).astype(np.int64)
+    requests = np.zeros(resolution + 1)
+
+    # Large (limits, duration) groups: one curve convolved with the histogram of offsets.
+    # Small ones would pay a convolution each, so their users are evaluated on the grid directly.
+    scattered = {}
+    for (values_key, periods_key, duration), users in groups.items():
+        values, periods = tables[users[0]]
+        users = np.asarray(users)
+        if len(users) < min_group:
+            scattered.setdefault((values_key, periods_key), []).append(users)
+            continue
+        curve = capacity_at_ms(values, periods, np.minimum(grid, duration))
+        histogram = np.bincount(bins[users][bins[users] <= resolution], minlength=resolution + 1)
+        requests += np.convolve(histogram, curve)[:resolution + 1]
+
+    for user_lists in scattered.values():
+        users = np.concatenate(user_lists)
+        values, periods = tables[users[0]]
+        per_chunk = max(1, chunk // (resolution + 1))
+        for i in range(0, len(users), per_chunk):
+            block = users[i:i + per_chunk]
+            local = grid[None, :] - (bins[block] * step)[:, None]
+            local = np.minimum(local, durations[block][:, None])
+            capacity = capacity_at_ms(values, periods, np.maximum(local, 0.0))
+            requests += np.where(local >= 0, capacity, 0.0).sum(axis=0)
+
+    return AggregateDemand(grid, requests, horizon, exact=False)
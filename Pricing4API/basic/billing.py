@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate
+from Pricing4API.basic.calendar_windows import CalendarWindows, windows_for
+from Pricing4API.basic.trace_replay import iter_timestamps
+from Pricing4API.utils import to_milliseconds
+
+pd = lazy_import("pandas")
+
+
+class BillingResult:
+    """
+    What each plan of a pricing charges for a demand, billing cycle by billing cycle.
+
+    Every array has shape (n_plans, n_cycles). Cycles start at the origin of the demand
+    and last the billing period of each plan (or follow the calendar, see
+    simulate_billing); plans with a longer billing period have fewer cycles and their
+    remaining columns are NaN.
+    """
+
+    def __init__(self, names: List[str], cycle_ms: np.ndarray, fees: np.ndarray, included: np.ndarray,
+                 overage: np.ndarray, overage_charges: np.ndarray, capped: np.ndarray,
+                 starts_ms: Optional[np.ndarray] = None):
+        self.__names = names
+        self.__cycle_ms = cycle_ms
+        if starts_ms is None:
+            starts_ms = np.arange(fees.shape[1]) * cycle_ms[:, None] if fees.size else np.full(fees.shape, np.nan)
+        self.__starts_ms = starts_ms
+        self.__fees = fees
+        self.__included = included
+        self.__overage = overage
+        self.__overage_charges = overage_charges
+        self.__capped = capped
+
+    @property
+    def names(self) -> List[str]:
+        return self.__names
+
+    @property
+    def cycle_ms(self) -> np.ndarray:
+        """
+        Billing period of each plan, in milliseconds (nominal for calendar cycles).
+        """
+        return self.__cycle_ms
+
+    @property
+    def starts_ms(self) -> np.ndarray:
+        """
+        Start of each cycle, in milliseconds since the origin.
+        """
+        return self.__starts_ms
+
+    @property
+    def fees(self) -> np.ndarray:
+        return self.__fees
+
+    @property
+    def included(self) -> np.ndarray:
+        """
+        Requests covered by the fee in each cycle.
+        """
+        return self.__included
+
+    @property
+    def overage(self) -> np.ndarray:
+        """
+        Requests paid as overage in each cycle.
+        """
+        return self.__overage
+
+    @property
+    def overage_charges(self) -> np.ndarray:
+        return self.__overage_charges
+
+    @property
+    def capped(self) -> np.ndarray:
+        """
+        Requests beyond the overage cap in each cycle, which the plan does not serve.
+        """
+        return self.__capped
+
+    @property
+    def cost(self) -> np.ndarray:
+        """
+        Fee plus overage charges of each cycle.
+        """
+        return self.__fees + self.__overage_charges
+
+    @property
+    def total_cost(self) -> np.ndarray:
+        """
+        Cost of the whole simulation for each plan, shape (n_plans,).
+        """
+        return np.nansum(self.cost, axis=1)
+
+    def cheapest(self, served_only: bool = True) -> Optional[str]:
+        """
+        Name of the plan with the lowest total cost.
+
+        Args:
+            served_only (bool): Only consider plans that serve every request (no capped requests).
+
+        Returns:
+            Optional[str]: The name, or None if no plan qualifies.
+        """
+        total = self.total_cost
+        if served_only:
+            total = np.where(np.nansum(self.__capped, axis=1) > 0, np.inf, total)
+        if not len(total) or not np.isfinite(total.min()):
+            return None
+        return self.__names[int(np.argmin(total))]
+
+    def summary(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "cycles": int(np.count_nonzero(~np.isnan(self.__fees[i]))),
+                "included": float(np.nansum(self.__included[i])),
+                "overage": float(np.nansum(self.__overage[i])),
+                "capped": float(np.nansum(self.__capped[i])),
+                "cost": float(self.total_cost[i]),
+            }
+            for i, name in enumerate(self.__names)
+        }
+
+    def to_dataframe(self):
+        """
+        One row per plan and cycle, with the cycle start in milliseconds.
+        """
+        n_plans, n_cycles = self.__fees.shape
+        keep = ~np.isnan(self.__fees).ravel()
+        cycle = np.tile(np.arange(n_cycles), n_plans)
+        return pd.DataFrame({
+            "plan": np.repeat(np.array(self.__names, dtype=object), n_cycles),
+            "cycle": cycle,
+            "start_ms": self.__starts_ms.ravel(),
+            "fee": self.__fees.ravel(),
+            "included": self.__included.ravel(),
+            "overage": self.__overage.ravel(),
+            "overage_charges": self.__overage_charges.ravel(),
+            "capped": self.__capped.ravel(),
+        })[keep].reset_index(drop=True)
+
+    def __repr__(self):
+        return f"BillingResult({len(self.__names)} plans, {self.__fees.shape[1]} cycles)"
+
+
+class _TraceCounts:
+    """
+    Requests of a trace before every window boundary of some periods, from per-window counts.
+
+    When every fixed period is a whole multiple of a common base of at least a minute,
+    only the windows of the base are counted and the others are read from their running
+    sum. Periods with CalendarWindows in grids are counted on their own boundaries.
+    """
+
+    def __init__(self, periods_ms, grids: Optional[dict] = None):
+        self.__calendars = {p: g for p, g in (grids or {}).items() if isinstance(g, CalendarWindows)}
+        periods = sorted(p for p in periods_ms if p not in self.__calendars)
+        integer = periods and all(float(p).is_integer() for p in periods)
+        base = np.gcd.reduce(np.array(periods, dtype=np.int64)) if integer else 0
+        self.__base = float(base) if base >= 60000 or len(periods) == 1 else None
+        keys = ([self.__base] if self.__base else periods) + list(self.__calendars)
+        self.__counts = {p: np.zeros(0, dtype=np.int64) for p in keys}
+        self.last_ms = -np.inf
+
+    def add(self, t_ms: np.ndarray):
+        for p, counts in self.__counts.items():
+            window = self.__calendars[p].index(t_ms) if p in self.__calendars else (t_ms // p).astype(np.int64)
+            bins = np.bincount(window)
+            if len(bins) > len(counts):
+                counts = np.concatenate((counts, np.zeros(len(bins) - len(counts), dtype=np.int64)))
+            counts[:len(bins)] += bins
+            self.__counts[p] = counts
+        self.last_ms = max(self.last_ms, float(t_ms[-1]))
+
+    def before(self, period_ms: float, n: int) -> np.ndarray:
+        """
+        Requests before the first n window boundaries of period_ms (k * period_ms if fixed).
+        """
+        calendar = period_ms in self.__calendars
+        base = period_ms if calendar else self.__base or period_ms
+        cum = np.concatenate(([0], np.cumsum(self.__counts[base])))
+        k = np.arange(n) * (1 if calendar else int(round(period_ms / base)))
+        return cum[np.minimum(k, len(cum) - 1)].astype(np.float64)
+
+
+def _curve_before(curve, x: np.ndarray) -> np.ndarray:
+    # Requests of the demand strictly before each boundary
+    return np.where(x > 0, curve.at_many(np.nextafter(x, -np.inf)), 0.0)
+
+
+def simulate_billing(
+    pricing,
+    source,
+    horizon: Union[str, TimeDuration, float, None] = None,
+    origin: Optional[float] = None,
+    unit: Optional[TimeUnit] = None,
+    chunk_size: int = 1 << 20,
+    column: Union[int, str] = 0,
+    has_header: bool = True,
+    max_cells: int = 1 << 22,
+    start: Union[datetime, str, None] = None,
+    reset_day: Optional[int] = None,
+    tz: str = "UTC",
+) -> BillingResult:
+    """
+    Bills a demand with every plan of a pricing, billing cycle by billing cycle.
+
+    Each plan charges its fee for every cycle started, covers up to its last quota per
+    window of that quota and charges overage_cost for the requests beyond it, up to the
+    overage cap of its OverageModel; requests beyond the cap are counted as capped.
+    The demand is reduced once to the requests made before every window and cycle
+    boundary, so a trace is read a single time however many plans there are. Plans
+    sharing a quota period and billing period are then billed together as one
+    (plans, cells) array, in blocks of at most max_cells.
+
+    Only the last quota is billed; the rate and the other quotas are not enforced
+    (replay_trace does that for a single plan).
+
+    With a start date, billing periods and quota periods of whole months (1month, 1year...)
+    follow the calendar from it (see CalendarWindows) instead of lasting 30-day months,
+    so multi-year forecasts do not drift against the real resets.
+
+    Args:
+        pricing: A Pricing, or a list of Plans (wrapped in a Pricing).
+        source: A Demand or BoundedRate issuing requests as fast as its limits allow, or
+            request timestamps, sorted, in any form accepted by iter_timestamps.
+        horizon (Union[str, TimeDuration, float, None]): Simulated time, in milliseconds if a
+            number, rounded up to whole cycles of each plan. Defaults to the duration of the
+            Demand or to the last timestamp of the trace.
+        origin (Optional[float]): Start of the subscriptions, as a timestamp in the unit of the
+            trace. Defaults to the first timestamp.
+        unit (Optional[TimeUnit]): Unit of the timestamps. Defaults to milliseconds.
+        chunk_size (int): Timestamps read per block.
+        column (Union[int, str]): CSV column holding the timestamps.
+        has_header (bool): Whether the CSV file starts with a header line.
+        max_cells (int): Largest (plans x cells) block billed at once.
+        start (Union[datetime, str, None]): Calendar date of the origin, for calendar cycles and quotas.
+        reset_day (Optional[int]): Day of the month of the calendar resets. Defaults to the day of start.
+        tz (str): Time zone of start and of the calendar resets.
+
+    Returns:
+        BillingResult: Per-cycle fees, usage and charges of every plan.
+    """
+    from Pricing4API.basic.pricing import Pricing
+
+    if not isinstance(pricing, Pricing):
+        pricing = Pricing(list(pricing))
+    models = pricing.overage_models
+    n_plans = len(models)
+
+    # Ventana de facturación del overage: la última cuota (o el propio ciclo si no hay cuotas)
+    window_ms = np.array([m.quota_period_ms if m.included_quota is not None else m.billing_period_ms
+                          for m in models])
+    cycle_ms = np.array([m.billing_period_ms for m in models])
+    quota = np.array([np.inf if m.included_quota is None else m.included_quota for m in models], dtype=np.float64)
+    cap = np.array([np.inf if m.overage_cap is None else m.overage_cap for m in models], dtype=np.float64)
+    fee = np.array([float(m.plan.cost or 0.0) for m in models])
+    price = np.array([float(m.plan.overage_cost or 0.0) for m in models])
+    # Bordes de ventana y de ciclo de cada periodo: múltiplos del periodo o fechas del calendario
+    grids = {p: windows_for(p, start, reset_day, tz) for p in set(window_ms.tolist()) | set(cycle_ms.tolist())}
+
+    demand = getattr(source, "bounded_rate", source)
+    if isinstance(demand, BoundedRate):
+        curve = demand.capacity_curve()
+        if horizon is None:
+            if demand.max_active_time is None:
+                raise ValueError("A horizon is needed for a demand without duration.")
+            horizon = demand.max_active_time
+        before = lambda p, n: _curve_before(curve, grids[p].edges(n))
+    else:
+        counts = _TraceCounts(grids, grids)
+        origin_ms = None if origin is None else origin * (1.0 if unit is None else unit.to_milliseconds())
+        last = -np.inf
+        for chunk in iter_timestamps(source, chunk_size, unit, column, has_header):
+            if not len(chunk):
+                continue
+            if chunk[0] < last or np.any(chunk[1:] < chunk[:-1]):
+                raise ValueError("Timestamps must be sorted.")
+            last = chunk[-1]
+            if origin_ms is None:
+                origin_ms = float(chunk[0])
+            t = chunk - origin_ms
+            if t[0] < 0:
+                raise ValueError("Timestamps before the origin.")
+            counts.add(t)
+        before = counts.before
+
+    if horizon is None:
+        # Hasta el ciclo que contiene la última petición
+        n_cycles = np.array([int(grids[c].index(max(counts.last_ms, 0.0))) + 1 for c in cycle_ms], dtype=np.int64)
+    else:
+        n_cycles = np.array([grids[c].count(to_milliseconds(horizon)) for c in cycle_ms], dtype=np.int64)
+    width = int(n_cycles.max()) if n_plans else 0
+    shape = (n_plans, width)
+    fees = np.full(shape, np.nan)
+    included = np.full(shape, np.nan)
+    overage = np.full(shape, np.nan)
+    capped = np.full(shape, np.nan)
+    starts_ms = np.full(shape, np.nan)
+
+    groups: Dict[tuple, List[int]] = {}
+    for i in range(n_plans):
+        groups.setdefault((window_ms[i], cycle_ms[i], int(n_cycles[i])), []).append(i)
+
+    for (w, c, n), members in groups.items():
+        windows, cycles = grids[w], grids[c]
+        cycle_edges = cycles.edges(n + 1)
+        end = cycle_edges[-1]
+        n_windows = windows.count(end) + 1
+        # Celdas: todos los bordes de ventana y de ciclo hasta el final del último ciclo
+        x = np.concatenate((windows.edges(n_windows), cycle_edges))
+        n_x = np.concatenate((before(w, n_windows), before(c, n + 1)))
+        order = np.argsort(x, kind="stable")
+        x, n_x = x[order], n_x[order]
+        keep = np.concatenate(([True], x[1:] != x[:-1])) & (x <= end)
+        x, n_x = x[keep], n_x[keep]
+
+        starts = x[:-1]
+        window = windows.index(starts)
+        window_before = before(w, int(window[-1]) + 1)[window]
+        # Peticiones desde el inicio de la ventana, al final y al principio de cada celda
+        used_end = n_x[1:] - window_before
+        used_start = n_x[:-1] - window_before
+        cycle_starts = np.flatnonzero(np.concatenate(([True], np.diff(cycles.index(starts)) != 0)))
+
+        members = np.array(members)
+        block = max(1, max_cells // max(len(starts), 1))
+        for lo in range(0, len(members), block):
+            idx = members[lo:lo + block]
+            q, m = quota[idx, None], cap[idx, None]
+            inc = np.minimum(used_end, q) - np.minimum(used_start, q)
+            served = np.minimum(used_end, m) - np.minimum(used_start, m)
+            total = used_end - used_start
+            included[idx, :n] = np.add.reduceat(inc, cycle_starts, axis=1)
+            overage[idx, :n] = np.add.reduceat(served - inc, cycle_starts, axis=1)
+            capped[idx, :n] = np.add.reduceat(np.broadcast_to(total - served, inc.shape), cycle_starts, axis=1)
+            fees[idx, :n] = fee[idx, None]
+            starts_ms[idx, :n] = cycle_edges[:-1]
+
+    return BillingResult([m.plan.name for m in models], cycle_ms, fees, included, overage,
+                         overage * price[:, None], capped, starts_ms)
@@ -1,13 +1,19 @@
-from concurrent.futures import ThreadPoolExecutor
+from __future__ import annotations
+
 from typing import List, Union, Optional, Tuple
 
 import numpy as np
-import plotly.graph_objects as go
-from matplotlib.colors import to_rgba
 
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.utils import parse_time_string_to_duration, format_time_with_unit, select_best_time_unit
 from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.capacity_kernels import (capacity_at_scalar, capacity_during_ms, inflection_points,
+                                                limit_table, validate_quota_tables)
+
+go = lazy_import("plotly.graph_objects")
+mcolors = lazy_import("matplotlib.colors")
 
 class Rate:
     
@@ -166,31 +172,24 @@ class Rate:
 
         t_milliseconds = int(time_interval.to_milliseconds())
         step = int(self.consumption_period.to_milliseconds())
-        defined_t_values_ms = list(range(0, t_milliseconds + 1, step))
+        defined_t_values_ms = CapacityPlotHelper.sample_times_ms(t_milliseconds, step)
 
-        # Ensure the last point is included
-        if defined_t_values_ms[-1] != t_milliseconds:
-            defined_t_values_ms.append(t_milliseconds)
-
-        defined_capacity_values = [
-            self.capacity_at(TimeDuration(t, TimeUnit.MILLISECOND)) for t in defined_t_values_ms
-        ]
+        value, period = self.consumption_unit, self.consumption_period.to_milliseconds()
+        defined_capacity_values = value * np.floor((defined_t_values_ms / period) + 1)
 
         if debug:
-            return list(zip(defined_t_values_ms, defined_capacity_values))
+            return list(zip(defined_t_values_ms.tolist(), defined_capacity_values.tolist()))
 
-        original_times_in_specified_unit = [
-            t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-        ]
+        original_times_in_specified_unit = defined_t_values_ms / time_interval.unit.to_milliseconds()
         x_label = f"Time ({time_interval.unit.value})"
 
         fig = go.Figure()
 
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'green')[:3]]))},0.3)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'green')[:3]]))},0.3)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times_in_specified_unit,
-            y=defined_capacity_values,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times_in_specified_unit,
+            defined_capacity_values,
             mode='lines',
             line=dict(color=color or 'green', shape='hv', width=1.3),
             fill='tonexty',
@@ -245,6 +244,21 @@ class Rate:
         # Return the difference in capacity
         return capacity_at_end - capacity_at_start
 
+    def capacity_during_many(self, starts_ms: np.ndarray, ends_ms: np.ndarray) -> np.ndarray:
+        """
+        capacity_during for many intervals at once, given in milliseconds.
+
+        Args:
+            starts_ms (np.ndarray): Start of each interval.
+            ends_ms (np.ndarray): End of each interval, greater than its start.
+
+        Returns:
+            np.ndarray: Capacity during each interval.
+        """
+        values = np.array([self.consumption_unit], dtype=np.float64)
+        periods = np.array([self.consumption_period.to_milliseconds()])
+        return capacity_during_ms(values, periods, starts_ms, ends_ms)
+
     def min_time(self, capacity_goal: int, return_unit: Optional[TimeUnit] = None, display=True) -> Union[str, TimeDuration]:
         """
         Calculates the minimum time to reach a capacity goal for the Rate.
@@ -386,32 +400,21 @@ class Quota:
 
         t_milliseconds = int(time_interval.to_milliseconds())
         step = int(self.consumption_period.to_milliseconds())
-        defined_t_values_ms = list(range(0, t_milliseconds + 1, step))
-
-        # Ensure at least two points if only one exists and t > 0
-        if len(defined_t_values_ms) == 1 and t_milliseconds > 0:
-            defined_t_values_ms.append(t_milliseconds)
+        defined_t_values_ms = CapacityPlotHelper.sample_times_ms(t_milliseconds, step)
 
-        # Ensure the last point is included
-        if defined_t_values_ms[-1] != t_milliseconds:
-            defined_t_values_ms.append(t_milliseconds)
-
-        defined_capacity_values = [
-            self.capacity_at(TimeDuration(t, TimeUnit.MILLISECOND)) for t in defined_t_values_ms
-        ]
+        value, period = self.consumption_unit, self.consumption_period.to_milliseconds()
+        defined_capacity_values = value * np.floor((defined_t_values_ms / period) + 1)
 
-        original_times_in_specified_unit = [
-            t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-        ]
+        original_times_in_specified_unit = defined_t_values_ms / time_interval.unit.to_milliseconds()
         x_label = f"Time ({time_interval.unit.value})"
 
         fig = go.Figure()
 
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'blue')[:3]]))},0.3)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'blue')[:3]]))},0.3)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times_in_specified_unit,
-            y=defined_capacity_values,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times_in_specified_unit,
+            defined_capacity_values,
             mode='lines',
             line=dict(color=color or 'blue', shape='hv', width=1.3),
             fill='tonexty',
@@ -528,32 +531,174 @@ class BoundedRate:
             quotas = [quota] if not isinstance(quota, list) else quota
             valid_quotas = []
 
+            # Tabla (valores, periodos en ms) de los límites ya aceptados, la rate primero
+            values = [rate.consumption_unit]
+            periods = [rate.consumption_period.to_milliseconds()]
+
             for q in quotas:
                 # Validación rápida: que sea mayor que la rate y no supere el máximo posible
                 if q.consumption_unit <= rate.consumption_unit:
                     continue
-                rate_capacity = rate.consumption_unit * (
-                    q.consumption_period.to_milliseconds() / rate.consumption_period.to_milliseconds()
-                )
+                q_period = q.consumption_period.to_milliseconds()
+                rate_capacity = rate.consumption_unit * (q_period / periods[0])
                 if q.consumption_unit > rate_capacity:
                     continue
 
-                # Simular capacidad hasta el momento de esa cuota
-                temp_limits = [rate] + valid_quotas
-                temp_br = object.__new__(BoundedRate)
-                temp_br.rate = rate
-                temp_br.quota = valid_quotas.copy()
-                temp_br.limits = temp_limits
-                capacity = temp_br.capacity_at(q.consumption_period)
+                # Capacidad al final del periodo de la cuota con los límites ya aceptados
+                capacity = capacity_at_scalar(values, periods, q_period)
 
                 if capacity >= q.consumption_unit:
                     valid_quotas.append(q)
                     self.limits.append(q)
+                    values.append(q.consumption_unit)
+                    periods.append(q_period)
                 else:
                     print(f"[WARNING] Quota omitted as unreachable: {q}")
 
             self.quota = valid_quotas
         self.max_active_time = max_active_time
+
+    @classmethod
+    def _from_validated(cls, rate: Rate, quotas: List[Quota], max_active_time: Optional[TimeDuration] = None,
+                        table: Optional[tuple] = None) -> 'BoundedRate':
+        """
+        Builds a BoundedRate from quotas that are already known to be valid for rate, skipping validation.
+        """
+        br = object.__new__(cls)
+        br.rate = rate
+        br.quota = list(quotas)
+        br.limits = [rate] + br.quota
+        br.max_active_time = max_active_time
+        if table is not None:
+            br._table, br._table_key = table, tuple(map(id, br.limits))
+        return br
+
+    @property
+    def limit_table(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (values, periods in milliseconds) arrays of self.limits, rate first.
+
+        Built on first access and shared with later copies; rebuilt if the limits list changes.
+        """
+        key = tuple(map(id, self.limits))
+        if getattr(self, "_table_key", None) != key:
+            self._table = limit_table(self.limits)
+            self._table_key = key
+        return self._table
+
+    def capacity_curve(self, name: Optional[str] = None) -> CapacityCurve:
+        """
+        Capacity of this BoundedRate as a CapacityCurve: one period of its largest limit
+        plus the increment per period, flat after max_active_time if there is one.
+
+        Args:
+            name (Optional[str]): Label of the curve in plots.
+
+        Returns:
+            CapacityCurve: The compressed curve.
+        """
+        values, periods = self.limit_table
+        active_ms = np.inf if self.max_active_time is None else self.max_active_time.to_milliseconds()
+        return CapacityCurve.from_limit_table(values, periods, active_ms, name)
+
+    def copy(self) -> 'BoundedRate':
+        """
+        Returns an independent BoundedRate with the same limits, without validating them again.
+
+        Returns:
+            BoundedRate: The copy. Its limits list can be modified without affecting this one.
+        """
+        table = self._table if getattr(self, "_table_key", None) == tuple(map(id, self.limits)) else None
+        return BoundedRate._from_validated(self.rate, self.quota, self.max_active_time, table)
+
+    def scaled(self, n: int) -> 'BoundedRate':
+        """
+        Returns the BoundedRate of n independent users of this one: every limit value multiplied by n.
+
+        The capacity of the scaled limits is n times the original one at every instant,
+        so the quotas that were reachable stay reachable and no validation is needed.
+
+        Args:
+            n (int): Number of users.
+
+        Returns:
+            BoundedRate: The scaled BoundedRate.
+        """
+        rate = Rate(self.rate.consumption_unit * n, self.rate.consumption_period)
+        quotas = [Quota(q.consumption_unit * n, q.consumption_period) for q in self.quota]
+        values, periods = self.limit_table
+        return BoundedRate._from_validated(rate, quotas, self.max_active_time, (values * n, periods))
+
+    @classmethod
+    def bulk(cls, rates: List[Rate], quotas: Optional[List[Union[Quota, List[Quota], None]]] = None,
+             max_active_times: Optional[List[Optional[TimeDuration]]] = None) -> List['BoundedRate']:
+        """
+        Builds many BoundedRates at once, validating all their quotas with array operations.
+
+        Equivalent to [BoundedRate(r, q, m) for r, q, m in zip(rates, quotas, max_active_times)],
+        but the quotas are validated level by level for every bounded rate together. Instead of
+        one warning per unreachable quota, a single summary warning is printed.
+
+        Args:
+            rates (List[Rate]): One rate per bounded rate.
+            quotas (Optional[List[Union[Quota, List[Quota], None]]]): Quotas of each bounded rate.
+            max_active_times (Optional[List[Optional[TimeDuration]]]): Max active time of each bounded rate.
+
+        Returns:
+            List[BoundedRate]: The bounded rates, in the same order as rates.
+        """
+        n = len(rates)
+        if quotas is None:
+            quotas = [None] * n
+        if max_active_times is None:
+            max_active_times = [None] * n
+        if len(quotas) != n or len(max_active_times) != n:
+            raise ValueError("rates, quotas and max_active_times must have the same length.")
+
+        quota_lists = [[] if not q else (q if isinstance(q, list) else [q]) for q in quotas]
+        depth = 1 + max((len(q) for q in quota_lists), default=0)
+
+        # Filas rellenadas hasta depth; el factor a ms de cada unidad se calcula una sola vez
+        unit_ms = {}
+
+        def _ms(duration):
+            factor = unit_ms.get(id(duration.unit))
+            if factor is None:
+                factor = unit_ms[id(duration.unit)] = duration.unit.to_milliseconds()
+            return duration.value * factor
+
+        flat_values, flat_periods, counts = [], [], []
+        for rate, qs in zip(rates, quota_lists):
+            flat_values.append(rate.consumption_unit)
+            flat_periods.append(_ms(rate.consumption_period))
+            for q in qs:
+                flat_values.append(q.consumption_unit)
+                flat_periods.append(_ms(q.consumption_period))
+            counts.append(len(qs) + 1)
+
+        counts = np.asarray(counts)
+        rows = np.repeat(np.arange(n), counts)
+        cols = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        values = np.zeros((n, depth))
+        periods = np.ones((n, depth))
+        present = np.zeros((n, depth), dtype=bool)
+        values[rows, cols] = flat_values
+        periods[rows, cols] = flat_periods
+        present[rows, cols] = True
+
+        accepted, unreachable = validate_quota_tables(values, periods, present)
+
+        omitted = int(unreachable.sum())
+        if omitted:
+            print(f"[WARNING] {omitted} quotas omitted as unreachable")
+
+        complete = (accepted.sum(axis=1) == counts).tolist()
+        brs = []
+        for i, (rate, qs, max_active_time) in enumerate(zip(rates, quota_lists, max_active_times)):
+            if not complete[i]:
+                qs = [q for j, q in enumerate(qs, start=1) if accepted[i, j]]
+            brs.append(cls._from_validated(rate, qs, max_active_time))
+        return brs
             
     def _effective_time(self, time_interval: TimeDuration) -> TimeDuration:
         """
@@ -687,6 +832,24 @@ class BoundedRate:
         # Return the difference in capacity
         return capacity_at_end - capacity_at_start
 
+    def capacity_during_many(self, starts_ms: np.ndarray, ends_ms: np.ndarray) -> np.ndarray:
+        """
+        capacity_during for many intervals at once, given in milliseconds.
+
+        All intervals are answered by one vectorized evaluation of the limit table.
+        The capacity stops growing at max_active_time, if there is one.
+
+        Args:
+            starts_ms (np.ndarray): Start of each interval.
+            ends_ms (np.ndarray): End of each interval, greater than its start.
+
+        Returns:
+            np.ndarray: Capacity during each interval.
+        """
+        values, periods = self.limit_table
+        active_ms = np.inf if self.max_active_time is None else self.max_active_time.to_milliseconds()
+        return capacity_during_ms(values, periods, starts_ms, ends_ms, active_ms)
+
     def show_available_capacity_curve(self, time_interval: TimeDuration, debug: bool = False, color=None, return_fig=False) -> None:
     # 1) recortamos el intervalo según max_active_time
         if isinstance(time_interval, str):
@@ -696,36 +859,21 @@ class BoundedRate:
 
         t_milliseconds = int(time_interval.to_milliseconds())
         step = int(self.limits[0].consumption_period.to_milliseconds())
-        defined_t_values_ms = list(range(0, t_milliseconds + 1, step))
-
-        if len(defined_t_values_ms) == 1 and t_milliseconds > 0:
-            defined_t_values_ms.append(t_milliseconds)
-        if defined_t_values_ms[-1] != t_milliseconds:
-            defined_t_values_ms.append(t_milliseconds)
+        defined_t_values_ms = CapacityPlotHelper.sample_times_ms(t_milliseconds, step)
 
-        with ThreadPoolExecutor() as executor:
-            defined_capacity_values = list(
-                executor.map(
-                    lambda t: self.capacity_at(
-                        TimeDuration(t, TimeUnit.MILLISECOND)
-                    ),
-                    defined_t_values_ms
-                )
-            )
+        defined_capacity_values = self.capacity_curve().at_many(defined_t_values_ms)
 
         if debug:
-            return list(zip(defined_t_values_ms, defined_capacity_values))
+            return list(zip(defined_t_values_ms.tolist(), defined_capacity_values.tolist()))
 
-        original_times = [
-            t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-        ]
+        original_times = defined_t_values_ms / time_interval.unit.to_milliseconds()
 
         fig = go.Figure()
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'green')[:3]]))},0.3)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'green')[:3]]))},0.3)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times,
-            y=defined_capacity_values,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times,
+            defined_capacity_values,
             mode='lines',
             line=dict(color=color or 'green', shape='hv', width=1.3),
             fill='tonexty',
@@ -760,29 +908,22 @@ class BoundedRate:
         step = int(self.limits[0].consumption_period.to_milliseconds())
         quota_frequency_ms = self.limits[-1].consumption_period.to_milliseconds()
 
-        defined_t_values_ms = list(range(0, t_milliseconds + 1, step))
-        if defined_t_values_ms[-1] != t_milliseconds:
-            defined_t_values_ms.append(t_milliseconds)
+        defined_t_values_ms = CapacityPlotHelper.sample_times_ms(t_milliseconds, step)
 
-        defined_capacity_values = []
-        for t in defined_t_values_ms:
-            period_time = t % quota_frequency_ms
-            capacity = self.capacity_at(TimeDuration(period_time, TimeUnit.MILLISECOND))
-            defined_capacity_values.append(capacity)
+        period_times = defined_t_values_ms.astype(np.float64) % quota_frequency_ms
+        defined_capacity_values = self.capacity_curve().at_many(period_times)
 
         if debug:
-            return list(zip(defined_t_values_ms, defined_capacity_values))
+            return list(zip(defined_t_values_ms.tolist(), defined_capacity_values.tolist()))
 
-        original_times = [
-            t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-        ]
+        original_times = defined_t_values_ms / time_interval.unit.to_milliseconds()
 
         fig = go.Figure()
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'blue')[:3]]))},0.3)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'blue')[:3]]))},0.3)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times,
-            y=defined_capacity_values,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times,
+            defined_capacity_values,
             mode='lines',
             line=dict(color=color or 'blue', shape='hv', width=1.3),
             fill='tonexty',
@@ -970,97 +1111,45 @@ class BoundedRate:
 
         return puntos
 
-    def calculate_inflection_points(self, time_interval: Union[str, TimeDuration]) -> List[Tuple[float, float]]:
+    def inflection_points(self, time_interval: Union[str, TimeDuration]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Returns a list of (t_ms, capacity) inflection points for each quota window,
-        up to the given time_interval, pruning redundant plateau points.
-        Always guarantees at least [(0, cap0), (sim_ms, cap_sim)].
+        Inflection points of the capacity curve as arrays, sorted by time.
+
+        Every window of every quota up to time_interval contributes its start, the
+        instant it is exhausted and the end of its plateau, all generated at once by
+        capacity_kernels.inflection_points. Repeated and plateau points are pruned and
+        (0, cap0), (sim_ms, cap_sim) are always present.
+
+        Args:
+            time_interval (Union[str, TimeDuration]): Length of the curve.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (t_ms, capacity) of the points.
         """
-        # 1) normalize input
         if isinstance(time_interval, str):
             time_interval = parse_time_string_to_duration(time_interval)
         sim_ms = int(time_interval.to_milliseconds())
 
-        # 2) only quotas (skip the base Rate)
-        quotas = self.limits[1:]
-        if not quotas:
-            # no quotas → straight line from 0 to sim_ms
-            return [
-                (0.0, self.capacity_at("0s")),
-                (sim_ms, self.capacity_at(TimeDuration(sim_ms, TimeUnit.MILLISECOND)))
-            ]
-
-        # 3) exhaustion thresholds per quota
-        thresholds = self.quota_exhaustion_threshold(display=False)
+        thresholds = self.quota_exhaustion_threshold(display=False) if len(self.limits) > 1 else []
         if not isinstance(thresholds, list):
             thresholds = [thresholds]
-
-        points: List[Tuple[float, float]] = []
-
-        # 4) for each quota generate start→exhaustion→plateau segments
-        for idx, quota in enumerate(quotas):
-            period_ms = int(quota.consumption_period.to_milliseconds())
-            t_ast = thresholds[idx]
+        thresholds_ms = []
+        for t_ast in thresholds:
             if isinstance(t_ast, str):
                 t_ast = parse_time_string_to_duration(t_ast)
-            t_ast_ms = int(t_ast.to_milliseconds())
-
-            k = 0
-            while True:
-                start_ms = k * period_ms
-                if start_ms >= sim_ms:
-                    break
-
-                # 4a) start of window
-                points.append((start_ms,
-                               self.capacity_at(TimeDuration(start_ms, TimeUnit.MILLISECOND))))
-                # 4b) exhaustion point (clamped to sim_ms)
-                agot_ms = min(start_ms + t_ast_ms, sim_ms)
-                points.append((agot_ms,
-                               self.capacity_at(TimeDuration(agot_ms, TimeUnit.MILLISECOND))))
-                # 4c) plateau until window end
-                fin_ms = min((k + 1) * period_ms, sim_ms)
-                points.append((fin_ms,
-                               self.capacity_at(TimeDuration(agot_ms, TimeUnit.MILLISECOND))))
-
-                if fin_ms >= sim_ms:
-                    break
-                k += 1
-
-        # 5) ensure (0, cap0) if missing
-        if not any(t == 0 for t, _ in points):
-            points.append((0.0, self.capacity_at("0s")))
-
-        # 6) ensure (sim_ms, cap_sim) if missing
-        final_cap = self.capacity_at(TimeDuration(sim_ms, TimeUnit.MILLISECOND))
-        if not any(t == sim_ms for t, _ in points):
-            points.append((sim_ms, final_cap))
-        
-        # 6) ¡SIEMPRE! forzamos el punto final con capacity_at(sim_ms)
-        final_cap = self.capacity_at(TimeDuration(sim_ms, TimeUnit.MILLISECOND))   
-        points.append((sim_ms, final_cap))
-
-        # 7) dedupe and sort by time for pruning
-        time_sorted = sorted({(t, c) for t, c in points}, key=lambda x: x[0])
-
-        # 8) prune plateau points: drop any point whose capacity equals
-        #    both the previous and next capacity
-        def _prune_plateaus(pts: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
-            if len(pts) <= 2:
-                return pts[:]
-            pruned = [pts[0]]
-            for prev, curr, nxt in zip(pts, pts[1:], pts[2:]):
-                if prev[1] == curr[1] == nxt[1]:
-                    continue
-                pruned.append(curr)
-            pruned.append(pts[-1])
-            return pruned
+            thresholds_ms.append(int(t_ast.to_milliseconds()))
 
-        pruned = _prune_plateaus(time_sorted)
+        values, periods = self.limit_table
+        return inflection_points(values, periods, thresholds_ms, sim_ms)
 
-        # 9) final sort by time (para que siempre vayan de izquierda a derecha)
-        result = sorted(pruned, key=lambda x: (x[1], x[0]))
-        return result
+    def calculate_inflection_points(self, time_interval: Union[str, TimeDuration]) -> List[Tuple[float, float]]:
+        """
+        Returns a list of (t_ms, capacity) inflection points for each quota window,
+        up to the given time_interval, pruning redundant plateau points.
+        Always guarantees at least [(0, cap0), (sim_ms, cap_sim)].
+        """
+        t_ms, capacity = self.inflection_points(time_interval)
+        return list(zip(t_ms.tolist(), capacity.tolist()))
 
 
     
@@ -1079,19 +1168,17 @@ class BoundedRate:
             unit_ms = time_interval.unit.to_milliseconds()
 
             # 2) obtengo y preparo los puntos
-            raw_pts = self.calculate_inflection_points(time_interval)
-            
             if debug:
-                return raw_pts
-                
-            xs = [t / unit_ms for t, _ in raw_pts]
-            ys = [c for _, c in raw_pts]
-            tooltip_labels = [CapacityPlotHelper.format_time_tooltip(t/1000) for t, _ in raw_pts]
+                return self.calculate_inflection_points(time_interval)
+            t_ms, ys = self.inflection_points(time_interval)
+
+            xs = t_ms / unit_ms
+            tooltip_labels = [CapacityPlotHelper.format_time_tooltip(t / 1000) for t in t_ms.tolist()]
 
             fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=xs,
-                y=ys,
+            fig.add_trace(CapacityPlotHelper.line_trace(
+                xs,
+                ys,
                 customdata=tooltip_labels,
                 hovertemplate="Time: %{customdata}<br>Capacity: %{y}<extra></extra>",
                 mode="lines",
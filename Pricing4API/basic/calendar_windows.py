@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime, time
+from typing import List, Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, limit_table
+from Pricing4API.utils import to_milliseconds
+
+MONTH_MS = TimeUnit.MONTH.to_milliseconds()
+
+# Capacidad justo antes del final de una ventana: los periodos son de milisegundos como poco
+_BEFORE_MS = 1e-3
+
+
+def calendar_months(period_ms: float) -> Optional[int]:
+    """
+    Whole number of nominal 30-day months in period_ms (1month, 3month, 1year...), or None.
+    """
+    months = period_ms / MONTH_MS
+    return int(round(months)) if months >= 1 and abs(months - round(months)) < 1e-9 else None
+
+
+def _datetime(value: Union[datetime, str], zone: ZoneInfo) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=zone) if value.tzinfo is None else value.astimezone(zone)
+
+
+class FixedWindows:
+    """
+    Windows of a fixed length from the origin, with the interface of CalendarWindows.
+    """
+
+    def __init__(self, period_ms: float):
+        self.__period_ms = float(period_ms)
+
+    @property
+    def period_ms(self) -> float:
+        return self.__period_ms
+
+    def edges(self, n: int) -> np.ndarray:
+        return np.arange(n) * self.__period_ms
+
+    def index(self, t_ms) -> np.ndarray:
+        return np.floor(np.asarray(t_ms, dtype=np.float64) / self.__period_ms).astype(np.int64)
+
+    def count(self, end_ms: float) -> int:
+        """
+        Windows needed to cover [0, end_ms), at least one.
+        """
+        return max(int(np.ceil(end_ms / self.__period_ms)), 1)
+
+    def __repr__(self):
+        return f"FixedWindows({self.__period_ms:g} ms)"
+
+
+class CalendarWindows:
+    """
+    Windows of whole calendar months that reset on a day of the month in a time zone.
+
+    Their boundaries, in milliseconds since the origin, are kept in an array that grows
+    on demand, so the window of many instants is a single searchsorted. The first window
+    runs from the origin to the first reset after it; a reset day missing in a shorter
+    month falls on its last day.
+
+    Args:
+        origin (Union[datetime, str]): Start of the analysis (naive or ISO strings are read in tz).
+        months (int): Months per window: 1 monthly, 3 quarterly, 12 yearly.
+        reset_day (Optional[int]): Day of the month of the resets, at midnight. Defaults to the
+            day and time of the origin (anniversary resets).
+        tz (str): IANA time zone of the resets.
+    """
+
+    def __init__(self, origin: Union[datetime, str], months: int = 1, reset_day: Optional[int] = None, tz: str = "UTC"):
+        if months < 1:
+            raise ValueError("A calendar window lasts one month at least")
+        if reset_day is not None and not 1 <= reset_day <= 31:
+            raise ValueError(f"reset_day must be between 1 and 31, got {reset_day}")
+        self.__zone = ZoneInfo(tz)
+        self.__origin = _datetime(origin, self.__zone)
+        self.__months = months
+        self.__reset_day = reset_day
+        self.__day = self.__origin.day if reset_day is None else reset_day
+        self.__time = self.__origin.timetz().replace(tzinfo=None) if reset_day is None else time(0)
+        # Primer reinicio no posterior al origen
+        self.__first = 0 if self._reset(0) <= self.__origin else -1
+        self.__boundaries = np.zeros(0)
+        self._grow(64)
+
+    @property
+    def origin(self) -> datetime:
+        return self.__origin
+
+    @property
+    def months(self) -> int:
+        return self.__months
+
+    @property
+    def reset_day(self) -> Optional[int]:
+        return self.__reset_day
+
+    @property
+    def tz(self) -> str:
+        return self.__zone.key
+
+    @property
+    def boundaries_ms(self) -> np.ndarray:
+        """
+        Boundaries computed so far; the first one is the origin (0).
+        """
+        return self.__boundaries.copy()
+
+    def _reset(self, k: int) -> datetime:
+        year, month = divmod(self.__origin.month - 1 + k * self.__months, 12)
+        year += self.__origin.year
+        day = min(self.__day, calendar.monthrange(year, month + 1)[1])
+        return datetime.combine(date(year, month + 1, day), self.__time, tzinfo=self.__zone)
+
+    def _grow(self, n: int):
+        # timestamp() y no la resta de fechas: con la misma zona la resta ignora los cambios de hora
+        origin = self.__origin.timestamp()
+        new = [(self._reset(self.__first + k).timestamp() - origin) * 1000.0
+               for k in range(len(self.__boundaries), n)]
+        self.__boundaries = np.concatenate((self.__boundaries, new))
+        self.__boundaries[0] = 0.0
+
+    def _cover(self, t_ms: float):
+        while self.__boundaries[-1] <= t_ms:
+            self._grow(2 * len(self.__boundaries))
+
+    def edges(self, n: int) -> np.ndarray:
+        """
+        Start of the first n windows, in milliseconds since the origin.
+        """
+        if n > len(self.__boundaries):
+            self._grow(n)
+        return self.__boundaries[:n].copy()
+
+    def index(self, t_ms) -> np.ndarray:
+        """
+        Window of each instant (milliseconds since the origin, not before it).
+        """
+        t = np.asarray(t_ms, dtype=np.float64)
+        if t.size:
+            self._cover(float(t.max()))
+        return np.searchsorted(self.__boundaries, t, side="right") - 1
+
+    def count(self, end_ms: float) -> int:
+        """
+        Windows needed to cover [0, end_ms), at least one.
+        """
+        self._cover(end_ms)
+        return max(int(np.searchsorted(self.__boundaries, end_ms, side="left")), 1)
+
+    def drift_ms(self, n: int) -> np.ndarray:
+        """
+        How far each of the first n resets is from the one of nominal 30-day months.
+        """
+        return self.edges(n) - np.arange(n) * self.__months * MONTH_MS
+
+    def __repr__(self):
+        return (f"CalendarWindows({self.__origin.isoformat()}, months={self.__months}, "
+                f"reset_day={self.__reset_day}, tz={self.tz!r})")
+
+
+def windows_for(period_ms: float, origin: Union[datetime, str, None] = None, reset_day: Optional[int] = None,
+                tz: str = "UTC") -> Union[FixedWindows, CalendarWindows]:
+    """
+    CalendarWindows for a period of whole months when there is an origin date, else FixedWindows.
+    """
+    months = calendar_months(period_ms)
+    if origin is None or months is None:
+        return FixedWindows(period_ms)
+    return CalendarWindows(origin, months, reset_day, tz)
+
+
+class CalendarQuota(Quota):
+    """
+    A Quota over calendar months: a period of whole months ("1month", "3month", "1year")
+    that resets on reset_day in tz instead of every 30 days.
+    """
+
+    def __init__(self, consumption_unit: int, consumption_period: Union[str, TimeDuration] = "1month",
+                 reset_day: Optional[int] = None, tz: str = "UTC"):
+        super().__init__(consumption_unit, consumption_period)
+        months = calendar_months(self.consumption_period.to_milliseconds())
+        if months is None:
+            raise ValueError(f"A calendar quota needs a period of whole months, got {self.consumption_period}")
+        self.__months = months
+        self.__reset_day = reset_day
+        self.__tz = tz
+
+    @property
+    def months(self) -> int:
+        return self.__months
+
+    @property
+    def reset_day(self) -> Optional[int]:
+        return self.__reset_day
+
+    @property
+    def tz(self) -> str:
+        return self.__tz
+
+    @property
+    def window(self) -> str:
+        return "calendar"
+
+    def windows(self, origin: Union[datetime, str]) -> CalendarWindows:
+        return CalendarWindows(origin, self.__months, self.__reset_day, self.__tz)
+
+    def __str__(self):
+        return f"CalendarQuota({self.consumption_unit}, {self.consumption_period}, {self.__reset_day}, {self.__tz!r})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def calendar_capacity_at(limits: Sequence, origin: Union[datetime, str], t_ms) -> np.ndarray:
+    """
+    Accumulated capacity of fixed limits and CalendarQuotas at instants in ms since origin.
+
+    The fixed limits restart at every reset of the shortest calendar quota, as the inner
+    levels of the nested kernel restart at the window above, and every calendar quota
+    caps what the shorter levels allow between two of its resets. Each level is a
+    cumulative sum over its windows, evaluated with searchsorted on its boundaries.
+
+    Args:
+        limits (Sequence): Rate, Quota, Limit and CalendarQuota objects.
+        origin (Union[datetime, str]): Calendar date of t = 0.
+        t_ms: Instants, in milliseconds since origin.
+
+    Returns:
+        np.ndarray: Capacity at each instant.
+
+    Raises:
+        ValueError: If a fixed period is not shorter than every calendar period, or the
+            resets of a calendar quota are not resets of the shorter ones.
+    """
+    t = np.asarray(t_ms, dtype=np.float64)
+    calendars = sorted((limit for limit in limits if isinstance(limit, CalendarQuota)), key=lambda q: q.months)
+    fixed = [limit for limit in limits if not isinstance(limit, CalendarQuota)]
+    values, periods = limit_table(fixed) if fixed else (np.zeros(0), np.zeros(0))
+    order = np.argsort(periods, kind="stable")
+    values, periods = values[order], periods[order]
+    if not calendars:
+        return capacity_at_ms(values, periods, t)
+    if len(periods) and periods[-1] >= calendars[0].months * MONTH_MS:
+        raise ValueError("Fixed periods must be shorter than the calendar ones")
+
+    def inner(x):
+        return capacity_at_ms(values, periods, x) if len(values) else np.full(np.shape(x), np.inf)
+
+    # Bordes de cada nivel hasta el final de la ventana más larga que contiene el último instante
+    windows = [quota.windows(origin) for quota in calendars]
+    top = windows[-1]
+    horizon = float(top.edges(int(top.index(t.max(initial=0.0))) + 2)[-1])
+    edges = [w.edges(w.count(horizon) + 1) for w in windows]
+
+    # Nivel más corto: límites fijos reiniciados en cada borde
+    v = calendars[0].consumption_unit
+    cum = np.concatenate(([0.0], np.cumsum(np.minimum(v, inner(np.diff(edges[0]) - _BEFORE_MS)))))
+    k = np.searchsorted(edges[0], t, side="right") - 1
+    capacity = cum[k] + np.minimum(v, inner(t - edges[0][k]))
+
+    for quota, lower, upper in zip(calendars[1:], edges[:-1], edges[1:]):
+        position = np.searchsorted(lower, upper)
+        if np.any(position >= len(lower)) or not np.array_equal(lower[position], upper):
+            raise ValueError(f"The resets of {quota} must also be resets of the shorter calendar quotas")
+        # cum[j]: capacidad de los niveles inferiores justo antes del borde j
+        before = cum[position]
+        v = quota.consumption_unit
+        cum = np.concatenate(([0.0], np.cumsum(np.minimum(v, np.diff(before)))))
+        k = np.searchsorted(upper, t, side="right") - 1
+        capacity = cum[k] + np.minimum(v, capacity - before[k])
+    return capacity
+
+
+class CalendarBoundedRate:
+    """
+    A rate and quotas like BoundedRate, the calendar ones resetting with the calendar from origin.
+    """
+
+    def __init__(self, rate: Rate, quota: Union[Quota, List[Quota], None], origin: Union[datetime, str]):
+        quotas = [] if quota is None else [quota] if not isinstance(quota, list) else list(quota)
+        self.rate = rate
+        self.quota = sorted(quotas, key=lambda q: q.consumption_period.to_milliseconds())
+        self.limits = [rate] + self.quota
+        self.origin = origin
+
+    def __repr__(self):
+        return f"CalendarBoundedRate({self.rate}, {self.quota}, {self.origin!r})"
+
+    def capacity_at(self, t: Union[str, TimeDuration, float, np.ndarray]):
+        """
+        Accumulated capacity at t (a time string, a TimeDuration, or milliseconds since origin).
+        """
+        if isinstance(t, np.ndarray):
+            return calendar_capacity_at(self.limits, self.origin, t)
+        return float(calendar_capacity_at(self.limits, self.origin, to_milliseconds(t)))
+
+    def nominal_capacity_at(self, t: Union[str, TimeDuration, float, np.ndarray]):
+        """
+        The same capacity with the calendar quotas taken as windows of 30-day months.
+        """
+        values, periods = limit_table(self.limits)
+        order = np.argsort(periods, kind="stable")
+        t_ms = t if isinstance(t, np.ndarray) else to_milliseconds(t)
+        capacity = capacity_at_ms(values[order], periods[order], t_ms)
+        return capacity if isinstance(t, np.ndarray) else float(capacity)
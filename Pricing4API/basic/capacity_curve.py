@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import operator
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+
+from Pricing4API.basic.capacity_kernels import capacity_jumps
+
+
+class CapacityCurve:
+    """
+    Accumulated capacity of a limit table, stored as one period of its step function.
+
+    The capacity of a BoundedRate repeats modulo the period P of its largest limit
+    plus an increment v (its value): C(t + P) = C(t) + v. Only the jumps of [0, P)
+    are kept (times_ms[0] is 0), so evaluating, inverting or slicing the curve costs
+    O(log k) for k jumps per period, whatever the horizon. After active_ms (the
+    max_active_time of the bounded rate, if any) the capacity stops growing.
+    """
+
+    def __init__(self, times_ms: np.ndarray, capacities: np.ndarray, period_ms: float, increment: float,
+                 active_ms: float = np.inf, name: Optional[str] = None):
+        self.__times_ms = np.asarray(times_ms, dtype=np.float64)
+        self.__capacities = np.asarray(capacities, dtype=np.float64)
+        self.__period_ms = float(period_ms)
+        self.__increment = float(increment)
+        self.__active_ms = float(active_ms)
+        self.__name = name
+
+    @classmethod
+    def from_limit_table(cls, values: np.ndarray, periods_ms: np.ndarray, active_ms: float = np.inf,
+                         name: Optional[str] = None) -> 'CapacityCurve':
+        """
+        Builds the curve of a limit table (rate first) from the jumps of one top period.
+        """
+        times, capacities = capacity_jumps(values, periods_ms, periods_ms[-1])
+        return cls(times, capacities, periods_ms[-1], values[-1], active_ms, name)
+
+    @property
+    def times_ms(self) -> np.ndarray:
+        return self.__times_ms
+
+    @property
+    def capacities(self) -> np.ndarray:
+        return self.__capacities
+
+    @property
+    def period_ms(self) -> float:
+        return self.__period_ms
+
+    @property
+    def increment(self) -> float:
+        return self.__increment
+
+    @property
+    def active_ms(self) -> float:
+        return self.__active_ms
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.__name
+
+    def __len__(self) -> int:
+        return len(self.__times_ms)
+
+    def at_many(self, t_ms: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Capacity at the given instant(s), in milliseconds. 0 before the origin.
+        """
+        t = np.minimum(np.asarray(t_ms, dtype=np.float64), self.__active_ms)
+        k = np.floor(t / self.__period_ms)
+        idx = np.searchsorted(self.__times_ms, t - k * self.__period_ms, side="right") - 1
+        c = k * self.__increment + self.__capacities[np.clip(idx, 0, len(self.__capacities) - 1)]
+        return np.where(t < 0, 0.0, c)
+
+    def at(self, t_ms: float) -> float:
+        return float(self.at_many(t_ms))
+
+    def inverse(self, n: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        First instant, in milliseconds, at which the capacity reaches n (inf if it never does).
+
+        Args:
+            n (Union[float, np.ndarray]): Number(s) of requests.
+
+        Returns:
+            Union[float, np.ndarray]: Instant(s), same shape as n.
+        """
+        goal = np.asarray(n, dtype=np.float64)
+        # First period whose last step reaches the goal, then the step within it
+        k = np.maximum(np.ceil((goal - self.__capacities[-1]) / self.__increment), 0)
+        idx = np.searchsorted(self.__capacities, goal - k * self.__increment, side="left")
+        t = k * self.__period_ms + self.__times_ms[np.minimum(idx, len(self.__times_ms) - 1)]
+        t = np.where(goal <= 0, 0.0, t)
+        t = np.where(t > self.__active_ms, np.inf, t)
+        return float(t) if t.ndim == 0 else t
+
+    def breakpoints(self, start_ms: float, end_ms: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Steps of the curve on [start_ms, end_ms): (start_ms, C(start_ms)) and every jump after it.
+
+        Only the partial periods at both ends are searched; whole periods in between
+        are the stored jumps shifted, so the cost is the size of the output.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (times, capacities), capacities[k] holding until times[k + 1].
+        """
+        start_ms = max(float(start_ms), 0.0)
+        # Past active_ms the curve is flat, but a jump at active_ms itself still counts
+        stop = min(float(end_ms), np.nextafter(self.__active_ms, np.inf))
+        first = self.at(start_ms)
+        if stop <= start_ms:
+            return np.array([start_ms]), np.array([first])
+
+        period = self.__period_ms
+        k0, k1 = int(start_ms // period), int(np.ceil(stop / period)) - 1
+        lo = np.searchsorted(self.__times_ms, start_ms - k0 * period, side="right")
+        hi = np.searchsorted(self.__times_ms, stop - k1 * period, side="left")
+        if k0 == k1:
+            pieces = [(k0, slice(lo, hi))]
+        else:
+            pieces = [(k0, slice(lo, None))] + [(k, slice(None)) for k in range(k0 + 1, k1)] \
+                     + [(k1, slice(None, hi))]
+
+        times = [np.array([start_ms])] + [k * period + self.__times_ms[s] for k, s in pieces]
+        capacities = [np.array([first])] + [k * self.__increment + self.__capacities[s] for k, s in pieces]
+        return np.concatenate(times), np.concatenate(capacities)
+
+    def __getitem__(self, interval: slice) -> Tuple[np.ndarray, np.ndarray]:
+        if not isinstance(interval, slice) or interval.step is not None:
+            raise TypeError("CapacityCurve only supports [start_ms:end_ms] slices.")
+        start = 0.0 if interval.start is None else interval.start
+        end = np.nextafter(self.__active_ms, np.inf) if interval.stop is None else interval.stop
+        if not np.isfinite(end):
+            raise ValueError("The end of the slice is required for curves without max_active_time.")
+        return self.breakpoints(start, end)
+
+    def steps(self, end_ms: float, start_ms: float = 0.0) -> 'StepCurve':
+        """
+        The curve on [start_ms, end_ms) as a StepCurve, to combine it with other curves.
+        """
+        times, capacities = self.breakpoints(start_ms, end_ms)
+        return StepCurve(times, capacities, end_ms)
+
+    def downsampled(self, start_ms: float, end_ms: float, max_points: int = 2000,
+                    instantaneous: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        At most max_points + 1 points drawing the curve on [start_ms, end_ms] as a step line.
+
+        When the interval has few enough jumps they are returned exactly (see breakpoints).
+        Otherwise the interval is cut into max_points // 2 buckets and each one gets two
+        points, the lowest and the highest capacity in it, so the drawn envelope never
+        hides a step however long the interval is. The cost depends on max_points only.
+
+        Args:
+            start_ms (float): Start of the interval.
+            end_ms (float): End of the interval; the last point is placed there.
+            max_points (int): Largest number of points before the one at end_ms.
+            instantaneous (bool): Capacity left in the current top period, C(t mod period),
+                instead of the accumulated capacity.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (times, capacities) for a "hv" line.
+        """
+        start_ms = max(float(start_ms), 0.0)
+        end_ms = max(float(end_ms), start_ms)
+        period = self.__period_ms
+        value = (lambda t: self.at_many(t % period)) if instantaneous else self.at_many
+
+        # Saltos en [start_ms, end_ms): los de los periodos completos más los de los dos extremos
+        stop = min(end_ms, self.__active_ms)
+        k0, k1 = np.floor(start_ms / period), np.floor(stop / period)
+        n_jumps = (k1 - k0) * len(self) + np.searchsorted(self.__times_ms, stop - k1 * period) \
+            - np.searchsorted(self.__times_ms, start_ms - k0 * period)
+        if n_jumps <= max_points:
+            times, capacities = self.breakpoints(start_ms, end_ms)
+            if instantaneous:
+                capacities = value(times)
+            return np.append(times, end_ms), np.append(capacities, capacities[-1])
+
+        edges = np.linspace(start_ms, end_ms, max(max_points // 2, 1) + 1)
+        lo_t, hi_t = edges[:-1], np.nextafter(edges[1:], -np.inf)
+        lo, hi = value(lo_t), value(hi_t)
+        if instantaneous:
+            # Un cubo que cruza el inicio de un periodo pasa por el mínimo y el máximo del periodo
+            wraps = np.floor(lo_t / period) != np.floor(hi_t / period)
+            lo = np.where(wraps, self.__capacities[0], lo)
+            hi = np.where(wraps, self.__capacities[-1], hi)
+        times = np.column_stack((lo_t, (lo_t + edges[1:]) / 2)).ravel()
+        capacities = np.column_stack((lo, hi)).ravel()
+        return np.append(times, end_ms), np.append(capacities, hi[-1])
+
+    def scaled(self, n: float) -> 'CapacityCurve':
+        """
+        Capacity of n subscriptions of this curve: same steps, n times the capacity.
+        """
+        return CapacityCurve(self.__times_ms, self.__capacities * n, self.__period_ms, self.__increment * n,
+                             self.__active_ms, self.__name)
+
+    def __mul__(self, n: float) -> 'CapacityCurve':
+        return self.scaled(n)
+
+    __rmul__ = __mul__
+
+    def __add__(self, other: 'CapacityCurve') -> 'CapacityCurve':
+        """
+        Exact sum of two curves with the same period and no max_active_time, still periodic.
+
+        Other sums change the period of the result; convert the curves with steps() first.
+        """
+        if not isinstance(other, CapacityCurve):
+            return NotImplemented
+        if not np.isclose(self.__period_ms, other.period_ms, rtol=1e-12, atol=0) \
+                or np.isfinite(self.__active_ms) or np.isfinite(other.active_ms):
+            raise ValueError("Only curves with the same period and no max_active_time can be added "
+                             "periodically; add their steps() instead.")
+        total = self.steps(self.__period_ms) + other.steps(self.__period_ms)
+        return CapacityCurve(total.times_ms, total.values, self.__period_ms,
+                             self.__increment + other.increment)
+
+    def to_dict(self) -> dict:
+        """
+        Compact serializable form: one period of jumps, the period and its increment.
+        """
+        return {
+            "name": self.__name,
+            "period_ms": self.__period_ms,
+            "increment": self.__increment,
+            "active_ms": None if np.isinf(self.__active_ms) else self.__active_ms,
+            "times_ms": self.__times_ms.tolist(),
+            "capacities": self.__capacities.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CapacityCurve':
+        active_ms = data.get("active_ms")
+        return cls(np.array(data["times_ms"]), np.array(data["capacities"]), data["period_ms"],
+                   data["increment"], np.inf if active_ms is None else active_ms, data.get("name"))
+
+    def __repr__(self):
+        return (f"CapacityCurve({len(self)} steps per {self.__period_ms:g} ms, +{self.__increment:g} per period"
+                + (f", active {self.__active_ms:g} ms" if np.isfinite(self.__active_ms) else "") + ")")
+
+
+class StepCurve:
+    """
+    Piecewise-constant function on [times_ms[0], end_ms): values[k] holds from times_ms[k]
+    until the next time, and the function is 0 before times_ms[0].
+
+    Sums, differences, scaling, pointwise min/max and shifts are merges of the
+    (sorted) breakpoints of both operands, linear in their number, so combining curves
+    is exact and never samples the horizon.
+    """
+
+    def __init__(self, times_ms: np.ndarray, values: np.ndarray, end_ms: float):
+        self.__times_ms = np.asarray(times_ms, dtype=np.float64)
+        self.__values = np.asarray(values, dtype=np.float64)
+        self.__end_ms = float(end_ms)
+
+    @property
+    def times_ms(self) -> np.ndarray:
+        return self.__times_ms
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.__values
+
+    @property
+    def end_ms(self) -> float:
+        return self.__end_ms
+
+    def __len__(self) -> int:
+        return len(self.__times_ms)
+
+    def at_many(self, t_ms: Union[float, np.ndarray]) -> np.ndarray:
+        idx = np.searchsorted(self.__times_ms, t_ms, side="right") - 1
+        if not len(self.__values):
+            return np.zeros(np.shape(idx))
+        return np.where(idx >= 0, self.__values[np.maximum(idx, 0)], 0.0)
+
+    def at(self, t_ms: float) -> float:
+        return float(self.at_many(t_ms))
+
+    def compressed(self) -> 'StepCurve':
+        """
+        Same function without the breakpoints that do not change the value.
+        """
+        keep = np.concatenate(([True], self.__values[1:] != self.__values[:-1]))[:len(self.__values)]
+        return StepCurve(self.__times_ms[keep], self.__values[keep], self.__end_ms)
+
+    def _combine(self, other: Union['StepCurve', float], op: Callable) -> 'StepCurve':
+        if not isinstance(other, StepCurve):
+            return StepCurve(self.__times_ms, op(self.__values, float(other)), self.__end_ms).compressed()
+
+        # Both breakpoint lists are sorted: a stable sort of the two runs is a merge, and the
+        # running count of each side gives the step of each operand at every merged time
+        times = np.concatenate((self.__times_ms, other.times_ms))
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        mine = order < len(self.__times_ms)
+        i, j = np.cumsum(mine) - 1, np.cumsum(~mine) - 1
+        left = np.where(i >= 0, self.__values[np.clip(i, 0, len(self) - 1)], 0.0) if len(self) else 0.0
+        right = np.where(j >= 0, other.values[np.clip(j, 0, len(other) - 1)], 0.0) if len(other) else 0.0
+
+        # The last entry of each instant has both operands up to date
+        end_ms = min(self.__end_ms, other.end_ms)
+        keep = (np.diff(times, append=np.inf) != 0) & (times < end_ms)
+        return StepCurve(times[keep], np.broadcast_to(op(left, right), times.shape)[keep], end_ms).compressed()
+
+    def __add__(self, other):
+        return self._combine(other, operator.add)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._combine(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._combine(other, lambda a, b: b - a)
+
+    def __neg__(self):
+        return StepCurve(self.__times_ms, -self.__values, self.__end_ms)
+
+    def __mul__(self, factor: float) -> 'StepCurve':
+        if isinstance(factor, StepCurve):
+            return NotImplemented
+        return StepCurve(self.__times_ms, self.__values * factor, self.__end_ms)
+
+    __rmul__ = __mul__
+
+    def minimum(self, other: Union['StepCurve', float]) -> 'StepCurve':
+        return self._combine(other, np.minimum)
+
+    def maximum(self, other: Union['StepCurve', float]) -> 'StepCurve':
+        return self._combine(other, np.maximum)
+
+    def shift(self, delta_ms: float) -> 'StepCurve':
+        """
+        The same function delayed by delta_ms (0 until it starts).
+        """
+        return StepCurve(self.__times_ms + delta_ms, self.__values, self.__end_ms + delta_ms)
+
+    def max(self) -> float:
+        """
+        Largest value from times_ms[0] on (0 for an empty curve).
+        """
+        return float(self.__values.max()) if len(self.__values) else 0.0
+
+    def first_above(self, level: float = 0.0) -> Optional[float]:
+        """
+        First instant at which the function exceeds level, or None if it never does.
+        """
+        above = np.flatnonzero(self.__values > level)
+        return float(self.__times_ms[above[0]]) if len(above) else None
+
+    def __repr__(self):
+        return f"StepCurve({len(self)} steps until {self.__end_ms:g} ms)"
@@ -0,0 +1,489 @@
+import math
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+
+def limit_table(limits: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattens a list of limits (rate first, then quotas by increasing period) into arrays.
+
+    Accepts both the basic Rate/Quota objects (consumption_unit, consumption_period)
+    and the main Limit objects (value, duration).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (values, periods in milliseconds), both float64.
+    """
+    values = np.empty(len(limits), dtype=np.float64)
+    periods = np.empty(len(limits), dtype=np.float64)
+    for i, limit in enumerate(limits):
+        if hasattr(limit, "consumption_unit"):
+            values[i] = limit.consumption_unit
+            periods[i] = limit.consumption_period.to_milliseconds()
+        else:
+            values[i] = limit.value
+            periods[i] = limit.duration.to_milliseconds()
+    return values, periods
+
+
+def capacity_at_ms(values: np.ndarray, periods_ms: np.ndarray, t_ms: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Vectorized accumulated capacity of a limit table at one or many instants.
+
+    Same recursion as BoundedRate.capacity_at and Plan.available_capacity, unrolled
+    so every level is a single array operation: the instant is reduced top-down
+    modulo each quota period, then the capacities are rebuilt bottom-up.
+
+    Args:
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        t_ms (Union[float, np.ndarray]): Instant(s) in milliseconds.
+
+    Returns:
+        np.ndarray: Capacity at each instant, same shape as t_ms.
+    """
+    t = np.asarray(t_ms, dtype=np.float64)
+    windows = []
+    for level in range(len(values) - 1, 0, -1):
+        n = np.floor(t / periods_ms[level])
+        windows.append(n)
+        t = t - n * periods_ms[level]
+
+    c = values[0] * (np.floor(t / periods_ms[0]) + 1)
+    for level, n in zip(range(1, len(values)), reversed(windows)):
+        c = values[level] * n + np.minimum(c, values[level])
+    return c
+
+
+def capacity_jumps(values: np.ndarray, periods_ms: np.ndarray, length_ms: float,
+                   cap: float = np.inf, level: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact jumps of the capacity step function of a limit table on [0, length_ms).
+
+    The jumps of one window of level i are those of level i-1 on [0, p_i) cut at
+    v_i, so they are computed once and tiled over the windows instead of sampling
+    the curve. Only instants where the capacity actually grows are returned.
+
+    Args:
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        length_ms (float): End of the (half-open) interval, must be finite.
+        cap (float): Capacity at which to stop. Defaults to no cap.
+        level (int): Top level to use. Defaults to the last limit.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (times, capacities), where capacities[k] holds
+        from times[k] until the next jump. times[0] is 0 when length_ms > 0.
+    """
+    if level is None:
+        level = len(values) - 1
+    if length_ms <= 0:
+        return np.empty(0), np.empty(0)
+    v, p = values[level], periods_ms[level]
+
+    if level == 0:
+        k = np.arange(int(min(np.ceil(length_ms / p), np.ceil(cap / v))))
+        return k * p, np.minimum(v * (k + 1), cap)
+
+    inner_t, inner_c = capacity_jumps(values, periods_ms, min(p, length_ms), v, level - 1)
+    # Every past window counts as v, so windows are needed while the previous one ends below the cap
+    n = np.arange(int(min(np.ceil(length_ms / p), np.ceil((cap - inner_c[-1]) / v) + 1)))
+    t = (n[:, None] * p + inner_t[None, :]).ravel()
+    c = (n[:, None] * v + inner_c[None, :]).ravel()
+    keep = t < length_ms
+    t, c = t[keep], c[keep]
+
+    # Stop at the first jump that reaches the cap
+    keep = np.concatenate(([True], c[:-1] < cap))
+    return t[keep], np.minimum(c[keep], cap)
+
+
+def capacity_at_scalar(values: Sequence[float], periods_ms: Sequence[float], t_ms: float) -> float:
+    """
+    capacity_at_ms for a single instant using plain Python arithmetic.
+
+    Cheaper than the numpy version for the handful of levels of one limit table,
+    which is what BoundedRate construction evaluates for every quota.
+    """
+    t = t_ms
+    windows = []
+    for level in range(len(values) - 1, 0, -1):
+        n = math.floor(t / periods_ms[level])
+        windows.append(n)
+        t = t - n * periods_ms[level]
+
+    c = values[0] * (math.floor(t / periods_ms[0]) + 1)
+    for level, n in zip(range(1, len(values)), reversed(windows)):
+        c = values[level] * n + min(c, values[level])
+    return c
+
+
+def reachable_values(values: np.ndarray, periods_ms: np.ndarray) -> np.ndarray:
+    """
+    Values of a limit table with every quota capped at what the levels below it let
+    through in one of its windows.
+
+    A quota that cannot be reached would count as its full value for every past
+    window in capacity_at_ms; capped, the same table gives the exact capacity, so it
+    does not need to be dropped as BoundedRate does.
+
+    Args:
+        values (np.ndarray): Limit values, rate first, periods sorted.
+        periods_ms (np.ndarray): Limit periods in milliseconds.
+
+    Returns:
+        np.ndarray: The capped values.
+    """
+    values = np.array(values, dtype=np.float64)
+    for level in range(1, len(values)):
+        # Justo antes del final de la ventana: en su final empieza otra de los niveles inferiores
+        reach = capacity_at_scalar(values[:level], periods_ms[:level], periods_ms[level] * (1 - 1e-9))
+        values[level] = min(values[level], reach)
+    return values
+
+
+def padded_capacity_at_ms(values: np.ndarray, periods_ms: np.ndarray, active: np.ndarray,
+                          t_ms: np.ndarray) -> np.ndarray:
+    """
+    Capacity of many limit tables padded to the same depth, one instant per table.
+
+    Args:
+        values (np.ndarray): Shape (n_tables, depth), rate in column 0.
+        periods_ms (np.ndarray): Shape (n_tables, depth), no zeros.
+        active (np.ndarray): Boolean (n_tables, depth); inactive levels are skipped.
+        t_ms (np.ndarray): Shape (n_tables,).
+
+    Returns:
+        np.ndarray: Shape (n_tables,).
+    """
+    t = np.array(t_ms, dtype=np.float64)
+    windows = []
+    for level in range(values.shape[1] - 1, 0, -1):
+        n = np.where(active[:, level], np.floor(t / periods_ms[:, level]), 0.0)
+        windows.append(n)
+        t = t - n * periods_ms[:, level]
+
+    c = values[:, 0] * (np.floor(t / periods_ms[:, 0]) + 1)
+    for level, n in zip(range(1, values.shape[1]), reversed(windows)):
+        c = np.where(active[:, level], values[:, level] * n + np.minimum(c, values[:, level]), c)
+    return c
+
+
+def validate_quota_tables(values: np.ndarray, periods_ms: np.ndarray,
+                          present: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Applies the BoundedRate quota validation to many padded limit tables at once.
+
+    Quota j of a table is kept when it is above the rate, not above what the rate
+    alone can serve in the quota period, and reachable at the end of its period
+    with the quotas already kept before it.
+
+    Args:
+        values (np.ndarray): Shape (n_tables, 1 + max_quotas), rate in column 0.
+        periods_ms (np.ndarray): Same shape, padded with ones.
+        present (np.ndarray): Boolean, same shape; False for padding.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (accepted, unreachable) boolean masks, same shape.
+    """
+    accepted = np.zeros(values.shape, dtype=bool)
+    accepted[:, 0] = True
+    unreachable = np.zeros(values.shape, dtype=bool)
+
+    rate_values, rate_periods = values[:, 0], periods_ms[:, 0]
+    for j in range(1, values.shape[1]):
+        q_values, q_periods = values[:, j], periods_ms[:, j]
+        plausible = present[:, j] & (q_values > rate_values) & (q_values <= rate_values * (q_periods / rate_periods))
+        capacity = padded_capacity_at_ms(values[:, :j], periods_ms[:, :j], accepted[:, :j], q_periods)
+        accepted[:, j] = plausible & (capacity >= q_values)
+        unreachable[:, j] = plausible & ~accepted[:, j]
+    return accepted, unreachable
+
+
+def admit_events(t_ms: np.ndarray, values: np.ndarray, periods_ms: np.ndarray, carry=None):
+    """
+    Exact admission of sorted request timestamps by a limit table, rejecting what does not fit.
+
+    Windows are nested as in capacity_at: each level restarts its windows at the start
+    of the window of the level above. A request is admitted when the rate window and
+    every quota window it falls in still have room. Levels are applied bottom-up as
+    segmented running counts; a request rejected by an outer level only inflates the
+    counts of inner windows that lie inside the already exhausted outer window.
+
+    Args:
+        t_ms (np.ndarray): Sorted timestamps in milliseconds since the windows origin.
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        carry: State returned by the previous call, or None for the first block.
+
+    Returns:
+        Tuple[np.ndarray, tuple]: (admitted boolean mask, carry for the next block).
+    """
+    n, depth = len(t_ms), len(values)
+    if n == 0:
+        return np.zeros(0, dtype=bool), carry
+
+    # Window index of every level within its parent window, top level first
+    windows = np.empty((depth, n))
+    r = np.asarray(t_ms, dtype=np.float64)
+    for level in range(depth - 1, -1, -1):
+        windows[level] = np.floor(r / periods_ms[level])
+        r = r - windows[level] * periods_ms[level]
+
+    changed = np.empty((depth, n), dtype=bool)
+    changed[:, 1:] = windows[:, 1:] != windows[:, :-1]
+    changed[:, 0] = True if carry is None else windows[:, 0] != carry[0]
+    # A window of level i starts when the window of any level >= i changes
+    starts = np.logical_or.accumulate(changed[::-1], axis=0)[::-1]
+
+    positions = np.arange(n)
+    admitted = np.ones(n, dtype=bool)
+    used = np.empty(depth)
+    for level in range(depth):
+        x = admitted.astype(np.int64)
+        total = np.cumsum(x)
+        first = np.maximum.accumulate(np.where(starts[level], positions, 0))
+        count = (total - (total[first] - x[first])).astype(np.float64)
+        if carry is not None and not starts[level, 0]:
+            count[first == 0] += carry[1][level]
+        admitted &= count <= values[level]
+        used[level] = count[-1]
+
+    return admitted, (windows[:, -1].copy(), used)
+
+
+def serve_bins(counts: np.ndarray, first_bin: int, bin_ms: float, values: np.ndarray, periods_ms: np.ndarray,
+               state: Tuple[np.ndarray, np.ndarray, np.ndarray],
+               queue: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Serves binned arrivals through the rate and fixed quota windows aligned at 0.
+
+    Time is cut into bins of bin_ms and the bins into segments inside which no quota
+    window starts. Inside a segment every quota only contributes a fixed bound on the
+    cumulative served count, so the segment is solved in closed form for all rows:
+    without queue (rejection) the served count is the clipped cumulative sum of the
+    arrivals cut at the rate; with an unbounded FIFO queue it is the min-plus running
+    minimum of the clipped arrivals against the rate.
+
+    Args:
+        counts (np.ndarray): Arrivals of shape (n_rows, n_bins), bins starting at first_bin.
+        first_bin (int): Index of the first bin since time 0.
+        bin_ms (float): Bin width; the rate allows values[0] * bin_ms / periods_ms[0] per bin.
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        state: (served, arrived, window_base) running totals per row, plus the served total
+            at the start of the current window of each quota, shape (n_quotas, n_rows).
+            Updated in place so consecutive blocks of bins can be chained.
+        queue (bool): Whether unserved arrivals wait (True) or are rejected (False).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (arrived, served, bound), cumulative per bin,
+        each of shape (n_rows, n_bins); bound is the quota limit on served in that bin.
+    """
+    served, arrived, window_base = state
+    n_rows, n_bins = counts.shape
+    rate_per_bin = values[0] * bin_ms / periods_ms[0]
+    quota_values, quota_periods = values[1:], periods_ms[1:]
+
+    arrived_cum = np.empty((n_rows, n_bins))
+    served_cum = np.empty((n_rows, n_bins))
+    bound_cum = np.full((n_rows, n_bins), np.inf)
+
+    # Bins where a window of some quota starts
+    bins = np.arange(first_bin, first_bin + n_bins)
+    # Periods come from unit conversions (e.g. 1012.9999999999999 ms): tolerate the rounding noise
+    windows = np.floor(bins[None, :] * bin_ms / quota_periods[:, None] + 1e-9)
+    previous = np.floor((bins[None, :] - 1) * bin_ms / quota_periods[:, None] + 1e-9)
+    resets = windows != previous
+    edges = np.unique(np.concatenate(([0], np.flatnonzero(resets.any(axis=0)), [n_bins])))
+
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        for level in np.flatnonzero(resets[:, lo]):
+            window_base[level] = served
+        bound = (window_base + quota_values[:, None]).min(axis=0, initial=np.inf)
+
+        a = counts[:, lo:hi]
+        arrived_seg = arrived[:, None] + np.cumsum(a, axis=1)
+        if queue:
+            k = np.arange(hi - lo) * rate_per_bin
+            capped = np.minimum(arrived_seg, bound[:, None])
+            served_seg = k + np.minimum(served[:, None] + rate_per_bin, np.minimum.accumulate(capped - k, axis=1))
+        else:
+            served_seg = np.minimum(served[:, None] + np.cumsum(np.minimum(a, rate_per_bin), axis=1), bound[:, None])
+
+        arrived_cum[:, lo:hi] = arrived_seg
+        served_cum[:, lo:hi] = served_seg
+        bound_cum[:, lo:hi] = bound[:, None]
+        served[:] = served_seg[:, -1]
+        arrived[:] = arrived_seg[:, -1]
+
+    return arrived_cum, served_cum, bound_cum
+
+
+def ragged_capacity_at_ms(values: np.ndarray, periods_ms: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                          t_ms: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    capacity_at_ms for many limit tables stored back to back in two flat columns.
+
+    Plan i owns values[starts[i]:ends[i]] and periods_ms[starts[i]:ends[i]]. The
+    columns are only read through fancy indexing, so they can be memory-mapped.
+
+    Returns:
+        np.ndarray: Array of shape (n_plans,) + np.shape(t_ms).
+    """
+    t = np.asarray(t_ms, dtype=np.float64)
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    depth = ends - starts
+    n_plans = len(starts)
+    extra = (1,) * t.ndim
+
+    remaining = np.array(np.broadcast_to(t, (n_plans,) + t.shape), dtype=np.float64)
+    windows = []
+    for k in range(int(depth.max(initial=1)) - 1):
+        active = np.flatnonzero(depth - 1 > k)
+        idx = ends[active] - 1 - k
+        period = np.asarray(periods_ms[idx], dtype=np.float64).reshape((-1,) + extra)
+        n = np.floor(remaining[active] / period)
+        remaining[active] -= n * period
+        windows.append((active, idx, n))
+
+    base_values = np.asarray(values[starts], dtype=np.float64).reshape((-1,) + extra)
+    base_periods = np.asarray(periods_ms[starts], dtype=np.float64).reshape((-1,) + extra)
+    c = base_values * (np.floor(remaining / base_periods) + 1)
+    for active, idx, n in reversed(windows):
+        v = np.asarray(values[idx], dtype=np.float64).reshape((-1,) + extra)
+        c[active] = v * n + np.minimum(c[active], v)
+    return c
+
+
+
+def _window_points(values: np.ndarray, periods_ms: np.ndarray, thresholds_ms: np.ndarray,
+                   window_ranges: Sequence[Tuple[int, int]], per_top: np.ndarray, length_ms: float,
+                   end_ms: float):
+    # Start, exhaustion and plateau end of windows [lo, hi) of every quota plus (end_ms, C(end_ms)),
+    # sorted by (t, capacity), with the top window each one belongs to (-1 for the added point)
+    times, at, owners = [np.array([end_ms])], [np.array([end_ms])], [np.array([-1])]
+    for period, threshold, (lo, hi), m in zip(periods_ms[1:], thresholds_ms, window_ranges, per_top):
+        k = np.arange(lo, hi)
+        starts = k * period
+        exhausted = np.minimum(starts + threshold, length_ms)
+        times += [starts, exhausted, np.minimum(starts + period, length_ms)]
+        at += [starts, exhausted, exhausted]
+        owners += [k // m] * 3
+    t = np.concatenate(times)
+    c = capacity_at_ms(values, periods_ms, np.concatenate(at))
+    order = np.lexsort((c, t))
+    return t[order], c[order], np.concatenate(owners)[order]
+
+
+def _kept_points(t: np.ndarray, c: np.ndarray) -> np.ndarray:
+    # Positions left after dropping repeated points and points inside a plateau
+    kept = np.flatnonzero(np.concatenate(([True], (t[1:] != t[:-1]) | (c[1:] != c[:-1]))))
+    level = c[kept]
+    flat = np.zeros(len(kept), dtype=bool)
+    flat[1:-1] = (level[:-2] == level[1:-1]) & (level[1:-1] == level[2:])
+    return kept[~flat]
+
+
+def inflection_points(values: np.ndarray, periods_ms: np.ndarray, thresholds_ms: Sequence[float],
+                      length_ms: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start, exhaustion and plateau points of every quota window on [0, length_ms].
+
+    Every window of quota i starting at s contributes (s, C(s)), (e, C(e)) and
+    (f, C(e)), with e = min(s + thresholds_ms[i], length_ms) and f the end of the
+    window clipped to length_ms; (0, C(0)) and (length_ms, C(length_ms)) are always
+    added. Points are sorted by (t, capacity), repeated points are dropped and so
+    are the ones whose capacity equals both neighbours.
+
+    When every quota period divides the largest one, C(t + P) = C(t) + v for the
+    top limit (v, P), so the kept points of an interior top window are computed once
+    and shifted to every other; only the first windows and the ones next to length_ms
+    are evaluated.
+
+    Args:
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        thresholds_ms (Sequence[float]): Time needed to exhaust each quota, in milliseconds.
+        length_ms (float): End of the interval.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (t_ms, capacity) of the points, sorted by time.
+    """
+    length_ms = float(length_ms)
+    quota_periods = np.asarray(periods_ms[1:], dtype=np.float64)
+    thresholds_ms = np.asarray(thresholds_ms, dtype=np.float64)
+    n_windows = [int(np.ceil(length_ms / p)) for p in quota_periods]
+
+    # Top windows that end before length_ms; the last ones are left to the tail
+    top = quota_periods[-1] if len(quota_periods) else np.inf
+    tiles = int(length_ms // top) - 1
+    per_top = np.maximum(np.round(top / quota_periods), 1).astype(np.int64) if len(quota_periods) else []
+    tileable = (tiles >= 3 and np.allclose(per_top * quota_periods, top, rtol=1e-12, atol=0)
+                and np.all(thresholds_ms <= quota_periods))
+
+    if not tileable:
+        t, c, _ = _window_points(values, periods_ms, thresholds_ms, [(0, n) for n in n_windows],
+                                 np.ones(len(n_windows), dtype=np.int64), length_ms, length_ms)
+        t, c = np.concatenate(([0.0], t)), np.concatenate((capacity_at_ms(values, periods_ms, [0.0]), c))
+        kept = _kept_points(t, c)
+        return t[kept], c[kept]
+
+    # First three top windows: the first one is kept as is, the second is the pattern
+    t, c, owner = _window_points(values, periods_ms, thresholds_ms, [(0, 3 * m) for m in per_top],
+                                 per_top, length_ms, 0.0)
+    kept = _kept_points(t, c)
+    head, pattern = kept[owner[kept] <= 0], kept[owner[kept] == 1]
+    head_t, head_c = t[head], c[head]
+    pattern_t, pattern_c = t[pattern] - top, c[pattern] - float(values[-1])
+
+    # From one top window before the tail, for context, to length_ms
+    ranges = [((tiles - 2) * m, n) for m, n in zip(per_top, n_windows)]
+    t, c, owner = _window_points(values, periods_ms, thresholds_ms, ranges, per_top, length_ms, length_ms)
+    kept = _kept_points(t, c)
+    tail = kept[(owner[kept] >= tiles - 1) | (owner[kept] < 0)]
+
+    shifts = np.arange(1, tiles - 1, dtype=np.float64)[:, None]
+    body = slice(len(head), len(head) + len(shifts) * len(pattern))
+    out_t = np.empty(body.stop + len(tail))
+    out_c = np.empty(body.stop + len(tail))
+    out_t[:body.start], out_c[:body.start] = head_t, head_c
+    np.add(pattern_t, shifts * top, out=out_t[body].reshape(len(shifts), -1))
+    np.add(pattern_c, shifts * float(values[-1]), out=out_c[body].reshape(len(shifts), -1))
+    out_t[body.stop:], out_c[body.stop:] = t[tail], c[tail]
+    return out_t, out_c
+
+
+def capacity_during_ms(values: np.ndarray, periods_ms: np.ndarray, starts_ms: np.ndarray, ends_ms: np.ndarray,
+                       active_ms: float = np.inf, chunk_size: int = 1 << 16) -> np.ndarray:
+    """
+    Capacity of a limit table during many intervals: C(end) - C(start) for each one.
+
+    The capacity stops growing at active_ms, so both ends are clipped to it. Intervals
+    are evaluated chunk by chunk, which keeps the temporaries of capacity_at_ms in cache.
+
+    Args:
+        values (np.ndarray): Limit values, rate first.
+        periods_ms (np.ndarray): Limit periods in milliseconds, rate first.
+        starts_ms (np.ndarray): Start of each interval.
+        ends_ms (np.ndarray): End of each interval, greater than its start.
+        active_ms (float): Instant after which the capacity is constant. Defaults to never.
+        chunk_size (int): Intervals evaluated at once.
+
+    Returns:
+        np.ndarray: Capacity during each interval.
+    """
+    starts, ends = np.broadcast_arrays(np.asarray(starts_ms, dtype=np.float64),
+                                       np.asarray(ends_ms, dtype=np.float64))
+    if np.any(ends <= starts):
+        raise ValueError("end_instant must be greater than start_instant")
+    shape = starts.shape
+    starts, ends = starts.ravel(), ends.ravel()
+
+    out = np.empty(len(starts))
+    for lo in range(0, len(starts), chunk_size):
+        hi = lo + chunk_size
+        out[lo:hi] = (capacity_at_ms(values, periods_ms, np.minimum(ends[lo:hi], active_ms))
+                      - capacity_at_ms(values, periods_ms, np.minimum(starts[lo:hi], active_ms)))
+    return out.reshape(shape)
@@ -1,12 +1,19 @@
+from __future__ import annotations
+
 import re
 from typing import List, Optional, Union
-import plotly.graph_objects as go
+import numpy as np
+
 from Pricing4API.basic.bounded_rate import Rate, Quota, BoundedRate
+from Pricing4API.basic.capacity_curve import CapacityCurve
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
-from matplotlib.colors import to_rgba
+from Pricing4API.ancillary.lazy_import import lazy_import
 from Pricing4API.utils import parse_time_string_to_duration
 
+go = lazy_import("plotly.graph_objects")
+mcolors = lazy_import("matplotlib.colors")
+
 def compare_rates_capacity(rates: List[Rate], time_interval: Union[str, TimeDuration], return_fig=False):
     """
     Compares the capacity curves of a list of rates, starting with the slowest.
@@ -32,17 +39,17 @@ def compare_rates_capacity(rates: List[Rate], time_interval: Union[str, TimeDura
     # Añadimos índice i para controlar el fill
     for i, (rate, color) in enumerate(zip(rates, predefined_colors)):
         debug_values = rate.show_capacity(time_interval, debug=True)
-        times_ms, capacities = zip(*debug_values)
-        original_times = [t / time_interval.unit.to_milliseconds() for t in times_ms]
+        times_ms, capacities = np.asarray(debug_values, dtype=np.float64).T
+        original_times = times_ms / time_interval.unit.to_milliseconds()
 
         rgba_color = (
-            f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
+            f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
         )
 
         # Solo se muestra la curva acumulada
-        fig.add_trace(go.Scatter(
-            x=original_times,
-            y=capacities,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times,
+            capacities,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill='tozeroy' if i == 0 else 'tonexty',
@@ -99,22 +106,18 @@ def compare_bounded_rates_capacity_inflection_points(
     unit_ms = time_interval.unit.to_milliseconds()
 
     for i, (br, color) in enumerate(zip(bounded_rates, predefined_colors)):
-        # Obtener los puntos de inflexión en modo debug
-        inflection_points = br.show_capacity_from_inflection_points(time_interval, debug=True)
+        # Puntos de inflexión como arrays
+        t_ms, capacities = br.inflection_points(time_interval)
+        x_vals = t_ms / unit_ms
 
-        x_vals = [t / unit_ms for t, _ in inflection_points]
-        print(x_vals)
-        print(unit_ms)
-        capacities = [cap for _, cap in inflection_points]
-
-        rgba = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
+        rgba = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
         legend_label = f"{br.rate.consumption_unit}/{br.rate.consumption_period}"
 
-        tooltip_labels = [CapacityPlotHelper.format_time_tooltip((t * unit_ms)/1000) for t in x_vals]
+        tooltip_labels = [CapacityPlotHelper.format_time_tooltip(t / 1000) for t in t_ms.tolist()]
 
-        fig.add_trace(go.Scatter(
-            x=x_vals,
-            y=capacities,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            x_vals,
+            capacities,
             customdata=tooltip_labels,
             hovertemplate="Time: %{customdata}<br>Capacity: %{y}<extra></extra>",
             mode='lines',
@@ -141,7 +144,7 @@ def compare_bounded_rates_capacity_inflection_points(
 
 
 def compare_bounded_rates_capacity(
-    bounded_rates: List[BoundedRate],
+    bounded_rates: List[Union[BoundedRate, CapacityCurve]],
     time_interval: Union[str, TimeDuration],
     return_fig: bool = False
 ):
@@ -149,6 +152,9 @@ def compare_bounded_rates_capacity(
     Compara las curvas de capacidad (acumulada vs. instantánea) de una lista de BoundedRate,
     empezando por la más lenta. Si el tiempo de simulación >= la cuota máxima y existen cuotas,
     permite alternar entre vista acumulada e instantánea.
+
+    Also accepts CapacityCurve objects: every curve is drawn from its exact steps, so
+    the cost depends on the number of steps shown and not on sampling the horizon.
     """
     if isinstance(time_interval, str):
         time_interval = parse_time_string_to_duration(time_interval)
@@ -168,28 +174,33 @@ def compare_bounded_rates_capacity(
     sim_ms = int(time_interval.to_milliseconds())
     trace_idx = 0
 
-    for br, color in zip(bounded_rates, predefined_colors):
-        # Construir la leyenda personalizada
-        rate_part = f"{br.rate.consumption_unit}/{br.rate.consumption_period}"
-        legend_label = rate_part
-        if len(br.limits) > 1:
-            q = br.limits[-1]
-            legend_label += f" ·{q.consumption_unit}/{q.consumption_period}"
-        if getattr(br, "max_active_time", None):
-            d = br.max_active_time
-            legend_label += f" during {d.value}{d.unit.value}"
-
-        rgba = f"rgba({','.join(map(str, [int(c*255) for c in to_rgba(color)[:3]]))},0.2)"
-
-        # --- acumulada ---
-        debug_acc = br.show_available_capacity_curve(time_interval, debug=True)
-        times_acc, caps_acc = zip(*debug_acc)
-        x_acc = [t / unit_ms for t in times_acc]
+    for i, (br, color) in enumerate(zip(bounded_rates, predefined_colors)):
+        if isinstance(br, CapacityCurve):
+            curve = br
+            legend_label = curve.name or f"Curve {i + 1}"
+        else:
+            # Construir la leyenda personalizada
+            curve = br.capacity_curve()
+            rate_part = f"{br.rate.consumption_unit}/{br.rate.consumption_period}"
+            legend_label = rate_part
+            if len(br.limits) > 1:
+                q = br.limits[-1]
+                legend_label += f" ·{q.consumption_unit}/{q.consumption_period}"
+            if getattr(br, "max_active_time", None):
+                d = br.max_active_time
+                legend_label += f" during {d.value}{d.unit.value}"
+
+        rgba = f"rgba({','.join(map(str, [int(c*255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
+
+        # --- acumulada: escalones exactos hasta el final (o max_active_time) ---
+        end_ms = min(sim_ms, curve.active_ms)
+        times, caps = curve.breakpoints(0, end_ms)
+        times, caps = np.append(times, end_ms), np.append(caps, curve.at(end_ms))
 
         fill_mode = "tozeroy" if trace_idx != 0 else "tonexty"
-        fig.add_trace(go.Scatter(
-            x=x_acc,
-            y=list(caps_acc),
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            times / unit_ms,
+            caps,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill=fill_mode,
@@ -202,16 +213,13 @@ def compare_bounded_rates_capacity(
         trace_idx += 1
 
         # --- instantánea (solo si hay cuota y el intervalo supera esa cuota) ---
-        max_quota_ms = br.limits[-1].consumption_period.to_milliseconds()
-        if len(br.limits) > 1 and sim_ms >= max_quota_ms:
-            debug_inst = br.show_instantaneous_capacity_curve(time_interval, debug=True)
-            times_inst, caps_inst = zip(*debug_inst)
-            x_inst = [t / unit_ms for t in times_inst]
+        if len(curve) > 1 and sim_ms >= curve.period_ms:
+            caps_inst = caps - np.floor(times / curve.period_ms) * curve.increment
 
             fill_mode = "tozeroy" if trace_idx == 0 else "tonexty"
-            fig.add_trace(go.Scattergl(
-                x=x_inst,
-                y=list(caps_inst),
+            fig.add_trace(CapacityPlotHelper.line_trace(
+                times / unit_ms,
+                caps_inst,
                 mode='lines',
                 line=dict(color=color, shape='hv', width=1.3),
                 fill=fill_mode,
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Pricing4API.basic.capacity_kernels import limit_table
+
+
+def _key_limits(key) -> list:
+    # Plan de basic (bounded_rate), BoundedRate o Plan de main (limits), o una lista de límites
+    key = getattr(key, "bounded_rate", key)
+    return list(getattr(key, "limits", key))
+
+
+class KeyPool:
+    """
+    Spreads requests over several subscriptions (API keys), each with its own limits.
+
+    Every key keeps one budget per period, with windows nested as in the capacity
+    kernels (each one restarts at the start of the window above), and the instant
+    since which all its budgets have room. A heap ordered by that instant gives the key
+    of each request: the one that has been free the longest, or the first to be free
+    again when none is. A key keeps its place while it has room, so the heap is only
+    updated, in O(log N), when a key runs out; charging a request is O(periods).
+
+    Args:
+        keys (Sequence): One entry per key: a Plan, a BoundedRate or a list of limits.
+        names (Optional[Sequence[str]]): Name of each key. Defaults to "key0", "key1"...
+    """
+
+    def __init__(self, keys: Sequence, names: Optional[Sequence[str]] = None):
+        if not len(keys):
+            raise ValueError("A key pool needs at least one key")
+        if names is not None and len(names) != len(keys):
+            raise ValueError("One name per key is needed")
+        self.__names = list(names) if names is not None else [f"key{i}" for i in range(len(keys))]
+        self.__values, self.__periods = [], []
+        for key in keys:
+            values, periods = limit_table(_key_limits(key))
+            if np.any(values < 1):
+                raise ValueError("Every limit of a key must allow one request at least")
+            order = np.argsort(periods, kind="stable")
+            self.__values.append(values[order].tolist())
+            self.__periods.append(periods[order].tolist())
+        self.__starts = [[math.nan] * len(p) for p in self.__periods]
+        self.__ends = [[-math.inf] * len(p) for p in self.__periods]
+        self.__used = [[0.0] * len(p) for p in self.__periods]
+        self.__dispatched = [0] * len(keys)
+        # (instante libre, clave): ya es un montículo
+        self.__heap = [(0.0, i) for i in range(len(keys))]
+
+    @classmethod
+    def from_subscriptions(cls, plans: Sequence, counts: Sequence[int]) -> "KeyPool":
+        """
+        Pool with counts[i] keys of plans[i], e.g. the combination of get_optimal_subscription.
+        """
+        keys, names = [], []
+        for plan, count in zip(plans, counts):
+            for j in range(int(count)):
+                keys.append(plan)
+                names.append(f"{plan.name}#{j + 1}")
+        return cls(keys, names)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.__names)
+
+    @property
+    def dispatched(self) -> np.ndarray:
+        """
+        Requests sent through each key so far.
+        """
+        return np.array(self.__dispatched)
+
+    @property
+    def next_available_ms(self) -> float:
+        """
+        Earliest instant at which some key has room (requests are never sent before they arrive).
+        """
+        return self.__heap[0][0]
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def __repr__(self):
+        return f"KeyPool({len(self.__names)} keys, {sum(self.__dispatched)} dispatched)"
+
+    def _refresh(self, key: int, t_ms: float):
+        # Solo se recalculan las ventanas que ya han terminado (la de arriba antes que las de abajo)
+        periods, starts, ends, used = self.__periods[key], self.__starts[key], self.__ends[key], self.__used[key]
+        parent_start, parent_end = 0.0, math.inf
+        for level in range(len(periods) - 1, -1, -1):
+            if t_ms >= ends[level]:
+                p = periods[level]
+                start = parent_start + math.floor((t_ms - parent_start) / p) * p
+                starts[level], ends[level], used[level] = start, min(start + p, parent_end), 0.0
+            parent_start, parent_end = starts[level], ends[level]
+
+    def _available(self, key: int, t_ms: float) -> float:
+        # Cuando terminen las ventanas agotadas vuelven a tener sitio, y con ellas las de debajo
+        available = t_ms
+        for value, used, end in zip(self.__values[key], self.__used[key], self.__ends[key]):
+            if used + 1 > value and end > available:
+                available = end
+        return available
+
+    def budgets(self, key: int, t_ms: float) -> List[float]:
+        """
+        Requests key can still make in the current window of each period at t_ms, shortest period first.
+        """
+        self._refresh(key, t_ms)
+        return [value - used for value, used in zip(self.__values[key], self.__used[key])]
+
+    def dispatch(self, t_ms: float) -> Tuple[int, float]:
+        """
+        Sends one request that arrives at t_ms through the key that has been free the longest.
+
+        Args:
+            t_ms (float): Arrival in milliseconds, not before the previous one.
+
+        Returns:
+            Tuple[int, float]: The key and the instant the request is sent, max(t_ms, its
+            next available instant). Requests are sent in arrival order.
+        """
+        available, key = self.__heap[0]
+        send = t_ms if t_ms > available else available
+        self._refresh(key, send)
+        used = self.__used[key]
+        for level in range(len(used)):
+            used[level] += 1
+        self.__dispatched[key] += 1
+        # Mientras le quede sitio la clave conserva su instante y sigue la primera
+        next_available = self._available(key, send)
+        if next_available > send:
+            heapq.heapreplace(self.__heap, (next_available, key))
+        return key, send
+
+    def dispatch_many(self, t_ms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        dispatch for every arrival of a sorted array.
+
+        The key at the top of the heap takes, in one step, every request it has room for
+        before its next window boundary, so the cost is per run of requests on the same
+        key rather than per request.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (key, send instant) of each request.
+        """
+        t = np.asarray(t_ms, dtype=np.float64)
+        keys = np.empty(len(t), dtype=np.int64)
+        sends = np.empty(len(t), dtype=np.float64)
+        heap = self.__heap
+        i, n = 0, len(t)
+        while i < n:
+            available, key = heap[0]
+            first = float(t[i])
+            send = first if first > available else available
+            self._refresh(key, send)
+            values, used, ends = self.__values[key], self.__used[key], self.__ends[key]
+            room = min((v - u for v, u in zip(values, used)), default=math.inf)
+            # Hasta el próximo borde de ventana de la clave, donde puede volver a tener sitio
+            boundary = int(np.searchsorted(t, min(ends, default=math.inf), side="left"))
+            j = boundary if room >= boundary - i else i + int(room)
+            count = j - i
+            keys[i:j] = key
+            np.maximum(t[i:j], available, out=sends[i:j])
+            for level in range(len(used)):
+                used[level] += count
+            self.__dispatched[key] += count
+            next_available = self._available(key, send)
+            if next_available > send:
+                heapq.heapreplace(heap, (next_available, key))
+            i = j
+        return keys, sends
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from Pricing4API.basic.capacity_kernels import limit_table, padded_capacity_at_ms, reachable_values
+
+# Nodo de los límites globales del plan
+ROOT = "/*"
+
+# Margen relativo para evaluar la capacidad justo antes del final de una ventana
+_BEFORE_END = 1 - 1e-9
+
+
+def _endpoint_key(endpoint: str) -> str:
+    endpoint = endpoint.strip()
+    while endpoint.endswith("/*"):
+        endpoint = endpoint[:-2]
+    endpoint = endpoint.rstrip("/")
+    return endpoint if endpoint not in ("", "*") else ROOT
+
+
+def _node_name(endpoint: str, method: str = "all") -> str:
+    endpoint = _endpoint_key(endpoint)
+    method = method.strip().upper()
+    return endpoint if method in ("ALL", "*") else f"{method} {endpoint}"
+
+
+class LimitTree:
+    """
+    Limits of an API by endpoint and method, under the global limits of its plan.
+
+    The root (ROOT, "/*") holds the plan-wide limits. Every endpoint is a child of the
+    longest endpoint that is a path prefix of it ("/v1/search" under "/v1"), or of the
+    root, and every method-specific node ("GET /search") a child of its endpoint. A
+    request made to a node consumes from that node and from all its ancestors, so its
+    capacity is the one of the limits along the path, all evaluated together.
+
+    Windows are nested as in capacity_at, over the periods of the whole tree: a window
+    of one period restarts at the start of every window of the longer periods, so the
+    budgets shared by several paths have one clock. With periods that divide each other
+    (1s, 1min, 1h, ...) these are plain windows aligned at 0.
+
+    Limits are basic Rate/Quota or main Limit objects (anything limit_table accepts).
+    """
+
+    def __init__(self, limits: Sequence = (), name: str = "Unnamed API"):
+        self.__name = name
+        self.__limits: Dict[str, list] = {ROOT: list(limits)}
+        self.__compiled = None
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    def add(self, endpoint: str, limits: Sequence, method: str = "all") -> str:
+        """
+        Adds limits to the node of an endpoint (and method), creating it if needed.
+
+        Args:
+            endpoint (str): Endpoint path, e.g. "/search". "/*" is the root.
+            limits (Sequence): Limits of the node.
+            method (str): HTTP method, or "all" for the whole endpoint.
+
+        Returns:
+            str: Name of the node.
+        """
+        name = _node_name(endpoint, method)
+        if " " in name and name.split(" ", 1)[1] not in self.__limits:
+            # El nodo del endpoint existe siempre que exista uno de sus métodos
+            self.__limits[name.split(" ", 1)[1]] = []
+        self.__limits.setdefault(name, []).extend(limits)
+        self.__compiled = None
+        return name
+
+    @property
+    def nodes(self) -> List[str]:
+        """
+        Names of the nodes, parents before children.
+        """
+        return list(self._compile()["order"])
+
+    def limits(self, node: str) -> list:
+        return list(self.__limits[node])
+
+    def parent(self, node: str) -> Optional[str]:
+        return self._compile()["parent"][node]
+
+    def children(self, node: str) -> List[str]:
+        parent = self._compile()["parent"]
+        return [n for n in self._compile()["order"] if parent[n] == node]
+
+    def path(self, node: str) -> List[str]:
+        """
+        Nodes a request to node consumes from, root first.
+        """
+        return list(self._compile()["paths"][node])
+
+    @property
+    def targets(self) -> List[str]:
+        """
+        Leaf nodes, the usual destinations of the traffic.
+        """
+        parents = set(self._compile()["parent"].values())
+        return [n for n in self._compile()["order"] if n not in parents]
+
+    def resolve(self, endpoint: str, method: str = "all") -> str:
+        """
+        Node that a request to an endpoint with a method consumes from.
+
+        The method-specific node if there is one, else the endpoint node, else the
+        deepest endpoint that is a path prefix of it, else the root.
+        """
+        name = _node_name(endpoint, method)
+        if name in self.__limits:
+            return name
+        return self._parent_endpoint(_endpoint_key(endpoint), include_self=True)
+
+    def _parent_endpoint(self, endpoint: str, include_self: bool = False) -> str:
+        if include_self and endpoint in self.__limits:
+            return endpoint
+        best = ROOT
+        for candidate in self.__limits:
+            if " " in candidate or candidate == ROOT:
+                continue
+            if endpoint.startswith(candidate + "/") and len(candidate) > len(best if best != ROOT else ""):
+                best = candidate
+        return best
+
+    def _compile(self) -> dict:
+        """
+        Parents, paths and the limit tables of every node over the periods of the tree.
+        """
+        if self.__compiled is not None:
+            return self.__compiled
+
+        parent: Dict[str, Optional[str]] = {ROOT: None}
+        for name in self.__limits:
+            if name == ROOT:
+                continue
+            parent[name] = name.split(" ", 1)[1] if " " in name else self._parent_endpoint(name)
+
+        paths = {}
+
+        def path_of(name):
+            if name not in paths:
+                paths[name] = (name,) if parent[name] is None else path_of(parent[name]) + (name,)
+            return paths[name]
+
+        for name in parent:
+            path_of(name)
+        order = sorted(parent, key=lambda n: (len(paths[n]), n))
+
+        tables = {name: limit_table(self.__limits[name]) for name in order}
+        all_periods = np.concatenate([periods for _, periods in tables.values()] + [np.empty(0)])
+        periods = np.unique(all_periods)
+        # Periodos que solo difieren por el redondeo de la conversión de unidades
+        if len(periods):
+            periods = periods[np.concatenate(([True], np.diff(periods) > 1e-9 * periods[1:]))]
+
+        # Valor propio de cada nodo en cada periodo (inf si no lo limita)
+        own = np.full((len(order), len(periods)), np.inf)
+        for i, name in enumerate(order):
+            values, node_periods = tables[name]
+            levels = np.clip(np.searchsorted(periods, node_periods * _BEFORE_END), 0, len(periods) - 1)
+            np.minimum.at(own[i], levels, values)
+
+        self.__compiled = {"parent": parent, "paths": paths, "order": order, "periods": periods,
+                           "own": own, "index": {name: i for i, name in enumerate(order)}}
+        return self.__compiled
+
+    def _path_values(self, node: str) -> np.ndarray:
+        """
+        Values of the path of node at every period of the tree, each capped at what the
+        shorter periods let through in one of its windows; inf below the first limit.
+        """
+        compiled = self._compile()
+        periods = compiled["periods"]
+        rows = [compiled["index"][name] for name in compiled["paths"][node]]
+        values = compiled["own"][rows].min(axis=0) if len(periods) else np.empty(0)
+
+        finite = np.flatnonzero(np.isfinite(values))
+        if len(finite):
+            values[finite[0]:] = reachable_values(values[finite[0]:], periods[finite[0]:])
+        return values
+
+    def path_table(self, node: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (values, periods in ms) of the limits a request to node is subject to, rate first.
+
+        The limits of the whole path are merged. The table has a level for every period
+        of the tree from the shortest limit of the path on, so it can be used with
+        capacity_at_ms, CapacityCurve and the other kernels. It is empty for a node
+        without limits on its path.
+        """
+        periods = self._compile()["periods"]
+        values = self._path_values(node)
+        keep = np.isfinite(values)
+        return values[keep], periods[keep]
+
+    def capacity_at(self, t_ms: Union[float, np.ndarray], targets: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Accumulated capacity of every target at one or many instants, each target on its own.
+
+        Args:
+            t_ms (Union[float, np.ndarray]): Instant(s) in milliseconds.
+            targets (Optional[Iterable[str]]): Nodes to evaluate. Defaults to the leaves.
+
+        Returns:
+            np.ndarray: Shape (n_targets, *t_ms.shape); inf for a target without limits.
+        """
+        targets = self.targets if targets is None else list(targets)
+        periods = self._compile()["periods"]
+        t = np.asarray(t_ms, dtype=np.float64)
+        if not len(periods):
+            return np.full((len(targets),) + t.shape, np.inf)
+
+        values = np.array([self._path_values(target) for target in targets])
+        active = np.isfinite(values)
+        # Los niveles por debajo del primer límite del camino se saltan; sin límite en el
+        # nivel 0 la capacidad parte de inf y la recorta el primer nivel activo
+        values = np.where(active, values, np.where(np.arange(len(periods)) == 0, np.inf, 1.0))
+
+        n_t = t.size
+        c = padded_capacity_at_ms(np.repeat(values, n_t, axis=0),
+                                  np.broadcast_to(periods, (len(targets) * n_t, len(periods))),
+                                  np.repeat(active, n_t, axis=0), np.tile(t.ravel(), len(targets)))
+        return c.reshape((len(targets),) + t.shape)
+
+    def admission(self) -> 'LimitTreeAdmission':
+        """
+        Online admission state of the tree, all windows empty.
+        """
+        return LimitTreeAdmission(self)
+
+    def _slots(self) -> dict:
+        """
+        One budget (slot) per node and period the node limits, sorted by period.
+
+        Returns:
+            dict: {"periods", "level", "value", "own": {node: its slots},
+            "of": {node: slots of its whole path}}.
+        """
+        compiled = self._compile()
+        own_values, index = compiled["own"], compiled["index"]
+        slots = sorted((int(level), index[name]) for name in compiled["order"]
+                       for level in np.flatnonzero(np.isfinite(own_values[index[name]])))
+        position = {(row, level): s for s, (level, row) in enumerate(slots)}
+        own = {name: [position[(index[name], int(level))]
+                      for level in np.flatnonzero(np.isfinite(own_values[index[name]]))]
+               for name in compiled["order"]}
+        of = {name: [s for node in compiled["paths"][name] for s in own[node]] for name in compiled["order"]}
+        return {"periods": compiled["periods"], "level": [level for level, _ in slots],
+                "value": [float(own_values[row, level]) for level, row in slots], "own": own, "of": of}
+
+    def route(self, horizon_ms: float, targets: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Requests per target of a greedy schedule that sends as much as the tree admits up to horizon_ms.
+
+        At every window start (the only instants where budgets grow) each target gets all
+        it can, targets whose own budgets expire sooner first: a budget that resets every
+        minute is used before one that lasts an hour, and targets without limits of their
+        own go last. With a single target this is its capacity_at.
+
+        Args:
+            horizon_ms (float): End of the schedule, inclusive as in capacity_at.
+            targets (Optional[Iterable[str]]): Nodes the traffic can go to. Defaults to the leaves.
+
+        Returns:
+            Dict[str, float]: Requests admitted for every target (inf for one without limits).
+        """
+        targets = self.targets if targets is None else list(targets)
+        slots = self._slots()
+        periods, level_of = slots["periods"], slots["level"]
+        admitted = {target: np.inf for target in targets if not slots["of"][target]}
+        limited = [target for target in targets if slots["of"][target]]
+        if not limited:
+            return admitted
+
+        # Presupuestos exclusivos de cada destino: los de los nodos que no comparte con otro
+        paths = {target: set(self.path(target)) for target in limited}
+        expiry = {}
+        for target in limited:
+            shared = set().union(*(paths[other] for other in limited if other != target))
+            own = [s for node in paths[target] - shared for s in slots["own"][node]]
+            expiry[target] = max((periods[level_of[s]] for s in own), default=np.inf)
+        order = sorted(limited, key=lambda target: expiry[target])
+
+        _, top = window_starts(periods, horizon_ms)
+        # Slots ordenados por periodo: una ventana de nivel k reinicia los slots de nivel <= k
+        bound = np.searchsorted(level_of, np.arange(len(periods)), side="right").tolist()
+        value, used = slots["value"], [0.0] * len(slots["value"])
+        of = [slots["of"][target] for target in order]
+        totals = [0.0] * len(order)
+        # Un destino sin sitio no lo recupera hasta que reinicie el mayor de sus presupuestos agotados
+        blocked = [-1] * len(order)
+        for level in top.tolist():
+            used[:bound[level]] = [0.0] * bound[level]
+            for i, path in enumerate(of):
+                if blocked[i] > level:
+                    continue
+                room = min([value[s] - used[s] for s in path])
+                if room > 0:
+                    for s in path:
+                        used[s] += room
+                    totals[i] += room
+                blocked[i] = max(level_of[s] for s in path if used[s] >= value[s])
+        admitted.update(zip(order, totals))
+        return {target: admitted[target] for target in targets}
+
+    def __repr__(self):
+        return f"LimitTree({self.__name!r}, {len(self.__limits)} nodes)"
+
+
+class LimitTreeAdmission:
+    """
+    Online admission of requests against a LimitTree, one budget per node and period.
+
+    Each check touches the budgets along the path of the node only, O(depth), and the
+    windows of every period are found in O(number of periods). Requests must come in
+    non-decreasing time order.
+    """
+
+    def __init__(self, tree: LimitTree):
+        slots = tree._slots()
+        self.__tree = tree
+        self.__periods = slots["periods"].tolist()
+        self.__level = slots["level"]
+        self.__value = slots["value"]
+        self.__of = slots["of"]
+        self.__start = [math.nan] * len(self.__value)
+        self.__used = [0.0] * len(self.__value)
+        self.__admitted = 0
+        self.__rejected = 0
+
+    @property
+    def tree(self) -> LimitTree:
+        return self.__tree
+
+    @property
+    def admitted(self) -> int:
+        return self.__admitted
+
+    @property
+    def rejected(self) -> int:
+        return self.__rejected
+
+    def _refresh(self, node: str, t_ms: float) -> List[int]:
+        # Inicio de la ventana de cada periodo: suma de n_j * p_j de los periodos mayores
+        starts = [0.0] * len(self.__periods)
+        start, r = 0.0, t_ms
+        for level in range(len(self.__periods) - 1, -1, -1):
+            n = math.floor(r / self.__periods[level])
+            start += n * self.__periods[level]
+            r -= n * self.__periods[level]
+            starts[level] = start
+
+        path = self.__of[node]
+        for s in path:
+            if self.__start[s] != starts[self.__level[s]]:
+                self.__start[s] = starts[self.__level[s]]
+                self.__used[s] = 0.0
+        return path
+
+    def room(self, node: str, t_ms: float) -> float:
+        """
+        Requests node can still make at t_ms (inf if nothing limits it).
+        """
+        path = self._refresh(node, t_ms)
+        return min((self.__value[s] - self.__used[s] for s in path), default=math.inf)
+
+    def admit(self, node: str, t_ms: float, count: int = 1) -> bool:
+        """
+        Admits count requests to node at t_ms if every budget along its path has room.
+
+        Args:
+            node (str): Node of the requests (see LimitTree.resolve).
+            t_ms (float): Instant in milliseconds, not before the previous call.
+            count (int): Requests, all admitted or none.
+
+        Returns:
+            bool: Whether they were admitted; if so they are charged to the whole path.
+        """
+        path = self._refresh(node, t_ms)
+        for s in path:
+            if self.__used[s] + count > self.__value[s]:
+                self.__rejected += count
+                return False
+        for s in path:
+            self.__used[s] += count
+        self.__admitted += count
+        return True
+
+
+def window_starts(periods_ms: np.ndarray, horizon_ms: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Instants of [0, horizon_ms] where a window of the shortest period starts, windows nested.
+
+    Args:
+        periods_ms (np.ndarray): Sorted periods.
+        horizon_ms (float): End of the interval, inclusive.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (instants, level), level being the longest period whose
+        window also starts there (the last one at 0).
+    """
+    depth = len(periods_ms)
+    horizon = horizon_ms * (1 + 1e-12)
+    t, level = np.zeros(1), np.zeros(1, dtype=np.int64)
+    for k in range(1, depth + 1):
+        inner = periods_ms[k - 1]
+        # Ventanas del nivel k-1 dentro de una del nivel k (el último nivel se repite hasta el horizonte)
+        span = periods_ms[k] * _BEFORE_END if k < depth else math.inf
+        n = np.arange(int(math.floor(min(span, horizon) / inner)) + 1)
+        shifted = (n[:, None] * inner + t[None, :]).ravel()
+        lv = np.broadcast_to(level, (len(n), len(level))).copy()
+        lv[1:, 0] = k - 1
+        keep = (shifted < span) & (shifted <= horizon)
+        t, level = shifted[keep], lv.ravel()[keep]
+    level[0] = depth - 1
+    return t, level
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.utils import parse_time_string_to_duration
+
+
+class OverageModel:
+    """
+    Included and overage usage of a plan, and what it costs, without touching the plan.
+
+    The last quota of the plan is what its fee includes; requests beyond it in a
+    window of that quota are overage, paid at overage_cost each, up to overage_cap
+    per window. The capacity with overage (the last quota raised to overage_cap) is
+    a separate BoundedRate built once, so the plan keeps its own limits.
+    """
+
+    def __init__(self, plan, overage_cap: Optional[float] = None):
+        """
+        Args:
+            plan (Plan): The plan.
+            overage_cap (Optional[float]): Requests per window of the last quota when paying
+                overage. Defaults to 6 times the included quota.
+        """
+        br = plan.bounded_rate
+        self.__plan = plan
+        self.__overage_cost = float(plan.overage_cost or 0.0)
+        billing = plan.billing_period
+        if isinstance(billing, str):
+            billing = parse_time_string_to_duration(billing)
+        self.__billing_period_ms = billing.to_milliseconds()
+
+        if br.quota:
+            last = br.limits[-1]
+            self.__included_quota = last.consumption_unit
+            self.__quota_period_ms = last.consumption_period.to_milliseconds()
+            self.__overage_cap = overage_cap if overage_cap is not None else 6 * last.consumption_unit
+            self.__bounded_rate = BoundedRate._from_validated(
+                br.rate, br.quota[:-1] + [Quota(self.__overage_cap, last.consumption_period)], br.max_active_time)
+        else:
+            # Sin cuotas todo está incluido
+            self.__included_quota = None
+            self.__quota_period_ms = np.inf
+            self.__overage_cap = None
+            self.__bounded_rate = br
+
+    @property
+    def plan(self):
+        return self.__plan
+
+    @property
+    def included_quota(self) -> Optional[float]:
+        return self.__included_quota
+
+    @property
+    def quota_period_ms(self) -> float:
+        return self.__quota_period_ms
+
+    @property
+    def overage_cap(self) -> Optional[float]:
+        return self.__overage_cap
+
+    @property
+    def billing_period_ms(self) -> float:
+        return self.__billing_period_ms
+
+    @property
+    def bounded_rate(self) -> BoundedRate:
+        """
+        Limits of the plan with the last quota raised to the overage cap.
+        """
+        return self.__bounded_rate
+
+    def capacity_curve(self) -> CapacityCurve:
+        return self.__bounded_rate.capacity_curve(name=self.__plan.name)
+
+    def capacity_at(self, time_interval: Union[str, TimeDuration]) -> float:
+        """
+        Capacity with overage at the given instant.
+        """
+        return self.__bounded_rate.capacity_at(time_interval)
+
+    def split(self, requests: Union[float, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (included, overage) parts of the requests made in one window of the last quota.
+        """
+        requests = np.asarray(requests, dtype=np.float64)
+        if self.__included_quota is None:
+            return requests, np.zeros_like(requests)
+        included = np.minimum(requests, self.__included_quota)
+        return included, requests - included
+
+    def cost(self, requests: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Cost of one billing period in which the given requests are made: fee plus overage.
+        """
+        return self.__plan.cost + self.split(requests)[1] * self.__overage_cost
+
+    def usage(self, t_ms: np.ndarray, requests: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cumulative included requests, overage requests and cost of a demand.
+
+        The included quota starts again in every window of the last quota, and a fee
+        is paid for every billing period started. Everything is computed with
+        cumulative sums over the samples, in one pass.
+
+        Args:
+            t_ms (np.ndarray): Sample instants, in milliseconds, non-decreasing.
+            requests (np.ndarray): Cumulative requests of the demand at each instant.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (included, overage, cost) at each instant.
+        """
+        t = np.asarray(t_ms, dtype=np.float64)
+        n = np.asarray(requests, dtype=np.float64)
+        cost = (np.floor(t / self.__billing_period_ms) + 1) * self.__plan.cost
+        if self.__included_quota is None or not len(n):
+            overage = np.zeros_like(n)
+            return n, overage, cost
+
+        # Requests made before the window of each sample, from the last sample of the previous window
+        window = np.floor(t / self.__quota_period_ms)
+        first = np.concatenate(([True], window[1:] != window[:-1]))
+        before = np.where(first, np.concatenate(([0.0], n[:-1])), -np.inf)
+        before = np.maximum.accumulate(before)
+
+        # Included requests of the windows already closed, plus the current one
+        current = np.minimum(n - before, self.__included_quota)
+        last = np.concatenate((first[1:], [True]))
+        closed = np.cumsum(np.where(last, current, 0.0)) - np.where(last, current, 0.0)
+        included = closed + current
+        overage = n - included
+        return included, overage, cost + overage * self.__overage_cost
+
+    def __repr__(self):
+        return (f"OverageModel({self.__plan.name}, included={self.__included_quota}, "
+                f"cap={self.__overage_cap}, overage_cost={self.__overage_cost})")
@@ -1,9 +1,16 @@
+from __future__ import annotations
+
+from itertools import islice
 from typing import List, Optional, Union
+
+import numpy as np
+
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.basic.bounded_rate import BoundedRate, Rate, Quota
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.request_schedule import RequestSchedule, schedule_backlog
 from Pricing4API.utils import parse_time_string_to_duration, select_best_time_unit
 from Pricing4API.basic.compare_curves import *
-import plotly.graph_objects as go
 
 class Plan():
     def __init__(self, name, bounded_rate: BoundedRate, cost, overage_cost, max_number_of_subscriptions, billing_period):
@@ -13,7 +20,14 @@ class Plan():
         self.overage_cost = overage_cost
         self.max_number_of_subscriptions = max_number_of_subscriptions
         self.billing_period = billing_period
-        self.max_included_quota: Optional[int] = None
+
+    @property
+    def max_included_quota(self) -> Optional[int]:
+        """
+        Requests included in the fee: the value of the last quota, None if there is none.
+        """
+        quotas = self.bounded_rate.quota
+        return quotas[-1].consumption_unit if quotas else None
 
     
     def show_capacity_inflection_points(self, time_interval: Union[str, TimeDuration], return_fig=False):
@@ -21,6 +35,15 @@ class Plan():
             time_interval = parse_time_string_to_duration(time_interval)
         return self.bounded_rate.show_capacity_from_inflection_points(time_interval, return_fig=return_fig)
     
+    def capacity_curve(self, subscriptions: int = 1) -> CapacityCurve:
+        """
+        Capacity of the plan as a CapacityCurve, for the given number of subscriptions.
+        """
+        if not 1 <= subscriptions <= self.max_number_of_subscriptions:
+            raise ValueError(f"subscriptions must be between 1 and {self.max_number_of_subscriptions}.")
+        curve = self.bounded_rate.capacity_curve(name=self.name)
+        return curve if subscriptions == 1 else curve.scaled(subscriptions)
+
     def quota_exhaustion_thresholds(self):
         return self.bounded_rate.quota_exhaustion_threshold()
     
@@ -101,36 +124,45 @@ class Plan():
     
     def has_enough_capacity_for_constant_rate(
         self,
-        demand: 'Demand',
+        demand: Union['Demand', CapacityCurve],
         time_interval: Union[str, TimeDuration, None] = None
     ) -> None:
         """
         Check if this plan can serve a constant‐rate demand over the demand's duration.
         Prints Yes or No and the first point of failure (if any).
+
+        The demand can also be given as a CapacityCurve. The excess of the demand over
+        the plan is the difference of both step curves, computed exactly over their steps.
         """
+        demand_curve = demand if isinstance(demand, CapacityCurve) else demand.bounded_rate.capacity_curve()
+
         # 1) Si no viene intervalo, usamos la duración de la demanda
         if time_interval is None:
-            time_interval = demand.bounded_rate.max_active_time
+            if isinstance(demand, CapacityCurve):
+                time_interval = select_best_time_unit(demand.active_ms) if np.isfinite(demand.active_ms) else None
+            else:
+                time_interval = demand.bounded_rate.max_active_time
             if time_interval is None:
                 raise ValueError("Demand has no max_active_time; please supply time_interval.")
         elif isinstance(time_interval, str):
             time_interval = parse_time_string_to_duration(time_interval)
 
-        # 2) Extraemos curvas debug [(t_ms, cap), ...]
-        plan_pts = self.bounded_rate.show_available_capacity_curve(time_interval, debug=True)
-        dem_pts  = demand.bounded_rate.show_available_capacity_curve(time_interval, debug=True)
+        # 2) Exceso de la demanda sobre el plan hasta el final del intervalo (incluido)
+        end_ms = np.nextafter(time_interval.to_milliseconds(), np.inf)
+        plan_steps = self.capacity_curve().steps(end_ms)
+        excess = demand_curve.steps(end_ms) - plan_steps
 
         unit_ms = time_interval.unit.to_milliseconds()
 
-        # 3) Recorremos punto a punto
-        for (t_ms, cap_plan), (_, cap_dem) in zip(plan_pts, dem_pts):
-            t_val = t_ms / unit_ms
-            if cap_dem > cap_plan:
-                print(
-                    f"No: at t={t_val:.2f}{time_interval.unit.value}, "
-                    f"plan={cap_plan}, demand={cap_dem}"
-                )
-                return
+        # 3) Primer punto en que la demanda supera al plan
+        t_ms = excess.first_above(0)
+        if t_ms is not None:
+            cap_plan = plan_steps.at(t_ms)
+            print(
+                f"No: at t={t_ms / unit_ms:.2f}{time_interval.unit.value}, "
+                f"plan={cap_plan}, demand={cap_plan + excess.at(t_ms)}"
+            )
+            return
 
         # 4) Si nunca falla
         print(
@@ -150,9 +182,10 @@ class Plan():
         - demand_rate (str)
         - v_plan (float): plan speed in req/ms
         - v_demand (float): demand speed in req/ms
-        - max_backlog (int)
-        - drain_time (float, in output_time_unit)
-        - scheduled_requests (List[{"id": int, "scheduled_at": float}])
+        - max_backlog (int): largest number of requests waiting at once
+        - drain_time (float, in output_time_unit): when the last delayed request is sent
+        - scheduled_requests (RequestSchedule): ids and send times of the delayed requests,
+          as arrays (iterating yields {"id": int, "scheduled_at": float} rows)
         - resume_plan_rate (str)
         - resume_in (float, in output_time_unit)
         """
@@ -214,33 +247,15 @@ class Plan():
                             "quota_allowed_in_plan_window": q_p.consumption_unit
                         }
 
-        # 2) Horizon and sampling
-        plan_q_ms = plan_quotas[0].consumption_period.to_milliseconds() if plan_quotas else 0
-        demand_q_ms = demand_quotas[-1].consumption_period.to_milliseconds() if demand_quotas else 0
-        horizon_ms = max(plan_q_ms, demand_q_ms)
-        td = select_best_time_unit(horizon_ms)
-        step_ms = plan_rate.consumption_period.to_milliseconds()
-        times = list(range(0, int(td.to_milliseconds()) + 1, int(step_ms)))
-        if times[-1] != td.to_milliseconds():
-            times.append(int(td.to_milliseconds()))
-
-        plan_pts = self.bounded_rate.show_available_capacity_curve(td, debug=True)
-        demand_pts = demand.bounded_rate.show_available_capacity_curve(td, debug=True)
+        # 2) Horizon: the demand's duration, or its largest window and the plan's
+        if demand.bounded_rate.max_active_time is not None:
+            horizon_ms = demand.bounded_rate.max_active_time.to_milliseconds()
+        else:
+            horizon_ms = max(self.bounded_rate.limit_table[1][-1], demand.bounded_rate.limit_table[1][-1])
 
-        def value_at(ts, pts):
-            last = 0
-            for t, c in pts:
-                if t > ts:
-                    break
-                last = c
-            return last
-
-        # 3) Compute backlog
-        max_backlog = 0
-        for t in times:
-            back = value_at(t, demand_pts) - value_at(t, plan_pts)
-            if back > max_backlog:
-                max_backlog = back
+        # 3) Serve the demand through every limit of the plan, delayed requests as arrays
+        scheduled, max_backlog = schedule_backlog(self.bounded_rate, demand.bounded_rate, horizon_ms,
+                                                  output_time_unit)
 
         if max_backlog <= 0:
             return {
@@ -250,27 +265,15 @@ class Plan():
                 "v_plan": round(v_plan, 6),
                 "v_demand": round(v_dem, 6),
                 "max_backlog": 0,
-                "scheduled_requests": [],
+                "scheduled_requests": scheduled,
                 "resume_plan_rate": f"{plan_rate.consumption_unit}/{plan_rate.consumption_period}",
                 "resume_in": 0.0
             }
 
-        # 4) Drain backlog
-        r_p = v_plan
-        periodo_ms = 1 / r_p
-        t_drain_ms = max_backlog / r_p
-
-        # 5) Schedule requests
-        scheduled = []
-        first_id = 2
-        for i in range(int(max_backlog)):
-            pid = first_id + i
-            t_i_ms = (i + 1) * periodo_ms
-            t_i = TimeDuration(t_i_ms, TimeUnit.MILLISECOND)\
-                    .to_desired_time_unit(output_time_unit).value
-            scheduled.append({"id": pid, "scheduled_at": t_i})
-
-        # 6) Resume windows
+        # 4) The backlog is cleared when its last request is sent
+        t_drain_ms = float(scheduled.send_times_ms[-1])
+
+        # 5) Resume windows
         dp_ms = d_rate.consumption_period.to_milliseconds()
         rem_ms = dp_ms - (t_drain_ms % dp_ms)
         if rem_ms >= dp_ms:
@@ -344,8 +347,10 @@ class Plan():
         scheduled = analysis.get("scheduled_requests", [])
         if scheduled:
             print("\nRescheduled requests (ID → time):")
-            for r in scheduled:
+            for r in islice(scheduled, 20):
                 print(f"  · Request #{r['id']}: at {r['scheduled_at']:.2f} {output_time_unit.value}")
+            if len(scheduled) > 20:
+                print(f"  · ... {len(scheduled) - 20} more")
             last_id = scheduled[-1]['id']
             print(f"\n✔ After request #{last_id}, backlog is cleared.")
         else:
@@ -393,20 +398,13 @@ class Plan():
         
         # Analyze capacity to get scheduled requests
         analysis = self.has_enough_capacity(demand, output_time_unit)
-        scheduled = analysis.get("scheduled_requests", [])
+        scheduled = analysis.get("scheduled_requests") or RequestSchedule(np.zeros(0, dtype=np.int64), np.zeros(0))
         
-        # Build rescheduled demand
-        demand_resched = []
-        cum = 0
-        sched_iter = iter(scheduled)
-        next_sched = next(sched_iter, None)
-        for t_ms, orig_c in zip(times_ms, demand_caps):
-            if t_ms == 0:
-                cum = orig_c
-            while next_sched and next_sched["scheduled_at"] * 1000 <= t_ms:
-                cum += 1
-                next_sched = next(sched_iter, None)
-            demand_resched.append(cum)
+        # Build rescheduled demand: issued requests, minus the delayed ones issued, plus those already sent
+        issued = np.asarray(demand_caps)
+        demand_resched = issued \
+            - np.searchsorted(scheduled.ids, issued, side="right") \
+            + np.searchsorted(scheduled.send_times_ms, times_ms, side="right")
         
         # Convert times to output unit for axis
         factor = output_time_unit.to_milliseconds(1)
@@ -459,27 +457,34 @@ class Demand():
         # parsear duration si vino como string
         if isinstance(duration, str):
             duration = parse_time_string_to_duration(duration)
-        self.duration = duration
 
         # mantenemos la lógica antigua para quota y N
+        quota = None if quota is None else (quota if isinstance(quota, list) else [quota])
         if N is not None:
-            self.rate = Rate(rate.consumption_unit * N, rate.consumption_period)
-            self.quota = None if quota is None else (quota if isinstance(quota, list) else [quota])
-            if self.quota is not None:
-                self.quota = [
-                    Quota(q.consumption_unit * N, q.consumption_period)
-                    for q in self.quota
-                ]
-        else:
-            self.rate = rate
-            self.quota = None if quota is None else (quota if isinstance(quota, list) else [quota])
-
-        # ahora creamos el bounded_rate pasando max_active_time=self.duration
-        self.bounded_rate = BoundedRate(
-            self.rate,
-            self.quota,
-            max_active_time=self.duration
-        )
+            rate = Rate(rate.consumption_unit * N, rate.consumption_period)
+            if quota is not None:
+                quota = [Quota(q.consumption_unit * N, q.consumption_period) for q in quota]
+
+        # ahora creamos el bounded_rate pasando max_active_time=duration
+        self._set_fields(rate, quota, duration, BoundedRate(rate, quota, max_active_time=duration))
+
+    def _set_fields(self, rate: Rate, quota: Optional[List[Quota]], duration: Optional[TimeDuration],
+                    bounded_rate: BoundedRate):
+        # Único sitio donde se fijan los atributos, tanto desde __init__ como desde _from_bounded_rate
+        self.duration = duration
+        self.rate = rate
+        self.quota = quota
+        self.bounded_rate = bounded_rate
+
+    @classmethod
+    def _from_bounded_rate(cls, bounded_rate: BoundedRate, quota: Optional[List[Quota]] = None,
+                           duration: Optional[TimeDuration] = None) -> 'Demand':
+        """
+        Builds a Demand around an already validated BoundedRate, skipping its validation.
+        """
+        demand = object.__new__(cls)
+        demand._set_fields(bounded_rate.rate, quota, duration, bounded_rate)
+        return demand
 
             
     def __str__(self):
@@ -511,7 +516,11 @@ class Demand():
         if n <= 0:
             raise ValueError("The number of users must be a positive integer.")
         
-        return Demand(rate=self.rate, quota=self.quota, N=n)
+        # Los límites escalados siguen siendo válidos: se reutiliza el bounded_rate sin revalidar
+        bounded_rate = self.bounded_rate.scaled(n)
+        bounded_rate.max_active_time = None
+        quota = None if self.quota is None else [Quota(q.consumption_unit * n, q.consumption_period) for q in self.quota]
+        return Demand._from_bounded_rate(bounded_rate, quota)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,59 +1,52 @@
 # Pricing4API/basic/pricing.py
 
 from typing import List, Union, Optional
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
-from matplotlib.colors import to_rgba
+
+import numpy as np
+
+from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
+from Pricing4API.ancillary.lazy_import import lazy_import
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.utils import parse_time_string_to_duration, select_best_time_unit
 from Pricing4API.basic.plan_and_demand import Plan
 from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_curve import StepCurve
+from Pricing4API.basic.overage import OverageModel
 from Pricing4API.basic.compare_curves import (
     compare_bounded_rates_capacity,
     update_legend_names,
     compare_bounded_rates_capacity_inflection_points
 )
 
+go = lazy_import("plotly.graph_objects")
+plotly_subplots = lazy_import("plotly.subplots")
+mcolors = lazy_import("matplotlib.colors")
+
 
 class Pricing:
     def __init__(self, plans: List[Plan]):
-        # Guardamos copia de los planes "base" antes de inyectar pseudocuotas
-        self.base_plans = plans[:]
-
-        # *** Guardamos los bounded_rates ORIGINALES para no‐overage ***
-        self._original_brs = {}
-        for plan in self.base_plans:
-            br = plan.bounded_rate
-            quotas = None if br.quota is None else br.quota.copy()
-            self._original_brs[plan] = BoundedRate(br.rate, quotas, br.max_active_time)
-
-        # ahora sí, preparamos pseudocuotas sobre los br originales
         self.plans = plans
-        self._inject_overage_quotas()
+        # Los planes no se modifican: el overage se modela aparte
+        self.base_plans = plans[:]
+        self.overage_models = self._build_overage_models()
 
-    def _inject_overage_quotas(self):
+    def _build_overage_models(self) -> List[OverageModel]:
         """
-        Para cada plan, reemplaza su última cuota real por una pseudocuota:
-          - si existe un plan siguiente: 4× la última cuota de ese siguiente plan
+        Un OverageModel por plan (en el orden de self.plans). El tope de overage es
+          - si existe un plan siguiente (por cuota incluida): 4× la última cuota de ese plan
           - si no (último plan): 6× su propia última cuota
-        y almacena la real en plan.max_included_quota.
         """
-        sorted_plans = sorted(
-            self.plans,
+        with_quota = sorted(
+            (p for p in self.plans if p.bounded_rate.quota),
             key=lambda p: p.bounded_rate.limits[-1].consumption_unit
         )
-        for idx, plan in enumerate(sorted_plans):
-            br = plan.bounded_rate
-            real = br.limits[-1]
-            plan.max_included_quota = real.consumption_unit
-
-            if idx < len(sorted_plans) - 1:
-                next_units = sorted_plans[idx + 1].bounded_rate.limits[-1].consumption_unit
-                fict = next_units * 4
+        caps = {}
+        for idx, plan in enumerate(with_quota):
+            if idx < len(with_quota) - 1:
+                caps[id(plan)] = with_quota[idx + 1].bounded_rate.limits[-1].consumption_unit * 4
             else:
-                fict = real.consumption_unit * 6
-
-            br.limits[-1] = Quota(fict, real.consumption_period)
+                caps[id(plan)] = plan.bounded_rate.limits[-1].consumption_unit * 6
+        return [OverageModel(plan, caps.get(id(plan))) for plan in self.plans]
 
     def _compute_default_interval(self) -> TimeDuration:
         max_ms = 0
@@ -65,6 +58,62 @@ class Pricing:
             max_ms = max(max_ms, ms)
         return select_best_time_unit(max_ms)
 
+    def quote(self, requests: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Cost of one billing period of every plan for the given numbers of requests.
+
+        Args:
+            requests (Union[float, np.ndarray]): Requests made in the period.
+
+        Returns:
+            np.ndarray: Array of shape (n_plans,) + np.shape(requests).
+        """
+        return np.stack([np.broadcast_to(model.cost(requests), np.shape(requests))
+                         for model in self.overage_models])
+
+    def simulate_billing(self, source, horizon: Union[str, TimeDuration, float, None] = None, **kwargs):
+        """
+        Per-cycle fees, usage and charges of every plan for a demand or a request trace.
+        See Pricing4API.basic.billing.simulate_billing for the arguments.
+
+        Returns:
+            BillingResult: One row per plan, one column per billing cycle.
+        """
+        from Pricing4API.basic.billing import simulate_billing
+        return simulate_billing(self, source, horizon=horizon, **kwargs)
+
+    def combined_capacity(
+        self,
+        subscriptions: List[int],
+        time_interval: Union[str, TimeDuration, None] = None
+    ) -> StepCurve:
+        """
+        Exact capacity of subscribing subscriptions[i] times to self.plans[i], as a StepCurve.
+
+        Each plan contributes its CapacityCurve scaled by its number of subscriptions;
+        the curves are added by merging their steps instead of sampling the interval.
+
+        Args:
+            subscriptions (List[int]): Subscriptions to each plan (0 to skip it).
+            time_interval (Union[str, TimeDuration, None]): Horizon. Defaults to the largest period of the plans.
+
+        Returns:
+            StepCurve: Combined capacity on [0, time_interval).
+        """
+        if len(subscriptions) != len(self.plans):
+            raise ValueError("subscriptions must have one entry per plan.")
+        if time_interval is None:
+            time_interval = self._compute_default_interval()
+        elif isinstance(time_interval, str):
+            time_interval = parse_time_string_to_duration(time_interval)
+        end_ms = time_interval.to_milliseconds()
+
+        total = StepCurve(np.zeros(1), np.zeros(1), end_ms)
+        for plan, n in zip(self.plans, subscriptions):
+            if n:
+                total = total + plan.capacity_curve(n).steps(end_ms)
+        return total
+
     def show_capacity(
         self,
         time_interval: Union[str, TimeDuration, None] = None,
@@ -77,7 +126,7 @@ class Pricing:
             time_interval = parse_time_string_to_duration(time_interval)
 
         fig = compare_bounded_rates_capacity(
-            bounded_rates=[p.bounded_rate for p in self.plans],
+            bounded_rates=[m.bounded_rate for m in self.overage_models],
             time_interval=time_interval,
             return_fig=True
         )
@@ -106,7 +155,7 @@ class Pricing:
         palette = ["green", "purple", "blue", "orange", "red", "teal"]
         colors = palette[: len(self.base_plans)]
 
-        fig = make_subplots(
+        fig = plotly_subplots.make_subplots(
             rows=1, cols=2,
             subplot_titles=("Capacity Curves", "Flat Cost"),
             column_widths=[0.6, 0.4]
@@ -115,17 +164,16 @@ class Pricing:
         # — Capacity (solo originales) con fill bajo la curva —
         for idx, plan in enumerate(self.base_plans):
             col = colors[idx]
-            orig_br = self._original_brs[plan]
-            pts = orig_br.show_available_capacity_curve(time_interval, debug=True)
-            times, caps = zip(*pts)
-            xs = [t / time_interval.unit.to_milliseconds() for t in times]
+            pts = plan.bounded_rate.show_available_capacity_curve(time_interval, debug=True)
+            times, caps = np.asarray(pts, dtype=np.float64).T
+            xs = times / time_interval.unit.to_milliseconds()
 
-            rgba = to_rgba(col)
+            rgba = mcolors.to_rgba(col)
             fillcolor = f"rgba({int(rgba[0]*255)},{int(rgba[1]*255)},{int(rgba[2]*255)},0.3)"
 
             fig.add_trace(
-                go.Scatter(
-                    x=xs, y=caps,
+                CapacityPlotHelper.line_trace(
+                    xs, caps,
                     mode="lines",
                     line=dict(color=col, dash="solid", width=2),
                     fill="tozeroy",
@@ -142,8 +190,7 @@ class Pricing:
         # — Flat Cost — (horizontales al coste base)
         for idx, plan in enumerate(self.base_plans):
             col = colors[idx]
-            orig_br = self._original_brs[plan]
-            cap_max = int(orig_br.capacity_at(time_interval))
+            cap_max = int(plan.bounded_rate.capacity_at(time_interval))
             xs = [0, cap_max]
             ys = [plan.cost, plan.cost]
 
@@ -187,7 +234,7 @@ class Pricing:
         palette = ["green", "blue", "orange",  "red", "purple", "brown", "pink", "gray", "olive", "cyan"]
         colors = palette[: len(self.plans)]
 
-        fig = make_subplots(
+        fig = plotly_subplots.make_subplots(
             rows=1, cols=2,
             subplot_titles=("Capacity Curves", "Cost vs Requests"),
             column_widths=[0.6, 0.4]
@@ -195,7 +242,7 @@ class Pricing:
 
         # — Capacity subplot — 
         fig_cap = compare_bounded_rates_capacity_inflection_points(
-            bounded_rates=[p.bounded_rate for p in self.plans],
+            bounded_rates=[m.bounded_rate for m in self.overage_models],
             time_interval=time_interval,
             return_fig=True
         )
@@ -208,7 +255,7 @@ class Pricing:
         for idx, tr in enumerate(fig_cap.data):
             # sólo los fill="tozeroy" nos interesan
             
-            r, g, b, _ = to_rgba(colors[idx])
+            r, g, b, _ = mcolors.to_rgba(colors[idx])
             tr.fillcolor = f"rgba({int(r*255)},{int(g*255)},{int(b*255)},0.2)"
             # Store the plan name and color mapping
             plan_colors[tr.name] = colors[idx]
@@ -223,9 +270,9 @@ class Pricing:
                 annotation_text=f"Demand={desired_demand}",
                 row=1, col=1
             )
-            for plan in self.plans:
+            for plan, model in zip(self.plans, self.overage_models):
                 try:
-                    t_str = plan.bounded_rate.min_time(desired_demand)
+                    t_str = model.bounded_rate.min_time(desired_demand)
                 except Exception:
                     t_str = "no alcanzable"
                 print(f"{plan.name}: time to reach {desired_demand} = {t_str}")
@@ -234,23 +281,22 @@ class Pricing:
         fig.update_yaxes(title_text=fig_cap.layout.yaxis.title.text, row=1, col=1)
         print("Plan Colors Mapping:", plan_colors)
         # — Cost subplot — 
-        for plan in self.plans:
-            base = plan.cost
-            over = plan.overage_cost or 0.0
-            limit = plan.max_included_quota
-            sim_cap = int(plan.bounded_rate.capacity_at(time_interval))
+        for plan, model in zip(self.plans, self.overage_models):
+            sim_cap = int(model.capacity_at(time_interval))
 
             # Get the matching color for this plan
             col = plan_colors.get(plan.name, "gray")  # Use a default color if not found
 
             # Defino sólo los x de quiebre
-            xs = [0, limit, sim_cap]
+            xs = [0, sim_cap]
+            if model.included_quota is not None:
+                xs.append(model.included_quota)
             if desired_demand is not None and 0 < desired_demand < sim_cap:
                 xs.append(desired_demand)
 
             xs = sorted(set(xs))
             # Calculo coste en cada quiebre
-            ys = [base + max(0, x - limit) * over for x in xs]
+            ys = model.cost(xs).tolist()
 
             fig.add_trace(
                 go.Scatter(
@@ -270,8 +316,7 @@ class Pricing:
                 annotation_text=f"Demand={desired_demand}",
                 row=1, col=2
             )
-            for plan in self.plans:
-                cost_at = plan.cost + max(0, desired_demand - plan.max_included_quota) * (plan.overage_cost or 0)
+            for plan, cost_at in zip(self.plans, self.quote(desired_demand)):
                 print(f"{plan.name}: cost at {desired_demand} = {cost_at:.2f}")
 
         fig.update_xaxes(title_text="Requests", row=1, col=2)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate
+from Pricing4API.basic.capacity_kernels import capacity_jumps, serve_bins
+
+
+class RequestSchedule:
+    """
+    Requests of a demand that a plan can only send later than the demand issues them.
+
+    ids are the positions of the requests in the demand (1 is its first request) and
+    send_times_ms the instants at which the plan lets them out, both in FIFO order.
+    Iterating yields the rows as {"id", "scheduled_at"} dicts, built lazily.
+    """
+
+    def __init__(self, ids: np.ndarray, send_times_ms: np.ndarray, time_unit: TimeUnit = TimeUnit.SECOND):
+        self.__ids = ids
+        self.__send_times_ms = send_times_ms
+        self.__time_unit = time_unit
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.__ids
+
+    @property
+    def send_times_ms(self) -> np.ndarray:
+        return self.__send_times_ms
+
+    @property
+    def time_unit(self) -> TimeUnit:
+        return self.__time_unit
+
+    @property
+    def send_times(self) -> np.ndarray:
+        """
+        Send times in time_unit.
+        """
+        return self.__send_times_ms / self.__time_unit.to_milliseconds()
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def __getitem__(self, i: int) -> dict:
+        return {"id": int(self.__ids[i]),
+                "scheduled_at": float(self.__send_times_ms[i] / self.__time_unit.to_milliseconds())}
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def iter_chunks(self, chunk_size: int = 1 << 16) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields (ids, send_times) slices of at most chunk_size, send times in time_unit.
+        """
+        unit_ms = self.__time_unit.to_milliseconds()
+        for start in range(0, len(self.__ids), chunk_size):
+            yield self.__ids[start:start + chunk_size], self.__send_times_ms[start:start + chunk_size] / unit_ms
+
+    def iter_rows(self, chunk_size: int = 1 << 16) -> Iterator[dict]:
+        for ids, times in self.iter_chunks(chunk_size):
+            for pid, t in zip(ids.tolist(), times.tolist()):
+                yield {"id": pid, "scheduled_at": t}
+
+    def to_csv(self, path, chunk_size: int = 1 << 16):
+        """
+        Writes the schedule as "id,scheduled_at" lines, one chunk at a time.
+        """
+        with open(path, "w") as f:
+            f.write("id,scheduled_at\n")
+            for ids, times in self.iter_chunks(chunk_size):
+                np.savetxt(f, np.column_stack((ids, times)), fmt=["%d", "%.17g"], delimiter=",")
+
+    def __repr__(self):
+        return f"RequestSchedule({len(self)} requests, time_unit={self.__time_unit.value})"
+
+
+def _next_release(lo: int, bin_ms: float, values: np.ndarray, periods: np.ndarray, state) -> int:
+    # Con la cola llena y alguna cuota agotada no se sirve nada hasta que se reinicien todas las agotadas
+    served, _, window_base = state
+    exhausted = np.flatnonzero(window_base[:, 0] + values[1:] - served[0] <= 0)
+    if not len(exhausted):
+        return lo
+    quota_periods = periods[1:]
+    # Misma tolerancia al ruido de los periodos que serve_bins
+    windows = np.floor((lo - 1) * bin_ms / quota_periods + 1e-9)
+    target = int(np.ceil(((windows[exhausted] + 1 - 1e-9) * quota_periods[exhausted] / bin_ms).max()))
+    # Las ventanas que empiezan entre medias arrancan del total servido, que no cambia
+    restarted = np.floor((target - 1) * bin_ms / quota_periods + 1e-9) != windows
+    window_base[restarted] = served
+    return max(target, lo)
+
+
+def schedule_backlog(plan: BoundedRate, demand: BoundedRate, horizon_ms: float,
+                     time_unit: TimeUnit = TimeUnit.SECOND,
+                     max_bins: int = 1 << 20) -> Tuple[RequestSchedule, int]:
+    """
+    Sends the demand through the plan with a FIFO queue and returns the delayed requests.
+
+    The demand issues its requests as its capacity curve grows during horizon_ms. The
+    plan serves them with serve_bins, one bin per period of its rate: each bin sends
+    up to the rate value, backlog first, and no quota window (aligned at 0) is ever
+    exceeded. Requests served in bin b that arrived before it are the delayed ones,
+    sent at the start of b, so the schedule is built per bin from the running totals
+    instead of request by request. Bins are processed in blocks until the queue is empty;
+    once the demand is over, bins where an exhausted quota blocks the queue are skipped.
+
+    Args:
+        plan (BoundedRate): Limits of the plan.
+        demand (BoundedRate): The demand, issuing requests as fast as its limits allow.
+        horizon_ms (float): Time during which the demand issues requests.
+        time_unit (TimeUnit): Unit of the send times reported by the schedule.
+        max_bins (int): Bins processed per block.
+
+    Returns:
+        Tuple[RequestSchedule, int]: The delayed requests and the largest backlog.
+    """
+    values, periods = plan.limit_table
+    demand_values, demand_periods = demand.limit_table
+    bin_ms = float(periods[0])
+
+    jump_times, jump_totals = capacity_jumps(demand_values, demand_periods, np.nextafter(horizon_ms, np.inf))
+    total = float(jump_totals[-1]) if len(jump_totals) else 0.0
+    n_bins = int(np.ceil(horizon_ms / bin_ms)) + 1
+
+    state = (np.zeros(1), np.zeros(1), np.zeros((len(values) - 1, 1)))
+    served_before, arrived_before = 0.0, 0.0
+    max_backlog = 0.0
+    ids, send_times = [], []
+
+    lo = 0
+    while lo < n_bins or served_before < total:
+        if lo < n_bins:
+            hi = min(lo + max_bins, n_bins)
+        else:
+            # Demand over: just enough bins to drain the queue at the rate
+            hi = lo + min(max_bins, int(np.ceil((total - served_before) / values[0])) + 1)
+        bins = np.arange(lo, hi)
+        # Demand issued before the end of each bin
+        issued = np.searchsorted(jump_times, (bins + 1) * bin_ms, side="left")
+        arrived = np.where(issued > 0, jump_totals[np.maximum(issued - 1, 0)], 0.0)
+        counts = np.diff(arrived, prepend=arrived_before)[None, :]
+
+        arrived_cum, served_cum, _ = serve_bins(counts, lo, bin_ms, values, periods, state, queue=True)
+        arrived_cum, served_cum = arrived_cum[0], served_cum[0]
+        max_backlog = max(max_backlog, float(np.max(arrived_cum - served_cum)))
+
+        # Served in the bin among those that had arrived before it
+        served_prev = np.concatenate(([served_before], served_cum[:-1]))
+        arrived_prev = np.concatenate(([arrived_before], arrived_cum[:-1]))
+        delayed = np.maximum(np.minimum(served_cum, arrived_prev) - served_prev, 0).astype(np.int64)
+        busy = np.flatnonzero(delayed)
+        if len(busy):
+            delayed, first = delayed[busy], served_prev[busy].astype(np.int64) + 1
+            offsets = np.arange(delayed.sum()) - np.repeat(np.cumsum(delayed) - delayed, delayed)
+            ids.append(np.repeat(first, delayed) + offsets)
+            send_times.append(np.repeat(bins[busy] * bin_ms, delayed))
+
+        served_before, arrived_before = float(served_cum[-1]), float(arrived_cum[-1])
+        lo = hi
+        if lo >= n_bins and served_before < total:
+            lo = _next_release(lo, bin_ms, values, periods, state)
+
+    schedule = RequestSchedule(
+        np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+        np.concatenate(send_times) if send_times else np.zeros(0),
+        time_unit,
+    )
+    return schedule, int(round(max_backlog))
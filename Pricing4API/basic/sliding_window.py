@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, capacity_jumps, limit_table, reachable_values
+from Pricing4API.utils import to_milliseconds
+
+WINDOWS = ("fixed", "rolling", "sliding")
+
+# Por encima de este valor un rolling log se guarda en cubetas en lugar de marca a marca
+MAX_LOG = 4096
+
+
+def _nested(periods: np.ndarray) -> bool:
+    ratios = periods[1:] / periods[:-1]
+    return bool(np.all(np.abs(ratios - np.rint(ratios)) < 1e-9))
+
+
+def window_of(limit) -> str:
+    """
+    Window semantics of a limit: "fixed" for Rate, Quota and Limit, else its window.
+    """
+    return getattr(limit, "window", "fixed")
+
+
+class SlidingQuota(Quota):
+    """
+    A Quota enforced over windows that move with time instead of windows aligned at 0.
+
+    With window="rolling" (a rolling log) at most consumption_unit requests fit in any
+    interval (t - period, t]. With window="sliding" it is the sliding-window counter of
+    many gateways: the count of the current fixed window plus the count of the previous
+    one weighted by the fraction of it still inside (t - period, t].
+    """
+
+    def __init__(self, consumption_unit: int, consumption_period: Union[str, TimeDuration], window: str = "rolling"):
+        if window not in WINDOWS[1:]:
+            raise ValueError(f"window must be one of {WINDOWS[1:]}, got {window!r}")
+        super().__init__(consumption_unit, consumption_period)
+        self.__window = window
+
+    @property
+    def window(self) -> str:
+        return self.__window
+
+    def __str__(self):
+        return f"SlidingQuota({self.consumption_unit}, {self.consumption_period}, {self.__window!r})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def capacity_at(self, t: Union[str, TimeDuration]):
+        return float(window_capacity_at([self], to_milliseconds(t)))
+
+
+class _FixedWindow:
+    """
+    Count of the current window aligned at 0.
+    """
+
+    def __init__(self, value: float, period_ms: float):
+        self.value, self.period = value, period_ms
+        self.index, self.used = -1, 0.0
+
+    def room(self, t: float) -> float:
+        index = math.floor(t / self.period)
+        if index != self.index:
+            self.index, self.used = index, 0.0
+        return self.value - self.used
+
+    def fits(self, t: float, count: int) -> bool:
+        return self.room(t) >= count
+
+    def release(self, t: float) -> float:
+        return t if self.room(t) >= 1 else (self.index + 1) * self.period
+
+    def add(self, t: float, count: int):
+        self.used += count
+
+
+class _RollingLog:
+    """
+    Exact rolling log: a ring buffer with the instants of the last value requests.
+    """
+
+    def __init__(self, value: float, period_ms: float):
+        self.value, self.period = value, period_ms
+        self.ring = [-math.inf] * int(value)
+        self.head = 0  # posición de la marca más antigua
+
+    def _oldest(self, k: int) -> float:
+        # Instante de la k-ésima marca más antigua (0 es la más antigua)
+        return self.ring[(self.head + k) % len(self.ring)]
+
+    def room(self, t: float) -> float:
+        # Marcas fuera de la ventana (t - p, t]: las más antiguas, con instante + p <= t
+        # (el anillo está ordenado a partir de head: búsqueda binaria, O(log value))
+        low, high = 0, len(self.ring)
+        while low < high:
+            middle = (low + high) // 2
+            if self._oldest(middle) + self.period <= t:
+                low = middle + 1
+            else:
+                high = middle
+        return float(low)
+
+    def fits(self, t: float, count: int) -> bool:
+        return 0 < count <= len(self.ring) and self._oldest(count - 1) + self.period <= t
+
+    def release(self, t: float) -> float:
+        return max(t, self._oldest(0) + self.period) if self.ring else math.inf
+
+    def add(self, t: float, count: int):
+        for _ in range(count):
+            self.ring[self.head] = t
+            self.head = (self.head + 1) % len(self.ring)
+
+
+class _BucketedLog:
+    """
+    Rolling log in buckets of period / buckets: O(buckets) memory whatever the value.
+
+    A bucket leaves the window only when all of it is out of (t - p, t], so the count
+    is never below the exact one and no more requests are admitted than the log would.
+    """
+
+    def __init__(self, value: float, period_ms: float, buckets: int):
+        self.value, self.period, self.buckets = value, period_ms, buckets
+        self.width = period_ms / buckets
+        self.counts = [0] * (buckets + 1)
+        self.index, self.total = 0, 0
+
+    def _advance(self, t: float):
+        index = math.floor(t / self.width)
+        if index - self.index > self.buckets:
+            self.counts = [0] * (self.buckets + 1)
+            self.total = 0
+        else:
+            for j in range(self.index + 1, index + 1):
+                slot = j % (self.buckets + 1)
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        self.index = max(self.index, index)
+
+    def room(self, t: float) -> float:
+        self._advance(t)
+        return self.value - self.total
+
+    def fits(self, t: float, count: int) -> bool:
+        return self.room(t) >= count
+
+    def release(self, t: float) -> float:
+        if self.room(t) >= 1:
+            return t
+        # La cubeta no vacía más antigua sale de la ventana al empezar la cubeta index + 1 de después
+        for j in range(self.index - self.buckets, self.index + 1):
+            if self.counts[j % (self.buckets + 1)]:
+                return (j + self.buckets + 1) * self.width
+        return t
+
+    def add(self, t: float, count: int):
+        self.counts[self.index % (self.buckets + 1)] += count
+        self.total += count
+
+
+class _SlidingCounter:
+    """
+    Sliding-window counter: current and previous fixed windows, the previous one weighted.
+    """
+
+    def __init__(self, value: float, period_ms: float):
+        self.value, self.period = value, period_ms
+        self.index, self.previous, self.current = 0, 0.0, 0.0
+
+    def _shift(self, t: float):
+        index = math.floor(t / self.period)
+        if index != self.index:
+            self.previous = self.current if index == self.index + 1 else 0.0
+            self.current, self.index = 0.0, index
+
+    def room(self, t: float) -> float:
+        self._shift(t)
+        elapsed = (t - self.index * self.period) / self.period
+        return math.floor(self.value - self.previous * (1 - elapsed) - self.current + 1e-9)
+
+    def fits(self, t: float, count: int) -> bool:
+        return self.room(t) >= count
+
+    def release(self, t: float) -> float:
+        if self.room(t) >= 1:
+            return t
+        start, previous, current = self.index * self.period, self.previous, self.current
+        if current > self.value - 1:
+            # Hasta la ventana siguiente no cabe ninguna: allí la actual pasa a ser la anterior
+            start, previous, current = start + self.period, current, 0.0
+        # previous * (1 - e / p) + current <= value - 1
+        elapsed = max(0.0, self.period * (1 - (self.value - 1 - current) / previous)) if previous else 0.0
+        return max(t, start + elapsed * (1 + 1e-12))
+
+    def add(self, t: float, count: int):
+        self.current += count
+
+
+def _window_state(limit, max_log: int = MAX_LOG, buckets: int = 64):
+    value, period = limit_table([limit])
+    value, period = float(value[0]), float(period[0])
+    window = window_of(limit)
+    if window == "fixed":
+        return _FixedWindow(value, period)
+    if window == "sliding":
+        return _SlidingCounter(value, period)
+    return _RollingLog(value, period) if value <= max_log else _BucketedLog(value, period, buckets)
+
+
+def _closed_form(limits: Sequence) -> bool:
+    # Con periodos que se dividen y sin contadores deslizantes, la ráfaga voraz desde 0 es
+    # la misma con ventanas fijas que con rolling log (ver window_capacity_jumps)
+    periods = np.sort(limit_table(limits)[1])
+    return all(window_of(limit) != "sliding" for limit in limits) and _nested(periods)
+
+
+def _sorted_table(limits: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    values, periods = limit_table(limits)
+    order = np.argsort(periods, kind="stable")
+    return values[order], periods[order]
+
+
+def window_capacity_jumps(limits: Sequence, length_ms: float, simulate: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact jumps of the accumulated capacity of limits with any window semantics, on [0, length_ms).
+
+    The capacity is the one of the greedy schedule that sends every request as soon as
+    all the limits let it, which is the largest count by every instant. When the periods
+    divide each other and no limit is a sliding counter it is the capacity_jumps of the
+    limit table: the greedy schedule repeats the same bursts in every window of each
+    level, so the requests in any (t - p, t] are a tail of one window plus the matching
+    head of the next, never more than the value. Otherwise the greedy schedule is
+    simulated burst by burst, O(bursts * limits).
+
+    Args:
+        limits (Sequence): Rate, Quota, Limit and SlidingQuota objects.
+        length_ms (float): End of the (half-open) interval.
+        simulate (bool): Simulate even when the closed form applies.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (times, capacities) as in capacity_jumps.
+    """
+    if not limits:
+        raise ValueError("At least one limit is needed")
+    if not simulate and _closed_form(limits):
+        values, periods = _sorted_table(limits)
+        return capacity_jumps(reachable_values(values, periods), periods, length_ms)
+
+    states = [_window_state(limit, max_log=math.inf) for limit in limits]
+    t, total = 0.0, 0.0
+    times, capacities = [], []
+    while t < length_ms:
+        later = max(state.release(t) for state in states)
+        if later > t:
+            t = later
+            continue
+        burst = math.floor(min(state.room(t) for state in states))
+        for state in states:
+            state.add(t, burst)
+        total += burst
+        times.append(t)
+        capacities.append(total)
+    return np.array(times), np.array(capacities)
+
+
+def window_capacity_at(limits: Sequence, t_ms: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Accumulated capacity of limits with any window semantics at one or many instants.
+    """
+    t = np.asarray(t_ms, dtype=np.float64)
+    if _closed_form(limits):
+        values, periods = _sorted_table(limits)
+        return capacity_at_ms(reachable_values(values, periods), periods, t)
+    times, capacities = window_capacity_jumps(limits, float(t.max(initial=0.0)) * (1 + 1e-12) + 1.0)
+    return capacities[np.searchsorted(times, t, side="right") - 1]
+
+
+def worst_case_burst(limits: Sequence, length_ms: Union[str, TimeDuration, float]) -> Dict[str, float]:
+    """
+    Most requests the limits let through in any interval of length length_ms, with their
+    values and periods enforced over fixed windows and over rolling windows.
+
+    With rolling windows no interval holds more than the greedy schedule sends in
+    [0, length_ms), C(length_ms^-). With fixed windows a client that saved its budget
+    spends the end of one top window and then starts afresh: the worst case is
+    max over d of C(d^-) + C((length_ms - d)^-), d being how long before the top
+    boundary it starts; both terms only change at multiples of the shortest period.
+
+    Args:
+        limits (Sequence): Limits of the plan, whatever their window semantics.
+        length_ms (Union[str, TimeDuration, float]): Length of the interval (ms if a number).
+
+    Returns:
+        Dict[str, float]: {"fixed": ..., "rolling": ...}.
+
+    Raises:
+        ValueError: If the periods do not divide each other.
+    """
+    length = to_milliseconds(length_ms)
+    values, periods = _sorted_table(limits)
+    if not _nested(periods):
+        raise ValueError("worst_case_burst needs periods that divide each other (e.g. 1s, 1min, 1h)")
+    values = reachable_values(values, periods)
+    shortest, top = periods[0], periods[-1]
+
+    def before(x):
+        # C(x^-): la capacidad solo salta en múltiplos del periodo más corto
+        x = np.asarray(x, dtype=np.float64)
+        at = (np.ceil(x / shortest - 1e-9) - 0.5) * shortest
+        return np.where(x > 0, capacity_at_ms(values, periods, np.maximum(at, 0.0)), 0.0)
+
+    if length <= 0:
+        return {"fixed": 0.0, "rolling": 0.0}
+    j = np.arange(int(np.ceil(min(length, top) / shortest - 1e-9)))
+    fixed = capacity_at_ms(values, periods, j * shortest) + before(length - j * shortest)
+    return {"fixed": float(fixed.max()), "rolling": float(before(length))}
+
+
+class SlidingAdmission:
+    """
+    Online admission against limits with fixed, rolling or sliding windows.
+
+    Every check is O(1) per limit: fixed windows and sliding counters keep two
+    counters, a rolling log of value <= max_log keeps a ring buffer with the instants
+    of its last value requests, and a larger one keeps counts for buckets of
+    period / buckets (never admitting more than the exact log would). Requests must
+    come in non-decreasing time order.
+    """
+
+    def __init__(self, limits: Sequence, max_log: int = MAX_LOG, buckets: int = 64):
+        self.__limits = list(limits)
+        self.__states = [_window_state(limit, max_log, buckets) for limit in self.__limits]
+        self.__admitted = 0
+        self.__rejected = 0
+
+    @property
+    def limits(self) -> list:
+        return list(self.__limits)
+
+    @property
+    def admitted(self) -> int:
+        return self.__admitted
+
+    @property
+    def rejected(self) -> int:
+        return self.__rejected
+
+    def room(self, t_ms: float) -> float:
+        """
+        Requests that still fit at t_ms.
+        """
+        return min(state.room(t_ms) for state in self.__states)
+
+    def admit(self, t_ms: float, count: int = 1) -> bool:
+        """
+        Admits count requests at t_ms if every limit has room for all of them.
+        """
+        if all(state.fits(t_ms, count) for state in self.__states):
+            for state in self.__states:
+                state.add(t_ms, count)
+            self.__admitted += count
+            return True
+        self.__rejected += count
+        return False
+
+
+class SlidingBoundedRate:
+    """
+    A rate and quotas like BoundedRate, each enforced over its own kind of window.
+
+    Quotas are Quota (fixed windows aligned at 0) or SlidingQuota (rolling log or
+    sliding counter). Unlike BoundedRate no quota is dropped: one that cannot be
+    reached just never binds.
+    """
+
+    def __init__(self, rate: Rate, quota: Union[Quota, List[Quota], None] = None):
+        quotas = [] if quota is None else [quota] if not isinstance(quota, list) else list(quota)
+        self.rate = rate
+        self.quota = sorted(quotas, key=lambda q: q.consumption_period.to_milliseconds())
+        self.limits = [rate] + self.quota
+
+    def __repr__(self):
+        return f"SlidingBoundedRate({self.rate}, {self.quota})"
+
+    @property
+    def windows(self) -> List[str]:
+        return [window_of(limit) for limit in self.limits]
+
+    def capacity_at(self, t: Union[str, TimeDuration, float, np.ndarray]):
+        """
+        Accumulated capacity at t (a time string, a TimeDuration, or milliseconds).
+        """
+        if isinstance(t, np.ndarray):
+            return window_capacity_at(self.limits, t)
+        return float(window_capacity_at(self.limits, to_milliseconds(t)))
+
+    def capacity_jumps(self, length: Union[str, TimeDuration, float]) -> Tuple[np.ndarray, np.ndarray]:
+        return window_capacity_jumps(self.limits, to_milliseconds(length))
+
+    def admission(self, max_log: int = MAX_LOG, buckets: int = 64) -> SlidingAdmission:
+        return SlidingAdmission(self.limits, max_log, buckets)
+
+    def worst_case_burst(self, length: Union[str, TimeDuration, float]) -> Dict[str, float]:
+        return worst_case_burst(self.limits, length)
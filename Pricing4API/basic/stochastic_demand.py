@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration
+from Pricing4API.basic.bounded_rate import BoundedRate, Rate
+from Pricing4API.basic.capacity_kernels import serve_bins
+from Pricing4API.utils import to_milliseconds
+
+POLICIES = ("reject", "queue")
+# Ensayos que comparten una semilla hija: fija para que el resultado no dependa de batch_size
+SEED_BLOCK = 50
+
+
+def _per_ms(rate: Rate) -> float:
+    return rate.consumption_unit / rate.consumption_period.to_milliseconds()
+
+
+class StochasticDemand(ABC):
+    """
+    Base class of the random arrival models used by simulate_demand.
+
+    A model draws, for a batch of independent trials, the number of requests that
+    arrive in each time bin. Models with memory (e.g. on/off) keep it in a state
+    object that is passed from one block of bins to the next.
+    """
+
+    def init_state(self, rng: np.random.Generator, n_trials: int):
+        # Memoryless models only need to know how many trials to draw
+        return n_trials
+
+    @abstractmethod
+    def sample(self, rng: np.random.Generator, state, start_ms: float, bin_ms: float, n_bins: int):
+        """
+        Returns (counts, state): counts has shape (n_trials, n_bins).
+        """
+
+    @abstractmethod
+    def mean_rate_at(self, t_ms: np.ndarray) -> np.ndarray:
+        """
+        Expected arrivals per millisecond at each instant.
+        """
+
+
+class PoissonDemand(StochasticDemand):
+    """
+    Poisson arrivals with a constant mean rate, e.g. PoissonDemand(Rate(1, "2s")).
+    """
+
+    def __init__(self, mean_rate: Rate):
+        self.mean_rate = mean_rate
+
+    def __repr__(self):
+        return f"PoissonDemand({self.mean_rate})"
+
+    def mean_rate_at(self, t_ms):
+        return np.full(np.shape(t_ms), _per_ms(self.mean_rate))
+
+    def sample(self, rng, state, start_ms, bin_ms, n_bins):
+        n_trials = state
+        return rng.poisson(_per_ms(self.mean_rate) * bin_ms, size=(n_trials, n_bins)), state
+
+
+class DiurnalDemand(StochasticDemand):
+    """
+    Poisson arrivals whose rate follows a daily cycle:
+
+        rate(t) = mean_rate * (1 + amplitude * cos(2*pi*(t - peak) / period))
+    """
+
+    def __init__(self, mean_rate: Rate, amplitude: float = 0.5,
+                 period: Union[str, TimeDuration] = "1day", peak: Union[str, TimeDuration] = "14h"):
+        if not 0 <= amplitude <= 1:
+            raise ValueError("amplitude must be between 0 and 1.")
+        self.mean_rate = mean_rate
+        self.amplitude = amplitude
+        self.period_ms = to_milliseconds(period)
+        self.peak_ms = to_milliseconds(peak)
+
+    def __repr__(self):
+        return f"DiurnalDemand({self.mean_rate}, amplitude={self.amplitude})"
+
+    def mean_rate_at(self, t_ms):
+        phase = 2 * np.pi * (np.asarray(t_ms, dtype=np.float64) - self.peak_ms) / self.period_ms
+        return _per_ms(self.mean_rate) * (1 + self.amplitude * np.cos(phase))
+
+    def sample(self, rng, state, start_ms, bin_ms, n_bins):
+        n_trials = state
+        # Rate at the middle of each bin
+        mean = self.mean_rate_at(start_ms + (np.arange(n_bins) + 0.5) * bin_ms) * bin_ms
+        return rng.poisson(mean, size=(n_trials, n_bins)), state
+
+
+class OnOffDemand(StochasticDemand):
+    """
+    Bursty arrivals: Poisson at on_rate during ON periods and nothing during OFF periods.
+
+    ON and OFF durations are exponential with the given means; every trial starts
+    in the stationary regime.
+    """
+
+    def __init__(self, on_rate: Rate, mean_on: Union[str, TimeDuration] = "5min",
+                 mean_off: Union[str, TimeDuration] = "30min"):
+        self.on_rate = on_rate
+        self.mean_on_ms = to_milliseconds(mean_on)
+        self.mean_off_ms = to_milliseconds(mean_off)
+
+    def __repr__(self):
+        return f"OnOffDemand({self.on_rate}, mean_on={self.mean_on_ms}ms, mean_off={self.mean_off_ms}ms)"
+
+    def mean_rate_at(self, t_ms):
+        duty = self.mean_on_ms / (self.mean_on_ms + self.mean_off_ms)
+        return np.full(np.shape(t_ms), _per_ms(self.on_rate) * duty)
+
+    def init_state(self, rng, n_trials):
+        on = rng.random(n_trials) < self.mean_on_ms / (self.mean_on_ms + self.mean_off_ms)
+        # Exponential durations are memoryless, so the residual time is exponential too
+        remaining = rng.exponential(np.where(on, self.mean_on_ms, self.mean_off_ms))
+        return on, remaining
+
+    def sample(self, rng, state, start_ms, bin_ms, n_bins):
+        on, next_switch = state
+        n_trials = len(on)
+        end_ms = n_bins * bin_ms
+        switch_at = next_switch.copy()  # relative to start_ms
+        current = on.copy()
+
+        # Toggle events, one switch per trial and iteration
+        toggles = np.zeros((n_trials, n_bins + 1), dtype=np.int8)
+        pending = switch_at < end_ms
+        while pending.any():
+            trials = np.flatnonzero(pending)
+            np.add.at(toggles, (trials, np.ceil(switch_at[trials] / bin_ms).astype(np.int64)), 1)
+            current[trials] = ~current[trials]
+            switch_at[trials] += rng.exponential(np.where(current[trials], self.mean_on_ms, self.mean_off_ms))
+            pending = switch_at < end_ms
+
+        active = (on[:, None].astype(np.int8) + np.cumsum(toggles, axis=1)[:, :n_bins]) % 2
+        counts = rng.poisson(_per_ms(self.on_rate) * bin_ms * active)
+        return counts, (current, switch_at - end_ms)
+
+
+class MonteCarloResult:
+    """
+    Per-trial outcome of simulate_demand, with the usual summary statistics.
+    """
+
+    def __init__(self, policy: str, horizon_ms: float, arrivals: np.ndarray, served: np.ndarray,
+                 max_backlog: np.ndarray, limited: np.ndarray, exhaustion_ms: np.ndarray):
+        self.__policy = policy
+        self.__horizon_ms = horizon_ms
+        self.__arrivals = arrivals
+        self.__served = served
+        self.__max_backlog = max_backlog
+        self.__limited = limited
+        self.__exhaustion_ms = exhaustion_ms
+
+    @property
+    def policy(self) -> str:
+        return self.__policy
+
+    @property
+    def horizon_ms(self) -> float:
+        return self.__horizon_ms
+
+    @property
+    def n_trials(self) -> int:
+        return len(self.__arrivals)
+
+    @property
+    def arrivals(self) -> np.ndarray:
+        return self.__arrivals
+
+    @property
+    def served(self) -> np.ndarray:
+        return self.__served
+
+    @property
+    def rejected(self) -> np.ndarray:
+        """
+        Requests not served: rejected ones, or still queued at the end with the queue policy.
+        """
+        return self.__arrivals - self.__served
+
+    @property
+    def max_backlog(self) -> np.ndarray:
+        return self.__max_backlog
+
+    @property
+    def exhaustion_ms(self) -> np.ndarray:
+        """
+        First instant some quota was exhausted in each trial (inf if never).
+        """
+        return self.__exhaustion_ms
+
+    @property
+    def rejection_probability(self) -> float:
+        """
+        Probability that at least one request is not served on arrival (rejected or delayed).
+        """
+        return float(np.mean(self.__limited))
+
+    @property
+    def exhaustion_probability(self) -> float:
+        return float(np.mean(np.isfinite(self.__exhaustion_ms)))
+
+    def backlog_percentiles(self, q: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+        return dict(zip(q, np.percentile(self.__max_backlog, q).tolist()))
+
+    def exhaustion_percentiles(self, q: Sequence[float] = (1, 10, 50)) -> Dict[float, float]:
+        """
+        Percentiles (nearest rank) of the time to exhaustion in ms; trials that never exhaust count as inf.
+        """
+        ordered = np.sort(self.__exhaustion_ms)
+        ranks = np.clip(np.ceil(np.asarray(q) / 100 * len(ordered)).astype(np.int64) - 1, 0, len(ordered) - 1)
+        return dict(zip(q, ordered[ranks].tolist()))
+
+    def summary(self) -> dict:
+        return {
+            "policy": self.__policy,
+            "n_trials": self.n_trials,
+            "mean_arrivals": float(np.mean(self.__arrivals)),
+            "mean_served": float(np.mean(self.__served)),
+            "rejection_probability": self.rejection_probability,
+            "mean_rejected_fraction": float(np.mean(self.rejected / np.maximum(self.__arrivals, 1))),
+            "backlog_percentiles": self.backlog_percentiles(),
+            "exhaustion_probability": self.exhaustion_probability,
+            "exhaustion_percentiles": self.exhaustion_percentiles(),
+        }
+
+
+def _simulate_batch(values: np.ndarray, periods: np.ndarray, model: StochasticDemand, policy: str,
+                    n_trials: int, bin_ms: float, n_bins: int, seed, cells: int = 1 << 21):
+    """
+    Simulates n_trials independent trials; returns the per-trial arrays of MonteCarloResult.
+
+    Arrivals are drawn in blocks of bins and served with serve_bins, all trials at once.
+    """
+    rng = np.random.default_rng(seed)
+    state = model.init_state(rng, n_trials)
+
+    served = np.zeros(n_trials)
+    arrived = np.zeros(n_trials)
+    window_base = np.zeros((len(values) - 1, n_trials))
+    max_backlog = np.zeros(n_trials)
+    limited = np.zeros(n_trials, dtype=bool)
+    exhaustion = np.full(n_trials, np.inf)
+
+    chunk = max(1, cells // n_trials)
+    for start in range(0, n_bins, chunk):
+        stop = min(start + chunk, n_bins)
+        counts, state = model.sample(rng, state, start * bin_ms, bin_ms, stop - start)
+
+        served_before, arrived_before = served.copy(), arrived.copy()
+        arrived_cum, served_cum, bound = serve_bins(counts, start, bin_ms, values, periods,
+                                                    (served, arrived, window_base), queue=policy == "queue")
+        if policy == "reject":
+            limited |= (arrived - arrived_before) > (served - served_before)
+        else:
+            max_backlog = np.maximum(max_backlog, (arrived_cum - served_cum).max(axis=1))
+            limited |= max_backlog > 0
+
+        hit = (served_cum >= bound) & np.isinf(exhaustion)[:, None]
+        first = np.argmax(hit, axis=1)
+        newly = hit[np.arange(n_trials), first]
+        exhaustion[newly] = (start + first[newly]) * bin_ms
+
+    return arrived, served, max_backlog, limited, exhaustion
+
+
+def simulate_demand(
+    plan,
+    demand: StochasticDemand,
+    time_interval: Union[str, TimeDuration] = "1month",
+    n_trials: int = 1000,
+    policy: str = "reject",
+    bin_size: Union[str, TimeDuration, None] = None,
+    seed: Optional[int] = None,
+    batch_size: int = 1000,
+    workers: Optional[int] = None,
+) -> MonteCarloResult:
+    """
+    Monte-Carlo simulation of a random demand against the limits of a plan.
+
+    Every trial draws its arrivals from the demand model and serves them through the
+    plan's rate and quotas (fixed windows aligned at 0, as in capacity_at). Requests
+    that do not fit are rejected (policy="reject") or wait in an unbounded FIFO queue
+    (policy="queue").
+
+    Args:
+        plan: A BoundedRate, or a Plan with a bounded_rate.
+        demand (StochasticDemand): Arrival model.
+        time_interval (Union[str, TimeDuration]): Simulated time. Defaults to one month.
+        n_trials (int): Number of independent trials.
+        policy (str): "reject" or "queue".
+        bin_size (Union[str, TimeDuration, None]): Time resolution. Defaults to the rate period;
+            coarser bins serve up to the rate scaled to the bin.
+        seed (Optional[int]): Seed; results do not depend on batch_size or workers.
+        batch_size (int): Trials handed to a worker at a time. Trials are simulated in
+            blocks of SEED_BLOCK, each with its own child seed.
+        workers (Optional[int]): Processes to spread the batches over. Defaults to in-process.
+
+    Returns:
+        MonteCarloResult: Per-trial results and summary statistics.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}")
+    if n_trials < 1:
+        raise ValueError("n_trials must be at least 1.")
+    bounded_rate: BoundedRate = getattr(plan, "bounded_rate", plan)
+    values, periods = bounded_rate.limit_table
+
+    horizon_ms = to_milliseconds(time_interval)
+    bin_ms = periods[0] if bin_size is None else to_milliseconds(bin_size)
+    n_bins = int(np.ceil(horizon_ms / bin_ms))
+
+    sizes = [min(SEED_BLOCK, n_trials - i) for i in range(0, n_trials, SEED_BLOCK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(values, periods, demand, policy, size, bin_ms, n_bins, s) for size, s in zip(sizes, seeds)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_simulate_batch, *zip(*jobs),
+                                        chunksize=max(1, batch_size // SEED_BLOCK)))
+    else:
+        outputs = [_simulate_batch(*job) for job in jobs]
+
+    arrays = [np.concatenate(column) for column in zip(*outputs)]
+    return MonteCarloResult(policy, horizon_ms, *arrays)
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration
+from Pricing4API.basic.bounded_rate import BoundedRate
+from Pricing4API.basic.key_pool import KeyPool
+from Pricing4API.utils import to_milliseconds
+
+
+class Tenant:
+    """
+    A tenant of a shared plan.
+
+    Args:
+        name (str): Unique name.
+        weight (float): Share of the spare capacity relative to its siblings.
+        minimum (float): Fraction of every window of the longest limit guaranteed to the tenant.
+        ceiling (float): Largest fraction of every window of the longest limit it may use.
+    """
+
+    def __init__(self, name: str, weight: float = 1.0, minimum: float = 0.0, ceiling: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"The weight of {name} must be positive")
+        if not 0 <= minimum <= ceiling <= 1:
+            raise ValueError(f"{name} needs 0 <= minimum <= ceiling <= 1")
+        self.__name = name
+        self.__weight = weight
+        self.__minimum = minimum
+        self.__ceiling = ceiling
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def weight(self) -> float:
+        return self.__weight
+
+    @property
+    def minimum(self) -> float:
+        return self.__minimum
+
+    @property
+    def ceiling(self) -> float:
+        return self.__ceiling
+
+    def __repr__(self):
+        return f"Tenant({self.__name!r}, weight={self.__weight}, minimum={self.__minimum}, ceiling={self.__ceiling})"
+
+
+class TenantGroup:
+    """
+    Tenants (or groups) that share, by their weights, what the group gets from its siblings.
+    """
+
+    def __init__(self, name: str, children: Sequence[Union[Tenant, "TenantGroup"]], weight: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"The weight of {name} must be positive")
+        if not children:
+            raise ValueError(f"The group {name} has no tenants")
+        self.__name = name
+        self.__children = list(children)
+        self.__weight = weight
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def children(self) -> list:
+        return list(self.__children)
+
+    @property
+    def weight(self) -> float:
+        return self.__weight
+
+    def __repr__(self):
+        return f"TenantGroup({self.__name!r}, {self.__children}, weight={self.__weight})"
+
+
+class _FairTree:
+    """
+    Hierarchical start-time fair queueing: every internal node keeps a heap of its
+    backlogged children ordered by virtual finish tag, so choosing a leaf and charging it
+    are O(depth * log(fan-out)).
+    """
+
+    def __init__(self, parent: List[int], weight: List[float]):
+        self.parent = parent
+        self.cost = [1.0 / w for w in weight]
+        self.heap = [[] for _ in parent]
+        self.vtime = [0.0] * len(parent)
+        self.start = [0.0] * len(parent)
+        self.finish = [0.0] * len(parent)
+        self.active = [False] * len(parent)
+        self.order = 0
+
+    def _push(self, node: int, start: float):
+        self.start[node], self.finish[node] = start, start + self.cost[node]
+        self.order += 1
+        heapq.heappush(self.heap[self.parent[node]], (self.finish[node], self.order, node))
+
+    def activate(self, node: int):
+        # Sube hasta el primer antecesor que ya estaba en la cola de su padre (la raíz es 0)
+        while node and not self.active[node]:
+            self.active[node] = True
+            self._push(node, max(self.vtime[self.parent[node]], self.finish[node]))
+            node = self.parent[node]
+
+    def select(self) -> int:
+        node = 0
+        while self.heap[node]:
+            node = self.heap[node][0][2]
+        return node if node else -1
+
+    def charge(self, leaf: int, backlogged: bool):
+        # La hoja elegida está en la cima de cada montículo de su camino
+        node, more = leaf, backlogged
+        while node:
+            parent = self.parent[node]
+            heapq.heappop(self.heap[parent])
+            self.vtime[parent] = self.start[node]
+            if more:
+                self._push(node, self.finish[node])
+            else:
+                self.active[node] = False
+            more, node = bool(self.heap[parent]), parent
+
+
+class TenantShareResult:
+    """
+    Outcome of sharing a plan among tenants: send instant of every request and per-tenant accounting.
+    """
+
+    def __init__(self, names: List[str], tenant: np.ndarray, arrivals_ms: np.ndarray, send_ms: np.ndarray,
+                 guaranteed: np.ndarray):
+        self.__names = names
+        self.__tenant = tenant
+        self.__arrivals_ms = arrivals_ms
+        self.__send_ms = send_ms
+        self.__guaranteed = guaranteed
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.__names)
+
+    @property
+    def tenant(self) -> np.ndarray:
+        """
+        Tenant (index into names) of every request, in arrival order.
+        """
+        return self.__tenant
+
+    @property
+    def arrivals_ms(self) -> np.ndarray:
+        return self.__arrivals_ms
+
+    @property
+    def send_ms(self) -> np.ndarray:
+        """
+        Instant each request is sent upstream (NaN if not served within the horizon).
+        """
+        return self.__send_ms
+
+    @property
+    def delay_ms(self) -> np.ndarray:
+        return self.__send_ms - self.__arrivals_ms
+
+    @property
+    def guaranteed(self) -> np.ndarray:
+        """
+        Whether each request was served out of the guaranteed minimum of its tenant.
+        """
+        return self.__guaranteed
+
+    @property
+    def served(self) -> np.ndarray:
+        """
+        Requests served per tenant.
+        """
+        return np.bincount(self.__tenant[~np.isnan(self.__send_ms)], minlength=len(self.__names))
+
+    def summary(self) -> Dict[str, dict]:
+        served = self.served
+        total = max(int(served.sum()), 1)
+        result = {}
+        for i, name in enumerate(self.__names):
+            mine = self.__tenant == i
+            delay = self.delay_ms[mine]
+            delay = delay[~np.isnan(delay)]
+            result[name] = {
+                "arrivals": int(np.count_nonzero(mine)),
+                "served": int(served[i]),
+                "guaranteed": int(np.count_nonzero(self.__guaranteed[mine])),
+                "share": served[i] / total,
+                "mean_delay_ms": float(delay.mean()) if len(delay) else 0.0,
+                "p99_delay_ms": float(np.percentile(delay, 99)) if len(delay) else 0.0,
+                "max_delay_ms": float(delay.max(initial=0.0)),
+            }
+        return result
+
+    def __repr__(self):
+        return f"TenantShareResult({len(self.__names)} tenants, {int(self.served.sum())}/{len(self.__tenant)} served)"
+
+
+class TenantShare:
+    """
+    One subscription resold to several tenants, shared with hierarchical weighted fairness.
+
+    Requests are sent upstream as soon as the limits of the plan let them (fixed nested
+    windows, as KeyPool), in this order of preference:
+
+    1. Tenants below their guaranteed minimum in the current window of the longest limit,
+       the furthest behind it first.
+    2. The rest by start-time fair queueing over the tree of groups and tenants: when
+       every sibling is backlogged each gets its weight's share, and the share of an idle
+       one is borrowed by the others, up to each tenant's ceiling.
+
+    The guaranteed minimums are reserved: nobody borrows the part of a window that a
+    tenant has not yet used of its minimum, so a guarantee holds even if its tenant
+    starts late in the window. Every choice is O(log tenants).
+
+    Args:
+        bounded_rate (BoundedRate): The upstream plan.
+        tenants (Sequence[Union[Tenant, TenantGroup]]): Top level of the tree of tenants.
+    """
+
+    def __init__(self, bounded_rate: BoundedRate, tenants: Sequence[Union[Tenant, TenantGroup]]):
+        self.__bounded_rate = bounded_rate
+        self.__tenants: List[Tenant] = []
+        self.__leaf: List[int] = []
+        parent, weight = [0], [1.0]
+
+        def add(entry, parent_node):
+            node = len(parent)
+            parent.append(parent_node)
+            weight.append(entry.weight)
+            if isinstance(entry, TenantGroup):
+                for child in entry.children:
+                    add(child, node)
+            else:
+                self.__tenants.append(entry)
+                self.__leaf.append(node)
+
+        for entry in tenants:
+            add(entry, 0)
+        names = [tenant.name for tenant in self.__tenants]
+        if not names or len(set(names)) != len(names):
+            raise ValueError("Tenant names must be unique and there must be at least one")
+        if sum(tenant.minimum for tenant in self.__tenants) > 1 + 1e-9:
+            raise ValueError("The guaranteed minimums add up to more than the plan")
+        self.__parent, self.__weight = parent, weight
+
+    @property
+    def bounded_rate(self) -> BoundedRate:
+        return self.__bounded_rate
+
+    @property
+    def tenants(self) -> List[Tenant]:
+        return list(self.__tenants)
+
+    @property
+    def names(self) -> List[str]:
+        return [tenant.name for tenant in self.__tenants]
+
+    def simulate(self, demand: Mapping[str, Sequence[float]],
+                 horizon: Union[str, TimeDuration, float, None] = None) -> TenantShareResult:
+        """
+        Replays recorded demand of every tenant through the shared plan.
+
+        Args:
+            demand (Mapping[str, Sequence[float]]): Request timestamps (ms) of each tenant.
+            horizon (Union[str, TimeDuration, float, None]): Requests not sent before it are
+                left unserved (ms if a number). Defaults to serving them all.
+
+        Returns:
+            TenantShareResult: Send instants and per-tenant accounting.
+        """
+        names = self.names
+        unknown = set(demand) - set(names)
+        if unknown:
+            raise ValueError(f"Demand for unknown tenants: {sorted(unknown)}")
+        t = np.concatenate([np.asarray(demand.get(name, []), dtype=np.float64) for name in names])
+        who = np.concatenate([np.full(len(demand.get(name, [])), i, dtype=np.int64) for i, name in enumerate(names)])
+        order = np.argsort(t, kind="stable")
+        t, who = t[order], who[order]
+        end = math.inf if horizon is None else to_milliseconds(horizon)
+
+        n_tenants = len(names)
+        values, periods = self.__bounded_rate.limit_table
+        top_value, top_period = float(values[-1]), float(periods[-1])
+        minimum = [math.floor(tenant.minimum * top_value) for tenant in self.__tenants]
+        ceiling = [math.floor(tenant.ceiling * top_value) for tenant in self.__tenants]
+        limiter = KeyPool([self.__bounded_rate])
+        tree = _FairTree(self.__parent, self.__weight)
+        leaf_tenant = {node: i for i, node in enumerate(self.__leaf)}
+
+        queues: List[List[int]] = [[] for _ in range(n_tenants)]
+        heads = [0] * n_tenants
+        used = [0] * n_tenants
+        behind: list = []  # (usado / mínimo, tenant) de los que tienen cola y mínimo por cubrir
+        reserved = 0
+        window = -1
+        send = np.full(len(t), np.nan)
+        guaranteed = np.zeros(len(t), dtype=bool)
+        tau, a, backlog = 0.0, 0, 0
+
+        def enqueue(i: int):
+            if used[i] < minimum[i]:
+                heapq.heappush(behind, (used[i] / minimum[i], i))
+            if used[i] < ceiling[i]:
+                tree.activate(self.__leaf[i])
+
+        while True:
+            if not backlog:
+                if a == len(t):
+                    break
+                tau = max(tau, t[a])
+            tau = max(tau, limiter.next_available_ms)
+            if tau >= end:
+                break
+            if math.floor(tau / top_period) != window:
+                # Ventana nueva del límite más largo: se reponen los mínimos y los techos
+                window = math.floor(tau / top_period)
+                used = [0] * n_tenants
+                reserved = sum(minimum)
+                behind = [(0.0, i) for i in range(n_tenants) if minimum[i] and heads[i] < len(queues[i])]
+                heapq.heapify(behind)
+                for i in range(n_tenants):
+                    if heads[i] < len(queues[i]):
+                        tree.activate(self.__leaf[i])
+            while a < len(t) and t[a] <= tau:
+                i = int(who[a])
+                queues[i].append(a)
+                backlog += 1
+                if heads[i] == len(queues[i]) - 1:
+                    enqueue(i)
+                a += 1
+            if not backlog:
+                continue
+
+            chosen, from_minimum = -1, False
+            while behind:
+                ratio, i = behind[0]
+                if heads[i] < len(queues[i]) and used[i] < minimum[i] and ratio == used[i] / minimum[i]:
+                    chosen, from_minimum = i, True
+                    break
+                heapq.heappop(behind)
+            if chosen < 0 and limiter.budgets(0, tau)[-1] > reserved:
+                while True:
+                    leaf = tree.select()
+                    if leaf < 0:
+                        break
+                    i = leaf_tenant[leaf]
+                    if heads[i] < len(queues[i]) and used[i] < ceiling[i]:
+                        chosen = i
+                        break
+                    # Vaciada por su mínimo o en su techo: sale del árbol hasta que vuelva a tener cola
+                    tree.charge(leaf, False)
+            if chosen < 0:
+                # Lo que queda de la ventana está reservado a mínimos sin cola: esperar a una
+                # llegada o a la ventana siguiente
+                tau = min(t[a] if a < len(t) else math.inf, (window + 1) * top_period)
+                if math.isinf(tau):
+                    break
+                continue
+
+            i = chosen
+            request = queues[i][heads[i]]
+            heads[i] += 1
+            backlog -= 1
+            limiter.dispatch(tau)
+            send[request], guaranteed[request] = tau, from_minimum
+            if used[i] < minimum[i]:
+                reserved -= 1
+            used[i] += 1
+            more = heads[i] < len(queues[i])
+            if from_minimum:
+                heapq.heapreplace(behind, (used[i] / minimum[i], i))
+            else:
+                tree.charge(self.__leaf[i], more and used[i] < ceiling[i])
+
+        return TenantShareResult(names, who, t, send, guaranteed)
@@ -0,0 +1,621 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from Pricing4API.ancillary.lazy_import import lazy_import
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate
+from Pricing4API.basic.capacity_kernels import admit_events, capacity_at_ms, serve_bins
+from Pricing4API.utils import select_best_time_unit, to_milliseconds
+
+go = lazy_import("plotly.graph_objects")
+pd = lazy_import("pandas")
+
+POLICIES = ("reject", "delay", "queue")
+
+# Fixed histogram of (non-zero) queueing delays: [0, 1ms) and then 8 bins per decade up to ~4 months
+DELAY_EDGES_MS = np.concatenate(([0.0], np.logspace(0, 10, 81)))
+
+_NEVER = np.iinfo(np.int64).max // 4
+
+
+def _nested(periods: np.ndarray) -> bool:
+    ratios = periods[1:] / periods[:-1]
+    return bool(np.all(np.abs(ratios - np.rint(ratios)) < 1e-9))
+
+
+def iter_timestamps(source, chunk_size: int = 1 << 20, unit: Optional[TimeUnit] = None,
+                    column: Union[int, str] = 0, has_header: bool = True) -> Iterator[np.ndarray]:
+    """
+    Streams request timestamps in blocks of at most chunk_size, converted to milliseconds.
+
+    Args:
+        source: A .npy file (memory-mapped), a CSV file (read lazily with pandas), an
+            array or np.memmap, or any iterable of arrays.
+        chunk_size (int): Timestamps per block.
+        unit (Optional[TimeUnit]): Unit of the timestamps. Defaults to milliseconds.
+        column (Union[int, str]): CSV column holding the timestamps.
+        has_header (bool): Whether the CSV file starts with a header line.
+    """
+    factor = 1.0 if unit is None else unit.to_milliseconds()
+
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(".npy"):
+            source = np.load(path, mmap_mode="r")
+        else:
+            reader = pd.read_csv(path, usecols=[column], header=0 if has_header else None,
+                                 chunksize=chunk_size)
+            for frame in reader:
+                yield frame.iloc[:, 0].to_numpy(dtype=np.float64) * factor
+            return
+
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), chunk_size):
+            yield np.asarray(source[start:start + chunk_size], dtype=np.float64) * factor
+        return
+
+    for block in source:
+        yield np.asarray(block, dtype=np.float64) * factor
+
+
+class ReplayResult:
+    """
+    Outcome of replaying a trace through a plan: counts, queueing delays and the accumulated curves.
+
+    Only aggregates are kept (counts, a fixed delay histogram and the curves on a grid of
+    curve_step), so its size does not depend on the number of requests replayed.
+    """
+
+    def __init__(self, policy: str, values: np.ndarray, periods: np.ndarray, origin_ms: float, recorder):
+        self.__policy = policy
+        self.__values = values
+        self.__periods = periods
+        self.__origin_ms = origin_ms
+        self.__arrivals = recorder.arrivals
+        self.__accepted = recorder.accepted
+        self.__delayed = recorder.delayed
+        self.__max_backlog = recorder.max_backlog
+        self.__delay_histogram = recorder.delay_histogram
+        self.__delay_sum = recorder.delay_sum
+        self.__delay_max = recorder.delay_max
+        self.__curve_step = recorder.step
+        self.__arrived_cells = recorder.cells(recorder.arrived_cells)
+        self.__served_cells = recorder.cells(recorder.served_cells)
+
+    @property
+    def policy(self) -> str:
+        return self.__policy
+
+    @property
+    def origin_ms(self) -> float:
+        """
+        Timestamp at which the windows of the plan start (the start of the subscription).
+        """
+        return self.__origin_ms
+
+    @property
+    def arrivals(self) -> int:
+        return self.__arrivals
+
+    @property
+    def accepted(self) -> int:
+        """
+        Requests served, immediately or after waiting.
+        """
+        return self.__accepted
+
+    @property
+    def rejected(self) -> int:
+        return self.__arrivals - self.__accepted
+
+    @property
+    def delayed(self) -> int:
+        """
+        Accepted requests that had to wait in the queue.
+        """
+        return self.__delayed
+
+    @property
+    def max_backlog(self) -> int:
+        return self.__max_backlog
+
+    @property
+    def delay_histogram(self):
+        """
+        (counts, edges_ms) of the delays of the delayed requests.
+        """
+        return self.__delay_histogram, DELAY_EDGES_MS
+
+    @property
+    def mean_delay_ms(self) -> float:
+        """
+        Mean delay over all accepted requests (0 for those served on arrival).
+        """
+        return self.__delay_sum / self.__accepted if self.__accepted else 0.0
+
+    @property
+    def max_delay_ms(self) -> float:
+        return self.__delay_max
+
+    def delay_percentiles(self, q: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+        """
+        Percentiles (nearest rank) of the delay of accepted requests, in ms.
+
+        Delayed requests are only known up to their histogram bin, so the upper edge of
+        the bin is returned (capped at the maximum delay).
+        """
+        immediate = self.__accepted - self.__delayed
+        cumulative = immediate + np.cumsum(self.__delay_histogram)
+        result = {}
+        for p in q:
+            rank = max(int(np.ceil(p / 100 * self.__accepted)), 1)
+            if rank <= immediate:
+                result[p] = 0.0
+            else:
+                k = int(np.searchsorted(cumulative, rank))
+                result[p] = float(min(DELAY_EDGES_MS[k + 1], self.__delay_max))
+        return result
+
+    def curve(self) -> Dict[str, np.ndarray]:
+        """
+        Accumulated arrivals and served requests at the end of each cell of curve_step,
+        next to the capacity of the plan (capacity_at) just before that instant.
+        """
+        n = len(self.__arrived_cells)
+        t = np.arange(1, n + 1) * self.__curve_step
+        return {
+            "t_ms": t,
+            "arrived": np.cumsum(self.__arrived_cells),
+            "served": np.cumsum(self.__served_cells),
+            "capacity": capacity_at_ms(self.__values, self.__periods, np.nextafter(t, 0.0)),
+        }
+
+    def max_excess(self) -> float:
+        """
+        Largest amount by which the accumulated arrivals exceed the capacity of the plan.
+        """
+        curve = self.curve()
+        return float(np.max(curve["arrived"] - curve["capacity"], initial=0.0))
+
+    def summary(self) -> dict:
+        return {
+            "policy": self.__policy,
+            "arrivals": self.__arrivals,
+            "accepted": self.__accepted,
+            "rejected": self.rejected,
+            "delayed": self.__delayed,
+            "max_backlog": self.__max_backlog,
+            "mean_delay_ms": self.mean_delay_ms,
+            "max_delay_ms": self.__delay_max,
+            "delay_percentiles": self.delay_percentiles(),
+            "max_excess": self.max_excess(),
+        }
+
+    def show(self, time_unit=None, return_fig=False):
+        """
+        Plots the accumulated arrivals and served requests against the capacity of the plan.
+        """
+        curve = self.curve()
+        if time_unit is None:
+            time_unit = select_best_time_unit(curve["t_ms"][-1] if len(curve["t_ms"]) else 1.0).unit
+        xs = curve["t_ms"] / time_unit.to_milliseconds()
+
+        fig = go.Figure()
+        for name, color in (("capacity", "blue"), ("arrived", "red"), ("served", "green")):
+            fig.add_trace(go.Scatter(x=xs, y=curve[name], mode='lines',
+                                     line=dict(color=color, shape='hv', width=1.3), name=name.capitalize()))
+        fig.update_layout(
+            title=f'Trace replay ({self.__policy})',
+            xaxis_title=f"Time ({time_unit.value})",
+            yaxis_title="Requests",
+            showlegend=True,
+            template="plotly_white",
+            width=1000,
+            height=600
+        )
+
+        if return_fig:
+            return fig
+        fig.show()
+
+
+class _Recorder:
+    """
+    Running aggregates of a replay, fed block by block with sorted instants.
+    """
+
+    def __init__(self, step_ms: float):
+        self.step = step_ms
+        self.arrivals = 0
+        self.accepted = 0
+        self.delayed = 0
+        self.max_backlog = 0
+        self.delay_histogram = np.zeros(len(DELAY_EDGES_MS) - 1, dtype=np.int64)
+        self.delay_sum = 0.0
+        self.delay_max = 0.0
+        self.arrived_cells = np.zeros(1024, dtype=np.int64)
+        self.served_cells = np.zeros(1024, dtype=np.int64)
+        self.last_cell = -1
+
+    def _add(self, name: str, first: int, counts: np.ndarray):
+        last = first + len(counts) - 1
+        target = getattr(self, name)
+        if last >= len(target):
+            grown = np.zeros(max(2 * len(target), last + 1), dtype=np.int64)
+            grown[:len(target)] = target
+            target = grown
+            setattr(self, name, target)
+        target[first:last + 1] += counts
+        self.last_cell = max(self.last_cell, last)
+
+    def _cell_edges(self, t_ms: np.ndarray):
+        # Cells touched by the sorted block and the instants at which the inner ones start
+        first, last = int(t_ms[0] // self.step), int(t_ms[-1] // self.step)
+        return first, np.arange(first + 1, last + 1) * self.step
+
+    def _count_cells(self, name: str, t_ms: np.ndarray):
+        first, edges = self._cell_edges(t_ms)
+        inside = np.searchsorted(t_ms, edges)
+        self._add(name, first, np.diff(inside, prepend=0, append=len(t_ms)))
+
+    def cells(self, target: np.ndarray) -> np.ndarray:
+        result = np.zeros(self.last_cell + 1, dtype=np.int64)
+        n = min(len(target), len(result))
+        result[:n] = target[:n]
+        return result
+
+    def arrive(self, t_ms: np.ndarray):
+        if len(t_ms):
+            self.arrivals += len(t_ms)
+            self._count_cells("arrived_cells", t_ms)
+
+    def serve(self, arrival_ms: np.ndarray, service_ms: np.ndarray):
+        """
+        Requests served in FIFO order, so service_ms is sorted.
+        """
+        if not len(arrival_ms):
+            return
+        self.accepted += len(arrival_ms)
+        self._count_cells("served_cells", service_ms)
+        delays = service_ms - arrival_ms
+        delays = delays[delays > 0]
+        if len(delays):
+            self.delayed += len(delays)
+            self.delay_sum += float(delays.sum())
+            self.delay_max = max(self.delay_max, float(delays.max()))
+            bins = np.searchsorted(DELAY_EDGES_MS, delays, side="right") - 1
+            self.delay_histogram += np.bincount(np.minimum(bins, len(self.delay_histogram) - 1),
+                                                minlength=len(self.delay_histogram))
+
+    def serve_prefixes(self, t_ms: np.ndarray, first: np.ndarray, admitted: np.ndarray,
+                       first_bin: int, bin_ms: float):
+        """
+        Requests served on arrival: the first admitted[k] of bin first_bin + k, which starts
+        at index first[k] of t_ms. Cells are filled from the served counts at their edges.
+        """
+        total = int(admitted.sum())
+        if not total:
+            return
+        self.accepted += total
+        cell, edges = self._cell_edges(t_ms)
+        inside = np.searchsorted(t_ms, edges)
+        k = np.clip((edges // bin_ms).astype(np.int64) - first_bin, 0, len(admitted) - 1)
+        before = np.cumsum(admitted) - admitted
+        served = before[k] + np.clip(inside - first[k], 0, admitted[k])
+        self._add("served_cells", cell, np.diff(served, prepend=0, append=total))
+
+
+class _BinnedReplay:
+    """
+    Admission on bins of one rate period, for plans whose limit periods are nested.
+
+    When every limit period is a multiple of the previous one, the rate windows are
+    the bins and the quota windows start at bin boundaries, so requests only need to
+    be counted per bin: each bin serves up to the rate value (backlog first) while the
+    quotas allow it, and the requests served on arrival are the first ones of the bin.
+    """
+
+    def __init__(self, values: np.ndarray, periods: np.ndarray, recorder: _Recorder, policy: str,
+                 max_queue: Optional[int], max_bins: int = 1 << 20):
+        if not _nested(periods):
+            raise ValueError("delay and queue policies need every limit period to be a multiple of the previous one")
+        self.values = values
+        self.periods = periods
+        self.bin_ms = float(periods[0])
+        self.ratios = [int(r) for r in np.rint(periods[1:] / periods[0])]
+        self.recorder = recorder
+        self.policy = policy
+        self.max_queue = max_queue
+        self.max_bins = max_bins
+
+        self.next_bin = 0
+        self.served = np.zeros(1)
+        self.arrived = np.zeros(1)
+        self.window_base = np.zeros((len(values) - 1, 1))
+        self.pending = np.zeros(0)
+        self.held = np.zeros(0)
+
+    def _bins(self, t_ms: np.ndarray) -> np.ndarray:
+        # Same convention as the searchsorted counts below: bin k is [k * bin_ms, (k + 1) * bin_ms)
+        bins = (t_ms // self.bin_ms).astype(np.int64)
+        bins -= t_ms < bins * self.bin_ms
+        bins += t_ms >= (bins + 1) * self.bin_ms
+        return bins
+
+    def _advance(self, target: int):
+        # Skip bins where nothing can happen: quota windows starting in between restart from the served total
+        last = self.next_bin - 1
+        for level, ratio in enumerate(self.ratios):
+            if last // ratio != target // ratio:
+                self.window_base[level] = self.served
+        self.next_bin = target
+
+    def _room(self) -> float:
+        bound = (self.window_base[:, 0] + self.values[1:]).min(initial=np.inf)
+        return bound - self.served[0]
+
+    def _next_release(self) -> int:
+        # First bin at which every exhausted quota has restarted (the outermost one does it for all)
+        room = self.window_base[:, 0] + self.values[1:] - self.served[0]
+        level = int(np.flatnonzero(room <= 0)[-1])
+        return (self.next_bin // self.ratios[level] + 1) * self.ratios[level]
+
+    def feed(self, t_ms: np.ndarray, final: bool = False):
+        events = np.concatenate((self.held, t_ms)) if len(self.held) else t_ms
+        if final:
+            close_bin = _NEVER
+            self.held = np.zeros(0)
+        elif len(events):
+            # The bin of the last timestamp may still receive requests from the next block
+            close_bin = int(self._bins(events[-1:])[0])
+            split = np.searchsorted(events, close_bin * self.bin_ms)
+            self.held = events[split:]
+            events = events[:split]
+        else:
+            return
+        self.recorder.arrive(events)
+
+        if self.policy == "queue":
+            self._queue(events, close_bin)
+        else:
+            self._serve(events, close_bin)
+
+    def _serve(self, events: np.ndarray, close_bin: int):
+        # Reject and unbounded FIFO (delay), a block of bins at a time with serve_bins
+        queue = self.policy == "delay"
+        position = 0
+        while (position < len(events) or len(self.pending)) and self.next_bin < close_bin:
+            if not len(self.pending):
+                self._advance(max(self.next_bin, int(self._bins(events[position:position + 1])[0])))
+            else:
+                self._advance(self.next_bin)
+                if self._room() <= 0:
+                    release = self._next_release()
+                    if position < len(events):
+                        release = min(release, int(self._bins(events[position:position + 1])[0]))
+                    if release > self.next_bin:
+                        self._advance(min(release, close_bin))
+                        continue
+
+            hi = min(close_bin, self.next_bin + self.max_bins)
+            if position < len(events):
+                hi = min(hi, int(self._bins(events[-1:])[0]) + 1)
+            else:
+                drain = int(np.ceil(len(self.pending) / self.values[0])) + 1
+                hi = min(hi, self.next_bin + drain)
+
+            first = np.searchsorted(events, np.arange(self.next_bin, hi + 1) * self.bin_ms)
+            counts = np.diff(first)[None, :]
+            served_before = self.served[0]
+            arrived_cum, served_cum, _ = serve_bins(counts, self.next_bin, self.bin_ms, self.values, self.periods,
+                                                    (self.served, self.arrived, self.window_base), queue=queue)
+            served_here = np.rint(served_cum[0] - served_before)
+
+            if queue:
+                self.recorder.max_backlog = max(self.recorder.max_backlog,
+                                                int(np.max(arrived_cum - served_cum, initial=0)))
+                block = events[first[0]:first[-1]]
+                fifo = np.concatenate((self.pending, block)) if len(self.pending) else block
+                n_served = int(served_here[-1])
+                service_bin = np.repeat(np.arange(len(served_here)), np.diff(served_here, prepend=0.0).astype(np.int64))
+                service = np.maximum(fifo[:n_served], (self.next_bin + service_bin) * self.bin_ms)
+                self.recorder.serve(fifo[:n_served], service)
+                self.pending = fifo[n_served:]
+            else:
+                admitted = np.diff(served_here, prepend=0.0).astype(np.int64)
+                self.recorder.serve_prefixes(events, first[:-1], admitted, self.next_bin, self.bin_ms)
+
+            position = int(first[-1])
+            self.next_bin = hi
+
+    def _queue(self, events: np.ndarray, close_bin: int):
+        # Sequential over the bins with arrivals or backlog; requests are matched to the outcome afterwards
+        if not len(events):
+            starts = np.zeros(0, dtype=np.int64)
+            event_bins, event_counts = [], []
+        else:
+            lo, hi = (int(b) for b in self._bins(events[[0, -1]]))
+            if hi - lo < len(events):
+                first = np.searchsorted(events, np.arange(lo, hi + 2) * self.bin_ms)
+                occupied = np.flatnonzero(np.diff(first))
+                starts = first[occupied]
+                event_bins = (occupied + lo).tolist()
+                event_counts = np.diff(first)[occupied].tolist()
+            else:
+                bins = self._bins(events)
+                starts = np.flatnonzero(np.diff(bins, prepend=-1))
+                event_bins = bins[starts].tolist()
+                event_counts = np.diff(np.append(starts, len(bins))).tolist()
+
+        rate = int(self.values[0])
+        quota_values = self.values[1:].tolist()
+        ratios = self.ratios
+        base = self.window_base[:, 0].tolist()
+        served = float(self.served[0])
+        limit = min((w + v for w, v in zip(base, quota_values)), default=np.inf)
+        backlog = len(self.pending)
+        max_backlog = self.recorder.max_backlog
+        immediate, queued, dequeue_bins, dequeues = [], [], [], []
+
+        last, b, j = self.next_bin - 1, self.next_bin, 0
+        while b < close_bin:
+            if backlog == 0:
+                if j == len(event_bins):
+                    break
+                b = max(b, event_bins[j])
+            # Quota windows started since the last bin looked at restart from the served total
+            reset = False
+            for level, ratio in enumerate(ratios):
+                if last // ratio != b // ratio:
+                    base[level] = served
+                    reset = True
+            if reset:
+                limit = min(w + v for w, v in zip(base, quota_values))
+            last = b
+
+            arriving = event_counts[j] if j < len(event_bins) and event_bins[j] == b else 0
+            room = min(rate, limit - served)
+            if room <= 0 and not arriving:
+                # Nothing to do until every exhausted quota restarts (the outermost one does it for all)
+                level = max(k for k, (w, v) in enumerate(zip(base, quota_values)) if w + v <= served)
+                b = (b // ratios[level] + 1) * ratios[level]
+                if j < len(event_bins):
+                    b = min(b, event_bins[j])
+                b = min(b, close_bin)
+                continue
+
+            room = int(max(room, 0))
+            out = min(backlog, room)
+            if out:
+                backlog -= out
+                room -= out
+                dequeue_bins.append(b)
+                dequeues.append(out)
+            now = 0
+            if arriving:
+                now = min(arriving, room)
+                waiting = min(arriving - now, self.max_queue - backlog)
+                backlog += waiting
+                immediate.append(now)
+                queued.append(waiting)
+                j += 1
+            served += out + now
+            max_backlog = max(max_backlog, backlog)
+            b += 1
+
+        # Windows started after the last bin looked at also restart from the served total
+        for level, ratio in enumerate(ratios):
+            if last // ratio != (b - 1) // ratio:
+                base[level] = served
+        self.window_base[:, 0] = base
+        self.served[0] = served
+        self.arrived[0] += len(events)
+        self.recorder.max_backlog = max_backlog
+        self.next_bin = b
+
+        self._match(events, starts, immediate, queued, dequeue_bins, dequeues)
+
+    def _match(self, events, starts, immediate, queued, dequeue_bins, dequeues):
+        sizes = np.diff(np.append(starts, len(events)))
+        rank = np.arange(len(events)) - np.repeat(starts, sizes)
+        group = np.repeat(np.arange(len(starts)), sizes)
+        immediate = np.asarray(immediate, dtype=np.int64)
+        queued = np.asarray(queued, dtype=np.int64)
+
+        now = rank < immediate[group]
+        waiting = ~now & (rank < (immediate + queued)[group])
+        fifo = np.concatenate((self.pending, events[waiting]))
+
+        service = np.repeat(np.asarray(dequeue_bins, dtype=np.float64) * self.bin_ms, dequeues)
+        n_served = len(service)
+        service = np.maximum(fifo[:n_served], service)
+        self.recorder.serve(events[now], events[now])
+        self.recorder.serve(fifo[:n_served], service)
+        self.pending = fifo[n_served:]
+
+
+def replay_trace(
+    plan,
+    source,
+    policy: str = "reject",
+    max_queue: Optional[int] = None,
+    origin: Optional[float] = None,
+    unit: Optional[TimeUnit] = None,
+    chunk_size: int = 1 << 20,
+    curve_step: Union[str, TimeDuration, float, None] = None,
+    column: Union[int, str] = 0,
+    has_header: bool = True,
+) -> ReplayResult:
+    """
+    Replays real request timestamps through the limits of a plan.
+
+    The timestamps are streamed in blocks (see iter_timestamps) and admitted by the
+    plan's rate and quotas, with windows starting at origin and nested as in
+    capacity_at. Requests that do not fit are rejected (policy="reject"), wait in an
+    unbounded FIFO queue (policy="delay") or wait in a FIFO queue of max_queue
+    requests, the rest being rejected (policy="queue"). Rejection is decided per
+    request; the delay and queue policies serve requests at the start of each rate
+    period and need every limit period to be a multiple of the previous one.
+
+    Memory does not grow with the trace, except for the requests waiting in the queue
+    and the curves (one cell per curve_step of trace).
+
+    Args:
+        plan: A BoundedRate, or a Plan with a bounded_rate.
+        source: Timestamps, sorted: .npy or CSV path, array, memmap or iterable of arrays.
+        policy (str): "reject", "delay" or "queue".
+        max_queue (Optional[int]): Queue size of the queue policy.
+        origin (Optional[float]): Start of the subscription, as a timestamp in the unit of the
+            trace. Defaults to the first timestamp.
+        unit (Optional[TimeUnit]): Unit of the timestamps. Defaults to milliseconds.
+        chunk_size (int): Timestamps read per block.
+        curve_step (Union[str, TimeDuration, float, None]): Resolution of the accumulated curves.
+            Defaults to a hundredth of the largest limit period, and at least a minute.
+        column (Union[int, str]): CSV column holding the timestamps.
+        has_header (bool): Whether the CSV file starts with a header line.
+
+    Returns:
+        ReplayResult: Counts, delay distribution and accumulated curves.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}")
+    if policy == "queue" and (max_queue is None or max_queue < 0):
+        raise ValueError("the queue policy needs a non-negative max_queue")
+    bounded_rate: BoundedRate = getattr(plan, "bounded_rate", plan)
+    values, periods = bounded_rate.limit_table
+
+    step = max(periods[-1] / 100, 60000.0) if curve_step is None else to_milliseconds(curve_step)
+    recorder = _Recorder(step)
+    # Rejection with periods that are not nested is decided request by request
+    replay = None if policy == "reject" and not _nested(periods) else \
+        _BinnedReplay(values, periods, recorder, policy, max_queue)
+
+    origin_ms = None if origin is None else origin * (1.0 if unit is None else unit.to_milliseconds())
+    last = -np.inf
+    carry = None
+    for chunk in iter_timestamps(source, chunk_size, unit, column, has_header):
+        if not len(chunk):
+            continue
+        if chunk[0] < last or np.any(chunk[1:] < chunk[:-1]):
+            raise ValueError("Timestamps must be sorted.")
+        last = chunk[-1]
+        if origin_ms is None:
+            origin_ms = float(chunk[0])
+        t = chunk - origin_ms
+        if t[0] < 0:
+            raise ValueError("Timestamps before the origin.")
+
+        if replay is None:
+            admitted, carry = admit_events(t, values, periods, carry)
+            recorder.arrive(t)
+            recorder.serve(t[admitted], t[admitted])
+        else:
+            replay.feed(t)
+
+    if replay is not None:
+        replay.feed(np.zeros(0), final=True)
+    return ReplayResult(policy, values, periods, 0.0 if origin_ms is None else origin_ms, recorder)
@@ -1,14 +1,21 @@
+from __future__ import annotations
+
 from typing import List
-import plotly.graph_objects as go
 
+import numpy as np
+
+from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
 from Pricing4API.ancillary.limit import Limit
 from Pricing4API.ancillary.plans_yaml import create_plan_interactive
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.main.plan import Plan
-from matplotlib.colors import to_rgba
+from Pricing4API.ancillary.lazy_import import lazy_import
 
 from Pricing4API.utils import parse_time_string_to_duration
 
+go = lazy_import("plotly.graph_objects")
+mcolors = lazy_import("matplotlib.colors")
+
 
 def compare_plans(plans, time_interval, return_fig=False):
     """
@@ -35,15 +42,15 @@ def compare_plans(plans, time_interval, return_fig=False):
         debug_values = plan.show_available_capacity_curve(
             time_interval, debug=True
         )
-        times_ms, capacities = zip(*debug_values)
+        times_ms, capacities = np.asarray(debug_values, dtype=np.float64).T
 
-        original_times = [t / time_interval.unit.to_milliseconds() for t in times_ms]
+        original_times = times_ms / time_interval.unit.to_milliseconds()
 
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times,
-            y=capacities,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times,
+            capacities,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill='tonexty',
@@ -89,15 +96,15 @@ def compare_instantaneous_capacity_curves(plans, time_interval, return_fig=False
         debug_values = plan.show_instantaneous_capacity_curve(
             time_interval, debug=True
         )
-        times_ms, capacities = zip(*debug_values)
+        times_ms, capacities = np.asarray(debug_values, dtype=np.float64).T
 
-        original_times = [t / time_interval.unit.to_milliseconds() for t in times_ms]
+        original_times = times_ms / time_interval.unit.to_milliseconds()
 
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times,
-            y=capacities,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times,
+            capacities,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill='tonexty',
@@ -148,13 +155,13 @@ def compare_plans_curves(plans, time_interval, return_fig=False):
         debug_values_accumulated = plan.show_available_capacity_curve(
             time_interval, debug=True
         )
-        times_ms_acc, capacities_acc = zip(*debug_values_accumulated)
-        original_times_acc = [t / time_interval.unit.to_milliseconds() for t in times_ms_acc]
+        times_ms_acc, capacities_acc = np.asarray(debug_values_accumulated, dtype=np.float64).T
+        original_times_acc = times_ms_acc / time_interval.unit.to_milliseconds()
 
-        rgba_color_acc = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
-        fig_accumulated.add_trace(go.Scatter(
-            x=original_times_acc,
-            y=capacities_acc,
+        rgba_color_acc = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
+        fig_accumulated.add_trace(CapacityPlotHelper.line_trace(
+            original_times_acc,
+            capacities_acc,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill='tonexty',
@@ -166,13 +173,13 @@ def compare_plans_curves(plans, time_interval, return_fig=False):
         debug_values_instantaneous = plan.show_instantaneous_capacity_curve(
             time_interval, debug=True
         )
-        times_ms_inst, capacities_inst = zip(*debug_values_instantaneous)
-        original_times_inst = [t / time_interval.unit.to_milliseconds() for t in times_ms_inst]
+        times_ms_inst, capacities_inst = np.asarray(debug_values_instantaneous, dtype=np.float64).T
+        original_times_inst = times_ms_inst / time_interval.unit.to_milliseconds()
 
-        rgba_color_inst = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color)[:3]]))},0.2)"
-        fig_instantaneous.add_trace(go.Scatter(
-            x=original_times_inst,
-            y=capacities_inst,
+        rgba_color_inst = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.2)"
+        fig_instantaneous.add_trace(CapacityPlotHelper.line_trace(
+            original_times_inst,
+            capacities_inst,
             mode='lines',
             line=dict(color=color, shape='hv', width=1.3),
             fill='tonexty',
@@ -1,9 +1,12 @@
 import asyncio
 import os
 import time
-import httpx
-from dotenv import load_dotenv
-import requests
+
+from Pricing4API.ancillary.lazy_import import lazy_import
+
+httpx = lazy_import("httpx")
+dotenv = lazy_import("dotenv")
+requests = lazy_import("requests")
 
 
 class ConformityCapacityTest:
@@ -20,7 +23,7 @@ class ConformityCapacityTest:
     @staticmethod
     def get_access_token():
         """Retrieve an access token using Amadeus credentials."""
-        load_dotenv()
+        dotenv.load_dotenv()
 
         AMADEUS_CLIENT_ID = os.getenv("AMADEUS_CLIENT_ID")
         AMADEUS_CLIENT_SECRET = os.getenv("AMADEUS_CLIENT_SECRET")
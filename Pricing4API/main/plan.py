@@ -1,19 +1,17 @@
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import math
 from typing import List, Optional, Tuple, Union
 
-from matplotlib import pyplot as plt
-from matplotlib.colors import to_rgba
-from matplotlib.widgets import RadioButtons
 import numpy as np
-import yaml
-import plotly.graph_objects as go
 
+from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
+from Pricing4API.ancillary.lazy_import import lazy_import
 from Pricing4API.ancillary.limit import Limit
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.utils import rearrange_time_axis_function, select_best_time_unit, format_time, format_time_with_unit, parse_time_string_to_duration
 
+go = lazy_import("plotly.graph_objects")
+mcolors = lazy_import("matplotlib.colors")
+
 
 class Plan:
     
@@ -364,24 +362,24 @@ class Plan:
         if not defined_t_values_ms:
             defined_t_values_ms = [0, t_milliseconds]
 
+        from concurrent.futures import ThreadPoolExecutor
+
         with ThreadPoolExecutor() as executor:
             defined_capacity_values = list(executor.map(self.compute_available_capacity_threads, defined_t_values_ms))
 
         if debug:
             return list(zip(defined_t_values_ms, defined_capacity_values))
 
-        original_times_in_specified_unit = [
-            t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-        ]
+        original_times_in_specified_unit = np.asarray(defined_t_values_ms) / time_interval.unit.to_milliseconds()
         x_label = f"Time ({time_interval.unit.value})"
 
         fig = go.Figure()
 
-        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'green')[:3]]))},0.3)"
+        rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'green')[:3]]))},0.3)"
 
-        fig.add_trace(go.Scatter(
-            x=original_times_in_specified_unit,
-            y=defined_capacity_values,
+        fig.add_trace(CapacityPlotHelper.line_trace(
+            original_times_in_specified_unit,
+            defined_capacity_values,
             mode='lines',
             line=dict(color=color or 'green', shape='hv', width=1.3),
             fill='tonexty',
@@ -473,18 +471,16 @@ class Plan:
             if debug:
                 return list(zip(defined_t_values_ms, defined_capacity_values))
 
-            original_times_in_specified_unit = [
-                t / time_interval.unit.to_milliseconds() for t in defined_t_values_ms
-            ]
+            original_times_in_specified_unit = np.asarray(defined_t_values_ms) / time_interval.unit.to_milliseconds()
             x_label = f"Time ({time_interval.unit.value})"
 
             fig = go.Figure()
 
-            rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in to_rgba(color or 'blue')[:3]]))},0.3)"
+            rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color or 'blue')[:3]]))},0.3)"
 
-            fig.add_trace(go.Scatter(
-                x=original_times_in_specified_unit,
-                y=defined_capacity_values,
+            fig.add_trace(CapacityPlotHelper.line_trace(
+                original_times_in_specified_unit,
+                defined_capacity_values,
                 mode='lines',
                 line=dict(color=color or 'blue', shape='hv', width=1.3),
                 fill='tonexty',
@@ -827,17 +823,17 @@ class Plan:
 
         # Curva acumulada
         acc_data = self.show_available_capacity_curve(time_interval, debug=True)
-        times, caps = zip(*acc_data)
-        times_unit = [t / time_interval.unit.to_milliseconds() for t in times]
-        traces.append(go.Scatter(x=times_unit, y=caps, mode='lines', name='Accumulated', line=dict(shape='hv', color=color_map["Accumulated"])))
+        times, caps = np.asarray(acc_data, dtype=np.float64).T
+        times_unit = times / time_interval.unit.to_milliseconds()
+        traces.append(CapacityPlotHelper.line_trace(times_unit, caps, mode='lines', name='Accumulated', line=dict(shape='hv', color=color_map["Accumulated"])))
         visibilities.append([True, False, False, False])
 
         # Curva instantánea
         if t_ms > quota_ms:
             inst_data = self.show_instantaneous_capacity_curve(time_interval, debug=True)
-            t_inst, c_inst = zip(*inst_data)
-            t_inst_unit = [t / time_interval.unit.to_milliseconds() for t in t_inst]
-            traces.append(go.Scatter(x=t_inst_unit, y=c_inst, mode='lines', name='Instantaneous', line=dict(shape='hv', color=color_map["Instantaneous"])))
+            t_inst, c_inst = np.asarray(inst_data, dtype=np.float64).T
+            t_inst_unit = t_inst / time_interval.unit.to_milliseconds()
+            traces.append(CapacityPlotHelper.line_trace(t_inst_unit, c_inst, mode='lines', name='Instantaneous', line=dict(shape='hv', color=color_map["Instantaneous"])))
             visibilities[0][1] = True  # activable si está presente
 
         # Curva unitary uniformizada
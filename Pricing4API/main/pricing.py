@@ -1,13 +1,19 @@
+from __future__ import annotations
+
 from typing import List
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import plotly.graph_objects as go
+import numpy as np
+
+from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
+from Pricing4API.ancillary.lazy_import import lazy_import
 from Pricing4API.ancillary.time_unit import TimeDuration
 from Pricing4API.main.plan import Plan
 from Pricing4API.utils import format_time_with_unit
 
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
+mcolors = lazy_import("matplotlib.colors")
+
 
 
 class Pricing:
@@ -84,16 +90,15 @@ class Pricing:
         """
         Show a more detailed table with the same information as the original table.
         """
-        for plan in self.plans:
-            df.loc[f'Unit Base Cost ($/{self.__billing_object})'] = [plan.unit_base_cost for plan in self.plans]
-            df.loc[f'New subscription threshold'] = [plan.overage_quote for plan in self.plans]
-            df.loc[f'Upgrade plan threshold'] = [plan.upgrade_quote for plan in self.plans]
-            df.loc[f'Downgrade plan threshold'] = [plan.downgrade_quote for plan in self.plans]
-            df.loc['Earliest Coolingdown threshold'] = [format_time_with_unit(plan.earliest_coolingdown_threshold) for plan in self.plans]
-            df.loc['Earliest Coolingdown threshold - v2 and rounded'] = [round(plan.earliest_coolingdown_threshold, 3) for plan in self.plans]
-            df.loc['Max Unavailability'] = [format_time_with_unit(plan.max_unavailability_time) for plan in self.plans]
-            df.loc['Max Unavailability - v2 and rounded'] = [round(plan.max_unavailability_time, 3) for plan in self.plans]
-            df.loc['Max Unavailability Percentage'] = [plan.max_unavailability_percentage for plan in self.plans]
+        df.loc[f'Unit Base Cost ($/{self.__billing_object})'] = [plan.unit_base_cost for plan in self.plans]
+        df.loc[f'New subscription threshold'] = [plan.overage_quote for plan in self.plans]
+        df.loc[f'Upgrade plan threshold'] = [plan.upgrade_quote for plan in self.plans]
+        df.loc[f'Downgrade plan threshold'] = [plan.downgrade_quote for plan in self.plans]
+        df.loc['Earliest Coolingdown threshold'] = [format_time_with_unit(plan.earliest_coolingdown_threshold) for plan in self.plans]
+        df.loc['Earliest Coolingdown threshold - v2 and rounded'] = [round(plan.earliest_coolingdown_threshold, 3) for plan in self.plans]
+        df.loc['Max Unavailability'] = [format_time_with_unit(plan.max_unavailability_time) for plan in self.plans]
+        df.loc['Max Unavailability - v2 and rounded'] = [round(plan.max_unavailability_time, 3) for plan in self.plans]
+        df.loc['Max Unavailability Percentage'] = [plan.max_unavailability_percentage for plan in self.plans]
             
         return df
     
@@ -124,17 +129,17 @@ class Pricing:
             debug_data = plan.show_available_capacity_curve(
                 time_interval, debug=True
             )
-            times_ms, capacities = zip(*debug_data)
+            times_ms, capacities = np.asarray(debug_data, dtype=np.float64).T
 
             # Convertir los tiempos al formato original especificado
-            original_times = [t / time_interval.unit.to_milliseconds() for t in times_ms]
+            original_times = times_ms / time_interval.unit.to_milliseconds()
 
             rgba_color = f"rgba({','.join(map(str, [int(c * 255) for c in mcolors.to_rgba(color)[:3]]))},0.3)"
 
             # Añadir la línea escalonada al gráfico combinado
-            fig.add_trace(go.Scatter(
-                x=original_times,
-                y=capacities,
+            fig.add_trace(CapacityPlotHelper.line_trace(
+                original_times,
+                capacities,
                 mode='lines',
                 line=dict(color=color, shape='hv', width=1.3),
                 fill='tonexty',
@@ -1,15 +1,17 @@
+from __future__ import annotations
+
 import asyncio
 import logging
 import time
 
-import httpx
-from matplotlib import pyplot as plt
-import pandas as pd
-import requests
+from Pricing4API.ancillary.lazy_import import lazy_import
 from Pricing4API.ancillary.limit import Limit
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
 from Pricing4API.main.plan import Plan
-import plotly.graph_objects as go
+
+httpx = lazy_import("httpx")
+pd = lazy_import("pandas")
+go = lazy_import("plotly.graph_objects")
 
 
 class Subscription:
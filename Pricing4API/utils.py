@@ -1,4 +1,5 @@
 from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from typing import Union
 import re
 
 def heaviside(x):
@@ -141,6 +142,22 @@ def parse_time_string_to_duration(time_string: str) -> TimeDuration:
 
     return total_duration
 
+def to_milliseconds(value: Union[str, TimeDuration, float]) -> float:
+    """
+    Convierte una duración en milisegundos.
+
+    Args:
+        value (Union[str, TimeDuration, float]): Cadena de tiempo (e.g., '2.5s'), TimeDuration o milisegundos.
+
+    Returns:
+        float: La duración en milisegundos.
+    """
+    if isinstance(value, str):
+        value = parse_time_string_to_duration(value)
+    if isinstance(value, TimeDuration):
+        return value.to_milliseconds()
+    return float(value)
+
 if __name__ == "__main__":
     print(parse_time_string_to_duration("1day2.5min"))
 
@@ -0,0 +1,66 @@
+"""
+Aggregate demand of a heterogeneous, unaligned population: exact sweep, grid
+approximation and the naive dense grid (every user evaluated every second).
+
+Usage:
+    python -m benchmarks.bench_aggregate_demand [n_users]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.aggregate_demand import aggregate_demands
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms
+from Pricing4API.basic.plan_and_demand import Demand
+
+
+def synthetic_population(n_users: int, seed: int = 0):
+    """
+    n_users demands from a dozen profiles, with random durations and start offsets within a day.
+    """
+    rng = np.random.default_rng(seed)
+    profiles = [(Rate(r, f"{p}s"), [Quota(q, "1h")]) for r in (1, 2, 5) for p in (1, 10) for q in (500, 1800)]
+    demands, offsets = [], []
+    for _ in range(n_users):
+        rate, quotas = profiles[rng.integers(len(profiles))]
+        demands.append(Demand(rate, quota=quotas, duration=f"{int(rng.integers(10, 240))}min"))
+        offsets.append(float(rng.integers(0, 86_400_000)))
+    return demands, np.array(offsets)
+
+
+def dense_grid(demands, offsets, horizon_ms: float, step_ms: float = 1000.0) -> np.ndarray:
+    grid = np.arange(0.0, horizon_ms + step_ms, step_ms)
+    total = np.zeros_like(grid)
+    for demand, offset in zip(demands, offsets):
+        values, periods = demand.bounded_rate.limit_table
+        local = np.clip(grid - offset, 0, demand.duration.to_milliseconds())
+        total += np.where(grid >= offset, capacity_at_ms(values, periods, local), 0.0)
+    return total
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(n_users: int = 2000) -> None:
+    demands, offsets = synthetic_population(n_users)
+    horizon = "1day"
+
+    exact, t_exact = _timed(lambda: aggregate_demands(demands, offsets, time_interval=horizon))
+    approx, t_approx = _timed(lambda: aggregate_demands(demands, offsets, time_interval=horizon,
+                                                        approximate=True, resolution=1440))
+    dense, t_dense = _timed(lambda: dense_grid(demands, offsets, exact.horizon_ms))
+
+    error = np.max(np.abs(approx.requests - exact.at(approx.times_ms))) / exact.total
+    print(f"{n_users} users, {len(exact)} breakpoints, {exact.total:.0f} requests")
+    print(f"      exact sweep: {t_exact * 1000:8.1f} ms")
+    print(f"      approximate: {t_approx * 1000:8.1f} ms  (max error {error:.2%} of total)")
+    print(f"  dense 1s grid  : {t_dense * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
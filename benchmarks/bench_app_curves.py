@@ -0,0 +1,50 @@
+"""
+Cost of one uncached interaction of the Streamlit app: building the capacity curve of
+every plan and downsampling it to the plotted points, for horizons up to a year,
+against the dense sampling of show_capacity.
+
+Usage:
+    python -m benchmarks.bench_app_curves [n_plans]
+"""
+import sys
+import time
+
+import plotly.graph_objects as go
+
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.utils import parse_time_string_to_duration
+from benchmarks.generators import synthetic_bounded_rate
+
+
+def main(n_plans: int = 10) -> None:
+    bounded_rates = [synthetic_bounded_rate(seed, n_quotas=1 + seed % 4) for seed in range(n_plans)]
+    go.Figure(go.Scatter(x=[0], y=[0]))  # carga los validadores de plotly fuera de la medida
+
+    for horizon in ("5min", "1day", "1month", "1year"):
+        horizon_ms = parse_time_string_to_duration(horizon).to_milliseconds()
+        start = time.perf_counter()
+        points = 0
+        for br in bounded_rates:
+            values, periods = br.limit_table
+            curve = CapacityCurve.from_limit_table(values, periods)
+            for instantaneous in (False, True):
+                t, _ = curve.downsampled(0, horizon_ms, 2000, instantaneous)
+                points += len(t)
+        elapsed = time.perf_counter() - start
+        print(f"{horizon:>7}: {n_plans} plans, both curves, {points} points in {elapsed * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        fig = go.Figure()
+        for br in bounded_rates:
+            t, c = CapacityCurve.from_limit_table(*br.limit_table).downsampled(0, horizon_ms, 2000)
+            fig.add_trace(go.Scatter(x=t, y=c, mode="lines", line=dict(shape="hv")))
+        print(f"{'':>7}  curves and plotly figure: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    bounded_rates[0].show_available_capacity_curve("1day", debug=True)
+    print(f"show_available_capacity_curve('1day') of one plan (dense samples): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,36 @@
+"""
+Wall time of the batch reports of n_catalogs synthetic catalogs, with the time
+spent in each stage summed over the worker processes.
+
+Usage:
+    python -m benchmarks.bench_batch_report [n_catalogs] [jobs]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from Pricing4API.ancillary.batch_report import STAGES, generate_reports
+from benchmarks.bench_yaml_loading import synthetic_catalog_yaml
+
+
+def main(n_catalogs: int = 500, jobs: int = 0) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n_catalogs):
+            path = os.path.join(tmp, f"catalog_{i}.yaml")
+            with open(path, "w") as f:
+                f.write(synthetic_catalog_yaml(5 + i % 16).replace("Synthetic Pricing", f"Catalog {i}"))
+            paths.append(path)
+
+        start = time.perf_counter()
+        summary = generate_reports(paths, os.path.join(tmp, "reports"), jobs=jobs or None)
+        wall = time.perf_counter() - start
+
+    print(f"{n_catalogs} catalogs ({summary['plans'].sum()} plans) on {jobs or os.cpu_count()} "
+          f"processes: {wall:.2f} s, {(summary['status'] == 'ok').sum()} ok")
+    print("  " + ", ".join(f"{stage} {summary[stage].sum():.2f} s" for stage in STAGES))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,42 @@
+"""
+Billing simulation of a multi-year trace with thousands of plans: time to read the
+trace once and to bill every plan cycle by cycle.
+
+Usage:
+    python -m benchmarks.bench_billing [n_plans] [n_events]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.billing import simulate_billing
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Plan
+from Pricing4API.basic.pricing import Pricing
+
+
+def main(n_plans: int = 5000, n_events: int = 20_000_000) -> None:
+    rng = np.random.default_rng(0)
+    periods = [("1day", "1month"), ("1month", "1month"), ("1h", "1week"), ("1month", "1year")]
+    plans = []
+    for i in range(n_plans):
+        quota_period, billing = periods[i % len(periods)]
+        quota = int(rng.integers(100, 1_000_000))
+        plans.append(Plan(f"P{i}", BoundedRate(Rate(100, "1s"), Quota(quota, quota_period)),
+                          float(rng.uniform(0, 500)), float(rng.uniform(1e-5, 1e-2)), 1, billing))
+    pricing = Pricing(plans)
+
+    # Tres años de tráfico Poisson
+    years_ms = 3 * 365 * 86_400_000
+    t = np.cumsum(rng.exponential(years_ms / n_events, n_events))
+
+    start = time.perf_counter()
+    result = simulate_billing(pricing, t, origin=0)
+    elapsed = time.perf_counter() - start
+    print(f"{n_plans} plans x {result.fees.shape[1]} cycles, {n_events} requests: {elapsed:.2f} s "
+          f"(cheapest: {result.cheapest()})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
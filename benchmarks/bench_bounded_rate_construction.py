@@ -0,0 +1,75 @@
+"""
+Construction time of many BoundedRates: per-object constructor, bulk constructor and copies.
+
+Usage:
+    python -m benchmarks.bench_bounded_rate_construction [n_bounded_rates]
+"""
+import contextlib
+import io
+import random
+import sys
+import time
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def synthetic_limits(n: int, seed: int = 0):
+    """
+    n (rate, quotas) pairs with 0 to 4 quotas each, some of them unreachable.
+    """
+    rng = random.Random(seed)
+    periods = ["1min", "1h", "1day", "1month"]
+    cases = []
+    for _ in range(n):
+        rate = Rate(rng.randint(1, 50), f"{rng.randint(1, 10)}s")
+        quotas = [Quota(rng.randint(100, 500_000), period) for period in periods[:rng.randint(0, 4)]]
+        cases.append((rate, quotas))
+    return cases
+
+
+def _legacy_bounded_rate(rate, quotas):
+    # Former validation: one temporary BoundedRate and a recursive capacity_at per quota
+    valid = []
+    for q in quotas:
+        if q.consumption_unit <= rate.consumption_unit:
+            continue
+        if q.consumption_unit > rate.consumption_unit * (
+                q.consumption_period.to_milliseconds() / rate.consumption_period.to_milliseconds()):
+            continue
+        temp = object.__new__(BoundedRate)
+        temp.rate, temp.quota, temp.limits = rate, list(valid), [rate] + valid
+        if temp.capacity_at(q.consumption_period) >= q.consumption_unit:
+            valid.append(q)
+    return BoundedRate._from_validated(rate, valid)
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    # Best of repeat, with the unreachable-quota warnings kept off the terminal
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n: int = 20_000) -> None:
+    cases = synthetic_limits(n)
+    rates = [rate for rate, _ in cases]
+    quotas = [qs for _, qs in cases]
+    with contextlib.redirect_stdout(io.StringIO()):
+        brs = [BoundedRate(r, q) for r, q in cases]
+
+    results = {
+        "legacy validation": _timed(lambda: [_legacy_bounded_rate(r, q) for r, q in cases]),
+        "BoundedRate(...)": _timed(lambda: [BoundedRate(r, q) for r, q in cases]),
+        "BoundedRate.bulk(...)": _timed(lambda: BoundedRate.bulk(rates, quotas)),
+        "copy()": _timed(lambda: [br.copy() for br in brs]),
+    }
+    for label, seconds in results.items():
+        print(f"{label:>22}: {seconds * 1000:8.1f} ms  ({seconds / n * 1e6:.2f} us per bounded rate)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,49 @@
+"""
+Calendar windows over a multi-year horizon: capacity of a plan with monthly and yearly
+calendar quotas at many instants, and billing of a trace with calendar cycles against
+30-day ones.
+
+Usage:
+    python -m benchmarks.bench_calendar_windows [n_instants] [n_events]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.billing import simulate_billing
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.calendar_windows import CalendarBoundedRate, CalendarQuota
+from Pricing4API.basic.plan_and_demand import Plan
+
+DAY = 86_400_000
+
+
+def main(n_instants: int = 1_000_000, n_events: int = 5_000_000) -> None:
+    years = 5
+    plan = CalendarBoundedRate(Rate(100, "1s"), [Quota(20_000, "1h"), CalendarQuota(2_000_000, "1month", reset_day=1),
+                                                 CalendarQuota(20_000_000, "1year", reset_day=1)],
+                               "2024-03-10T12:00")
+    t = np.sort(np.random.default_rng(0).uniform(0, years * 365 * DAY, n_instants))
+    start = time.perf_counter()
+    calendar = plan.capacity_at(t)
+    elapsed = time.perf_counter() - start
+    nominal = plan.nominal_capacity_at(t)
+    print(f"capacity_at: {n_instants} instants over {years} years in {elapsed * 1000:.0f} ms; "
+          f"largest gap with 30-day months {np.abs(calendar - nominal).max():.0f} requests")
+
+    rng = np.random.default_rng(1)
+    events = np.cumsum(rng.exponential(years * 365 * DAY / n_events, n_events))
+    plans = [Plan("Monthly", BoundedRate(Rate(100, "1s"), Quota(80_000, "1month")), 49, 0.001, 1, "1month"),
+             Plan("Yearly", BoundedRate(Rate(100, "1s"), Quota(1_000_000, "1year")), 499, 0.0008, 1, "1year")]
+    for label, kwargs in (("30-day", {}), ("calendar", {"start": "2024-03-10T12:00", "tz": "Europe/Madrid"})):
+        start = time.perf_counter()
+        result = simulate_billing(plans, events, origin=0, **kwargs)
+        elapsed = time.perf_counter() - start
+        costs = ", ".join(f"{name} {cost:.2f}" for name, cost in zip(result.names, result.total_cost))
+        print(f"billing {label:8s}: {n_events} requests, {result.fees.shape[1]} cycles in {elapsed * 1000:.0f} ms "
+              f"({costs})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""
+Cost of year-long capacity analyses on a CapacityCurve against evaluating the
+full limit table at every instant.
+
+Usage:
+    python -m benchmarks.bench_capacity_curve [n_instants]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms
+
+
+def main(n: int = 10_000_000) -> None:
+    br = BoundedRate(Rate(10, "1s"), [Quota(300, "1min"), Quota(100_000, "1day")])
+    year_ms = 365 * 86_400_000
+    t = np.random.default_rng(0).uniform(0, year_ms, n)
+
+    start = time.perf_counter()
+    curve = br.capacity_curve()
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from_curve = curve.at_many(t)
+    at_many = time.perf_counter() - start
+
+    values, periods = br.limit_table
+    start = time.perf_counter()
+    from_table = capacity_at_ms(values, periods, t)
+    table = time.perf_counter() - start
+    assert np.array_equal(from_curve, from_table)
+
+    start = time.perf_counter()
+    curve.inverse(np.arange(0, from_curve.max(), 1000.0))
+    inverse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    steps, _ = curve[180 * 86_400_000:181 * 86_400_000]
+    sliced = time.perf_counter() - start
+
+    print(f"curve: {len(curve)} steps per period, built in {built * 1000:.2f} ms")
+    print(f"at_many on {n} instants over a year: {at_many:.3f} s (limit table: {table:.3f} s)")
+    print(f"inverse of {int(from_curve.max() // 1000)} goals: {inverse * 1000:.2f} ms")
+    print(f"one day slice ({len(steps)} steps) in {sliced * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""
+capacity_during over millions of arbitrary intervals (billing reconciliation),
+against calling capacity_during once per interval.
+
+Usage:
+    python -m benchmarks.bench_capacity_during [n_intervals]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def main(n: int = 10_000_000) -> None:
+    br = BoundedRate(Rate(10, "1s"), [Quota(300, "1min"), Quota(100_000, "1day")])
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 365 * 86_400_000, n)
+    ends = starts + rng.uniform(1, 30 * 86_400_000, n)
+
+    start = time.perf_counter()
+    br.capacity_during_many(starts, ends)
+    batched = time.perf_counter() - start
+
+    sample = 2000
+    start = time.perf_counter()
+    for s, e in zip(starts[:sample], ends[:sample]):
+        br.capacity_during(TimeDuration(e, TimeUnit.MILLISECOND), TimeDuration(s, TimeUnit.MILLISECOND))
+    per_call = (time.perf_counter() - start) / sample
+
+    print(f"capacity_during_many: {n} intervals in {batched:.3f} s ({n / batched / 1e6:.1f} M/s)")
+    print(f"capacity_during: {per_call * 1e6:.1f} us per interval, {per_call * n:.0f} s estimated for {n}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
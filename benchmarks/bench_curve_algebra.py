@@ -0,0 +1,49 @@
+"""
+Combining capacity curves over a year (two subscriptions of the last plans, backlog
+of a demand against them): exact merges of their steps against sampling every plan
+once per second.
+
+Usage:
+    python -m benchmarks.bench_curve_algebra [days]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms
+
+
+def main(days: int = 365) -> None:
+    end_ms = days * 86_400_000.0
+    # Typical plans: a fast rate under a quota that is used up early in its window
+    brs = [
+        BoundedRate(Rate(100, "1s"), Quota(10_000, "1day")),
+        BoundedRate(Rate(50, "1s"), Quota(1_000, "1h")),
+        BoundedRate(Rate(20, "1s"), [Quota(600, "1min"), Quota(50_000, "1day")]),
+    ]
+    demand = BoundedRate(Rate(10, "1s"), Quota(4_000, "1h"))
+
+    start = time.perf_counter()
+    capacity = brs[0].capacity_curve().steps(end_ms)
+    for br in brs[1:]:
+        capacity = capacity + 2 * br.capacity_curve().steps(end_ms)
+    backlog = demand.capacity_curve().steps(end_ms) - capacity
+    worst = backlog.max()
+    exact = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t = np.arange(0, end_ms, 1000.0)
+    sampled = capacity_at_ms(*brs[0].limit_table, t)
+    for br in brs[1:]:
+        sampled += 2 * capacity_at_ms(*br.limit_table, t)
+    sampled_worst = np.max(capacity_at_ms(*demand.limit_table, t) - sampled)
+    dense = time.perf_counter() - start
+
+    print(f"exact: {len(capacity)} combined steps, max backlog {worst:.0f} in {exact:.3f} s")
+    print(f"sampled every second: {len(t)} points, max backlog {sampled_worst:.0f} in {dense:.3f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,25 @@
+"""
+Throughput of the differential harness: random limit tables checked per second,
+for the vectorized fast paths alone and for every implementation.
+
+Usage:
+    python -m benchmarks.bench_differential [n_cases]
+"""
+import sys
+
+from Pricing4API.ancillary.differential import run
+
+
+def main(n: int = 20_000) -> None:
+    fast = run(n, seed=0, implementations=["capacity_at_ms", "curve"], minimize=False)
+    print(f"fast paths: {fast.cases} cases in {fast.seconds:.2f} s ({fast.cases_per_second:.0f} cases/s)")
+
+    full = run(n // 10, seed=0, minimize=False)
+    print(f"all implementations: {full.cases} cases in {full.seconds:.2f} s ({full.cases_per_second:.0f} cases/s)")
+    for (name, prop), failed in full.failures.items():
+        if failed:
+            print(f"  {name}.{prop}: {failed}/{full.checks[name, prop]} cases disagree with the oracle")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
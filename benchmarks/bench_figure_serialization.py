@@ -0,0 +1,47 @@
+"""
+Size and serialization time of capacity figures: plotly's own JSON against
+CapacityPlotHelper.figure_json (narrowed base64 typed arrays), and the point
+from which traces switch to WebGL.
+
+Usage:
+    python -m benchmarks.bench_figure_serialization [n_plans]
+"""
+import json
+import sys
+import time
+
+import plotly.graph_objects as go
+
+from Pricing4API.ancillary.CapacityPlotHelper import WEBGL_MIN_POINTS, CapacityPlotHelper
+from Pricing4API.basic.compare_curves import compare_bounded_rates_capacity
+from benchmarks.generators import synthetic_bounded_rate
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main(n_plans: int = 5) -> None:
+    bounded_rates = [synthetic_bounded_rate(seed, n_quotas=1 + seed % 3) for seed in range(n_plans)]
+    go.Figure(go.Scatter(x=[0], y=[0])).to_json()  # carga los validadores de plotly fuera de la medida
+    print(f"WEBGL_MIN_POINTS = {WEBGL_MIN_POINTS}")
+
+    for horizon in ("1h", "1day", "1week"):
+        fig, build = _timed(lambda: compare_bounded_rates_capacity(bounded_rates, horizon, return_fig=True))
+        points = sum(len(trace.x) for trace in fig.data)
+        webgl = sum(trace.type == "scattergl" for trace in fig.data)
+
+        lists, t_lists = _timed(lambda: json.dumps({"data": [{"x": trace.x.tolist(), "y": trace.y.tolist()}
+                                                             for trace in fig.data]}))
+        plotly_json, t_plotly = _timed(fig.to_json)
+        typed, t_typed = _timed(lambda: CapacityPlotHelper.figure_json(fig))
+        print(f"{horizon:>6}: {points} points, {webgl}/{len(fig.data)} WebGL traces, figure in {build * 1000:.0f} ms")
+        print(f"{'':>6}  plain lists     {len(lists) / 1e6:7.2f} MB  {t_lists * 1000:6.1f} ms")
+        print(f"{'':>6}  fig.to_json     {len(plotly_json) / 1e6:7.2f} MB  {t_plotly * 1000:6.1f} ms")
+        print(f"{'':>6}  figure_json     {len(typed) / 1e6:7.2f} MB  {t_typed * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
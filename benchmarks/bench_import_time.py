@@ -0,0 +1,50 @@
+"""
+Import time of the core model, measured in a fresh interpreter.
+
+numpy is imported first and excluded from the measurement: it is the numeric
+core of the library. Everything else (plotting, YAML, HTTP) must stay unloaded.
+
+Usage:
+    python -m benchmarks.bench_import_time
+"""
+import json
+import subprocess
+import sys
+
+CORE_MODULES = [
+    "Pricing4API.basic",
+    "Pricing4API.basic.bounded_rate",
+    "Pricing4API.basic.plan_and_demand",
+    "Pricing4API.main.plan",
+]
+HEAVY_MODULES = ["plotly", "matplotlib", "yaml", "pandas", "httpx", "requests", "asyncio"]
+
+_PROBE = """
+import json, sys, time
+import numpy
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"elapsed_ms": elapsed_ms, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_core_import(repeat: int = 5) -> dict:
+    """
+    Best-of-repeat import time (ms) of CORE_MODULES and the heavy modules they pulled in.
+    """
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(modules=CORE_MODULES, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out)
+        if best is None or result["elapsed_ms"] < best["elapsed_ms"]:
+            best = result
+    return best
+
+
+if __name__ == "__main__":
+    result = measure_core_import()
+    print(f"core model import (after numpy): {result['elapsed_ms']:.1f} ms")
+    print(f"heavy modules loaded: {result['loaded'] or 'none'}")
@@ -0,0 +1,24 @@
+"""
+Time of the inflection points of a per-minute quota plan over a multi-year horizon.
+
+Usage:
+    python -m benchmarks.bench_inflection_points [days]
+"""
+import sys
+import time
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def main(days: int = 5 * 365) -> None:
+    br = BoundedRate(Rate(10, "1s"), [Quota(300, "1min"), Quota(100_000, "1day")])
+    br.inflection_points("1day")
+
+    start = time.perf_counter()
+    t_ms, _ = br.inflection_points(f"{days}day")
+    elapsed = time.perf_counter() - start
+    print(f"{len(t_ms)} inflection points over {days} days in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
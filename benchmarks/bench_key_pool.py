@@ -0,0 +1,54 @@
+"""
+Key pool with many subscriptions of different plans: dispatches per second of a
+million requests, below and above the capacity of the pool, one by one and in batch.
+
+Usage:
+    python -m benchmarks.bench_key_pool [n_keys] [n_requests]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.key_pool import KeyPool
+
+
+def synthetic_keys(n_keys: int, seed: int = 0) -> list:
+    """
+    Keys of three plan families: rate per second, quota per minute and, for some, per day.
+    """
+    rng = np.random.default_rng(seed)
+    keys = []
+    for i in range(n_keys):
+        rate = int(rng.integers(5, 50))
+        quotas = [Quota(rate * int(rng.integers(20, 60)), "1min")]
+        if i % 3 == 0:
+            quotas.append(Quota(rate * 20_000, "1day"))
+        keys.append(BoundedRate(Rate(rate, "1s"), quotas))
+    return keys
+
+
+def main(n_keys: int = 1000, n_requests: int = 1_000_000) -> None:
+    keys = synthetic_keys(n_keys)
+    rng = np.random.default_rng(1)
+    for gap_ms in (1.0, 0.01):
+        arrivals = np.cumsum(rng.exponential(gap_ms, n_requests))
+        pool = KeyPool(keys)
+        start = time.perf_counter()
+        _, send = pool.dispatch_many(arrivals)
+        elapsed = time.perf_counter() - start
+        print(f"{n_keys} keys, {1000 / gap_ms:,.0f} req/s: dispatch_many {n_requests / elapsed:,.0f} dispatches/s, "
+              f"mean wait {np.mean(send - arrivals):.1f} ms")
+
+        pool = KeyPool(keys)
+        dispatch = pool.dispatch
+        start = time.perf_counter()
+        for t in arrivals[:200_000].tolist():
+            dispatch(t)
+        elapsed = time.perf_counter() - start
+        print(f"  one by one: {200_000 / elapsed:,.0f} dispatches/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""
+Limit trees of APIs with many endpoints under global limits: vectorized capacity of
+every endpoint, online admission per request and greedy routing over a day.
+
+Usage:
+    python -m benchmarks.bench_limit_tree [n_endpoints]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.limit_tree import LimitTree
+
+
+def synthetic_tree(n_endpoints: int, seed: int = 0) -> LimitTree:
+    """
+    Global 50/s, 2000/min and 500000/day, and per endpoint a rate plus a quota per minute or hour.
+    """
+    rng = np.random.default_rng(seed)
+    tree = LimitTree([Rate(50, "1s"), Quota(2000, "1min"), Quota(500_000, "1day")], name="synthetic")
+    for i in range(n_endpoints):
+        endpoint = f"/v1/resource{i // 4}" + ("" if i % 4 == 0 else f"/sub{i % 4}")
+        period = "1min" if i % 2 else "1h"
+        tree.add(endpoint, [Rate(int(rng.integers(2, 20)), "1s"),
+                            Quota(int(rng.integers(100, 600)) * (60 if period == "1h" else 1), period)],
+                 method="GET" if i % 3 == 0 else "all")
+    return tree
+
+
+def main(n_endpoints: int = 32) -> None:
+    tree = synthetic_tree(n_endpoints)
+    targets = tree.targets
+    depth = max(len(tree.path(target)) for target in targets)
+    print(f"{len(tree.nodes)} nodes, {len(targets)} leaves, depth up to {depth}")
+
+    t = np.linspace(0, 30 * 86_400_000, 10_000)
+    start = time.perf_counter()
+    capacities = tree.capacity_at(t)
+    print(f"capacity_at: {capacities.size} (leaf, instant) pairs in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(1)
+    n = 200_000
+    times = np.sort(rng.uniform(0, 3_600_000, n)).tolist()
+    nodes = [targets[i] for i in rng.integers(0, len(targets), n)]
+    admission = tree.admission()
+    start = time.perf_counter()
+    for node, instant in zip(nodes, times):
+        admission.admit(node, instant)
+    elapsed = time.perf_counter() - start
+    print(f"admit: {n} requests in {elapsed * 1000:.0f} ms ({elapsed / n * 1e6:.2f} us/request), "
+          f"{admission.admitted} admitted")
+
+    for horizon in (3_600_000, 86_400_000):
+        start = time.perf_counter()
+        routed = tree.route(horizon)
+        print(f"route {horizon / 3_600_000:g}h: {sum(routed.values()):.0f} requests over {len(routed)} leaves "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
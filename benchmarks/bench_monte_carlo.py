@@ -0,0 +1,38 @@
+"""
+Throughput of the Monte-Carlo demand simulation: trials per second for a
+one-month horizon, in-process and across a process pool.
+
+Usage:
+    python -m benchmarks.bench_monte_carlo [n_trials] [workers]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.stochastic_demand import DiurnalDemand, simulate_demand
+
+
+def main(n_trials: int = 200, workers: int = os.cpu_count() or 1) -> None:
+    plan = BoundedRate(Rate(10, "1s"), [Quota(1500, "1h"), Quota(400_000, "1month")])
+    demand = DiurnalDemand(Rate(1, "6s"), amplitude=0.8)
+
+    start = time.perf_counter()
+    serial = simulate_demand(plan, demand, "1month", n_trials=n_trials, seed=0, batch_size=50)
+    t_serial = time.perf_counter() - start
+    print(f"{n_trials} one-month trials in-process: {t_serial:.1f} s ({n_trials / t_serial:.1f} trials/s)")
+
+    if workers > 1:
+        start = time.perf_counter()
+        pooled = simulate_demand(plan, demand, "1month", n_trials=n_trials, seed=0, batch_size=50, workers=workers)
+        t_pool = time.perf_counter() - start
+        assert np.array_equal(serial.served, pooled.served)
+        print(f"{n_trials} one-month trials, {workers} workers: {t_pool:.1f} s ({n_trials / t_pool:.1f} trials/s)")
+
+    print(serial.summary())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
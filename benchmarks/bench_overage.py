@@ -0,0 +1,48 @@
+"""
+Quoting and usage accounting with the overage model: costs of many request
+volumes for every plan, and included/overage/cost of a long sampled demand.
+
+Usage:
+    python -m benchmarks.bench_overage [n_samples]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Plan
+from Pricing4API.basic.pricing import Pricing
+
+
+def main(n: int = 10_000_000) -> None:
+    plans = [
+        Plan("Pro", BoundedRate(Rate(10, "1s"), Quota(40000, "1month")), 9.95, 0.001, 1, "1month"),
+        Plan("Ultra", BoundedRate(Rate(10, "1s"), Quota(100000, "1month")), 79.95, 0.00085, 1, "1month"),
+        Plan("Mega", BoundedRate(Rate(50, "1s"), Quota(300000, "1month")), 199.95, 0.0005, 1, "1month"),
+    ]
+
+    start = time.perf_counter()
+    pricing = Pricing(plans)
+    built = time.perf_counter() - start
+
+    volumes = np.arange(n, dtype=np.float64)
+    start = time.perf_counter()
+    pricing.quote(volumes)
+    quoted = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 36 * pricing.overage_models[0].quota_period_ms, n)
+    requests = np.cumsum(rng.poisson(0.2, n)).astype(np.float64)
+    start = time.perf_counter()
+    for model in pricing.overage_models:
+        model.usage(t, requests)
+    used = time.perf_counter() - start
+
+    print(f"Pricing built in {built * 1000:.2f} ms")
+    print(f"quote: {n} volumes x {len(plans)} plans in {quoted:.3f} s")
+    print(f"usage: {n} samples over 36 months x {len(plans)} plans in {used:.3f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,30 @@
+"""
+Time and memory of the rescheduling output of has_enough_capacity for a backlog
+of millions of requests (bursty demand against an hourly quota).
+
+Usage:
+    python -m benchmarks.bench_request_schedule [hours]
+"""
+import sys
+import time
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Demand, Plan
+
+
+def main(hours: int = 12) -> None:
+    plan = Plan("Bench", BoundedRate(Rate(100, "1s"), Quota(300_000, "1h")), 1, 1, 1, "1month")
+    demand = Demand(6000, "1min", f"{hours}h")
+
+    start = time.perf_counter()
+    analysis = plan.has_enough_capacity(demand)
+    elapsed = time.perf_counter() - start
+
+    scheduled = analysis["scheduled_requests"]
+    size_mb = (scheduled.ids.nbytes + scheduled.send_times_ms.nbytes) / 2 ** 20
+    print(f"{len(scheduled)} rescheduled requests (max backlog {analysis['max_backlog']}) "
+          f"in {elapsed:.3f} s, {size_mb:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
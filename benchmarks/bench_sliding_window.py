@@ -0,0 +1,51 @@
+"""
+Fixed windows against rolling logs and sliding counters: capacity curves, admission
+per request with a month-long quota, and the worst burst of each semantics.
+
+Usage:
+    python -m benchmarks.bench_sliding_window [n_requests]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.sliding_window import SlidingBoundedRate, SlidingQuota
+
+
+def plans(window: str) -> SlidingBoundedRate:
+    """
+    100/s, 3000/min and 2000000/month, the quotas with the given window semantics.
+    """
+    quota = Quota if window == "fixed" else lambda value, period: SlidingQuota(value, period, window)
+    return SlidingBoundedRate(Rate(100, "1s"), [quota(3000, "1min"), quota(2_000_000, "1month")])
+
+
+def main(n: int = 500_000) -> None:
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.exponential(5.0, n)).tolist()
+    for window in ("fixed", "rolling", "sliding"):
+        plan = plans(window)
+        start = time.perf_counter()
+        jumps, _ = plan.capacity_jumps("10min")
+        curve_ms = (time.perf_counter() - start) * 1000
+
+        admission = plan.admission()
+        start = time.perf_counter()
+        for instant in times:
+            admission.admit(instant)
+        elapsed = time.perf_counter() - start
+        print(f"{window:8s} curve 10min: {jumps.size} jumps in {curve_ms:.1f} ms; admit: {n} requests in "
+              f"{elapsed * 1000:.0f} ms ({elapsed / n * 1e6:.2f} us/request), {admission.admitted} admitted")
+
+    plan = plans("rolling")
+    for length in ("1min", "1h", "1day", "1month"):
+        start = time.perf_counter()
+        worst = plan.worst_case_burst(length)
+        print(f"worst burst in {length}: fixed {worst['fixed']:.0f}, rolling {worst['rolling']:.0f} "
+              f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,51 @@
+"""
+One plan shared by many tenants in groups: time to replay recorded demand through the
+weighted-fair scheduler as the number of tenants grows, and the spread of their shares.
+
+Usage:
+    python -m benchmarks.bench_tenant_share [n_requests]
+"""
+import sys
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.tenant_share import Tenant, TenantGroup, TenantShare
+
+
+def synthetic_share(n_tenants: int, seed: int = 0) -> TenantShare:
+    """
+    Groups of 10 tenants with random weights; one tenant in ten has a guaranteed minimum.
+    """
+    rng = np.random.default_rng(seed)
+    groups = []
+    for g in range(max(n_tenants // 10, 1)):
+        tenants = [Tenant(f"t{g}_{i}", weight=float(rng.integers(1, 5)), minimum=0.5 / n_tenants if i == 0 else 0.0)
+                   for i in range(min(10, n_tenants))]
+        groups.append(TenantGroup(f"g{g}", tenants, weight=float(rng.integers(1, 3))))
+    return TenantShare(BoundedRate(Rate(500, "1s"), Quota(20_000, "1min")), groups)
+
+
+def main(n_requests: int = 500_000) -> None:
+    rng = np.random.default_rng(1)
+    for n_tenants in (10, 100, 1000):
+        share = synthetic_share(n_tenants)
+        names = share.names
+        # Diez minutos de demanda, por encima de la capacidad del plan, repartida de forma desigual entre inquilinos
+        popularity = rng.pareto(1.5, len(names)) + 1
+        who = rng.choice(len(names), n_requests, p=popularity / popularity.sum())
+        t = np.sort(rng.uniform(0, 600_000, n_requests))
+        demand = {name: t[who == i] for i, name in enumerate(names)}
+
+        start = time.perf_counter()
+        result = share.simulate(demand)
+        elapsed = time.perf_counter() - start
+        served = result.served
+        print(f"{n_tenants:5d} tenants: {n_requests / elapsed:,.0f} requests/s, served in "
+              f"{np.nanmax(result.send_ms) / 60_000:.0f} min, mean delay {np.nanmean(result.delay_ms) / 1000:.1f} s, "
+              f"largest share {served.max() / served.sum():.3f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
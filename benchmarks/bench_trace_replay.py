@@ -0,0 +1,38 @@
+"""
+Throughput of the trace replay: events per second for a memory-mapped .npy trace
+of n_events timestamps (one day of Poisson traffic), for each policy.
+
+Usage:
+    python -m benchmarks.bench_trace_replay [n_events]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.trace_replay import replay_trace
+
+
+def main(n_events: int = 20_000_000) -> None:
+    plan = BoundedRate(Rate(250, "1s"), [Quota(600_000, "1h"), Quota(12_000_000, "1day")])
+
+    rng = np.random.default_rng(0)
+    gaps = rng.exponential(86_400_000 / n_events, size=n_events)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.npy")
+        np.save(path, np.cumsum(gaps))
+        del gaps
+
+        for policy, max_queue in (("reject", None), ("delay", None), ("queue", 10_000)):
+            start = time.perf_counter()
+            result = replay_trace(plan, path, policy=policy, max_queue=max_queue)
+            elapsed = time.perf_counter() - start
+            print(f"{policy:>6}: {n_events / elapsed / 1e6:.1f} M events/s "
+                  f"({result.accepted} accepted, {result.rejected} rejected, {result.delayed} delayed)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
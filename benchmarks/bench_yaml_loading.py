@@ -0,0 +1,71 @@
+"""
+Cold vs warm load time of a synthetic pricing catalog.
+
+Usage:
+    python -m benchmarks.bench_yaml_loading [n_plans]
+"""
+import sys
+import tempfile
+import time
+
+import yaml
+
+from Pricing4API.ancillary.pricing_catalog import load_catalog
+from Pricing4API.ancillary.yaml_serialization import PricingYamlHandler
+
+
+def synthetic_catalog_yaml(n_plans: int) -> str:
+    """
+    Builds a '!Pricing' document with n_plans plans shaped like new_notebooks/yaml/plan_dblp.yaml.
+    """
+    lines = ["!Pricing", "Synthetic Pricing:", "  metrics:", "    name: requests", "  plans:"]
+    for i in range(n_plans):
+        lines += [
+            f"    Plan {i}:",
+            f"      cost: {i * 0.5}",
+            "      billing_cycle: {value: 1, unit: month}",
+            "      unitary_rate:",
+            "        /*: {all: {requests: {period: {value: 1, unit: second}}}}",
+            "      quotas:",
+            "        /*:",
+            "          all:",
+            "            requests:",
+            f"              - {{max: {30 + i}, period: {{value: 1, unit: minute}}}}",
+            f"              - {{max: {1000 + 10 * i}, period: {{value: 1, unit: hour}}}}",
+            f"              - {{max: {100000 + 100 * i}, period: {{value: 1, unit: month}}}}",
+            "      overage: {cost: 0.001}",
+            "      max_number_of_subscriptions: 1",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_plans: int = 1000) -> None:
+    text = synthetic_catalog_yaml(n_plans)
+
+    yaml.add_constructor("!Pricing", PricingYamlHandler.pricing_constructor, Loader=yaml.SafeLoader)
+    legacy = _timed(lambda: yaml.load(text, Loader=yaml.SafeLoader), repeat=1)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = _timed(lambda: load_catalog(text))
+        load_catalog(text, cache_dir=cache_dir)
+        warm = _timed(lambda: load_catalog(text, cache_dir=cache_dir))
+        warm_all_plans = _timed(lambda: load_catalog(text, cache_dir=cache_dir).plans, repeat=1)
+
+    print(f"catalog with {n_plans} plans ({len(text) / 1024:.0f} KiB)")
+    print(f"  legacy (pure-Python loader, eager plans): {legacy * 1000:9.1f} ms")
+    print(f"  cold   (C loader, lazy plans, no cache):  {cold * 1000:9.1f} ms")
+    print(f"  warm   (cache hit, lazy plans):           {warm * 1000:9.1f} ms")
+    print(f"  warm + building every plan:               {warm_all_plans * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
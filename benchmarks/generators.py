@@ -0,0 +1,77 @@
+"""
+Synthetic plans, pricings and demands for the benchmarks, all reproducible from a seed.
+"""
+from typing import List
+
+import numpy as np
+
+from Pricing4API.ancillary.limit import Limit
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Demand, Plan
+from Pricing4API.main.plan import Plan as MainPlan
+from Pricing4API.main.pricing import Pricing as MainPricing
+from benchmarks.bench_yaml_loading import synthetic_catalog_yaml
+
+# Periodos de las cuotas, de menor a mayor; cada uno múltiplo del anterior
+QUOTA_PERIODS = ["1min", "1h", "1day", "1month"]
+
+
+def synthetic_bounded_rate(seed: int = 0, n_quotas: int = 3, rate: int = 10) -> BoundedRate:
+    """
+    A rate of rate requests per second and n_quotas nested quotas, each binding.
+
+    Every quota allows between 20% and 60% of what the previous limit allows over its
+    period, so all of them shape the capacity curve.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = {"1min": 60, "1h": 3600, "1day": 86400, "1month": 2592000}
+    quotas = []
+    allowed = float(rate)
+    previous = 1
+    for period in QUOTA_PERIODS[:n_quotas]:
+        allowed = allowed * seconds[period] / previous * rng.uniform(0.2, 0.6)
+        previous = seconds[period]
+        quotas.append(Quota(max(int(allowed), 1), period))
+    return BoundedRate(Rate(rate, "1s"), quotas)
+
+
+def synthetic_plans(n_plans: int, seed: int = 0) -> List[Plan]:
+    """
+    Basic Plans of increasing capacity and cost, with overage.
+    """
+    return [
+        Plan(f"Plan {i}", synthetic_bounded_rate(seed + i, n_quotas=1 + i % len(QUOTA_PERIODS), rate=5 * (i + 1)),
+             10.0 * i, 0.001, 1, "1month")
+        for i in range(n_plans)
+    ]
+
+
+def synthetic_demand(rate: int = 20, period: str = "1s", duration: str = "1h") -> Demand:
+    return Demand(rate, period, duration)
+
+
+def synthetic_main_pricing(n_plans: int = 4, max_subscriptions: int = 3) -> MainPricing:
+    """
+    Pricing4API.main Pricing with a free plan and n_plans - 1 paid plans, for get_optimal_subscription.
+    """
+    plans = []
+    for i in range(n_plans):
+        plans.append(MainPlan(
+            f"Plan {i}",
+            billing=(0.0 if i == 0 else 9.95 * i, TimeDuration(1, TimeUnit.MONTH)),
+            overage_cost=None if i == 0 else 0.001,
+            unitary_rate=Limit(1, TimeDuration(1, TimeUnit.SECOND)),
+            quotes=[Limit(100 * 6 ** i, TimeDuration(1, TimeUnit.DAY))],
+            max_number_of_subscriptions=1 if i == 0 else max_subscriptions,
+        ))
+    return MainPricing("Synthetic", plans, "requests")
+
+
+__all__ = [
+    "synthetic_bounded_rate",
+    "synthetic_catalog_yaml",
+    "synthetic_demand",
+    "synthetic_main_pricing",
+    "synthetic_plans",
+]
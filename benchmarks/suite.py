@@ -0,0 +1,290 @@
+"""
+Benchmark suite of the capacity engine and the optimizer, with stored baselines.
+
+Every case is timed timeit-style (loops autoranged to at least min_time, best of
+repeat runs, setup excluded) and the results can be saved as a baseline and
+compared against one later. The standalone bench_*.py scripts measure whole
+scenarios; this suite tracks the primitives they are built on.
+
+Usage:
+    python -m benchmarks.suite                              # run and print
+    python -m benchmarks.suite -k capacity_at               # only matching cases
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json [--fail-on-regression]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.utils import parse_time_string_to_duration
+from benchmarks.generators import (synthetic_bounded_rate, synthetic_catalog_yaml, synthetic_demand,
+                                   synthetic_main_pricing, synthetic_plans)
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    """
+    Registers a case: a setup function returning the callable to time.
+    """
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+# --- capacity_at ---------------------------------------------------------------
+
+@case("capacity_at/scalar")
+def _capacity_at_scalar():
+    br = synthetic_bounded_rate(n_quotas=4)
+    t = TimeDuration(1_234_567_891, TimeUnit.MILLISECOND)
+    return lambda: br.capacity_at(t)
+
+
+@case("capacity_at/batched_1M")
+def _capacity_at_batched():
+    curve = synthetic_bounded_rate(n_quotas=4).capacity_curve()
+    t = np.random.default_rng(0).uniform(0, 365 * 86_400_000, 1_000_000)
+    return lambda: curve.at_many(t)
+
+
+# --- curves --------------------------------------------------------------------
+
+def _curve_case(horizon: str):
+    def setup():
+        curve = synthetic_bounded_rate(n_quotas=4).capacity_curve()
+        end_ms = parse_time_string_to_duration(horizon).to_milliseconds()
+        return lambda: curve.breakpoints(0, end_ms)
+    return setup
+
+
+for _horizon in ("1h", "1day", "1month", "1year"):
+    case(f"curve/exact_{_horizon}")(_curve_case(_horizon))
+
+
+@case("curve/downsampled_1year")
+def _curve_downsampled():
+    curve = synthetic_bounded_rate(n_quotas=4).capacity_curve()
+    end_ms = parse_time_string_to_duration("1year").to_milliseconds()
+    return lambda: curve.downsampled(0, end_ms, 2000)
+
+
+@case("curve/sampled_1h")
+def _curve_sampled():
+    br = synthetic_bounded_rate(n_quotas=4)
+    return lambda: br.show_available_capacity_curve("1h", debug=True)
+
+
+@case("curve/sampled_1day")
+def _curve_sampled_day():
+    br = synthetic_bounded_rate(n_quotas=4)
+    return lambda: br.show_available_capacity_curve("1day", debug=True)
+
+
+# --- min_time, inflection points -----------------------------------------------
+
+@case("min_time")
+def _min_time():
+    br = synthetic_bounded_rate(n_quotas=4)
+    goal = int(br.capacity_at("20day"))
+    return lambda: br.min_time(goal, display=False)
+
+
+@case("inflection_points/1month")
+def _inflection_points():
+    br = synthetic_bounded_rate(n_quotas=3)
+    return lambda: br.calculate_inflection_points("1month")
+
+
+# --- has_enough_capacity, optimizer --------------------------------------------
+
+@case("has_enough_capacity/1h")
+def _has_enough_capacity():
+    plan = synthetic_plans(3)[2]
+    # Por debajo del rate del plan pero por encima de sus cuotas: hay que reprogramar
+    demand = synthetic_demand(10, "1s", "1h")
+    return lambda: plan.has_enough_capacity(demand)
+
+
+@case("get_optimal_subscription/4x3")
+def _optimal_subscription():
+    from Pricing4API.main.optimal_subscription import get_optimal_subscription
+    pricing = synthetic_main_pricing(4, 3)
+    time_interval = TimeDuration(1, TimeUnit.DAY)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return get_optimal_subscription(pricing, 20_000, time_interval)
+    return run
+
+
+# --- YAML loading ----------------------------------------------------------------
+
+@case("yaml/load_cold_200")
+def _yaml_cold():
+    from Pricing4API.ancillary.pricing_catalog import load_catalog
+    text = synthetic_catalog_yaml(200)
+    return lambda: load_catalog(text)
+
+
+@case("yaml/load_warm_200")
+def _yaml_warm():
+    from Pricing4API.ancillary.pricing_catalog import load_catalog
+    text = synthetic_catalog_yaml(200)
+    # El directorio se borra cuando la lambda (que lo referencia) deja de usarse
+    cache_dir = tempfile.TemporaryDirectory()
+    load_catalog(text, cache_dir=cache_dir.name)
+    return lambda: load_catalog(text, cache_dir=cache_dir.name)
+
+
+# --- runner ----------------------------------------------------------------------
+
+def time_case(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Seconds per call of fn: loops grown until one run lasts min_time, best and median of repeat runs.
+    """
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    runs = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        runs.append((time.perf_counter() - start) / loops)
+    return {"best": min(runs), "median": float(np.median(runs)), "loops": loops, "repeat": repeat}
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def run_suite(pattern: Optional[str] = None, repeat: int = 5, min_time: float = 0.2, verbose: bool = True) -> dict:
+    """
+    Runs every case whose name matches the pattern (a regular expression).
+
+    Returns:
+        dict: {"environment": {...}, "results": {name: {"best", "median", "loops", "repeat"}}}.
+    """
+    # Liberar un bloque grande sube el umbral de mmap de glibc: sin esto los casos con arrays
+    # de más de 128 KiB miden page faults o no según qué casos se hayan ejecutado antes
+    np.ones(1 << 20).sum()
+
+    results = {}
+    for name, setup in CASES.items():
+        if pattern and not re.search(pattern, name):
+            continue
+        results[name] = time_case(setup(), repeat=repeat, min_time=min_time)
+        if verbose:
+            print(f"{name:<32} {_format(results[name]['best']):>10}  ({results[name]['loops']} loops)")
+    return {"environment": _environment(), "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.25) -> List[dict]:
+    """
+    One row per case of current: baseline and current best times and their ratio.
+
+    status is "slower" when current/baseline exceeds threshold, "faster" when it is
+    below 1/threshold, "new" when the baseline lacks the case and "same" otherwise.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            rows.append({"case": name, "baseline": None, "current": result["best"], "ratio": None, "status": "new"})
+            continue
+        ratio = result["best"] / before["best"]
+        status = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else "same"
+        rows.append({"case": name, "baseline": before["best"], "current": result["best"], "ratio": ratio,
+                     "status": status})
+    return rows
+
+
+def _format(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def format_comparison(rows: List[dict]) -> str:
+    lines = [f"{'case':<32} {'baseline':>10} {'current':>10} {'ratio':>7}  status"]
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        lines.append(f"{row['case']:<32} {_format(row['baseline']):>10} {_format(row['current']):>10} "
+                     f"{ratio:>7}  {row['status']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite of Pricing4API.")
+    parser.add_argument("-k", "--filter", default=None, help="regular expression on case names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--save", nargs="?", const=BASELINE, default=None, help="write the results as a baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, default=None, help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+
+    current = run_suite(args.filter, repeat=args.repeat, min_time=args.min_time)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold)
+        print()
+        print(format_comparison(rows))
+        if args.fail_on_regression and any(row["status"] == "slower" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,124 @@
+import numpy as np
+import plotly.graph_objects as go
 import streamlit as st
+
+from Pricing4API.ancillary.CapacityPlotHelper import CapacityPlotHelper
+from Pricing4API.ancillary.pricing_catalog import load_catalog
 from Pricing4API.basic.bounded_rate import Rate, Quota, BoundedRate
-from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
-from Pricing4API.utils import parse_time_string_to_duration  # Importar la función correcta
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.capacity_kernels import limit_table
+from Pricing4API.utils import format_time_with_unit, parse_time_string_to_duration, select_best_time_unit
+
+# Puntos por curva: por encima se dibuja la envolvente de cada tramo (ver CapacityCurve.downsampled)
+MAX_POINTS = 2000
+
+
+@st.cache_data(show_spinner=False)
+def single_plan_signature(consumption_unit: int, consumption_period: str, quota_unit: int, quota_period: str):
+    """
+    (values, periods in ms) of the plan built from the sidebar, after BoundedRate drops unreachable quotas.
+    """
+    bounded_rate = BoundedRate(Rate(consumption_unit, consumption_period), Quota(quota_unit, quota_period))
+    values, periods = bounded_rate.limit_table
+    return tuple(values.tolist()), tuple(periods.tolist())
+
+
+@st.cache_data(show_spinner=False)
+def catalog_signatures(raw: bytes):
+    """
+    Name and (values, periods in ms) of every plan of an uploaded YAML catalog.
+    """
+    catalog = load_catalog(raw)
+    plans = []
+    for plan in catalog.plans:
+        values, periods = limit_table(plan.limits)
+        plans.append((plan.name, tuple(values.tolist()), tuple(periods.tolist())))
+    return catalog.name, plans
+
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def capacity_curve(values: tuple, periods: tuple) -> CapacityCurve:
+    return CapacityCurve.from_limit_table(np.array(values), np.array(periods))
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def curve_data(values: tuple, periods: tuple, horizon_ms: float, instantaneous: bool):
+    """
+    Points of the capacity curve of a limit signature up to horizon_ms, at most MAX_POINTS + 1.
+    """
+    return capacity_curve(values, periods).downsampled(0, horizon_ms, MAX_POINTS, instantaneous)
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def exhaustion_thresholds(values: tuple, periods: tuple):
+    """
+    For every quota, when the limits below it let it be exhausted (see BoundedRate.quota_exhaustion_threshold).
+    """
+    return [format_time_with_unit(select_best_time_unit(capacity_curve(values[:i], periods[:i]).inverse(values[i])))
+            for i in range(1, len(values))]
+
 
 def main():
     st.title("Capacity Simulation App")
 
-    # User inputs for Rate
-    st.sidebar.header("Rate Configuration")
-    consumption_unit = st.sidebar.number_input("Consumption Unit", min_value=1, value=10)
-    consumption_period = st.sidebar.text_input("Consumption Period", value="1s")
+    st.sidebar.header("Pricing Catalog")
+    uploaded = st.sidebar.file_uploader("YAML catalog (optional)", type=["yaml", "yml"])
 
-    # User inputs for Quota
-    st.sidebar.header("Quota Configuration")
-    quota_unit = st.sidebar.number_input("Quota Unit", min_value=1, value=100)
-    quota_period = st.sidebar.text_input("Quota Period", value="1min")
+    if uploaded is None:
+        # User inputs for Rate
+        st.sidebar.header("Rate Configuration")
+        consumption_unit = st.sidebar.number_input("Consumption Unit", min_value=1, value=10)
+        consumption_period = st.sidebar.text_input("Consumption Period", value="1s")
 
-    # Create Rate and Quota objects
-    rate = Rate(consumption_unit, consumption_period)
-    quota = Quota(quota_unit, quota_period)
+        # User inputs for Quota
+        st.sidebar.header("Quota Configuration")
+        quota_unit = st.sidebar.number_input("Quota Unit", min_value=1, value=100)
+        quota_period = st.sidebar.text_input("Quota Period", value="1min")
 
-    # Create BoundedRate object
-    bounded_rate = BoundedRate(rate, quota)
+        plans = [("Plan", *single_plan_signature(int(consumption_unit), consumption_period,
+                                                  int(quota_unit), quota_period))]
+    else:
+        try:
+            catalog_name, plans = catalog_signatures(uploaded.getvalue())
+        except Exception as e:
+            st.error(f"Could not load the catalog: {e}")
+            return
+        names = [name for name, _, _ in plans]
+        selected = st.sidebar.multiselect(f"Plans of {catalog_name}", names, default=names)
+        plans = [plan for plan in plans if plan[0] in selected]
 
     # User input for time interval
     st.sidebar.header("Simulation Configuration")
     time_interval = st.sidebar.text_input("Time Interval", value="5min")
+    horizon_ms = parse_time_string_to_duration(time_interval).to_milliseconds()
 
-    # Convert time interval to TimeDuration using the correct function
-    time_duration = parse_time_string_to_duration(time_interval)
+    curve_kind = "Accumulated"
+    if any(horizon_ms > periods[-1] for _, _, periods in plans if len(periods) > 1):
+        curve_kind = st.sidebar.radio("Curve", ["Accumulated", "Instantaneous"], horizontal=True)
 
     # Display capacity curves
     st.header("Capacity Curves")
-    fig = bounded_rate.show_capacity(time_duration, return_fig=True)
+    unit = select_best_time_unit(horizon_ms).unit
+    fig = go.Figure()
+    for name, values, periods in plans:
+        t, c = curve_data(values, periods, horizon_ms, curve_kind == "Instantaneous")
+        fig.add_trace(CapacityPlotHelper.line_trace(t / unit.to_milliseconds(), c, mode="lines",
+                                                    line=dict(shape="hv", width=1.3), name=name))
+    fig.update_layout(
+        title=f"{curve_kind} Capacity - {time_interval}",
+        xaxis_title=f"Time ({unit.value})",
+        yaxis_title="Capacity",
+        legend_title="Plans",
+        showlegend=True,
+        template="plotly_white",
+    )
     st.plotly_chart(fig)
 
     # Display quota exhaustion threshold
     st.header("Quota Exhaustion Threshold")
-    thresholds = bounded_rate.quota_exhaustion_threshold()
-    st.write(thresholds)
+    st.table([{"Plan": name, "Thresholds": ", ".join(exhaustion_thresholds(values, periods)) or "-"}
+              for name, values, periods in plans])
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
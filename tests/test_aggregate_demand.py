@@ -0,0 +1,56 @@
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.aggregate_demand import aggregate_demands
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Demand
+
+
+def _population(n, seed=3):
+    rng = np.random.default_rng(seed)
+    demands, offsets = [], []
+    for _ in range(n):
+        kind = rng.integers(3)
+        if kind == 0:
+            demands.append(Demand(1, f"{rng.integers(1, 4)}s", f"{rng.integers(1, 20)}min"))
+        elif kind == 1:
+            demands.append(Demand(Rate(2, "1s"), quota=Quota(int(rng.integers(30, 200)), "1min"), duration="10min"))
+        else:
+            demands.append(Demand(1, "2s", quota=[Quota(18, "60s"), Quota(48, "300s")]))
+        offsets.append(float(rng.integers(0, 600_000)))
+    return demands, offsets
+
+
+def _brute_force(demands, offsets, t_ms):
+    total = 0.0
+    for demand, offset in zip(demands, offsets):
+        local = t_ms - offset
+        if local < 0:
+            continue
+        if demand.duration is not None:
+            local = min(local, demand.duration.to_milliseconds())
+        total += demand.bounded_rate.capacity_at(TimeDuration(local, TimeUnit.MILLISECOND))
+    return total
+
+
+def test_exact_aggregate_matches_sum_of_users():
+    demands, offsets = _population(40)
+    aggregate = aggregate_demands(demands, offsets, time_interval="30min")
+
+    rng = np.random.default_rng(0)
+    probes = np.concatenate([rng.uniform(0, 1_800_000, 60), aggregate.times_ms[::50]])
+    for t in probes:
+        assert aggregate.at(t) == _brute_force(demands, offsets, t)
+
+
+def test_approximate_aggregate_and_fit():
+    demands, offsets = _population(200)
+    exact = aggregate_demands(demands, offsets, time_interval="30min")
+    approx = aggregate_demands(demands, offsets, time_interval="30min", approximate=True, resolution=3600)
+
+    assert abs(approx.total - exact.total) <= 0.01 * exact.total
+    grid = approx.times_ms
+    assert np.max(np.abs(approx.requests - exact.at(grid))) <= 0.02 * exact.total
+
+    assert exact.fits(BoundedRate(Rate(1000, "1s")))
+    assert not exact.fits(BoundedRate(Rate(1, "1s")))
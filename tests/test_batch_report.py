@@ -0,0 +1,54 @@
+import json
+import os
+
+import numpy as np
+
+from Pricing4API.ancillary.batch_report import generate_reports
+from Pricing4API.ancillary.pricing_catalog import load_catalog_file
+
+DBLP_YAML = os.path.join(os.path.dirname(__file__), "..", "new_notebooks", "yaml", "plan_dblp.yaml")
+
+
+def test_report_curves_match_plan(tmp_path):
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("!Pricing\nBroken: {}\n")
+
+    summary = generate_reports([DBLP_YAML, bad], tmp_path / "out", jobs=1)
+    assert list(summary["status"]) == ["ok", "error"]
+    assert summary["error"][1].startswith("load:")
+    assert (tmp_path / "out" / "summary.csv").exists()
+    assert sorted(os.listdir(tmp_path / "out" / "plan_dblp")) == ["datasheet.csv", "report.html", "report.json"]
+
+    with open(tmp_path / "out" / "plan_dblp" / "report.json") as f:
+        report = json.load(f)
+    plan = load_catalog_file(DBLP_YAML).plan("Free DBLP")
+    curve = report["plans"][0]["capacity"]
+    assert report["horizon_ms"] == 3_600_000
+    # Pasos exactos: la capacidad del plan justo en cada salto y justo antes del siguiente
+    for t, c, t_next in zip(curve["t_ms"], curve["capacity"], curve["t_ms"][1:]):
+        assert plan.compute_available_capacity_threads(t) == c
+        assert plan.compute_available_capacity_threads(t_next - 1) == c
+    assert report["datasheet"]["Max Unavailability Percentage"]["Free DBLP"] == "94.44"
+
+
+def test_pool_matches_single_process(tmp_path):
+    paths = [DBLP_YAML] * 3
+    single = generate_reports(paths, tmp_path / "single", jobs=1, horizon="2h", max_points=50)
+    pooled = generate_reports(paths, tmp_path / "pooled", jobs=2, horizon="2h", max_points=50)
+
+    assert sorted(os.listdir(tmp_path / "pooled")) == ["plan_dblp", "plan_dblp_2", "plan_dblp_3", "summary.csv"]
+    assert list(pooled["status"]) == ["ok"] * 3
+    for name in ("plan_dblp", "plan_dblp_3"):
+        with open(tmp_path / "single" / name / "report.json") as a, open(tmp_path / "pooled" / name / "report.json") as b:
+            assert json.load(a) == json.load(b)
+    assert np.all(single[["curves", "render", "total"]].to_numpy() >= 0)
+
+    # Un catálogo que ya se llama como el sufijo de otro no lo sobrescribe
+    for directory, name in (("x", "a.yaml"), ("y", "a.yaml"), ("z", "a_2.yaml")):
+        os.makedirs(tmp_path / directory)
+        with open(DBLP_YAML) as src, open(tmp_path / directory / name, "w") as dst:
+            dst.write(src.read())
+    clash = generate_reports([tmp_path / "x" / "a.yaml", tmp_path / "y" / "a.yaml", tmp_path / "z" / "a_2.yaml"],
+                             tmp_path / "clash", jobs=1, horizon="2h", max_points=50)
+    assert list(clash["status"]) == ["ok"] * 3
+    assert sorted(os.listdir(tmp_path / "clash")) == ["a", "a_2", "a_2_2", "summary.csv"]
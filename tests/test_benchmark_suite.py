@@ -0,0 +1,20 @@
+from benchmarks.suite import CASES, compare, run_suite
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"best": 1.0}, "b": {"best": 1.0}, "c": {"best": 1.0}}}
+    current = {"results": {"a": {"best": 1.5}, "b": {"best": 0.5}, "c": {"best": 1.1}, "d": {"best": 1.0}}}
+
+    rows = {row["case"]: row for row in compare(current, baseline, threshold=1.25)}
+    assert [rows[name]["status"] for name in "abcd"] == ["slower", "faster", "same", "new"]
+    assert rows["a"]["ratio"] == 1.5 and rows["d"]["ratio"] is None
+
+
+def test_suite_runs_selected_cases():
+    assert {"capacity_at/scalar", "curve/exact_1year", "get_optimal_subscription/4x3",
+            "yaml/load_warm_200"} <= set(CASES)
+
+    report = run_suite(r"^(capacity_at/scalar|min_time)$", repeat=2, min_time=0.001, verbose=False)
+    assert sorted(report["results"]) == ["capacity_at/scalar", "min_time"]
+    assert all(r["best"] > 0 and r["best"] <= r["median"] for r in report["results"].values())
+    assert report["environment"]["numpy"]
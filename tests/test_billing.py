@@ -0,0 +1,62 @@
+import numpy as np
+
+from Pricing4API.basic.billing import simulate_billing
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Demand, Plan
+from Pricing4API.basic.pricing import Pricing
+
+
+def _plans():
+    return [
+        Plan("Daily", BoundedRate(Rate(10, "1s"), Quota(30, "1day")), 5, 0.01, 1, "1week"),
+        Plan("Monthly", BoundedRate(Rate(10, "1s"), Quota(500, "1month")), 20, 0.002, 1, "1month"),
+        Plan("Yearly", BoundedRate(Rate(10, "1s"), Quota(4000, "1month")), 150, 0.001, 1, "1year"),
+        Plan("Free", BoundedRate(Rate(1, "1s")), 0, None, 1, "1month"),
+    ]
+
+
+def test_billing_matches_request_by_request():
+    pricing = Pricing(_plans())
+    day = 86_400_000
+    t = np.sort(np.random.default_rng(0).uniform(0, 400 * day, 20_000))
+
+    result = simulate_billing(pricing, t, origin=0)
+    for i, model in enumerate(pricing.overage_models):
+        quota = np.inf if model.included_quota is None else model.included_quota
+        cap = np.inf if model.overage_cap is None else model.overage_cap
+        window_ms = model.quota_period_ms if model.included_quota is not None else model.billing_period_ms
+        n = int(t[-1] // model.billing_period_ms) + 1
+        expected = np.zeros((3, n))
+        used = {}
+        for x in t:
+            w = x // window_ms
+            kind = 0 if used.get(w, 0) < quota else (1 if used.get(w, 0) < cap else 2)
+            used[w] = used.get(w, 0) + 1
+            expected[kind, int(x // model.billing_period_ms)] += 1
+
+        assert np.array_equal(result.included[i, :n], expected[0])
+        assert np.array_equal(result.overage[i, :n], expected[1])
+        assert np.array_equal(result.capped[i, :n], expected[2])
+        assert np.all(np.isnan(result.fees[i, n:]))
+        assert np.isclose(result.total_cost[i], n * model.plan.cost + expected[1].sum() * (model.plan.overage_cost or 0))
+
+    # El mismo trace en bloques da lo mismo
+    chunked = pricing.simulate_billing(np.array_split(t, 7), origin=0)
+    assert np.array_equal(np.nan_to_num(chunked.cost), np.nan_to_num(result.cost))
+    assert result.cheapest(served_only=False) == "Free"
+
+
+def test_billing_of_a_demand():
+    pricing = Pricing(_plans())
+    demand = Demand(Rate(1, "1h"), duration="1month")
+    result = pricing.simulate_billing(demand)
+
+    # Una petición por hora durante 30 días (721 con la del último instante, ya en el ciclo
+    # mensual siguiente): 24 al día caben en la cuota diaria, 500 al mes en la mensual
+    daily, monthly, yearly, free = range(4)
+    assert result.fees.shape == (4, 5)
+    assert np.nansum(result.included[daily]) == 721 and np.nansum(result.overage[daily]) == 0
+    assert result.included[monthly, 0] == 500 and result.overage[monthly, 0] == 220
+    assert result.included[yearly, 0] == 721 and np.isnan(result.fees[yearly, 1])
+    assert result.included[free, 0] == 720
+    assert result.cheapest() == "Free"
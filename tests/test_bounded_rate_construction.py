@@ -0,0 +1,52 @@
+import random
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Demand
+
+
+def _random_limits(rng):
+    rate = Rate(rng.randint(1, 20), f"{rng.randint(1, 10)}s")
+    quotas = [Quota(rng.randint(2, 20_000), f"{rng.choice([30, 60, 300, 3600, 86400])}s")
+              for _ in range(rng.randint(0, 4))]
+    return rate, quotas
+
+
+def _legacy_valid_quotas(rate, quotas):
+    # Validation as done before: capacity_at of a temporary BoundedRate per quota
+    valid = []
+    for q in quotas:
+        if q.consumption_unit <= rate.consumption_unit:
+            continue
+        if q.consumption_unit > rate.consumption_unit * (
+                q.consumption_period.to_milliseconds() / rate.consumption_period.to_milliseconds()):
+            continue
+        temp = object.__new__(BoundedRate)
+        temp.rate, temp.quota, temp.limits = rate, list(valid), [rate] + valid
+        if temp.capacity_at(q.consumption_period) >= q.consumption_unit:
+            valid.append(q)
+    return valid
+
+
+def test_validation_and_bulk_match_legacy(capsys):
+    rng = random.Random(7)
+    cases = [_random_limits(rng) for _ in range(300)]
+
+    bulk = BoundedRate.bulk([rate for rate, _ in cases], [quotas for _, quotas in cases])
+    for (rate, quotas), from_bulk in zip(cases, bulk):
+        expected = _legacy_valid_quotas(rate, quotas)
+        assert BoundedRate(rate, quotas).quota == expected
+        assert from_bulk.quota == expected
+        assert from_bulk.limits == [rate] + expected
+
+
+def test_copy_and_scaled_share_validated_limits():
+    br = BoundedRate(Rate(1, "2s"), [Quota(18, "60s"), Quota(48, "300s")])
+    table = br.limit_table
+    copy = br.copy()
+    assert copy.limits == br.limits and copy.limits is not br.limits
+    assert copy.limit_table is table
+
+    demand = Demand(1, "2s", quota=[Quota(18, "60s"), Quota(48, "300s")]).multiply_by(3)
+    for t in ["1s", "59s", "61s", "10min"]:
+        assert demand.bounded_rate.capacity_at(t) == 3 * br.capacity_at(t)
+    assert [q.consumption_unit for q in demand.bounded_rate.quota] == [54, 144]
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from Pricing4API.basic.billing import simulate_billing
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.calendar_windows import CalendarBoundedRate, CalendarQuota, CalendarWindows
+from Pricing4API.basic.plan_and_demand import Plan
+
+DAY = 86_400_000
+
+
+def test_calendar_boundaries_and_capacity():
+    # Aniversario el 31: el día que falta en los meses cortos pasa a ser el último
+    assert np.array_equal(CalendarWindows("2024-01-31").edges(4) / DAY, [0, 29, 60, 90])
+    # Reinicio el día 1 a medianoche en Madrid: marzo de 2024 tiene una hora menos
+    madrid = CalendarWindows("2024-02-01", reset_day=1, tz="Europe/Madrid")
+    assert np.allclose(madrid.edges(3) / 3_600_000, [0, 29 * 24, 60 * 24 - 1])
+    assert madrid.index([0, 29 * DAY, 40 * DAY]).tolist() == [0, 1, 1]
+    # Tres años de meses reales se alejan más de 15 días de 36 meses de 30 días
+    assert madrid.drift_ms(37)[-1] > 15 * DAY
+
+    plan = CalendarBoundedRate(Rate(10, "1s"), [Quota(1000, "1h"), CalendarQuota(50_000, "1month", reset_day=1),
+                                                CalendarQuota(400_000, "1year", reset_day=1)], "2024-01-15")
+    t = np.array([0, 17 * DAY - 1, 17 * DAY, 3 * 365 * DAY])
+    # La cuota mensual vuelve el 1 de febrero (día 17), no el día 30; la anual, cada 1 de enero
+    assert plan.capacity_at(t).tolist() == [10, 50_000, 50_010, 1_250_000]
+    assert plan.nominal_capacity_at(17 * DAY) == 50_000
+
+
+def test_calendar_billing_matches_request_by_request():
+    plan = Plan("Monthly", BoundedRate(Rate(10, "1s"), Quota(500, "1month")), 20, 0.002, 1, "1month")
+    t = np.sort(np.random.default_rng(0).uniform(0, 3 * 365 * DAY, 30_000))
+    result = simulate_billing([plan], t, origin=0, start="2024-01-01T00:00:00+00:00", reset_day=1)
+
+    origin = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    resets = np.array([(datetime(2024 + k // 12, k % 12 + 1, 1, tzinfo=timezone.utc).timestamp() - origin) * 1000
+                       for k in range(40)])
+    month = np.searchsorted(resets, t, side="right") - 1
+    used = np.arange(len(t)) - np.searchsorted(month, month)
+    included = np.bincount(month[used < 500], minlength=36)
+
+    assert result.fees.shape == (1, 36)
+    assert np.array_equal(result.included[0], included)
+    assert np.array_equal(result.included[0] + result.overage[0], np.bincount(month))
+    assert np.array_equal(result.starts_ms[0], resets[:36])
+    # Con meses de 30 días saldrían 37 ciclos
+    assert simulate_billing([plan], t, origin=0).fees.shape == (1, 37)
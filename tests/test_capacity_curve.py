@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_curve import CapacityCurve
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, capacity_jumps
+from Pricing4API.basic.plan_and_demand import Demand, Plan
+
+
+def test_curve_matches_limit_table():
+    rng = np.random.default_rng(0)
+    bounded_rates = [
+        BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")]),
+        BoundedRate(Rate(7, "1013ms"), Quota(50, "13s")),
+        BoundedRate(Rate(5, "1s")),
+    ]
+    for br in bounded_rates:
+        values, periods = br.limit_table
+        curve = br.capacity_curve()
+        top = periods[-1]
+
+        t = np.concatenate((np.arange(20) * top, rng.uniform(0, 40 * top, 5000)))
+        assert np.array_equal(curve.at_many(t), capacity_at_ms(values, periods, t))
+
+        jump_t, jump_c = capacity_jumps(values, periods, 9.5 * top)
+        start = 2.3 * top
+        steps_t, steps_c = curve[start:9.5 * top]
+        inside = jump_t > start
+        assert steps_t[0] == start and steps_c[0] == curve.at(start)
+        assert np.allclose(steps_t[1:], jump_t[inside]) and np.array_equal(steps_c[1:], jump_c[inside])
+
+        goals = rng.integers(1, int(jump_c[-1]), 300)
+        reached = curve.inverse(goals)
+        assert np.all(curve.at_many(reached) >= goals)
+        assert np.all(curve.at_many(reached - 1e-6) < goals)
+
+        copy = CapacityCurve.from_dict(json.loads(json.dumps(curve.to_dict())))
+        assert np.array_equal(copy.at_many(t), curve.at_many(t))
+
+
+def test_curve_in_feasibility_checks(capsys):
+    plan = Plan("P", BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")]), 1, 1, 1, "1month")
+    demand = Demand(2, "1s", "2min")
+    curve = demand.bounded_rate.capacity_curve()
+
+    assert curve.active_ms == 120_000
+    assert curve.at(10 ** 9) == curve.at(120_000) == 242
+    assert curve.inverse(243) == np.inf
+
+    plan.has_enough_capacity_for_constant_rate(demand)
+    from_demand = capsys.readouterr().out
+    plan.has_enough_capacity_for_constant_rate(curve, TimeDuration(2, TimeUnit.MINUTE))
+    assert capsys.readouterr().out == from_demand
+    assert from_demand.startswith("No: at t=0.50min, plan=60.0, demand=62.0")
+
+
+def test_downsampled_curve_keeps_the_envelope():
+    br = BoundedRate(Rate(10, "1s"), [Quota(100, "1min"), Quota(20_000, "1day")])
+    curve = br.capacity_curve()
+
+    # Pocos saltos: exactamente los de breakpoints, más el punto final
+    t, c = curve.downsampled(0, 30_000, max_points=100)
+    assert np.array_equal(t[:-1], curve.breakpoints(0, 30_000)[0]) and t[-1] == 30_000
+    assert np.array_equal(c[:-1], curve.at_many(t[:-1])) and c[-1] == c[-2]
+
+    year = 365 * 86_400_000
+    rng = np.random.default_rng(1)
+    sample = rng.uniform(0, year, 100_000)
+    for instantaneous in (False, True):
+        t, c = curve.downsampled(0, year, max_points=1000, instantaneous=instantaneous)
+        assert len(t) == 1001 and t[0] == 0 and t[-1] == year
+        exact = curve.at_many(sample % curve.period_ms if instantaneous else sample)
+        bucket = np.minimum((sample / (year / 500)).astype(int), 499)
+        assert np.all(c[2 * bucket] <= exact) and np.all(exact <= c[2 * bucket + 1])
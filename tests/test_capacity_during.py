@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def _ms(t):
+    return TimeDuration(float(t), TimeUnit.MILLISECOND)
+
+
+def test_capacity_during_many_matches_capacity_during():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 600_000, 300).round()
+    ends = starts + rng.uniform(1, 200_000, 300).round()
+
+    for limits in (Rate(7, "1013ms"), BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")])):
+        expected = [limits.capacity_during(_ms(e), _ms(s)) for s, e in zip(starts, ends)]
+        assert np.array_equal(limits.capacity_during_many(starts, ends), expected)
+
+
+def test_capacity_during_many_honors_max_active_time():
+    br = BoundedRate(Rate(3, "1s"), Quota(20, "10s"), max_active_time=TimeDuration(25, TimeUnit.SECOND))
+    during = br.capacity_during_many([0, 20_000, 30_000], [10_000, 40_000, 90_000])
+    assert during.tolist() == [br.capacity_during("10s"), br.capacity_at("25s") - br.capacity_at("20s"), 0]
+
+    with pytest.raises(ValueError):
+        br.capacity_during_many([5_000], [5_000])
@@ -0,0 +1,34 @@
+import numpy as np
+
+from Pricing4API.ancillary.compiled_catalog import CompiledCatalog, compile_catalog
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Plan
+
+PLAN_DBLP = Plan("DBLP", BoundedRate(Rate(1, "2s"), [Quota(18, "60s"), Quota(48, "300s")]),
+                 cost=0.0, overage_cost=None, max_number_of_subscriptions=1, billing_period="1month")
+PLAN_PRO = Plan("Pro", BoundedRate(Rate(10, "1s"), Quota(40000, "1month")),
+                cost=9.95, overage_cost=0.001, max_number_of_subscriptions=1, billing_period="1month")
+
+
+def test_compiled_capacity_matches_bounded_rate(tmp_path):
+    path = tmp_path / "catalog.bin"
+    compile_catalog([PLAN_DBLP, PLAN_PRO], path)
+    catalog = CompiledCatalog(path)
+
+    assert catalog.names == ["DBLP", "Pro"]
+    ts = np.arange(0, 3_600_000, 1_337.0)
+    capacities = catalog.capacity_at(ts)
+    for row, plan in enumerate([PLAN_DBLP, PLAN_PRO]):
+        expected = [plan.bounded_rate.capacity_at(TimeDuration(t, TimeUnit.MILLISECOND)) for t in ts]
+        assert np.array_equal(capacities[row], expected)
+
+
+def test_compiled_cost(tmp_path):
+    path = tmp_path / "catalog.bin"
+    compile_catalog([PLAN_DBLP, PLAN_PRO], path)
+    catalog = CompiledCatalog(path)
+
+    costs = catalog.cost_of([10_000, 50_000])
+    assert np.allclose(costs[1], [9.95, 9.95 + 10_000 * 0.001])
+    assert np.allclose(costs[0], [0.0, 0.0])
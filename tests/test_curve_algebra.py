@@ -0,0 +1,47 @@
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_curve import StepCurve
+from Pricing4API.basic.plan_and_demand import Plan
+from Pricing4API.basic.pricing import Pricing
+
+
+def test_operations_match_pointwise_evaluation():
+    a = BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")]).capacity_curve()
+    b = BoundedRate(Rate(7, "1013ms"), Quota(50, "13s")).capacity_curve()
+    end = 400_000.0
+    f, g = a.steps(end), b.steps(end).shift(2500)
+
+    t = np.concatenate((np.linspace(0, end - 1, 20_001), f.times_ms, g.times_ms[g.times_ms < end]))
+    fa, gb = a.at_many(t), np.where(t < 2500, 0, b.at_many(t - 2500))
+    cases = {
+        "sum": (f + g, fa + gb),
+        "difference": (g - f, gb - fa),
+        "scaled": (3 * f - g * 0.5, 3 * fa - 0.5 * gb),
+        "min": (f.minimum(g), np.minimum(fa, gb)),
+        "max": (f.maximum(g).maximum(100), np.maximum(np.maximum(fa, gb), 100)),
+    }
+    for name, (curve, expected) in cases.items():
+        assert np.array_equal(curve.at_many(t), expected), name
+        assert np.all(np.diff(curve.times_ms) > 0) and np.all(np.diff(curve.values) != 0), name
+
+    excess = g - f
+    first = excess.first_above(0)
+    assert first == t[np.flatnonzero(gb > fa)].min()
+    assert excess.max() == np.max(gb - fa)
+
+
+def test_combined_subscriptions():
+    basic = Plan("Basic", BoundedRate(Rate(2, "1s"), Quota(50, "1min")), 10, 0.1, 5, "1month")
+    pro = Plan("Pro", BoundedRate(Rate(5, "1s"), Quota(200, "1min")), 30, 0.05, 3, "1month")
+
+    periodic = basic.capacity_curve(4) + pro.capacity_curve(2)
+    t = np.random.default_rng(0).uniform(0, 3_600_000, 10_000)
+    expected = 4 * basic.capacity_curve().at_many(t) + 2 * pro.capacity_curve().at_many(t)
+    assert np.array_equal(periodic.at_many(t), expected)
+
+    pricing = Pricing([basic, pro])
+    combined = pricing.combined_capacity([4, 2], "1h")
+    expected = 4 * basic.capacity_curve().at_many(t) + 2 * pro.capacity_curve().at_many(t)
+    assert isinstance(combined, StepCurve)
+    assert np.array_equal(combined.at_many(t), expected)
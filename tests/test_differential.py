@@ -0,0 +1,40 @@
+import numpy as np
+
+from Pricing4API.ancillary.differential import (IMPLEMENTATIONS, Counterexample, implementation, reference_capacity,
+                                                reference_min_time, run, shrink)
+
+
+def test_fast_paths_agree_with_the_oracle():
+    report = run(300, seed=3, implementations=["basic", "capacity_at_ms", "capacity_at_scalar", "curve"])
+    assert report.ok, report.table()
+    assert report.checks["curve", "min_time"] == 300 and report.checks["basic", "thresholds"] == 300
+
+    # El oráculo por bisección coincide con la definición en los saltos de la curva
+    values, periods = [3, 20, 60], [1000, 10_000, 60_000]
+    reached = reference_min_time(values, periods, np.arange(1, 200))
+    assert np.all(reference_capacity(values, periods, reached) >= np.arange(1, 200))
+    assert np.all(reference_capacity(values, periods, reached - 1) < np.arange(1, 200))
+
+
+def test_disagreements_are_found_and_minimized():
+    # main.Plan.min_time reparte la rate uniformemente dentro de su periodo, en lugar de al inicio
+    report = run(100, seed=0, implementations=["main"], properties=["min_time"])
+    assert report.failures["main", "min_time"] > 0
+    example = report.counterexamples["main", "min_time"]
+    assert (example.values, example.periods, example.input) == ([2], [2], 2)
+    assert (example.expected, example.got) == (0.0, 1.0)
+
+    @implementation("off_by_one", "capacity")
+    def _off_by_one(values, periods, t_ms):
+        c = reference_capacity(values, periods, t_ms).astype(np.float64)
+        return np.where(t_ms >= 5000, c + 1, c)
+
+    try:
+        report = run(50, seed=1, implementations=["off_by_one"], properties=["capacity"], minimize=False)
+        big = report.counterexamples["off_by_one", "capacity"]
+        small = shrink(_off_by_one, Counterexample("off_by_one", "capacity", [5, 40, 600], [1000, 10_000, 120_000],
+                                                    70_000, 0.0, 0.0))
+        assert big.input >= 5000
+        assert (small.values, small.periods, small.input) == ([1], [1], 5000)
+    finally:
+        del IMPLEMENTATIONS["capacity"]["off_by_one"]
@@ -0,0 +1,43 @@
+import base64
+import json
+
+import numpy as np
+
+from Pricing4API.ancillary.CapacityPlotHelper import WEBGL_MIN_POINTS, CapacityPlotHelper
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def _decode(spec):
+    a = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=np.dtype(spec["dtype"]).newbyteorder("<"))
+    return a.reshape([int(n) for n in spec["shape"].split(",")]) if "shape" in spec else a
+
+
+def test_webgl_above_threshold():
+    small = CapacityPlotHelper.line_trace(np.arange(WEBGL_MIN_POINTS), np.zeros(WEBGL_MIN_POINTS))
+    large = CapacityPlotHelper.line_trace(np.arange(WEBGL_MIN_POINTS + 1), np.zeros(WEBGL_MIN_POINTS + 1))
+    assert small.type == "scatter" and large.type == "scattergl"
+    assert CapacityPlotHelper.line_trace([0, 1], [0, 1], webgl=True).type == "scattergl"
+
+    br = BoundedRate(Rate(1, "1ms"), Quota(1000, "1s"))
+    assert br.show_available_capacity_curve("1s", return_fig=True).data[0].type == "scatter"
+    fig = br.show_available_capacity_curve("1min", return_fig=True)
+    assert fig.data[0].type == "scattergl"
+    debug = br.show_available_capacity_curve("1min", debug=True)
+    assert np.array_equal(fig.data[0].y, [c for _, c in debug])
+
+
+def test_typed_array_json_is_lossless_and_smaller():
+    br = BoundedRate(Rate(7, "1013ms"), [Quota(50, "13s"), Quota(120, "1min")])
+    fig = br.show_available_capacity_curve("2h", return_fig=True)
+    t, c = fig.data[0].x, fig.data[0].y
+
+    payload = json.loads(CapacityPlotHelper.figure_json(fig))
+    x, y = payload["data"][0]["x"], payload["data"][0]["y"]
+    # ~14400 peticiones en 2h: las capacidades viajan como int16; las horas fraccionarias, como float64
+    assert y["dtype"] == "i2" and x["dtype"] == "f8" and np.array_equal(_decode(y), c)
+    assert np.array_equal(_decode(x), t)
+    assert payload["layout"]["title"]["text"] == fig.layout.title.text
+
+    assert len(CapacityPlotHelper.figure_json(fig)) < len(json.dumps({"x": list(t), "y": list(c)}))
+    assert CapacityPlotHelper.typed_array([1.5, 2.0]) == [1.5, 2.0]
+    assert _decode(CapacityPlotHelper.typed_array(np.arange(40.0).reshape(2, 20))).shape == (2, 20)
@@ -0,0 +1,20 @@
+import warnings
+
+from benchmarks.bench_import_time import measure_core_import
+
+# Orientativo: localmente son unos pocos ms, pero en máquinas de CI cargadas puede pasarse
+IMPORT_BUDGET_MS = 50
+# Solo por encima de esto se da por hecho que algo pesado se importa al cargar el núcleo
+IMPORT_LIMIT_MS = 2000
+
+
+def test_core_model_does_not_import_heavy_stacks():
+    result = measure_core_import(repeat=1)
+    assert result["loaded"] == []
+
+
+def test_core_model_import_time():
+    elapsed_ms = measure_core_import(repeat=3)["elapsed_ms"]
+    if elapsed_ms > IMPORT_BUDGET_MS:
+        warnings.warn(f"Core model import took {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    assert elapsed_ms < IMPORT_LIMIT_MS
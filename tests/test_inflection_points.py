@@ -0,0 +1,57 @@
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+
+
+def _window_by_window(br, sim_ms):
+    # Reference: the former per-window loop, sorted by (t, capacity) before pruning
+    def capacity(t):
+        return float(br.capacity_at(TimeDuration(t, TimeUnit.MILLISECOND)))
+
+    thresholds = br.quota_exhaustion_threshold(display=False)
+    thresholds = thresholds if isinstance(thresholds, list) else [thresholds]
+    points = {(0.0, capacity(0)), (sim_ms, capacity(sim_ms))}
+    for quota, t_ast in zip(br.limits[1:], thresholds):
+        period = int(quota.consumption_period.to_milliseconds())
+        t_ast = 0 if isinstance(t_ast, str) else int(t_ast.to_milliseconds())
+        for start in range(0, sim_ms, period):
+            exhausted = min(start + t_ast, sim_ms)
+            points |= {(start, capacity(start)), (exhausted, capacity(exhausted)),
+                       (min(start + period, sim_ms), capacity(exhausted))}
+    points = sorted(points)
+    return [points[0]] + [b for a, b, c in zip(points, points[1:], points[2:])
+                          if not a[1] == b[1] == c[1]] + [points[-1]]
+
+
+def test_inflection_points_match_window_by_window():
+    bounded_rates = [
+        BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")]),
+        BoundedRate(Rate(2, "1s"), [Quota(5, "4s"), Quota(7, "12s")]),
+        BoundedRate(Rate(3, "1s"), Quota(20, "7500ms")),
+    ]
+    for br in bounded_rates:
+        top = int(br.limits[-1].consumption_period.to_milliseconds())
+        for sim_ms in (500, 3 * top + 400, 4 * top, 9 * top + 1234):
+            expected = _window_by_window(br, sim_ms)
+            t_ms, capacity = br.inflection_points(TimeDuration(sim_ms, TimeUnit.MILLISECOND))
+            assert list(zip(t_ms.tolist(), capacity.tolist())) == expected
+            assert br.calculate_inflection_points(TimeDuration(sim_ms, TimeUnit.MILLISECOND)) == expected
+
+
+def test_inflection_points_long_horizon():
+    br = BoundedRate(Rate(10, "1s"), [Quota(300, "1min"), Quota(100_000, "1day")])
+    t_ms, capacity = br.inflection_points("1825day")
+
+    assert t_ms[0] == 0 and t_ms[-1] == 1825 * 86_400_000
+    assert np.all(np.diff(t_ms) >= 0) and np.all(np.diff(capacity) >= 0)
+    assert capacity[-1] == br.capacity_at("1825day")
+
+    # Repeating days are shifted copies of one evaluated directly
+    short_t, short_capacity = br.inflection_points("3day")
+    day = 86_400_000
+    reference = (short_t >= day) & (short_t < 2 * day)
+    for shift in (0, 1000):
+        window = (t_ms >= (shift + 1) * day) & (t_ms < (shift + 2) * day)
+        assert np.array_equal(t_ms[window] - shift * day, short_t[reference])
+        assert np.array_equal(capacity[window] - shift * 100_000, short_capacity[reference])
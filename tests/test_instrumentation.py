@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import Pricing4API.basic.bounded_rate as bounded_rate
+import Pricing4API.basic.capacity_kernels as capacity_kernels
+from Pricing4API.ancillary.instrumentation import Profiler, is_enabled
+from Pricing4API.ancillary.limit import Limit
+from Pricing4API.ancillary.time_unit import TimeDuration, TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.main.plan import Plan
+
+
+def test_disabled_leaves_the_original_functions():
+    originals = (BoundedRate.capacity_at, capacity_kernels.capacity_at_ms, bounded_rate.parse_time_string_to_duration)
+    br = BoundedRate(Rate(10, "1s"), [Quota(300, "1min"), Quota(10_000, "1day")])
+
+    with Profiler() as prof:
+        assert is_enabled()
+        assert BoundedRate.capacity_at is not originals[0]
+        expected = br.capacity_at("2day")
+        br.calculate_inflection_points("1h")
+
+    assert not is_enabled()
+    assert (BoundedRate.capacity_at, capacity_kernels.capacity_at_ms,
+            bounded_rate.parse_time_string_to_duration) == originals
+    assert br.capacity_at("2day") == expected
+    assert prof.profile["bounded_rate.BoundedRate.capacity_at"]["calls"] == 1
+    assert prof.profile["capacity_kernels.inflection_points"]["calls"] == 1
+    assert prof.profile["utils.parse_time_string_to_duration"]["calls"] >= 2
+
+
+def test_recursion_is_timed_once(tmp_path):
+    plan = Plan("Basic", (10, TimeDuration(1, TimeUnit.MONTH)), 0.01,
+                Limit(1, TimeDuration(1, TimeUnit.SECOND)), [Limit(100, TimeDuration(1, TimeUnit.HOUR))])
+
+    with Profiler() as prof:
+        for t in range(50):
+            plan.capacity(TimeDuration(t * 1000, TimeUnit.MILLISECOND))
+
+    # capacity -> available_capacity(nivel 1) -> available_capacity(nivel 0)
+    capacity, available = prof.profile["plan.Plan.capacity"], prof.profile["plan.Plan.available_capacity"]
+    assert capacity["calls"] == 50 and available["calls"] == 100
+    assert available["total_s"] <= capacity["total_s"] <= prof.profile.wall_s
+    assert json.loads(prof.to_json(str(tmp_path / "p.json")))["functions"][0]["function"] == "plan.Plan.capacity"
+
+    # Activado por variable de entorno: el JSON se escribe al salir
+    out = tmp_path / "env.json"
+    code = "from Pricing4API.basic.bounded_rate import *; BoundedRate(Rate(1, '1s'), Quota(100, '1h')).capacity_at('1day')"
+    subprocess.run([sys.executable, "-c", code], check=True, env={**os.environ, "PRICING4API_PROFILE": str(out)})
+    names = [row["function"] for row in json.loads(out.read_text())["functions"]]
+    assert "bounded_rate.BoundedRate.capacity_at" in names
@@ -0,0 +1,37 @@
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms, limit_table
+from Pricing4API.basic.key_pool import KeyPool
+from Pricing4API.basic.plan_and_demand import Plan
+
+
+def test_burst_gets_the_capacity_of_every_key():
+    keys = [BoundedRate(Rate(10, "1s"), Quota(100, "1min")), BoundedRate(Rate(5, "1s"), Quota(1000, "1h"))]
+    pool = KeyPool(keys)
+    key, send = pool.dispatch_many(np.zeros(2000))
+
+    # Cada petición sale en cuanto alguna clave tiene sitio: lo enviado hasta t es la suma de capacidades
+    t = np.linspace(0, 4_000_000, 500)
+    capacity = sum(capacity_at_ms(*limit_table(k.limits), t) for k in keys)
+    assert np.array_equal(np.searchsorted(send, t, side="right"), np.minimum(2000, capacity))
+    assert pool.dispatched.tolist() == [1000, 1000] and np.all(np.diff(send) >= 0)
+
+    # Petición a petición sale lo mismo que por tramos
+    single = KeyPool(keys)
+    assert [single.dispatch(0.0) for _ in range(300)] == list(zip(key[:300].tolist(), send[:300].tolist()))
+
+
+def test_pool_of_subscriptions_respects_every_key():
+    small = Plan("Small", BoundedRate(Rate(2, "1s"), Quota(30, "1min")), 10, None, 3, "1month")
+    large = Plan("Large", BoundedRate(Rate(20, "1s"), Quota(200, "1min")), 50, None, 1, "1month")
+    pool = KeyPool.from_subscriptions([small, large], [2, 1])
+    assert pool.names == ["Small#1", "Small#2", "Large#1"]
+
+    arrivals = np.sort(np.random.default_rng(0).uniform(0, 600_000, 5_000))
+    key, send = pool.dispatch_many(arrivals)
+    assert np.all(send >= arrivals) and np.all(np.diff(send) >= 0)
+    for k, plan in enumerate([small, small, large]):
+        values, periods = limit_table(plan.bounded_rate.limits)
+        for value, period in zip(values, periods):
+            assert np.bincount((send[key == k] // period).astype(np.int64)).max() <= value
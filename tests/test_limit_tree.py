@@ -0,0 +1,61 @@
+import numpy as np
+
+from Pricing4API.ancillary.plans_yaml import load_limit_tree
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_at_ms
+from Pricing4API.basic.limit_tree import LimitTree
+
+YAML = """
+name: Search API
+limits:
+  unitary_rate:
+    period: {value: 100, unit: millisecond}
+  quotas:
+    /*:
+      all:
+        - {max: 1000, period: {value: 1, unit: hour}}
+    /search:
+      all:
+        - {max: 60, period: {value: 1, unit: minute}}
+      GET:
+        - {max: 30, period: {value: 1, unit: minute}}
+    /items:
+      all:
+        - {max: 5, period: {value: 1, unit: second}}
+"""
+
+
+def test_yaml_tree_paths_and_capacity():
+    tree = load_limit_tree(YAML)
+    assert tree.targets == ["/items", "GET /search"]
+    assert tree.path("GET /search") == ["/*", "/search", "GET /search"]
+    assert tree.resolve("/search", "post") == "/search" and tree.resolve("/items/42", "get") == "/items"
+    assert tree.resolve("/health") == "/*"
+
+    # La capacidad de un camino es la de todos sus límites juntos, calculada para todos los destinos a la vez
+    t = np.arange(0, 3 * 3600_000, 997.0)
+    capacities = tree.capacity_at(t)
+    for target, capacity in zip(tree.targets, capacities):
+        values, periods = tree.path_table(target)
+        assert np.array_equal(capacity, capacity_at_ms(values, periods, t))
+        assert tree.route(7200_000, [target])[target] == capacity_at_ms(values, periods, 7200_000)
+    values, periods = tree.path_table("GET /search")
+    assert values[periods == 60_000] == 30 and capacities[1, -1] <= 3 * 1000 + 1
+
+
+def test_admission_and_routing_share_the_global_limits():
+    tree = LimitTree([Rate(1, "1s")])
+    tree.add("/report", [Quota(100, "1h")])
+    tree.add("/search", [Quota(10, "1min")])
+
+    # La cuota por minuto caduca antes: se gasta primero y la horaria rellena el resto
+    routed = tree.route(3600_000 - 1)
+    assert routed == {"/report": 100, "/search": 600}
+
+    admission = tree.admission()
+    results = [admission.admit("/search", t) for t in np.arange(0, 60_000, 500.0)]
+    assert sum(results) == 10 and admission.rejected == len(results) - 10
+    assert admission.room("/report", 59_999) == 1 and admission.room("/search", 59_999) == 0
+    assert admission.admit("/report", 60_000) and not admission.admit("/search", 60_000)
+    assert admission.room("/search", 60_500) == 0  # el rate global ya se usó en este segundo
+    assert admission.room("/search", 61_000) == 1
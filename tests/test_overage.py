@@ -0,0 +1,58 @@
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.plan_and_demand import Plan
+from Pricing4API.basic.pricing import Pricing
+
+
+def _plans():
+    return [
+        Plan("Pro", BoundedRate(Rate(10, "1s"), Quota(40000, "1month")), 9.95, 0.001, 1, "1month"),
+        Plan("Ultra", BoundedRate(Rate(10, "1s"), Quota(100000, "1month")), 79.95, 0.00085, 1, "1month"),
+        Plan("Free", BoundedRate(Rate(1, "1s")), 0, None, 1, "1month"),
+    ]
+
+
+def test_pricing_leaves_plans_untouched():
+    plans = _plans()
+    before = [list(plan.bounded_rate.limits) for plan in plans]
+    pricing = Pricing(plans)
+
+    assert [plan.bounded_rate.limits for plan in plans] == before
+    assert [plan.max_included_quota for plan in plans] == [40000, 100000, None]
+
+    pro, ultra, free = pricing.overage_models
+    assert pro.overage_cap == 4 * 100000 and ultra.overage_cap == 6 * 100000
+    assert pro.bounded_rate.limits[-1].consumption_unit == 400000
+    assert free.bounded_rate is plans[2].bounded_rate
+
+    quotes = pricing.quote(np.array([0, 40000, 250000]))
+    assert np.allclose(quotes[0], [9.95, 9.95, 9.95 + 210000 * 0.001])
+    assert np.allclose(quotes[1], [79.95, 79.95, 79.95 + 150000 * 0.00085])
+    assert np.allclose(quotes[2], 0)
+
+
+def test_usage_over_billing_cycles():
+    pro = Pricing(_plans()).overage_models[0]
+    month = pro.quota_period_ms
+    rng = np.random.default_rng(0)
+    t = np.sort(rng.uniform(0, 5 * month, 2000))
+    requests = np.cumsum(rng.integers(0, 150, len(t))).astype(float)
+
+    included, overage, cost = pro.usage(t, requests)
+
+    # Reference: one sample at a time, the quota starting again every month
+    window, used, total_included = -1, 0.0, 0.0
+    expected, previous = [], 0.0
+    for ti, n in zip(t, requests):
+        if ti // month != window:
+            window, used = ti // month, 0.0
+        new = n - previous
+        previous = n
+        taken = min(new, 40000 - used)
+        used += taken
+        total_included += taken
+        expected.append(total_included)
+    assert np.allclose(included, expected)
+    assert np.allclose(overage, requests - included)
+    assert np.allclose(cost, (t // month + 1) * 9.95 + overage * 0.001)
@@ -0,0 +1,42 @@
+import os
+
+import yaml
+
+from Pricing4API.ancillary.pricing_catalog import load_catalog, load_catalog_file
+from Pricing4API.ancillary.yaml_serialization import PricingYamlHandler
+
+DBLP_YAML = os.path.join(os.path.dirname(__file__), "..", "new_notebooks", "yaml", "plan_dblp.yaml")
+
+
+def test_catalog_matches_yaml_constructor():
+    PricingYamlHandler.load()
+    with open(DBLP_YAML) as f:
+        pricing = yaml.safe_load(f)
+
+    catalog = load_catalog_file(DBLP_YAML)
+    plan = catalog.plan("Free DBLP")
+    expected = pricing.plans[0]
+
+    assert catalog.name == pricing.name
+    assert catalog.billing_object == pricing.billing_object
+    assert [l.to_tuple for l in plan.limits] == [l.to_tuple for l in expected.limits]
+    assert plan.overage_cost == expected.overage_cost
+
+
+def test_catalog_cache_hit(tmp_path):
+    with open(DBLP_YAML) as f:
+        text = f.read()
+
+    cold = load_catalog(text, cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    warm = load_catalog(text, cache_dir=str(tmp_path))
+    assert warm.specs == cold.specs
+    assert [p.name for p in warm.pricing.plans] == ["Free DBLP"]
+
+    # Una entrada corrupta (o plantada) en el directorio de caché se trata como un fallo de caché
+    (entry,) = os.listdir(tmp_path)
+    with open(tmp_path / entry, "w") as f:
+        f.write('["name", "object", [["truncated"')
+    reparsed = load_catalog(text, cache_dir=str(tmp_path))
+    assert reparsed.specs == cold.specs
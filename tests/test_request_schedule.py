@@ -0,0 +1,87 @@
+from collections import deque
+
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.capacity_kernels import capacity_jumps
+from Pricing4API.basic.plan_and_demand import Demand, Plan
+from Pricing4API.basic.request_schedule import RequestSchedule, schedule_backlog
+
+
+def _request_by_request(plan, demand, horizon_ms):
+    # Reference: FIFO served bin by bin, one fixed-window counter per quota
+    values, periods = plan.limit_table
+    times, totals = capacity_jumps(*demand.limit_table, np.nextafter(horizon_ms, np.inf))
+    arrivals = np.repeat(times, np.diff(totals, prepend=0).astype(int))
+    used, queue, delayed, max_backlog = {}, deque(), [], 0
+    i, b = 0, 0
+    while i < len(arrivals) or queue:
+        start = b * periods[0]
+        while i < len(arrivals) and arrivals[i] < start:
+            queue.append(i + 1)
+            i += 1
+        windows = [(k, start // periods[k]) for k in range(1, len(values))]
+        room = min([values[0]] + [values[k] - used.get((k, w), 0) for k, w in windows])
+        max_backlog = max(max_backlog, len(queue))
+        sent = 0
+        while queue and sent < room:
+            delayed.append((queue.popleft(), start))
+            sent += 1
+        while i < len(arrivals) and arrivals[i] < start + periods[0]:
+            if sent < room and not queue:
+                sent += 1
+            else:
+                queue.append(i + 1)
+            i += 1
+        max_backlog = max(max_backlog, len(queue))
+        for window in windows:
+            used[window] = used.get(window, 0) + sent
+        b += 1
+    return delayed, max_backlog
+
+
+def test_schedule_respects_every_quota():
+    cases = [
+        (BoundedRate(Rate(2, "1s"), [Quota(30, "20s"), Quota(100, "100s")]), BoundedRate(Rate(5, "2s")), 300_000),
+        (BoundedRate(Rate(3, "1s"), Quota(50, "1min")), BoundedRate(Rate(100, "1min"), Quota(120, "10min")), 1_200_000),
+        # The queue outlives the demand and waits for several quota resets
+        (BoundedRate(Rate(4, "1s"), [Quota(30, "1min"), Quota(70, "5min")]), BoundedRate(Rate(5, "1s")), 40_000),
+    ]
+    for plan, demand, horizon_ms in cases:
+        schedule, max_backlog = schedule_backlog(plan, demand, horizon_ms)
+        expected, expected_backlog = _request_by_request(plan, demand, horizon_ms)
+        assert np.array_equal(schedule.ids, [pid for pid, _ in expected])
+        assert np.allclose(schedule.send_times_ms, [t for _, t in expected])
+        assert max_backlog == expected_backlog
+
+
+def test_has_enough_capacity_returns_arrays(tmp_path):
+    plan = Plan("Test", BoundedRate(Rate(100, "1s"), Quota(200_000, "1h")), 1, 1, 1, "1month")
+    analysis = plan.has_enough_capacity(Demand(6000, "1min", "40min"))
+
+    scheduled = analysis["scheduled_requests"]
+    assert isinstance(scheduled, RequestSchedule)
+    assert analysis["can_cover"] and analysis["max_backlog"] > 0
+    assert np.all(np.diff(scheduled.send_times_ms) >= 0)
+    assert analysis["drain_time"] == scheduled.send_times[-1]
+    # The hourly quota pushes part of the backlog to the second hour
+    assert scheduled.send_times_ms[-1] > 3_600_000
+
+    rows = iter(scheduled)
+    assert next(rows) == scheduled[0]
+    scheduled.to_csv(tmp_path / "schedule.csv")
+    exported = np.loadtxt(tmp_path / "schedule.csv", delimiter=",", skiprows=1)
+    assert np.array_equal(exported[:, 0], scheduled.ids)
+    assert np.allclose(exported[:, 1], scheduled.send_times)
+
+
+def test_drain_skips_exhausted_quota_windows():
+    plan = Plan("Monthly", BoundedRate(Rate(10, "1s"), Quota(1000, "1month")), 1, 1, 1, "1month")
+    scheduled = plan.has_enough_capacity(Demand(5, "1s", "10min"))["scheduled_requests"]
+
+    month_ms = BoundedRate(Rate(1, "1month")).limit_table[1][0]
+    # 1000 requests per month: the rest wait for the start of the following months
+    assert len(scheduled) == 3005 - 1000
+    third = scheduled.send_times_ms[(scheduled.ids > 2000) & (scheduled.ids <= 3000)]
+    assert third[0] == 2 * month_ms and third[-1] == 2 * month_ms + 99_000
+    assert np.all(scheduled.send_times_ms[scheduled.ids > 3000] == 3 * month_ms)
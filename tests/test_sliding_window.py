@@ -0,0 +1,43 @@
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import Quota, Rate
+from Pricing4API.basic.sliding_window import SlidingBoundedRate, SlidingQuota, window_capacity_jumps
+
+
+def test_capacity_and_worst_case_by_window():
+    rate = Rate(1, "1s")
+    fixed = SlidingBoundedRate(rate, Quota(10, "1min"))
+    rolling = SlidingBoundedRate(rate, SlidingQuota(10, "1min"))
+    sliding = SlidingBoundedRate(rate, SlidingQuota(10, "1min", window="sliding"))
+
+    # Desde un historial vacío la ráfaga voraz es la misma con ventanas fijas y con rolling log
+    assert fixed.capacity_at("3min") == rolling.capacity_at("3min") == 31
+    times, _ = sliding.capacity_jumps("75s")
+    assert np.allclose(times[10:] / 1000, [66, 72])
+
+    # Con ventanas fijas caben dos cuotas seguidas alrededor de un límite; con rolling log nunca
+    assert fixed.worst_case_burst("20s") == {"fixed": 20.0, "rolling": 10.0}
+
+    # La forma cerrada coincide con la simulación de la ráfaga voraz
+    limits = [Rate(1, "1s"), SlidingQuota(10, "1min"), SlidingQuota(100, "1h")]
+    closed, simulated = window_capacity_jumps(limits, 8e6), window_capacity_jumps(limits, 8e6, simulate=True)
+    assert all(np.array_equal(a, b) for a, b in zip(closed, simulated))
+
+
+def test_admission_is_exact_or_conservative():
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, 600_000, 5_000))
+    plan = SlidingBoundedRate(Rate(20, "1s"), SlidingQuota(500, "1min"))
+    exact, bucketed = plan.admission(), plan.admission(max_log=100, buckets=60)
+
+    log = []
+    for t in times:
+        if exact.admit(t):
+            log.append(t)
+        bucketed.admit(t)
+    log = np.array(log)
+    # Nunca más de 500 en ningún (t - 1min, t], y las cubetas no admiten más que el log exacto
+    in_window = np.searchsorted(log, log, side="right") - np.searchsorted(log, log - 60_000, side="right")
+    assert in_window.max() == 500
+    assert 0 < bucketed.admitted <= exact.admitted
+    assert exact.admitted + exact.rejected == times.size
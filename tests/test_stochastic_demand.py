@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.stochastic_demand import (OnOffDemand, PoissonDemand, StochasticDemand,
+                                                 _simulate_batch, simulate_demand)
+
+
+class _FixedArrivals(StochasticDemand):
+    def __init__(self, counts):
+        self.counts = counts
+
+    def init_state(self, rng, n_trials):
+        return 0
+
+    def sample(self, rng, state, start_ms, bin_ms, n_bins):
+        return self.counts[:, state:state + n_bins], state + n_bins
+
+    def mean_rate_at(self, t_ms):
+        return np.full(np.shape(t_ms), self.counts.mean())
+
+
+def _request_by_request(values, periods, counts, policy):
+    # Reference: one fixed-window counter per quota, bin after bin
+    results = []
+    for row in counts:
+        used, backlog, served, max_backlog, exhaustion = {}, 0, 0, 0, np.inf
+        for b, arrivals in enumerate(row):
+            t = b * periods[0]
+            wanted = arrivals + backlog
+            windows = [(i, t // periods[i]) for i in range(1, len(values))]
+            admitted = min([wanted, values[0]] + [values[i] - used.get(w, 0) for i, w in enumerate(windows, 1)])
+            for i, w in enumerate(windows, 1):
+                used[w] = used.get(w, 0) + admitted
+                if used[w] >= values[i] and exhaustion == np.inf:
+                    exhaustion = t
+            served += admitted
+            backlog = wanted - admitted if policy == "queue" else 0
+            max_backlog = max(max_backlog, backlog)
+        results.append((row.sum(), served, max_backlog, exhaustion))
+    return results
+
+
+def test_batch_matches_request_by_request():
+    rng = np.random.default_rng(0)
+    values, periods = np.array([2.0, 30.0, 100.0]), np.array([1000.0, 20000.0, 100000.0])
+    counts = rng.poisson(1.8, (10, 400))
+    for policy in ("reject", "queue"):
+        arrived, served, max_backlog, _, exhaustion = _simulate_batch(
+            values, periods, _FixedArrivals(counts), policy, 10, 1000.0, 400, 0, cells=10 * 37)
+        expected = np.array(_request_by_request(values, periods, counts, policy))
+        assert np.array_equal(arrived, expected[:, 0])
+        assert np.array_equal(served, expected[:, 1])
+        assert np.array_equal(max_backlog, expected[:, 2])
+        assert np.array_equal(exhaustion, expected[:, 3])
+
+
+def test_simulation_is_reproducible_and_reports():
+    br = BoundedRate(Rate(10, "1s"), Quota(1500, "1h"))
+    demand = OnOffDemand(Rate(2, "1s"), mean_on="5min", mean_off="30min")
+    first = simulate_demand(br, demand, "6h", n_trials=40, seed=5, batch_size=40)
+    second = simulate_demand(br, demand, "6h", n_trials=40, seed=5, batch_size=40)
+    assert np.array_equal(first.served, second.served)
+    # More trials than one seed block: the grouping in batches does not change the draws
+    wide = simulate_demand(br, demand, "6h", n_trials=120, seed=5, batch_size=120)
+    narrow = simulate_demand(br, demand, "6h", n_trials=120, seed=5, batch_size=10)
+    assert np.array_equal(wide.arrivals, narrow.arrivals)
+    assert np.array_equal(wide.served, narrow.served)
+
+    summary = first.summary()
+    assert 0 < summary["rejection_probability"] <= 1
+    assert np.all(first.served <= first.arrivals)
+    assert np.all(first.served <= 1500 * 6)
+
+    calm = simulate_demand(br, PoissonDemand(Rate(1, "10s")), "1h", n_trials=20, seed=1, policy="queue")
+    assert calm.exhaustion_probability == 0.0
+    with pytest.raises(ValueError):
+        simulate_demand(br, demand, "1h", n_trials=0)
@@ -0,0 +1,43 @@
+import numpy as np
+
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.tenant_share import Tenant, TenantGroup, TenantShare
+
+
+def _plan():
+    # 20/s y 600/min: la cuota se agota a los 30 s de cada minuto
+    return BoundedRate(Rate(20, "1s"), Quota(600, "1min"))
+
+
+def test_weighted_shares_and_borrowing():
+    tenants = [Tenant("a", weight=3), Tenant("b"), TenantGroup("g", [Tenant("c"), Tenant("d")], weight=2)]
+    share = TenantShare(_plan(), tenants)
+
+    # Todos saturados: 3/6, 1/6 y el grupo 2/6, repartido a partes iguales dentro
+    result = share.simulate({name: np.zeros(2000) for name in "abcd"}, horizon="3min")
+    assert np.allclose(result.served, [900, 300, 300, 300], atol=2)
+
+    # Sin demanda de b, lo suyo se reparte entre los demás por sus pesos
+    result = share.simulate({name: np.zeros(2000) for name in "acd"}, horizon="3min")
+    assert result.served.sum() == 1800
+    assert np.allclose(result.served, [1080, 0, 360, 360], atol=2)
+    assert result.summary()["b"]["served"] == 0
+
+
+def test_minimums_are_reserved_and_ceilings_hold():
+    share = TenantShare(_plan(), [Tenant("a"), Tenant("c", minimum=0.25), Tenant("d", ceiling=0.1)])
+    rng = np.random.default_rng(0)
+    demand = {"a": np.zeros(3000), "c": np.full(200, 50_000.0), "d": np.sort(rng.uniform(0, 180_000, 1000))}
+    result = share.simulate(demand, horizon="3min")
+    sent = ~np.isnan(result.send_ms)
+    minute = (result.send_ms[sent] // 60_000).astype(np.int64)
+    tenant = result.tenant[sent]
+
+    # c llega a los 50 s y aún tiene sus 150 del primer minuto; el resto, al empezar el siguiente
+    assert np.count_nonzero((tenant == 1) & (minute == 0)) == 150
+    assert result.guaranteed[result.tenant == 1].sum() == 200
+    assert np.bincount(minute[tenant == 2]).max() <= 60
+    # Los límites del plan se cumplen con todos juntos
+    assert np.bincount(minute).max() <= 600
+    assert np.bincount((result.send_ms[sent] // 1000).astype(np.int64)).max() <= 20
+    assert np.all(result.delay_ms[sent] >= 0)
@@ -0,0 +1,98 @@
+from collections import deque
+
+import numpy as np
+
+from Pricing4API.ancillary.time_unit import TimeUnit
+from Pricing4API.basic.bounded_rate import BoundedRate, Quota, Rate
+from Pricing4API.basic.trace_replay import replay_trace
+
+
+def _request_by_request(t, values, periods, policy, max_queue=None):
+    # Reference: hierarchical windows (as in capacity_at) and a FIFO served at the start of each rate period
+    def windows(x):
+        keys, rest = [], x
+        for p in periods[::-1]:
+            keys.append(rest // p)
+            rest -= keys[-1] * p
+        keys = keys[::-1]
+        return [(level, (level,) + tuple(keys[level:])) for level in range(len(values))]
+
+    used, fifo, delays = {}, deque(), []
+    if policy == "reject":
+        for x in t:
+            keys = windows(x)
+            if all(used.get(k, 0) < values[level] for level, k in keys):
+                for _, k in keys:
+                    used[k] = used.get(k, 0) + 1
+                delays.append(0.0)
+        return np.array(delays)
+
+    capacity = np.inf if max_queue is None else max_queue
+    bins = t // periods[0]
+    i, b = 0, 0
+    while i < len(t) or fifo:
+        b = b if fifo else max(b, bins[i])
+        keys = windows(b * periods[0])
+        room = min(values[level] - used.get(k, 0) for level, k in keys)
+        for _, k in keys:
+            used[k] = used.get(k, 0)
+        while fifo and room > 0:
+            delays.append(b * periods[0] - fifo.popleft())
+            room -= 1
+            for _, k in keys:
+                used[k] += 1
+        while i < len(t) and bins[i] == b:
+            if room > 0:
+                delays.append(0.0)
+                room -= 1
+                for _, k in keys:
+                    used[k] += 1
+            elif len(fifo) < capacity:
+                fifo.append(t[i])
+            i += 1
+        b += 1
+    return np.array(delays)
+
+
+def test_replay_matches_request_by_request():
+    rng = np.random.default_rng(0)
+    nested = BoundedRate(Rate(3, "1s"), [Quota(20, "10s"), Quota(60, "1min")])
+    unaligned = BoundedRate(Rate(3, "1s"), [Quota(20, "7500ms")])
+    t = np.sort(rng.integers(0, 300_000, 900)).astype(np.float64)
+
+    for br, policies in ((nested, ("reject", "delay", "queue")), (unaligned, ("reject",))):
+        values, periods = br.limit_table
+        for policy in policies:
+            max_queue = 5 if policy == "queue" else None
+            expected = _request_by_request(t, values, periods, policy, max_queue)
+            for chunk_size in (7, 1000):
+                result = replay_trace(br, t, policy=policy, max_queue=max_queue, origin=0, chunk_size=chunk_size)
+                assert result.arrivals == len(t)
+                assert result.accepted == len(expected)
+                assert result.delayed == np.count_nonzero(expected)
+                assert np.isclose(result.mean_delay_ms, expected.mean())
+                assert result.max_delay_ms == expected.max()
+
+                curve = result.curve()
+                assert curve["arrived"][-1] == len(t)
+                assert np.all(curve["served"] <= curve["capacity"])
+
+
+def test_replay_streams_files(tmp_path):
+    br = BoundedRate(Rate(5, "1s"), Quota(1000, "1h"))
+    seconds = np.sort(np.random.default_rng(1).uniform(1.7e9, 1.7e9 + 7200, 20_000))
+
+    np.save(tmp_path / "trace.npy", seconds * 1000)
+    with open(tmp_path / "trace.csv", "w") as f:
+        f.write("timestamp\n" + "\n".join(map(repr, seconds.tolist())) + "\n")
+
+    from_npy = replay_trace(br, tmp_path / "trace.npy", chunk_size=4096)
+    from_csv = replay_trace(br, tmp_path / "trace.csv", chunk_size=4096, unit=TimeUnit.SECOND)
+    assert from_npy.summary() == from_csv.summary()
+    assert from_npy.origin_ms == seconds[0] * 1000
+    assert from_npy.accepted == 2000
+    assert from_npy.max_excess() > 0
+
+    delayed = replay_trace(br, tmp_path / "trace.npy", policy="delay")
+    assert delayed.accepted == len(seconds)
+    assert delayed.delay_percentiles((50,))[50] > 0